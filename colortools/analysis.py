@@ -1,28 +1,160 @@
-from typing import List, Tuple
+from enum import Enum
+from typing import List, Tuple, Union
 
 import numpy as np
+from PIL import Image
+from scipy.optimize import linear_sum_assignment
 from sklearn.cluster import KMeans
 
+import colortools.config as config
 
-def fit_and_predict(rgb_image_data: np.ndarray, n_clusters: int) -> Tuple[KMeans, np.ndarray]:
+GRAYSCALE_MODES = ("1", "L", "LA", "I", "I;16", "F")
+HUE_PEAK_SMOOTHING_BINS = 5  # width of the circular window used to smooth the hue histogram before finding peaks
+
+
+class KMeansInit(str, Enum):
+    """Enum for k-means initialization strategies."""
+
+    KMEANS_PLUS_PLUS = "kmeans++"
+    HUE_PEAKS = "hue_peaks"
+    PREVIOUS = "previous"
+
+
+def fit_and_predict(
+    rgb_image_data: np.ndarray, n_clusters: int, init_centers: np.ndarray = None
+) -> Tuple[KMeans, np.ndarray]:
     """Create a scikit-learn k-means model and fit to provided data.
 
-    Create the model, fit it to the provided RGB image data, and get predictions for the provided data.
+    Create the model, fit it to the provided RGB image data, and get predictions for the provided data. If initial
+    centers are provided, k-means runs once from those centers instead of from several k-means++ initializations.
 
     Args:
-        rgb_image_data (np.ndarray): An RGB image as an array.
+        rgb_image_data (np.ndarray): An RGB image as an array (of any shape whose last axis holds the channels),
+            typically uint8; it is clustered in float32.
         n_clusters (int): The number of clusters to find in the data.
+        init_centers (np.ndarray, optional): Initial cluster centers, as an array of shape (n_clusters, 3).
+            Defaults to None.
 
     Returns:
         Tuple[KMeans, np.ndarray]: The fitted model clusters and the predictions for the provided data.
     """
-    image_size = rgb_image_data.shape[0] * rgb_image_data.shape[1]
-    image_rgb_data = rgb_image_data.reshape((image_size, 3))
-    clusters = KMeans(n_clusters=n_clusters, random_state=0, n_init="auto")
+    # a single conversion (and copy) to float32, which scikit-learn clusters without upcasting to float64
+    image_rgb_data = np.ascontiguousarray(rgb_image_data, dtype=np.float32).reshape((-1, 3))
+    if init_centers is not None:
+        init_centers = np.asarray(init_centers, dtype=np.float32)
+        clusters = KMeans(n_clusters=n_clusters, init=init_centers, n_init=1, random_state=0)
+    else:
+        clusters = KMeans(n_clusters=n_clusters, random_state=0, n_init="auto")
     predicted = clusters.fit_predict(image_rgb_data)
     return clusters, predicted
 
 
+def get_hue_peak_centers(
+    rgb_image_data: np.ndarray, hsv_image_data: np.ndarray, hue_histogram: np.ndarray, n_clusters: int
+) -> Union[np.ndarray, None]:
+    """Get initial cluster centers from the peaks of an image's hue histogram.
+
+    The hue histogram is smoothed (circularly, since hue wraps around), and its highest peaks are chosen, at least a
+    smoothing window apart; if there are fewer peaks than clusters, the most frequent remaining hues are added. Each
+    center is the mean RGB color of the pixels near a chosen hue.
+
+    Args:
+        rgb_image_data (np.ndarray): The image, as an RGB array.
+        hsv_image_data (np.ndarray): The same image, as an HSV array.
+        hue_histogram (np.ndarray): The image's hue histogram (see `heuristics.compute_hue_histogram`).
+        n_clusters (int): The number of centers to return.
+
+    Returns:
+        Union[np.ndarray, None]: The initial centers, as an array of shape (n_clusters, 3), or None if the image has
+            fewer distinct hues than clusters.
+    """
+    n_bins = len(hue_histogram)
+    if np.count_nonzero(hue_histogram) < n_clusters:
+        return None
+
+    half_window = HUE_PEAK_SMOOTHING_BINS // 2
+    padded = np.pad(hue_histogram.astype(float), half_window, mode="wrap")
+    smoothed = np.convolve(padded, np.ones(HUE_PEAK_SMOOTHING_BINS), mode="valid")
+
+    def hue_distance(hue, other_hue):
+        return min(abs(hue - other_hue), n_bins - abs(hue - other_hue))
+
+    # choose the highest (smoothed) hues, skipping those within the smoothing window of an already chosen peak
+    candidates = sorted(
+        np.flatnonzero(hue_histogram), key=lambda hue: (smoothed[hue], hue_histogram[hue]), reverse=True
+    )
+    peaks = []
+    for hue in candidates:
+        if all(hue_distance(hue, peak) > half_window for peak in peaks):
+            peaks.append(hue)
+    peaks = peaks[:n_clusters]
+    peaks.extend([hue for hue in candidates if hue not in peaks][: n_clusters - len(peaks)])
+
+    hues = hsv_image_data[..., 0].reshape(-1).astype(int)
+    rgb_data = rgb_image_data.reshape((-1, 3))
+    centers = []
+    for peak in peaks:
+        distances = np.abs(hues - peak)
+        near_peak = np.minimum(distances, n_bins - distances) <= half_window
+        centers.append(rgb_data[near_peak].mean(axis=0))
+    return np.array(centers)
+
+
+def compare_cluster_centers(centers: np.ndarray, other_centers: np.ndarray, proportions: np.ndarray) -> float:
+    """Measure how far cluster centers moved between two fits of the same image (e.g. at two resolutions).
+
+    Centers are matched one-to-one so that the total distance is minimal; the result is the mean distance between
+    matched centers, weighted by the proportions of the first fit's clusters (so that tiny clusters matter little).
+
+    Args:
+        centers (np.ndarray): The first fit's centers, as an array of shape (n_clusters, 3).
+        other_centers (np.ndarray): The second fit's centers, as an array of shape (n_clusters, 3).
+        proportions (np.ndarray): The proportion of pixels in each of the first fit's clusters.
+
+    Returns:
+        float: The weighted mean distance (in RGB units) between matched centers.
+    """
+    distances = np.linalg.norm(centers[:, np.newaxis] - other_centers[np.newaxis], axis=-1)
+    rows, cols = linear_sum_assignment(distances)
+    return float(np.average(distances[rows, cols], weights=np.asarray(proportions)[rows]))
+
+
+def compare_hue_histograms(hue_histogram: np.ndarray, other_hue_histogram: np.ndarray) -> float:
+    """Measure the similarity of two hue histograms (the intersection of their normalized distributions).
+
+    Args:
+        hue_histogram (np.ndarray): A hue histogram.
+        other_hue_histogram (np.ndarray): Another hue histogram, with the same number of bins.
+
+    Returns:
+        float: The similarity, from 0 (no hues in common) to 1 (identical hue distributions).
+    """
+    total, other_total = hue_histogram.sum(), other_hue_histogram.sum()
+    if total == 0 or other_total == 0:
+        return 0.0
+    return float(np.minimum(hue_histogram / total, other_hue_histogram / other_total).sum())
+
+
+def predict_from_centers(rgb_data: np.ndarray, cluster_centers: np.ndarray) -> np.ndarray:
+    """Assign each pixel to its nearest cluster center.
+
+    Equivalent to `KMeans.predict` for a model with the provided cluster centers, without needing the model itself.
+
+    Args:
+        rgb_data (np.ndarray): RGB pixels, as an array of shape (n_pixels, 3).
+        cluster_centers (np.ndarray): Cluster centers, as an array of shape (n_clusters, 3).
+
+    Returns:
+        np.ndarray: The index of the nearest cluster center for each pixel.
+    """
+    rgb_data = np.asarray(rgb_data, dtype="float32")
+    cluster_centers = np.asarray(cluster_centers, dtype="float32")
+    # squared distances, expanded as |x|^2 - 2x.c + |c|^2 (|x|^2 is constant per pixel and can be dropped)
+    distances = rgb_data @ (-2 * cluster_centers.T)
+    distances += (cluster_centers**2).sum(axis=1)  # in place, to avoid temporaries the size of the image
+    return np.argmin(distances, axis=1)
+
+
 def build_histogram_from_clusters(cluster_model: KMeans) -> List[Tuple[np.ndarray, float]]:
     """Generate a distribution of predictions for provided k-means cluster model.
 
@@ -43,3 +175,75 @@ def build_histogram_from_clusters(cluster_model: KMeans) -> List[Tuple[np.ndarra
         (rgb_color, proportion)
         for rgb_color, proportion in sorted(color_and_proportion, key=lambda x: x[1], reverse=True)
     ]
+
+
+def is_grayscale(
+    pil_image: Image.Image,
+    thumbnail_size: int = config.DEFAULT_GRAYSCALE_THUMBNAIL_SIZE,
+    max_saturation: float = config.DEFAULT_GRAYSCALE_MAX_SATURATION,
+    tolerance: int = config.DEFAULT_GRAYSCALE_TOLERANCE,
+) -> bool:
+    """Cheaply determine whether an image is clearly grayscale, before analyzing it.
+
+    Images in a grayscale mode are grayscale by definition. Otherwise, the image is reduced to a small thumbnail
+    (which also averages away compression noise in the color channels), and is grayscale if every thumbnail pixel
+    is nearly unsaturated: its channels differ by at most `max_saturation` of its brightest channel (its HSV
+    saturation), or by at most `tolerance` for near-black pixels, whose saturation is dominated by noise. Because
+    the criterion is relative, dark but clearly colored pixels are not mistaken for gray ones.
+
+    Args:
+        pil_image (Image.Image): The image to check.
+        thumbnail_size (int, optional): The length of the thumbnail's long axis. Defaults to
+            config.DEFAULT_GRAYSCALE_THUMBNAIL_SIZE.
+        max_saturation (float, optional): The maximum saturation of a grayscale pixel, from 0 to 1. Defaults to
+            config.DEFAULT_GRAYSCALE_MAX_SATURATION.
+        tolerance (int, optional): The maximum difference between the channels of a grayscale pixel, whatever its
+            saturation. Defaults to config.DEFAULT_GRAYSCALE_TOLERANCE.
+
+    Returns:
+        bool: Whether the image is grayscale.
+    """
+    if pil_image.mode in GRAYSCALE_MODES:
+        return True
+
+    scale = thumbnail_size / max(pil_image.size)
+    if scale < 1:
+        size = (max(1, round(pil_image.size[0] * scale)), max(1, round(pil_image.size[1] * scale)))
+        pil_image = pil_image.resize(size, Image.Resampling.BOX)
+    thumbnail = np.asarray(pil_image.convert("RGB"), dtype=np.int16)
+    brightest = thumbnail.max(axis=2)
+    spread = brightest - thumbnail.min(axis=2)
+    return bool(np.all((spread <= tolerance) | (spread <= max_saturation * brightest)))
+
+
+def fit_values(value_histogram: np.ndarray, n_clusters: int, max_iter: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+    """Cluster the values of a grayscale image, given their histogram (one-dimensional k-means).
+
+    Clustering the histogram's bins (weighted by their counts) instead of the pixels keeps the cost independent of
+    the size of the image. The centers start at evenly spaced quantiles of the values.
+
+    Args:
+        value_histogram (np.ndarray): The number of pixels of each value (typically 256 bins).
+        n_clusters (int): The number of clusters to find.
+        max_iter (int, optional): The maximum number of iterations. Defaults to 100.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The cluster centers (values) and their proportions, sorted by proportion
+            (largest first).
+    """
+    values = np.arange(len(value_histogram), dtype=float)
+    weights = np.asarray(value_histogram, dtype=float)
+    cumulative = np.cumsum(weights) / weights.sum()
+    centers = values[np.searchsorted(cumulative, (np.arange(n_clusters) + 0.5) / n_clusters)]
+    for _ in range(max_iter):
+        labels = np.argmin(np.abs(values[:, np.newaxis] - centers), axis=1)
+        cluster_weights = np.bincount(labels, weights=weights, minlength=n_clusters)
+        sums = np.bincount(labels, weights=weights * values, minlength=n_clusters)
+        new_centers = np.where(cluster_weights > 0, sums / np.maximum(cluster_weights, 1e-12), centers)
+        if np.allclose(new_centers, centers):
+            break
+        centers = new_centers
+
+    proportions = cluster_weights / weights.sum()
+    order = np.argsort(-proportions, kind="stable")
+    return centers[order], proportions[order]
@@ -7,24 +7,87 @@
 #     https://github.com/baptiste0928/dominant-color/blob/main/src/lib.rs#L27
 
 import logging
+import time
+from io import BytesIO
 from pathlib import Path
-from typing import List, Tuple, Union
+from typing import BinaryIO, List, Tuple, Union
 
 import numpy as np
 from PIL import Image
 
+import colortools.config as config
 import colortools.util as util
-from colortools.analysis import build_histogram_from_clusters, fit_and_predict
-from colortools.heuristics import NColorsHeuristic, compute_hue_dist, get_n_heuristic
+from colortools.analysis import (
+    KMeansInit,
+    build_histogram_from_clusters,
+    compare_cluster_centers,
+    compare_hue_histograms,
+    fit_and_predict,
+    fit_values,
+    get_hue_peak_centers,
+    is_grayscale,
+    predict_from_centers,
+)
+from colortools.heuristics import NColorsHeuristic, compute_hue_dist, compute_hue_histogram, get_n_heuristic
+from colortools.sampling import SamplingStrategy, get_sampling_function, sample_pixels
+from colortools.results import AnalysisResult
 
 logging.basicConfig(format="%(levelname)s: %(message)s")
 
 
-class AnalyzedImage:
+def get_resized_size(width: int, height: int, resize_long_axis: int) -> Tuple[int, int]:
+    """Get the size an image is resized to for analysis.
+
+    Args:
+        width (int): The original width of the image.
+        height (int): The original height of the image.
+        resize_long_axis (int): The target length of the long axis, or None to keep the original size.
+
+    Returns:
+        Tuple[int, int]: The resized width and height.
+    """
+    if resize_long_axis is None or max(width, height) == resize_long_axis:
+        return width, height  # not resized, or already resized (e.g. from a cache)
+    if height > width:
+        return int((width / height) * resize_long_axis), resize_long_axis
+    else:
+        return resize_long_axis, int((height / width) * resize_long_axis)
+
+
+def load_resized_image(image_path: Union[Path, str], resize_long_axis: int) -> Image.Image:
+    """Decode an image file and resize it for analysis.
+
+    Args:
+        image_path (Union[Path, str]): The path to the image file.
+        resize_long_axis (int): The target length of the long axis, or None to keep the original size.
+
+    Returns:
+        Image.Image: The decoded, resized image.
+    """
+    with Image.open(image_path) as pil_image:
+        size = get_resized_size(pil_image.size[0], pil_image.size[1], resize_long_axis)
+        if pil_image.size == size:
+            pil_image.load()
+            return pil_image.copy()
+        return pil_image.resize(size)
+
+
+class AnalyzedImage(AnalysisResult):
     """
-    Internal representation of an analyzed image. Includes basic image metadata as well as analysis results.
+    Internal representation of an analyzed image. Includes basic image metadata as well as analysis results, along
+    with the resized image and the fitted model.
     """
 
+    _analysis_image = None
+    _analysis_hsv = None
+    _sample_indices = None
+    analysis_long_axis = None
+    center_shift = None
+    hue_histogram = None
+    is_grayscale = False
+    model = None
+    predicted = None
+
     def __init__(
         self,
         image_path: Union[Path, str],
@@ -33,6 +96,15 @@ class AnalyzedImage:
         dominant_color_algorithm: util.DominantColorAlgorithm,
         n_colors: int,
         auto_n_heuristic: NColorsHeuristic,
+        image: Union[Image.Image, bytes, memoryview, BinaryIO] = None,
+        kmeans_init: KMeansInit = KMeansInit.KMEANS_PLUS_PLUS,
+        previous_image: "AnalyzedImage" = None,
+        grayscale_check: bool = False,
+        adaptive_resolution: bool = False,
+        crop_on_decode: bool = False,
+        sampling_strategy: SamplingStrategy = SamplingStrategy.NONE,
+        n_samples: int = config.DEFAULT_N_SAMPLES,
+        image_hsv: np.ndarray = None,
     ):
         """Create an instance of this class.
 
@@ -45,27 +117,90 @@ class AnalyzedImage:
                 determining dominant colors.
             auto_n_heuristic (NHeuristic): The heuristic to use for automatically determining the number of
                 colors to find in this image. More useful when using KMEANS for determining dominant colors.
+            image (Union[Image.Image, bytes, memoryview, BinaryIO], optional): The image itself, as an already-opened
+                image, a buffer holding the file's bytes, or a file-like object; if None, the image is read from
+                `image_path`. Defaults to None.
+            kmeans_init (KMeansInit, optional): How to initialize the cluster centers when using KMEANS. Defaults
+                to KMeansInit.KMEANS_PLUS_PLUS.
+            previous_image (AnalyzedImage, optional): The previous image in a sequence, whose cluster centers are
+                used as initial centers with KMeansInit.PREVIOUS if its hue distribution is similar to this image's
+                (otherwise, the hue histogram's peaks are used). Defaults to None.
+            grayscale_check (bool, optional): Whether to check a thumbnail of the image for grayscale, and analyze
+                grayscale images by value only (clustering their value histogram, for `n_colors` colors or as many
+                as the heuristic finds). This skips the clustering of pixels, not the decoding of the image.
+                Defaults to False.
+            adaptive_resolution (bool, optional): Whether to cluster at coarse resolutions first when using KMEANS,
+                and only at the full (resized) resolution if the coarse fits disagree (see
+                `get_dominant_colors_kmeans`). Defaults to False.
+            crop_on_decode (bool, optional): Whether to decode and resample only the region that is analyzed (the
+                image without its cropped edges), for runs that do not need the resized image itself. JPEG files are
+                decoded at reduced scale where possible, so the analyzed pixels (and the results) differ slightly
+                from a full decode. The full frame is re-read from disk if `pil_image` is accessed. Defaults to
+                False.
+            sampling_strategy (SamplingStrategy, optional): How to sample the pixels that the heuristic and the
+                dominant color algorithm see (see `get_analysis_array`). Defaults to SamplingStrategy.NONE.
+            n_samples (int, optional): The number of pixels to sample. Defaults to config.DEFAULT_N_SAMPLES.
+            image_hsv (np.ndarray, optional): The analyzed region (the resized image without its cropped edges),
+                already converted to HSV, for analyses that share one conversion; if None, the region is converted
+                whenever HSV pixels are needed. Defaults to None.
         """
-        if isinstance(image_path, str):
-            image_path = Path(image_path)
-        self.image_path = image_path
-        self.dominant_color_algorithm = dominant_color_algorithm
-
         # set image, dimensions, and orientation
-        pil_image = Image.open(image_path)
+        if image is None:
+            pil_image = Image.open(image_path)
+        elif isinstance(image, Image.Image):
+            pil_image = image
+        elif isinstance(image, (bytes, bytearray, memoryview)):
+            pil_image = Image.open(BytesIO(image))
+        else:
+            pil_image = Image.open(image)
         original_width, original_height = pil_image.size
         if original_height > original_width:
-            self.orientation = util.ImageOrientation.VERTICAL
-            resized_height = resize_long_axis if resize_long_axis is not None else original_height
-            resized_width = int((original_width / original_height) * resized_height)
+            orientation = util.ImageOrientation.VERTICAL
         else:
-            self.orientation = util.ImageOrientation.HORIZONTAL
-            resized_width = resize_long_axis if resize_long_axis is not None else original_width
-            resized_height = int((original_height / original_width) * resized_width)
-
-        self.pil_image = pil_image.resize((resized_width, resized_height))
-        self.width, self.height = self.pil_image.size
+            orientation = util.ImageOrientation.HORIZONTAL
+        resized_width, resized_height = get_resized_size(original_width, original_height, resize_long_axis)
+
+        # the dominant colors (and n_colors, if it is determined by a heuristic) are set once the image is analyzed
+        super().__init__(
+            image_path,
+            resized_width,
+            resized_height,
+            orientation,
+            dominant_color_algorithm,
+            n_colors,
+            dominant_colors_rgb=None,
+            dominant_colors_hsv=None,
+            resize_long_axis=resize_long_axis,
+        )
         self.edge_crop = edge_crop
+        self.sampling_strategy = SamplingStrategy(sampling_strategy)
+        self.n_samples = n_samples
+        self._analysis_hsv = image_hsv
+
+        if crop_on_decode:
+            # let the JPEG decoder downscale (by DCT scaling) to no less than the resized size, then resample only the
+            # analyzed region; the full frame is only decoded again if it is needed
+            if image is None or not isinstance(image, Image.Image):
+                pil_image.draft("RGB", (resized_width, resized_height))
+            scale_x, scale_y = pil_image.size[0] / resized_width, pil_image.size[1] / resized_height
+            left, upper, right, lower = util.get_crop_box(resized_width, resized_height, edge_crop)
+            box = (left * scale_x, upper * scale_y, right * scale_x, lower * scale_y)
+            self._analysis_image = pil_image.resize((right - left, lower - upper), box=box)
+            if image is None:
+                pil_image.close()
+        elif pil_image.size == (resized_width, resized_height):
+            pil_image.load()  # decode now (and release the file) rather than on first access
+            self.pil_image = pil_image
+        else:
+            self.pil_image = pil_image.resize((resized_width, resized_height))
+
+        analysis_image = self.get_cropped_image()
+        self.is_grayscale = grayscale_check and is_grayscale(analysis_image)
+        if analysis_image.mode != "RGB":
+            if self._analysis_image is not None:
+                self._analysis_image = self._analysis_image.convert("RGB")
+            else:
+                self.pil_image = self.pil_image.convert("RGB")
 
         # set n, if not provided
         if n_colors is None or n_colors == 0:
@@ -75,11 +210,15 @@ class AnalyzedImage:
                 self.n_colors = 1
             else:
                 auto_n_heuristic_func = get_n_heuristic(auto_n_heuristic)
-                self.n_colors = auto_n_heuristic_func(self.get_as_array(hsv=True, crop_center=True))
+                self.n_colors = auto_n_heuristic_func(
+                    self.get_analysis_array(hsv=True), hue_histogram=self.get_hue_histogram()
+                )
         else:
             self.n_colors = n_colors
 
-        if self.dominant_color_algorithm == util.DominantColorAlgorithm.HUE_DIST:
+        if self.is_grayscale:
+            self.dominant_colors_rgb, self.dominant_colors_hsv = self.get_dominant_colors_value(self.n_colors)
+        elif self.dominant_color_algorithm == util.DominantColorAlgorithm.HUE_DIST:
             if self.n_colors > 1:
                 logging.warning(
                     f"Using {self.dominant_color_algorithm.value} with n_colors={self.n_colors}; "
@@ -87,10 +226,32 @@ class AnalyzedImage:
                 )
             self.dominant_colors_rgb, self.dominant_colors_hsv = self.get_dominant_colors_hue_dist(self.n_colors)
         elif self.dominant_color_algorithm == util.DominantColorAlgorithm.KMEANS:
-            self.dominant_colors_rgb, self.dominant_colors_hsv = self.get_dominant_colors_kmeans(self.n_colors)
+            self.dominant_colors_rgb, self.dominant_colors_hsv = self.get_dominant_colors_kmeans(
+                self.n_colors, kmeans_init, previous_image, adaptive_resolution
+            )
         else:
             raise ValueError(f"Unrecognized dominant color algorithm: {self.dominant_color_algorithm}")
 
+    def get_dominant_colors_value(self, n_colors: int) -> Tuple[List, List]:
+        """Get dominant colors of a grayscale image, by clustering its histogram of values.
+
+        With the KMEANS algorithm, the cluster histogram is set as well (without a fitted model).
+
+        Args:
+            n_colors (int): The number of dominant colors to compute.
+
+        Returns:
+            Tuple[List, List]: The dominant colors (RGB values, HSV values).
+        """
+        values = np.asarray(self.get_cropped_image().convert("L"))
+        centers, proportions = fit_values(np.bincount(values.ravel(), minlength=256), n_colors)
+        dominant_colors_rgb = [[float(value)] * 3 for value in centers]
+        if self.dominant_color_algorithm == util.DominantColorAlgorithm.KMEANS:
+            self.cluster_histogram = [
+                (np.array(rgb), proportion) for rgb, proportion in zip(dominant_colors_rgb, proportions)
+            ]
+        return dominant_colors_rgb, util.rgb_to_hsv(dominant_colors_rgb)
+
     def get_dominant_colors_hue_dist(self, n_colors: int) -> Tuple[List, List]:
         """Get dominant colors using the HUE_DIST algorithm.
 
@@ -100,7 +261,7 @@ class AnalyzedImage:
         Returns:
             Tuple[List, List]: The dominant colors (RGB values, HSV values).
         """
-        hue_dist = compute_hue_dist(self.get_as_array(hsv=True, crop_center=True))
+        hue_dist = compute_hue_dist(self.get_analysis_array(hsv=True))
         hue_dist = [
             (hue, hsv_list) for hue, hsv_list in sorted(hue_dist.items(), key=lambda item: len(item[1]), reverse=True)
         ]
@@ -123,85 +284,172 @@ class AnalyzedImage:
         dominant_colors_rgb = util.hsv_to_rgb(dominant_colors_hsv)
         return dominant_colors_rgb, dominant_colors_hsv
 
-    def get_dominant_colors_kmeans(self, n_colors: int) -> Tuple[List, List]:
+    def get_dominant_colors_kmeans(
+        self,
+        n_colors: int,
+        kmeans_init: KMeansInit = KMeansInit.KMEANS_PLUS_PLUS,
+        previous_image: "AnalyzedImage" = None,
+        adaptive_resolution: bool = False,
+    ) -> Tuple[List, List]:
         """Get dominant colors using the KMEANS algorithm.
 
+        The initialization strategy that was actually used (after any fallback), the number of k-means iterations
+        (over all fits) and the time spent fitting are recorded in `kmeans_init`, `n_iter` and `fit_seconds`.
+
+        With adaptive resolution, the image is clustered at each of config.DEFAULT_ADAPTIVE_RESOLUTIONS (coarsest
+        first, each fit starting from the previous fit's centers). If the centers of the last two fits moved less
+        than config.DEFAULT_ADAPTIVE_TOLERANCE (see `compare_cluster_centers`), the last coarse fit is kept;
+        otherwise, the image is clustered at full resolution, starting from the coarse centers. The resolution
+        (long axis) of the kept fit and the last center shift are recorded in `analysis_long_axis` and
+        `center_shift`. Either way, `predicted` holds the labels of the analyzed pixels (at full resolution), which
+        are predicted from the kept centers if a coarse fit is kept.
+
         Args:
             n_colors (int): The number of dominant colors to compute.
+            kmeans_init (KMeansInit, optional): How to initialize the cluster centers. Defaults to
+                KMeansInit.KMEANS_PLUS_PLUS.
+            previous_image (AnalyzedImage, optional): The previous image in a sequence, for KMeansInit.PREVIOUS.
+                Defaults to None.
+            adaptive_resolution (bool, optional): Whether to cluster at coarse resolutions first. Defaults to False.
 
         Returns:
             Tuple[List, List]: The dominant colors (RGB values, HSV values).
         """
-        self.model, self.predicted = fit_and_predict(self.get_as_array(crop_center=True), n_colors)
+        start = time.perf_counter()
+        rgb_image_data = self.get_analysis_array()
+        init_centers = None
+        self.kmeans_init = KMeansInit.KMEANS_PLUS_PLUS
+        if kmeans_init == KMeansInit.PREVIOUS and self.is_similar_to(previous_image):
+            init_centers = np.array([rgb for rgb, _ in previous_image.cluster_histogram])
+            self.kmeans_init = KMeansInit.PREVIOUS
+        elif kmeans_init in (KMeansInit.HUE_PEAKS, KMeansInit.PREVIOUS):
+            hsv_image_data = self.get_analysis_array(hsv=True)
+            init_centers = get_hue_peak_centers(rgb_image_data, hsv_image_data, self.get_hue_histogram(), n_colors)
+            if init_centers is not None:
+                self.kmeans_init = KMeansInit.HUE_PEAKS
+        elif kmeans_init != KMeansInit.KMEANS_PLUS_PLUS:
+            raise ValueError(f"Unrecognized k-means initialization: {kmeans_init}")
+
+        self.analysis_long_axis = max(self.width, self.height)
+        self.n_iter = 0
+        model = None
+        if adaptive_resolution and max(config.DEFAULT_ADAPTIVE_RESOLUTIONS) < self.analysis_long_axis:
+            coarse_model = None
+            for long_axis in sorted(config.DEFAULT_ADAPTIVE_RESOLUTIONS):
+                model, _ = fit_and_predict(
+                    self.get_as_array(crop_center=True, long_axis=long_axis), n_colors, init_centers
+                )
+                self.n_iter += int(model.n_iter_)
+                if coarse_model is not None:
+                    proportions = np.bincount(coarse_model.labels_, minlength=n_colors) / len(coarse_model.labels_)
+                    self.center_shift = compare_cluster_centers(
+                        coarse_model.cluster_centers_, model.cluster_centers_, proportions
+                    )
+                coarse_model = model
+                init_centers = model.cluster_centers_
+            if self.center_shift is not None and self.center_shift <= config.DEFAULT_ADAPTIVE_TOLERANCE:
+                self.analysis_long_axis = long_axis
+            else:
+                model = None  # the coarse fits disagree; refine at full resolution
+
+        if model is None:
+            model, predicted = fit_and_predict(rgb_image_data, n_colors, init_centers)
+            self.n_iter += int(model.n_iter_)
+        else:
+            # the coarse model's labels are for the coarse image; label the analyzed pixels instead
+            predicted = predict_from_centers(rgb_image_data.reshape((-1, 3)), model.cluster_centers_)
+        self.model, self.predicted = model, predicted
+        self.fit_seconds = time.perf_counter() - start
         self.cluster_histogram = build_histogram_from_clusters(self.model)
         dominant_colors_rgb = [rgb.tolist() for rgb, _ in self.cluster_histogram]
         dominant_colors_hsv = util.rgb_to_hsv(dominant_colors_rgb)
         return dominant_colors_rgb, dominant_colors_hsv
 
-    def get_as_array(self, hsv=False, crop_center=False) -> np.ndarray:
-        """Get this image as a NumPy array.
-
-        Args:
-            hsv (bool, optional): Whether to convert pixels to HSV space before returning. Defaults to False.
+    def get_hue_histogram(self) -> np.ndarray:
+        """Get the hue histogram of the analyzed pixels, computing it on first use.
 
         Returns:
-            np.ndarray: This image as a NumPy array.
+            np.ndarray: The number of pixels of each hue.
         """
-        if hsv:
-            as_array = np.asarray(self.pil_image.convert("HSV"))
-        else:
-            as_array = np.asarray(self.pil_image)
-
-        if crop_center:
-            return util.crop_center(as_array, self.edge_crop)
-        else:
-            return as_array
+        if self.hue_histogram is None:
+            self.hue_histogram = compute_hue_histogram(self.get_analysis_array(hsv=True))
+        return self.hue_histogram
 
-    def get_dominant_colors(self, hsv=False, round=False) -> List[List]:
-        """Get the dominant colors that were computed for this image.
+    def is_similar_to(self, other: "AnalyzedImage") -> bool:
+        """Determine whether another analyzed image can warm-start this image's k-means fit.
 
         Args:
-            hsv (bool, optional): Whether to convert colors to HSV space before returning. Defaults to False.
+            other (AnalyzedImage): The other image (may be None).
 
         Returns:
-            List[List]: A list of the dominant colors for this image.
+            bool: Whether the other image has the same number of k-means clusters and a similar hue distribution.
         """
-        dom_colors = self.dominant_colors_hsv if hsv else self.dominant_colors_rgb
-        dom_colors = util.round_array(dom_colors) if round else dom_colors
-        if hsv:
-            for dc in dom_colors:
-                dc[0] = dc[0] % 360  # hue space fix
-        return dom_colors
-
-    def get_dominant_color(self, hsv=False, round=False) -> List:
-        """Get the single most dominant color for this image.
+        if other is None or other.cluster_histogram is None or other.n_colors != self.n_colors:
+            return False
+        other_hue_histogram = getattr(other, "hue_histogram", None)
+        if other_hue_histogram is None:
+            return False
+        similarity = compare_hue_histograms(self.get_hue_histogram(), other_hue_histogram)
+        return similarity >= config.DEFAULT_WARM_START_SIMILARITY
+
+    def get_as_array(self, hsv=False, crop_center=False, long_axis: int = None) -> np.ndarray:
+        """Get this image as a NumPy array.
 
         Args:
-            hsv (bool, optional): Whether to convert the color to HSV space before returning. Defaults to False.
+            hsv (bool, optional): Whether to convert pixels to HSV space before returning. Defaults to False.
+            crop_center (bool, optional): Whether to crop the edges (by `edge_crop`). Defaults to False.
+            long_axis (int, optional): If smaller than the image's long axis, the length to downsample the image's
+                long axis to (the cropped image is downsampled by the same factor). Defaults to None.
 
         Returns:
-            List: _description_
+            np.ndarray: This image as a NumPy array.
         """
-        return self.get_dominant_colors(hsv, round)[0]
+        downsample = long_axis is not None and long_axis < max(self.width, self.height)
+        if hsv and crop_center and not downsample and self._analysis_hsv is not None:
+            return self._analysis_hsv
+        pil_image = self.get_cropped_image() if crop_center else self.pil_image
+        if downsample:
+            scale = long_axis / max(self.width, self.height)
+            size = (max(1, round(pil_image.size[0] * scale)), max(1, round(pil_image.size[1] * scale)))
+            pil_image = pil_image.resize(size, Image.Resampling.BOX)
+        if hsv:
+            return np.asarray(pil_image.convert("HSV"))
+        else:
+            return np.asarray(pil_image)
 
-    def get_orientation(self) -> util.ImageOrientation:
-        """Get the orientation of this image.
+    def get_analysis_array(self, hsv=False) -> np.ndarray:
+        """Get the pixels that are analyzed: the cropped image, or a sample of its pixels.
 
-        Returns:
-            util.ImageOrientation: This image's orientation.
-        """
-        return self.orientation
+        If a sampling strategy is set, the same pixels are sampled for RGB and HSV arrays.
 
-    def is_bw(self) -> bool:
-        """Determine whether this image is black and white.
+        Args:
+            hsv (bool, optional): Whether to convert pixels to HSV space before returning. Defaults to False.
 
-        Determines whether the represented image is black and white by checking to see if the saturation of
-        the most dominant color is equal to 0.
+        Returns:
+            np.ndarray: The cropped image, of shape (height, width, 3), or the sampled pixels, of shape
+                (n_samples, 1, 3).
+        """
+        image_data = self.get_as_array(hsv=hsv, crop_center=True)
+        if self.sampling_strategy == SamplingStrategy.NONE:
+            return image_data
+        if self._sample_indices is None:
+            sampling_func = get_sampling_function(self.sampling_strategy)
+            self._sample_indices = sampling_func(
+                image_data.shape[0], image_data.shape[1], self.n_samples, config.DEFAULT_SAMPLING_SEED
+            )
+        return sample_pixels(image_data, self._sample_indices)
+
+    def get_cropped_image(self) -> Image.Image:
+        """Get the region of this image that is analyzed (the image without its cropped edges).
 
         Returns:
-            bool: Whether this image is black and white or not.
+            Image.Image: The analyzed region.
         """
-        return self.get_dominant_color(hsv=True)[1] < 1
+        if self._analysis_image is not None:
+            return self._analysis_image
+        if not self.edge_crop:
+            return self.pil_image
+        return self.pil_image.crop(util.get_crop_box(self.width, self.height, self.edge_crop))
 
     def get_remapped_image(self, other: "AnalyzedImage" = None) -> Union[Image.Image, None]:
         """Use the model created for this image to predict mapped colors for another image (or this image itself).
@@ -221,63 +469,12 @@ class AnalyzedImage:
             Union[Image.Image, None]: An image mapped to the colors represented by this analyzed image's associated
                 model, if present, else None.
         """
-        if self.dominant_color_algorithm == util.DominantColorAlgorithm.KMEANS:
-            target_colors = self.model.cluster_centers_
-            if other is None:
-                height, width = self.height, self.width
-                other_rgb_data = self.get_as_array().reshape((height * width, 3))
-            else:
-                height, width = other.height, other.width
-                other_rgb_data = other.get_as_array().reshape((height * width, 3))
-
-            other_predicted = self.model.predict(other_rgb_data)
-            remapped_image = np.array([target_colors[i] for i in other_predicted])
-            return Image.fromarray(np.uint8(remapped_image.reshape((height, width, 3))))
+        if self.dominant_color_algorithm == util.DominantColorAlgorithm.KMEANS and self.model is None:
+            return super().get_remapped_image(other)  # analyzed by value only
+        elif self.dominant_color_algorithm == util.DominantColorAlgorithm.KMEANS:
+            target_colors = np.uint8(self.model.cluster_centers_)
+            target = self if other is None else other
+            other_predicted = predict_from_centers(target.get_as_array().reshape((-1, 3)), self.model.cluster_centers_)
+            return Image.fromarray(target_colors[other_predicted].reshape((target.height, target.width, 3)))
         else:
             raise ValueError(f"Cannot remap images using the {self.dominant_color_algorithm.value} algorithm")
-
-    def generate_filename(self, index: int, base: str) -> str:
-        """Generate a filename using this analyzed image.
-
-        Args:
-            index (int): An index to use as a prefix for the generated filename.
-            base (str): A base string to use in the generated filename.
-
-        Returns:
-            str: The generated filename.
-        """
-        if index is not None:
-            filename = f"{str(index)}_"
-        else:
-            filename = ""
-
-        dom_color_hsv = util.round_array(self.get_dominant_color(hsv=True))
-        dom_hue, dom_sat, dom_val = dom_color_hsv[0], dom_color_hsv[1], dom_color_hsv[2]
-        filename += f"{base}_hue={dom_hue}_sat={dom_sat}_val={dom_val}_n={self.n_colors}.jpg"
-        return filename
-
-    def get_pretty_string(self) -> str:
-        """Get a pretty string representation of this image and its dominant colors.
-
-        Returns:
-            str: A pretty string representation of this analyzed image.
-        """
-        out = f"{self.image_path.name}: n={self.n_colors}, algorithm={self.dominant_color_algorithm.value} \n"
-        out += f"    rgb={util.round_array(self.dominant_colors_rgb)}\n"
-        out += f"    hsv={util.round_array(self.dominant_colors_hsv)}"
-        return out
-
-    def get_huesort_metric(self) -> int:
-        """Get a value to use for sorting.
-
-        Currently, this method returns the dominant color's hue, shifted by -90 degrees so that colors in the
-        red region of the spectrum come before colors in the blue region of the spectrum. (If not shifted, some
-        reds may appear at the beginning of the sort order, while some reds might appear at the end of the sort
-        order.)
-
-        Returns:
-            int: A value to use when sorting this image.
-        """
-        dom_hue = self.get_dominant_color(hsv=True)[0]
-        dom_hue = (dom_hue + 90) % 360
-        return dom_hue
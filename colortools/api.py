@@ -0,0 +1,475 @@
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from enum import Enum
+from functools import partial
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Callable, Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+import colortools.config as config
+import colortools.util as util
+from colortools.analysis import KMeansInit
+from colortools.analyzed_image import AnalyzedImage
+from colortools.cache import PixelCache
+from colortools.dedup import fan_out, get_duplicate_map, group_duplicates
+from colortools.heuristics import NColorsHeuristic
+from colortools.prefetch import PrefetchReader
+from colortools.results import AnalysisResult
+from colortools.sampling import SamplingStrategy
+from colortools.transport import RESULT_DTYPE, SharedPixelRing, pack_result, unpack_result, write_to_ring
+
+_worker_ring = None  # pixel ring attached by each worker process
+_worker_pixel_cache = None  # pixel cache opened (read-only) by each worker process
+
+
+class ExecutorType(str, Enum):
+    """Enum for the executors used to analyze batches of images."""
+
+    SERIAL = "serial"
+    THREADS = "threads"
+    PROCESSES = "processes"
+
+
+async def analyze_stream(
+    image_paths: Iterable[Union[Path, str]],
+    resize_long_axis: int = config.DEFAULT_RESIZE_LONG_AXIS,
+    edge_crop: float = config.DEFAULT_EDGE_CROP,
+    dominant_color_algorithm: util.DominantColorAlgorithm = config.DEFAULT_DOMINANT_COLOR_ALGORITHM,
+    n_colors: int = config.DEFAULT_N_COLORS,
+    auto_n_heuristic: NColorsHeuristic = config.DEFAULT_N_COLORS_HEURISTIC,
+    kmeans_init: KMeansInit = config.DEFAULT_KMEANS_INIT,
+    grayscale_check: bool = False,
+    adaptive_resolution: bool = False,
+    sampling_strategy: SamplingStrategy = config.DEFAULT_SAMPLING_STRATEGY,
+    n_samples: int = config.DEFAULT_N_SAMPLES,
+    max_concurrency: int = config.DEFAULT_ASYNC_CONCURRENCY,
+    ordered: bool = False,
+    executor: Executor = None,
+) -> AsyncIterator[AnalyzedImage]:
+    """Analyze a sequence of images without blocking the running event loop.
+
+    Decoding and clustering run in an executor, with at most `max_concurrency` images in flight at a time. Results
+    are yielded as soon as they are available (or in input order, if `ordered` is set). Closing or cancelling the
+    iteration cancels all images that have not started yet; images that are already being analyzed are discarded.
+
+    Example:
+        async for analyzed_image in analyze_stream(paths):
+            print(analyzed_image.get_pretty_string())
+
+    Args:
+        image_paths (Iterable[Union[Path, str]]): The paths to the JPG images on disk.
+        resize_long_axis (int, optional): The target length of the long axis after resizing. Defaults to
+            config.DEFAULT_RESIZE_LONG_AXIS.
+        edge_crop (float, optional): The percentage of each edge to crop before analysis. Defaults to
+            config.DEFAULT_EDGE_CROP.
+        dominant_color_algorithm (util.DominantColorAlgorithm, optional): The algorithm to use for determining the
+            dominant colors. Defaults to config.DEFAULT_DOMINANT_COLOR_ALGORITHM.
+        n_colors (int, optional): The number of dominant colors to find. Defaults to config.DEFAULT_N_COLORS.
+        auto_n_heuristic (NColorsHeuristic, optional): The heuristic to use for automatically determining the number
+            of colors to find. Defaults to config.DEFAULT_N_COLORS_HEURISTIC.
+        kmeans_init (KMeansInit, optional): How to initialize k-means cluster centers. Images are analyzed
+            concurrently, so KMeansInit.PREVIOUS falls back to KMeansInit.HUE_PEAKS. Defaults to
+            config.DEFAULT_KMEANS_INIT.
+        grayscale_check (bool, optional): Whether to analyze clearly grayscale images by value only. Defaults to
+            False.
+        adaptive_resolution (bool, optional): Whether to cluster at coarse resolutions first, and at full
+            resolution only if the coarse fits disagree. Defaults to False.
+        sampling_strategy (SamplingStrategy, optional): How to sample the pixels that are analyzed. Defaults to
+            config.DEFAULT_SAMPLING_STRATEGY.
+        n_samples (int, optional): The number of pixels to sample. Defaults to config.DEFAULT_N_SAMPLES.
+        max_concurrency (int, optional): The maximum number of images analyzed at once. Defaults to
+            config.DEFAULT_ASYNC_CONCURRENCY.
+        ordered (bool, optional): Whether to yield results in input order rather than in order of completion.
+            Defaults to False.
+        executor (Executor, optional): The executor in which to analyze images; if None, a thread pool with
+            `max_concurrency` workers is created (and shut down) by this function. Defaults to None.
+
+    Yields:
+        AsyncIterator[AnalyzedImage]: The analyzed images.
+    """
+    analyze = partial(
+        _analyze_path,
+        resize_long_axis=resize_long_axis,
+        edge_crop=edge_crop,
+        dominant_color_algorithm=util.DominantColorAlgorithm(dominant_color_algorithm),
+        n_colors=n_colors,
+        auto_n_heuristic=NColorsHeuristic(auto_n_heuristic) if auto_n_heuristic is not None else None,
+        kmeans_init=KMeansInit(kmeans_init),
+        grayscale_check=grayscale_check,
+        adaptive_resolution=adaptive_resolution,
+        sampling_strategy=SamplingStrategy(sampling_strategy),
+        n_samples=n_samples,
+    )
+    max_concurrency = max(1, max_concurrency)
+    owns_executor = executor is None
+    if owns_executor:
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    loop = asyncio.get_running_loop()
+    paths = iter(image_paths)
+    pending = deque()
+    try:
+        while True:
+            for image_path in paths:
+                pending.append(loop.run_in_executor(executor, analyze, image_path))
+                if len(pending) >= max_concurrency:
+                    break
+
+            if not pending:
+                break
+
+            if ordered:
+                yield await pending.popleft()
+            else:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # yield every successful result of the batch before raising the first error, if any
+                error = None
+                for future in [future for future in pending if future in done]:
+                    pending.remove(future)
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                        continue
+                    yield future.result()
+                if error is not None:
+                    raise error
+    finally:
+        for future in pending:
+            future.cancel()
+        if owns_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def analyze_many(
+    image_paths: Iterable[Union[Path, str]],
+    resize_long_axis: int = config.DEFAULT_RESIZE_LONG_AXIS,
+    edge_crop: float = config.DEFAULT_EDGE_CROP,
+    dominant_color_algorithm: util.DominantColorAlgorithm = config.DEFAULT_DOMINANT_COLOR_ALGORITHM,
+    n_colors: int = config.DEFAULT_N_COLORS,
+    auto_n_heuristic: NColorsHeuristic = config.DEFAULT_N_COLORS_HEURISTIC,
+    kmeans_init: KMeansInit = config.DEFAULT_KMEANS_INIT,
+    grayscale_check: bool = False,
+    adaptive_resolution: bool = False,
+    sampling_strategy: SamplingStrategy = config.DEFAULT_SAMPLING_STRATEGY,
+    n_samples: int = config.DEFAULT_N_SAMPLES,
+    executor: ExecutorType = config.DEFAULT_EXECUTOR,
+    n_workers: int = None,
+    chunk_size: int = config.DEFAULT_CHUNK_SIZE,
+    keep_images: bool = False,
+    crop_on_decode: bool = False,
+    prefetch: int = config.DEFAULT_PREFETCH_LOOKAHEAD,
+    prefetch_memory_cap: int = config.DEFAULT_PREFETCH_MEMORY_CAP,
+    pixel_cache: Union[PixelCache, Path, str] = None,
+    progress_callback: Callable[[int, int], None] = None,
+    metrics_callback: Callable[[Dict], None] = None,
+    result_callback: Callable[[AnalysisResult], None] = None,
+    deduplicate: bool = False,
+) -> List[AnalysisResult]:
+    """Analyze a batch of images, returning compact results in input order.
+
+    Images are analyzed in chunks of `chunk_size`, either in this thread (SERIAL, reading files ahead with a
+    `PrefetchReader`), in a thread pool (THREADS) or in a process pool (PROCESSES). Worker processes return
+    fixed-size result records rather than pickled objects; if `keep_images` is set, they also pass each resized
+    image and its label map back through a `SharedPixelRing` in shared memory.
+
+    Args:
+        image_paths (Iterable[Union[Path, str]]): The paths to the JPG images on disk.
+        resize_long_axis (int, optional): The target length of the long axis after resizing. Defaults to
+            config.DEFAULT_RESIZE_LONG_AXIS.
+        edge_crop (float, optional): The percentage of each edge to crop before analysis. Defaults to
+            config.DEFAULT_EDGE_CROP.
+        dominant_color_algorithm (util.DominantColorAlgorithm, optional): The algorithm to use for determining the
+            dominant colors. Defaults to config.DEFAULT_DOMINANT_COLOR_ALGORITHM.
+        n_colors (int, optional): The number of dominant colors to find. Defaults to config.DEFAULT_N_COLORS.
+        auto_n_heuristic (NColorsHeuristic, optional): The heuristic to use for automatically determining the number
+            of colors to find. Defaults to config.DEFAULT_N_COLORS_HEURISTIC.
+        kmeans_init (KMeansInit, optional): How to initialize k-means cluster centers. With KMeansInit.PREVIOUS,
+            each image is warm-started from the previous image in its chunk (all images, with the serial executor).
+            Defaults to config.DEFAULT_KMEANS_INIT.
+        grayscale_check (bool, optional): Whether to analyze clearly grayscale images by value only. Defaults to
+            False.
+        adaptive_resolution (bool, optional): Whether to cluster at coarse resolutions first, and at full
+            resolution only if the coarse fits disagree. Defaults to False.
+        sampling_strategy (SamplingStrategy, optional): How to sample the pixels that are analyzed. Defaults to
+            config.DEFAULT_SAMPLING_STRATEGY.
+        n_samples (int, optional): The number of pixels to sample. Defaults to config.DEFAULT_N_SAMPLES.
+        executor (ExecutorType, optional): The executor used to analyze images. Defaults to config.DEFAULT_EXECUTOR.
+        n_workers (int, optional): The number of worker threads or processes; if None, uses the executor's
+            default. Defaults to None.
+        chunk_size (int, optional): The number of images handed to a worker at a time. Defaults to
+            config.DEFAULT_CHUNK_SIZE.
+        keep_images (bool, optional): Whether results should keep the resized images in memory (for graphics that
+            need pixels); otherwise, results re-read their images from disk on demand. Defaults to False.
+        crop_on_decode (bool, optional): Whether to decode only the region that is analyzed, at reduced scale where
+            possible (see `AnalyzedImage`'s `crop_on_decode`). Faster, but results differ slightly from a full
+            decode; they do not depend on `keep_images`. Cannot be combined with `pixel_cache`. Defaults to False.
+        prefetch (int, optional): The number of files to read ahead when using the SERIAL executor (0 to disable).
+            Defaults to config.DEFAULT_PREFETCH_LOOKAHEAD.
+        prefetch_memory_cap (int, optional): The maximum number of bytes held by files that have been read ahead.
+            Defaults to config.DEFAULT_PREFETCH_MEMORY_CAP.
+        pixel_cache (Union[PixelCache, Path, str], optional): A pixel cache (or the directory of one) holding
+            decoded, resized images. Cached images are not decoded again; images that are not cached are added to
+            the cache, except by the PROCESSES executor, which only reads from it. Defaults to None.
+        progress_callback (Callable[[int, int], None], optional): Called with the number of images analyzed so far
+            and the total number of images whenever progress is made. Defaults to None.
+        metrics_callback (Callable[[Dict], None], optional): Called with a dictionary of throughput metrics
+            (`n_done`, `n_total`, `elapsed_seconds`, `images_per_second`) after each chunk. Defaults to None.
+        result_callback (Callable[[AnalysisResult], None], optional): Called with each result as soon as it is
+            available, in order of completion: after each image with the SERIAL executor, and after each chunk
+            otherwise. Defaults to None.
+        deduplicate (bool, optional): Whether to analyze files with identical contents only once (see
+            `dedup.group_duplicates`), copying the result to each duplicate. Callbacks and the returned results
+            still cover every path. Defaults to False.
+
+    Raises:
+        ValueError: If an unrecognized executor is provided, or if `crop_on_decode` is combined with `pixel_cache`.
+
+    Returns:
+        List[AnalysisResult]: The analysis results, in the same order as `image_paths`.
+    """
+    if crop_on_decode and pixel_cache is not None:
+        raise ValueError("crop_on_decode cannot be combined with a pixel cache, which holds fully decoded images")
+    image_paths = list(image_paths)
+    all_paths = image_paths
+    duplicates = {}
+    if deduplicate:
+        groups = group_duplicates(image_paths)
+        duplicates = get_duplicate_map(groups)
+        image_paths = [group[0] for group in groups]
+    executor = ExecutorType(executor)
+    analysis_kwargs = dict(
+        resize_long_axis=resize_long_axis,
+        edge_crop=edge_crop,
+        dominant_color_algorithm=util.DominantColorAlgorithm(dominant_color_algorithm),
+        n_colors=n_colors,
+        auto_n_heuristic=NColorsHeuristic(auto_n_heuristic) if auto_n_heuristic is not None else None,
+        kmeans_init=KMeansInit(kmeans_init),
+        grayscale_check=grayscale_check,
+        adaptive_resolution=adaptive_resolution,
+        sampling_strategy=SamplingStrategy(sampling_strategy),
+        n_samples=n_samples,
+        crop_on_decode=crop_on_decode,
+    )
+    chunk_size = max(1, chunk_size)
+    chunks = [image_paths[i : i + chunk_size] for i in range(0, len(image_paths), chunk_size)]
+    n_total = len(all_paths)
+    n_done = 0
+    start_time = time.perf_counter()
+    fanned_out = {}
+
+    def report(chunk_done: bool, results: List[AnalysisResult]):
+        nonlocal n_done
+        for result in results:
+            copies = fan_out(result, duplicates.get(result.image_path, []))
+            fanned_out.update((duplicate.image_path, duplicate) for duplicate in copies)
+            n_done += 1 + len(copies)
+            if result_callback is not None:
+                for reported in [result, *copies]:
+                    result_callback(reported)
+        if progress_callback is not None:
+            progress_callback(n_done, n_total)
+        if metrics_callback is not None and chunk_done:
+            elapsed = time.perf_counter() - start_time
+            metrics_callback(
+                {
+                    "n_done": n_done,
+                    "n_total": n_total,
+                    "elapsed_seconds": elapsed,
+                    "images_per_second": n_done / elapsed if elapsed > 0 else 0.0,
+                }
+            )
+
+    if pixel_cache is not None and not isinstance(pixel_cache, PixelCache):
+        pixel_cache = PixelCache(pixel_cache, read_only=executor == ExecutorType.PROCESSES)
+
+    try:
+        if executor == ExecutorType.SERIAL:
+            chunk_results = [
+                _analyze_serial(
+                    image_paths,
+                    keep_images,
+                    prefetch,
+                    prefetch_memory_cap,
+                    pixel_cache,
+                    analysis_kwargs,
+                    chunk_size,
+                    report,
+                )
+            ]
+        elif executor == ExecutorType.THREADS:
+            chunk_results = [None] * len(chunks)
+            with ThreadPoolExecutor(max_workers=n_workers) as pool:
+                futures = {
+                    pool.submit(_analyze_chunk, chunk, keep_images, pixel_cache, analysis_kwargs): i
+                    for i, chunk in enumerate(chunks)
+                }
+                for future in as_completed(futures):
+                    chunk_results[futures[future]] = future.result()
+                    report(True, chunk_results[futures[future]])
+        elif executor == ExecutorType.PROCESSES:
+            pixel_cache_dir = pixel_cache.cache_dir if pixel_cache is not None else None
+            chunk_results = _analyze_chunks_in_processes(
+                chunks, n_workers, keep_images, pixel_cache_dir, analysis_kwargs, report
+            )
+        else:
+            raise ValueError(f"Unrecognized executor: {executor}")
+    finally:
+        if pixel_cache is not None:
+            pixel_cache.flush()
+
+    results = [result for chunk_result in chunk_results for result in chunk_result]
+    if deduplicate:
+        by_path = {result.image_path: result for result in results}
+        by_path.update(fanned_out)
+        results = [by_path[Path(image_path)] for image_path in all_paths]
+    return results
+
+
+def _analyze_serial(
+    image_paths: List[Path],
+    keep_images: bool,
+    prefetch: int,
+    prefetch_memory_cap: int,
+    pixel_cache: PixelCache,
+    analysis_kwargs: Dict,
+    chunk_size: int,
+    report: Callable,
+) -> List[AnalysisResult]:
+    # only files that are not in the pixel cache need to be read ahead
+    resize_long_axis = analysis_kwargs["resize_long_axis"]
+    is_cached = [pixel_cache is not None and pixel_cache.contains(p, resize_long_axis) for p in image_paths]
+    uncached_paths = [image_path for image_path, cached in zip(image_paths, is_cached) if not cached]
+    if prefetch > 0:
+        prefetched = iter(PrefetchReader(uncached_paths, prefetch, prefetch_memory_cap))
+    else:
+        prefetched = ((image_path, None) for image_path in uncached_paths)
+
+    results = []
+    analyzed_image = None
+    for image_path, cached in zip(image_paths, is_cached):
+        image = None if cached else next(prefetched)[1]
+        analyzed_image = _analyze_image(image_path, image, pixel_cache, analysis_kwargs, analyzed_image)
+        results.append(AnalysisResult.from_analyzed_image(analyzed_image, keep_images))
+        report(len(results) % chunk_size == 0 or len(results) == len(image_paths), results[-1:])
+    return results
+
+
+def _analyze_chunks_in_processes(
+    chunks: List[List[Path]],
+    n_workers: int,
+    keep_images: bool,
+    pixel_cache_dir: Path,
+    analysis_kwargs: Dict,
+    report: Callable,
+) -> List[List[AnalysisResult]]:
+    n_workers = n_workers or os.cpu_count()
+    resize_long_axis = analysis_kwargs["resize_long_axis"]
+    ring = None
+    if keep_images and resize_long_axis is not None:
+        # slots are assigned per chunk, so bound the number of chunks in flight to bound the ring's size
+        max_chunks_in_flight = n_workers + 1
+        chunk_size = max(len(chunk) for chunk in chunks) if chunks else 1
+        ring = SharedPixelRing(max_chunks_in_flight * chunk_size, resize_long_axis**2)
+        ring_args = (ring.name, ring.n_slots, ring.max_pixels)
+    else:
+        max_chunks_in_flight = len(chunks)
+        ring_args = None
+    pool = ProcessPoolExecutor(
+        max_workers=n_workers, initializer=_init_worker_process, initargs=(ring_args, pixel_cache_dir)
+    )
+
+    chunk_results = [None] * len(chunks)
+    next_chunk = 0
+    pending = {}
+    try:
+        with pool:
+            while next_chunk < len(chunks) or pending:
+                while next_chunk < len(chunks) and len(pending) < max_chunks_in_flight:
+                    chunk = chunks[next_chunk]
+                    slots = [ring.acquire() for _ in chunk] if ring is not None else [-1] * len(chunk)
+                    future = pool.submit(_analyze_chunk_packed, chunk, slots, analysis_kwargs)
+                    pending[future] = (next_chunk, slots)
+                    next_chunk += 1
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, slots = pending.pop(future)
+                    records, overflow = future.result()
+                    chunk_results[i] = [
+                        overflow[j] if j in overflow else unpack_result(records[j], image_path, ring)
+                        for j, image_path in enumerate(chunks[i])
+                    ]
+                    for slot in slots:
+                        if slot >= 0:
+                            ring.release(slot)
+                    report(True, chunk_results[i])
+    finally:
+        if ring is not None:
+            ring.close()
+
+    return chunk_results
+
+
+def _analyze_path(image_path: Union[Path, str], **analysis_kwargs) -> AnalyzedImage:
+    return AnalyzedImage(image_path, **analysis_kwargs)
+
+
+def _analyze_image(
+    image_path: Path,
+    image: Union[BinaryIO, None],
+    pixel_cache: PixelCache,
+    analysis_kwargs: Dict,
+    previous_image: AnalyzedImage = None,
+) -> AnalyzedImage:
+    resize_long_axis = analysis_kwargs["resize_long_axis"]
+    cached = pixel_cache.get(image_path, resize_long_axis) if pixel_cache is not None else None
+    if cached is not None:
+        image = Image.fromarray(cached)
+
+    analyzed_image = AnalyzedImage(image_path, image=image, previous_image=previous_image, **analysis_kwargs)
+    if cached is None and pixel_cache is not None and not pixel_cache.read_only:
+        pixel_cache.put(image_path, resize_long_axis, np.asarray(analyzed_image.pil_image.convert("RGB")))
+    return analyzed_image
+
+
+def _analyze_chunk(
+    image_paths: List[Path], keep_images: bool, pixel_cache: PixelCache, analysis_kwargs: Dict
+) -> List[AnalysisResult]:
+    results = []
+    analyzed_image = None  # images are warm-started from the previous image within a chunk only
+    for image_path in image_paths:
+        analyzed_image = _analyze_image(image_path, None, pixel_cache, analysis_kwargs, analyzed_image)
+        results.append(AnalysisResult.from_analyzed_image(analyzed_image, keep_images))
+    return results
+
+
+def _init_worker_process(ring_args: Tuple, pixel_cache_dir: Path):
+    global _worker_ring, _worker_pixel_cache
+    if ring_args is not None:
+        _worker_ring = SharedPixelRing(*ring_args[1:], name=ring_args[0])
+        # detach from the ring when the worker exits; unlike `atexit` handlers, finalizers also run in forked workers
+        Finalize(_worker_ring, _worker_ring.close, exitpriority=0)
+    if pixel_cache_dir is not None:
+        _worker_pixel_cache = PixelCache(pixel_cache_dir, read_only=True)
+
+
+def _analyze_chunk_packed(
+    image_paths: List[Path], slots: List[int], analysis_kwargs: Dict
+) -> Tuple[np.ndarray, Dict[int, AnalysisResult]]:
+    records = np.zeros(len(image_paths), dtype=RESULT_DTYPE)
+    overflow = {}  # results with too many colors for a fixed-size record are returned as objects
+    analyzed_image = None
+    for j, (image_path, slot) in enumerate(zip(image_paths, slots)):
+        analyzed_image = _analyze_image(image_path, None, _worker_pixel_cache, analysis_kwargs, analyzed_image)
+        if slot >= 0:
+            write_to_ring(_worker_ring, slot, analyzed_image)
+        try:
+            records[j] = pack_result(analyzed_image, slot)
+        except ValueError:
+            overflow[j] = AnalysisResult.from_analyzed_image(analyzed_image, keep_image=slot >= 0)
+    return records, overflow
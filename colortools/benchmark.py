@@ -0,0 +1,363 @@
+import csv
+import gc
+import sys
+import time
+import tracemalloc
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+import colortools.config as config
+import colortools.util as util
+import colortools.visualization as visualization
+from colortools.analyzed_image import AnalyzedImage, load_resized_image
+from colortools.heuristics import NColorsHeuristic
+from colortools.results import AnalysisResult
+from colortools.sampling import SamplingStrategy
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class BenchmarkType(str, Enum):
+    """Enum type for the benchmarks run by `colortools benchmark`."""
+
+    SAMPLING = "sampling"
+    MEMORY = "memory"
+
+
+class SamplingBenchmarkResult(NamedTuple):
+    """The speed and accuracy of one sampling strategy, compared to analyzing every pixel."""
+
+    strategy: SamplingStrategy
+    mean_pixels: float  # pixels analyzed per image
+    seconds: float  # time spent analyzing all images (excluding decoding)
+    mean_color_drift: float  # see `get_color_drift`
+    max_color_drift: float
+    n_colors_agreement: float  # fraction of images for which `n` matches the baseline's
+
+
+class MemoryBenchmarkResult(NamedTuple):
+    """The memory used to analyze one image.
+
+    Peaks are measured with tracemalloc, relative to the memory in use before the stage, and include NumPy arrays
+    but not Pillow's image buffers (which tracemalloc cannot see); the sizes of retained images are added to the
+    retained totals instead.
+    """
+
+    image_path: Path
+    decode_peak_bytes: int  # decoding and resizing the image
+    analysis_peak_bytes: int  # the heuristic and the dominant color algorithm
+    retained_bytes: int  # held by the AnalyzedImage after analysis
+    pil_image_bytes: int  # of which: the resized image
+    model_bytes: int  # of which: the fitted k-means model (excluding its labels)
+    predicted_bytes: int  # of which: the labels of the analyzed pixels
+    result_retained_bytes: int  # held by the compact AnalysisResult that replaces the AnalyzedImage
+    # high-water mark of the process's resident memory so far (cumulative over all images, not this image's own
+    # peak), after analyzing the image (0 if unknown)
+    max_rss_so_far_bytes: int
+
+
+class MemoryStageResult(NamedTuple):
+    """The memory used by a stage that runs once for all images (e.g. a graphic)."""
+
+    stage: str
+    peak_bytes: int  # measured with tracemalloc (see MemoryBenchmarkResult)
+    max_rss_so_far_bytes: int  # high-water mark of the resident memory so far, after the stage (0 if unknown)
+
+
+def get_peak_rss() -> int:
+    """Get the high-water mark of this process's resident memory.
+
+    Returns:
+        int: The peak resident set size, in bytes, or 0 if it is not available on this platform.
+    """
+    if resource is None:
+        return 0
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024  # kilobytes everywhere but macOS
+
+
+def get_pil_image_bytes(pil_image: Image.Image) -> int:
+    """Get the size of a Pillow image's pixel buffer, which tracemalloc does not see.
+
+    Args:
+        pil_image (Image.Image): The image (may be None).
+
+    Returns:
+        int: The size of the image's pixels, in bytes (0 if there is no image).
+    """
+    if pil_image is None:
+        return 0
+    return pil_image.width * pil_image.height * len(pil_image.getbands())
+
+
+def get_retained_breakdown(analyzed_image: AnalysisResult) -> Dict[str, int]:
+    """Get the sizes of the largest objects held by an analyzed image.
+
+    Args:
+        analyzed_image (AnalysisResult): The analyzed image.
+
+    Returns:
+        Dict[str, int]: The sizes (in bytes) of the resized image held in memory (`pil_image`), the arrays of the
+            fitted model other than its labels (`model`), and the labels of the analyzed pixels (`predicted`).
+    """
+    predicted = getattr(analyzed_image, "predicted", None)
+    model = getattr(analyzed_image, "model", None)
+    model_bytes = 0
+    if model is not None:
+        model_bytes = sum(
+            value.nbytes for value in vars(model).values() if isinstance(value, np.ndarray) and value is not predicted
+        )
+    return {
+        "pil_image": get_pil_image_bytes(analyzed_image._pil_image),
+        "model": model_bytes,
+        "predicted": predicted.nbytes if predicted is not None else 0,
+    }
+
+
+def _measure_peak(func: Callable, *args, **kwargs) -> Tuple[object, int]:
+    gc.collect()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    result = func(*args, **kwargs)
+    return result, tracemalloc.get_traced_memory()[1] - baseline
+
+
+def benchmark_memory(
+    image_paths: List[Union[Path, str]],
+    resize_long_axis: int,
+    edge_crop: float,
+    dominant_color_algorithm: util.DominantColorAlgorithm,
+    n_colors: int,
+    auto_n_heuristic: NColorsHeuristic,
+    graphics_dir: Union[Path, str] = None,
+    progress_callback: Callable[[int, int], None] = None,
+) -> Tuple[List[MemoryBenchmarkResult], List[MemoryStageResult]]:
+    """Measure the memory used to analyze each image, and retained by each analyzed image.
+
+    Each image is decoded, analyzed into an AnalyzedImage (whose retained memory is measured), and replaced by a
+    compact AnalysisResult that keeps the resized image, as the CLI does for graphics. If `graphics_dir` is
+    provided, the collage and spectrum graphics are then generated there from the compact results, and measured.
+
+    Args:
+        image_paths (List[Union[Path, str]]): The paths of the images to analyze.
+        resize_long_axis (int): The target length of the long axis after resizing.
+        edge_crop (float): The percentage of each edge to crop before analysis.
+        dominant_color_algorithm (util.DominantColorAlgorithm): The dominant color algorithm.
+        n_colors (int): The number of dominant colors, or None to use the heuristic.
+        auto_n_heuristic (NColorsHeuristic): The heuristic for the number of colors, if `n_colors` is None.
+        graphics_dir (Union[Path, str], optional): The directory in which to generate graphics; if None, graphics
+            are not measured. Defaults to None.
+        progress_callback (Callable[[int, int], None], optional): Called with the number of images analyzed so far
+            and the total number of images after each image. Defaults to None.
+
+    Returns:
+        Tuple[List[MemoryBenchmarkResult], List[MemoryStageResult]]: The memory used for each image, and by each
+            graphic.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+
+    image_results, stage_results, compact_results = [], [], []
+    try:
+        for i, image_path in enumerate(image_paths):
+            gc.collect()
+            before = tracemalloc.get_traced_memory()[0]
+            pil_image, decode_peak = _measure_peak(load_resized_image, image_path, resize_long_axis)
+            analyzed_image, analysis_peak = _measure_peak(
+                AnalyzedImage,
+                image_path,
+                resize_long_axis,
+                edge_crop,
+                dominant_color_algorithm,
+                n_colors,
+                auto_n_heuristic if n_colors is None else None,
+                image=pil_image,
+            )
+            del pil_image
+            gc.collect()
+            breakdown = get_retained_breakdown(analyzed_image)
+            retained = tracemalloc.get_traced_memory()[0] - before + breakdown["pil_image"]
+
+            result = AnalysisResult.from_analyzed_image(analyzed_image, keep_image=True)
+            del analyzed_image  # the compact result replaces the analyzed image, as in `analyze_many`
+            gc.collect()
+            result_retained = tracemalloc.get_traced_memory()[0] - before + get_pil_image_bytes(result._pil_image)
+            compact_results.append(result)
+
+            image_results.append(
+                MemoryBenchmarkResult(
+                    Path(image_path),
+                    decode_peak,
+                    analysis_peak,
+                    retained,
+                    breakdown["pil_image"],
+                    breakdown["model"],
+                    breakdown["predicted"],
+                    result_retained,
+                    get_peak_rss(),
+                )
+            )
+            if progress_callback is not None:
+                progress_callback(i + 1, len(image_paths))
+
+        if graphics_dir is not None and len(compact_results) > 0:
+            graphics_dir = Path(graphics_dir)
+            _, collage_peak = _measure_peak(
+                visualization.save_image_collage,
+                compact_results,
+                config.DEFAULT_COLLAGE_WIDTH,
+                graphics_dir / "collage.jpg",
+                False,
+            )
+            stage_results.append(MemoryStageResult("collage", collage_peak, get_peak_rss()))
+            _, spectrum_peak = _measure_peak(
+                visualization.save_spectrum_visualization,
+                compact_results,
+                False,
+                config.DEFAULT_SPECTRUM_HEIGHT,
+                graphics_dir / "spectrum.jpg",
+                False,
+            )
+            stage_results.append(MemoryStageResult("spectrum", spectrum_peak, get_peak_rss()))
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    return image_results, stage_results
+
+
+def get_results_over_budget(results: List[MemoryBenchmarkResult], budget_bytes: int) -> List[MemoryBenchmarkResult]:
+    """Get the images whose analyzed image retained more memory than a budget.
+
+    Args:
+        results (List[MemoryBenchmarkResult]): The memory used for each image.
+        budget_bytes (int): The maximum number of bytes an analyzed image may retain.
+
+    Returns:
+        List[MemoryBenchmarkResult]: The results over budget, largest first.
+    """
+    over_budget = [result for result in results if result.retained_bytes > budget_bytes]
+    return sorted(over_budget, key=lambda result: result.retained_bytes, reverse=True)
+
+
+def get_color_drift(analyzed_image: AnalysisResult, baseline: AnalysisResult) -> float:
+    """Measure how far an image's dominant colors drifted from a baseline analysis of the same image.
+
+    Each of the baseline's dominant colors is matched to the nearest dominant color of the other analysis (so that
+    analyses with different numbers of colors can be compared); the result is the mean distance, weighted by the
+    baseline's cluster proportions if there are any.
+
+    Args:
+        analyzed_image (AnalysisResult): The analysis to compare.
+        baseline (AnalysisResult): The baseline analysis.
+
+    Returns:
+        float: The weighted mean distance (in RGB units) from the baseline's dominant colors.
+    """
+    baseline_colors = np.array(baseline.dominant_colors_rgb, dtype=float)
+    colors = np.array(analyzed_image.dominant_colors_rgb, dtype=float)
+    distances = np.linalg.norm(baseline_colors[:, np.newaxis] - colors[np.newaxis], axis=-1).min(axis=1)
+    weights = None
+    if baseline.cluster_histogram is not None:
+        weights = [proportion for _, proportion in baseline.cluster_histogram]
+    return float(np.average(distances, weights=weights))
+
+
+def benchmark_sampling(
+    image_paths: List[Union[Path, str]],
+    strategies: List[SamplingStrategy],
+    n_samples: int,
+    resize_long_axis: int,
+    edge_crop: float,
+    dominant_color_algorithm: util.DominantColorAlgorithm,
+    n_colors: int,
+    auto_n_heuristic: NColorsHeuristic,
+    progress_callback: Callable[[int, int], None] = None,
+) -> List[SamplingBenchmarkResult]:
+    """Compare the speed of sampling strategies, and the drift of their dominant colors from analyzing every pixel.
+
+    Each image is decoded once and analyzed without sampling (the baseline) and with each strategy.
+
+    Args:
+        image_paths (List[Union[Path, str]]): The paths of the images to analyze.
+        strategies (List[SamplingStrategy]): The sampling strategies to compare.
+        n_samples (int): The number of pixels to sample.
+        resize_long_axis (int): The target length of the long axis after resizing.
+        edge_crop (float): The percentage of each edge to crop before analysis.
+        dominant_color_algorithm (util.DominantColorAlgorithm): The dominant color algorithm.
+        n_colors (int): The number of dominant colors, or None to use the heuristic.
+        auto_n_heuristic (NColorsHeuristic): The heuristic for the number of colors, if `n_colors` is None.
+        progress_callback (Callable[[int, int], None], optional): Called with the number of images analyzed so far
+            and the total number of images after each image. Defaults to None.
+
+    Returns:
+        List[SamplingBenchmarkResult]: The results of the baseline (first) and of each strategy.
+    """
+    strategies = [SamplingStrategy.NONE] + [s for s in strategies if s != SamplingStrategy.NONE]
+    seconds = {strategy: 0.0 for strategy in strategies}
+    n_pixels = {strategy: [] for strategy in strategies}
+    drifts = {strategy: [] for strategy in strategies}
+    n_colors_matches = {strategy: [] for strategy in strategies}
+
+    for i, image_path in enumerate(image_paths):
+        pil_image = load_resized_image(image_path, resize_long_axis)
+        baseline = None
+        for strategy in strategies:
+            start = time.perf_counter()
+            analyzed_image = AnalyzedImage(
+                image_path,
+                resize_long_axis,
+                edge_crop,
+                dominant_color_algorithm,
+                n_colors,
+                auto_n_heuristic if n_colors is None else None,
+                image=pil_image,
+                grayscale_check=False,
+                sampling_strategy=strategy,
+                n_samples=n_samples,
+            )
+            seconds[strategy] += time.perf_counter() - start
+            if baseline is None:
+                baseline = analyzed_image
+            n_pixels[strategy].append(len(analyzed_image.get_analysis_array().reshape((-1, 3))))
+            drifts[strategy].append(get_color_drift(analyzed_image, baseline))
+            n_colors_matches[strategy].append(analyzed_image.n_colors == baseline.n_colors)
+
+        if progress_callback is not None:
+            progress_callback(i + 1, len(image_paths))
+
+    return [
+        SamplingBenchmarkResult(
+            strategy,
+            float(np.mean(n_pixels[strategy])),
+            seconds[strategy],
+            float(np.mean(drifts[strategy])),
+            float(np.max(drifts[strategy])),
+            float(np.mean(n_colors_matches[strategy])),
+        )
+        for strategy in strategies
+    ]
+
+
+def save_benchmark_table(results: List[NamedTuple], dest_path: Union[Path, str]):
+    """Save benchmark results as a CSV table, with one row per result.
+
+    Args:
+        results (List[NamedTuple]): The results to save.
+        dest_path (Union[Path, str]): The path of the CSV file.
+    """
+    dest_path = Path(dest_path)
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(dest_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(results[0]._fields)
+        for result in results:
+            writer.writerow([value.value if isinstance(value, Enum) else value for value in result])
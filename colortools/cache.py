@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+PIXEL_CACHE_DATA_FILE = "pixels.bin"
+PIXEL_CACHE_INDEX_FILE = "index.json"
+
+
+class PixelCache:
+    """
+    On-disk cache of decoded, resized RGB images, so that reruns with different analysis settings skip decoding.
+
+    All images are appended to a single data file, which is read back through a memory map (so cached pixels come
+    straight from the page cache without copying); a JSON index maps each entry's key to its offset and dimensions.
+    Entries are keyed by the image file's identity (resolved path, size and modification time) and the length of the
+    long axis the image was resized to, so modified files are never served stale pixels.
+    """
+
+    def __init__(self, cache_dir: Union[Path, str], read_only: bool = False):
+        """Open (or create) a pixel cache.
+
+        Args:
+            cache_dir (Union[Path, str]): The directory holding the cache's data and index files.
+            read_only (bool, optional): Whether to open the cache without adding new entries. Defaults to False.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.read_only = read_only
+        self.data_path = self.cache_dir / PIXEL_CACHE_DATA_FILE
+        self.index_path = self.cache_dir / PIXEL_CACHE_INDEX_FILE
+        if not read_only:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.index = {}
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        self.n_added = 0
+        self._data = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(image_path: Union[Path, str], resize_long_axis: int) -> str:
+        """Get the cache key for an image file and resize setting.
+
+        Args:
+            image_path (Union[Path, str]): The path to the image file.
+            resize_long_axis (int): The length of the long axis after resizing.
+
+        Returns:
+            str: The cache key.
+        """
+        stat = os.stat(image_path)
+        return f"{Path(image_path).resolve()}|{stat.st_size}|{stat.st_mtime_ns}|{resize_long_axis}"
+
+    def contains(self, image_path: Union[Path, str], resize_long_axis: int) -> bool:
+        """Check whether the cache holds an image.
+
+        Args:
+            image_path (Union[Path, str]): The path to the image file.
+            resize_long_axis (int): The length of the long axis after resizing.
+
+        Returns:
+            bool: Whether the image is cached.
+        """
+        return self.get_key(image_path, resize_long_axis) in self.index
+
+    def get(self, image_path: Union[Path, str], resize_long_axis: int) -> Union[np.ndarray, None]:
+        """Get a cached image.
+
+        Args:
+            image_path (Union[Path, str]): The path to the image file.
+            resize_long_axis (int): The length of the long axis after resizing.
+
+        Returns:
+            Union[np.ndarray, None]: A read-only view of the cached RGB image, or None if it is not cached.
+        """
+        entry = self.index.get(self.get_key(image_path, resize_long_axis))
+        if entry is None:
+            return None
+
+        offset, height, width = entry
+        size = height * width * 3
+        with self._lock:
+            if self._data is None or self._data.shape[0] < offset + size:
+                self._data = np.memmap(self.data_path, dtype=np.uint8, mode="r")
+            data = self._data
+        return data[offset : offset + size].reshape((height, width, 3))
+
+    def put(self, image_path: Union[Path, str], resize_long_axis: int, rgb_image_data: np.ndarray):
+        """Add an image to the cache. The index is written by `flush()`.
+
+        Args:
+            image_path (Union[Path, str]): The path to the image file.
+            resize_long_axis (int): The length of the long axis after resizing.
+            rgb_image_data (np.ndarray): The resized image, as an RGB array of shape (height, width, 3).
+
+        Raises:
+            ValueError: If the cache was opened read-only.
+        """
+        if self.read_only:
+            raise ValueError("Cannot add entries to a read-only pixel cache")
+
+        key = self.get_key(image_path, resize_long_axis)
+        rgb_image_data = np.ascontiguousarray(rgb_image_data, dtype=np.uint8)
+        height, width = rgb_image_data.shape[0], rgb_image_data.shape[1]
+        with self._lock:
+            with open(self.data_path, "ab") as f:
+                offset = f.tell()
+                f.write(rgb_image_data.tobytes())
+            self.index[key] = [offset, height, width]
+            self.n_added += 1
+
+    def flush(self):
+        """Write the index to disk (atomically), if entries were added."""
+        if self.read_only or self.n_added == 0:
+            return
+
+        with self._lock:
+            tmp_path = self.index_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self.index, f)
+            os.replace(tmp_path, self.index_path)
+            self.n_added = 0
+
+    def __len__(self) -> int:
+        return len(self.index)
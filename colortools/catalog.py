@@ -0,0 +1,263 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from colortools.results import AnalysisResult
+from colortools.store import ResultStore
+from colortools.util import ImageOrientation, write_dir_atomically
+
+CATALOG_VERSION = 1
+CATALOG_DIR = "catalog"  # within the store's directory
+CATALOG_INDEX_FILE = "catalog.json"
+# record fields with a sorted index; hue is normalized to [0, 360)
+CATALOG_COLUMNS = ("hue", "saturation", "value", "orientation", "n_colors")
+
+
+class Catalog:
+    """
+    Sorted indexes over the results of a collection, for filtering images by ranges of their dominant color.
+
+    Each indexed field of the records (see CATALOG_COLUMNS) has an index: the positions of the images sorted by the
+    field, and the sorted values. A range query is two binary searches in the sorted values, so filters only touch
+    the matching images rather than every image. Indexes can be saved alongside a result store, whose memory-mapped
+    arrays they complement: loading them is instant, and a query reads only the pages it needs.
+
+    Like sorting, filters use the most dominant color of each image.
+    """
+
+    def __init__(self, store: ResultStore, indexes: Dict[str, Tuple[np.ndarray, np.ndarray]] = None):
+        """Create a catalog of a store (or a view of one), building its indexes if they are not provided.
+
+        Args:
+            store (ResultStore): The store.
+            indexes (Dict[str, Tuple[np.ndarray, np.ndarray]], optional): The sorted positions and sorted values of
+                each indexed field (as created by a previous catalog of the same store). Defaults to None.
+        """
+        self.store = store
+        if indexes is None:
+            indexes = {}
+            for name in CATALOG_COLUMNS:
+                values = self.get_values(name)
+                order = np.argsort(values, kind="stable")
+                indexes[name] = (order, values[order])
+        self.indexes = indexes
+
+    @classmethod
+    def from_results(cls, analyzed_images: List[AnalysisResult]) -> "Catalog":
+        """Create a catalog of analysis results.
+
+        Args:
+            analyzed_images (List[AnalysisResult]): The results.
+
+        Returns:
+            Catalog: The catalog; the positions it finds are positions in `analyzed_images`.
+        """
+        return cls(ResultStore.from_results(analyzed_images))
+
+    @classmethod
+    def load(cls, src_dir: Union[Path, str], mmap: bool = True) -> "Catalog":
+        """Load a saved store, with its catalog indexes if they were saved (otherwise, they are built).
+
+        Args:
+            src_dir (Union[Path, str]): The directory of the store.
+            mmap (bool, optional): Whether to memory-map the arrays instead of reading them. Defaults to True.
+
+        Returns:
+            Catalog: The catalog of the store.
+        """
+        src_dir = Path(src_dir)
+        store = ResultStore.load(src_dir, mmap)
+        catalog_dir = src_dir / CATALOG_DIR
+        if not (catalog_dir / CATALOG_INDEX_FILE).exists():
+            return cls(store)
+        with open(catalog_dir / CATALOG_INDEX_FILE) as f:
+            index = json.load(f)
+        if (
+            index.get("version") != CATALOG_VERSION
+            or index.get("n_images") != len(store)
+            or index.get("fingerprint") != get_fingerprint(store)
+        ):
+            return cls(store)  # stale or unsupported; rebuild
+        mmap_mode = "r" if mmap else None
+        indexes = {
+            name: (
+                np.load(catalog_dir / f"{name}_order.npy", mmap_mode=mmap_mode),
+                np.load(catalog_dir / f"{name}_values.npy", mmap_mode=mmap_mode),
+            )
+            for name in CATALOG_COLUMNS
+        }
+        return cls(store, indexes)
+
+    def save(self, dest_dir: Union[Path, str]):
+        """Save the indexes of this catalog alongside its store, which must already be saved in `dest_dir`.
+
+        The indexes are saved to a directory within the store's (CATALOG_DIR), which replaces any previous indexes
+        at once (see `util.write_dir_atomically`). They are saved with a fingerprint of the records they index (see
+        `get_fingerprint`), so that `load` rebuilds them if the store has changed since.
+
+        Args:
+            dest_dir (Union[Path, str]): The directory of the store.
+        """
+
+        def write(tmp_dir: Path):
+            for name, (order, values) in self.indexes.items():
+                np.save(tmp_dir / f"{name}_order.npy", np.asarray(order))
+                np.save(tmp_dir / f"{name}_values.npy", np.asarray(values))
+            with open(tmp_dir / CATALOG_INDEX_FILE, "w") as f:
+                json.dump(
+                    {"version": CATALOG_VERSION, "n_images": len(self), "fingerprint": get_fingerprint(self.store)}, f
+                )
+
+        write_dir_atomically(Path(dest_dir, CATALOG_DIR), write)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def get_values(self, name: str) -> np.ndarray:
+        """Get the values of an indexed field, in the order of the store.
+
+        Args:
+            name (str): The field (see CATALOG_COLUMNS).
+
+        Returns:
+            np.ndarray: The values.
+        """
+        values = self.store.get_column(name)
+        return values % 360 if name == "hue" else values
+
+    def get_values_at(self, name: str, positions: np.ndarray) -> np.ndarray:
+        """Get the values of an indexed field for some images, reading only their records.
+
+        Args:
+            name (str): The field (see CATALOG_COLUMNS).
+            positions (np.ndarray): The positions of the images.
+
+        Returns:
+            np.ndarray: The values.
+        """
+        rows = positions if self.store.rows is None else np.asarray(self.store.rows)[positions]
+        values = np.asarray(self.store.records[name][rows])
+        return values % 360 if name == "hue" else values
+
+    def get_range(self, name: str, low: float, high: float) -> np.ndarray:
+        """Find the images with a field within a range, using its index.
+
+        Args:
+            name (str): The field (see CATALOG_COLUMNS).
+            low (float): The lowest value (inclusive).
+            high (float): The highest value (inclusive).
+
+        Returns:
+            np.ndarray: The positions of the images, in no particular order.
+        """
+        order, values = self.indexes[name]
+        start, end = np.searchsorted(values, low, side="left"), np.searchsorted(values, high, side="right")
+        return np.asarray(order[start:end])
+
+    def get_hue_range(self, low: float, high: float) -> np.ndarray:
+        """Find the images with a dominant hue within a range, which wraps around 360 if `low` is above `high`.
+
+        For instance, (330, 30) selects reds, from 330 to 360 and from 0 to 30.
+
+        Args:
+            low (float): The lowest hue (inclusive), from 0 to 360.
+            high (float): The highest hue (inclusive), from 0 to 360.
+
+        Returns:
+            np.ndarray: The positions of the images, in no particular order.
+        """
+        if low <= high:
+            return self.get_range("hue", low, high)
+        return np.concatenate([self.get_range("hue", low, 360), self.get_range("hue", 0, high)])
+
+    def find(
+        self,
+        hue_range: Optional[Tuple[float, float]] = None,
+        saturation_range: Optional[Tuple[float, float]] = None,
+        value_range: Optional[Tuple[float, float]] = None,
+        orientation: Optional[ImageOrientation] = None,
+        n_colors_range: Optional[Tuple[int, int]] = None,
+    ) -> np.ndarray:
+        """Find the images that match every provided filter.
+
+        Every filter is counted with its index, and only the images matched by the most selective one are checked
+        against the others.
+
+        Args:
+            hue_range (Optional[Tuple[float, float]], optional): The range of dominant hues (see `get_hue_range`).
+                Defaults to None.
+            saturation_range (Optional[Tuple[float, float]], optional): The range of dominant saturations, from 0 to
+                100. Defaults to None.
+            value_range (Optional[Tuple[float, float]], optional): The range of dominant values, from 0 to 100.
+                Defaults to None.
+            orientation (Optional[ImageOrientation], optional): The orientation. Defaults to None.
+            n_colors_range (Optional[Tuple[int, int]], optional): The range of numbers of dominant colors. Defaults to
+                None.
+
+        Returns:
+            np.ndarray: The positions of the matching images, in order.
+        """
+        filters = {}
+        if hue_range is not None:
+            filters["hue"] = tuple(hue_range)
+        if saturation_range is not None:
+            filters["saturation"] = tuple(saturation_range)
+        if value_range is not None:
+            filters["value"] = tuple(value_range)
+        if orientation is not None:
+            filters["orientation"] = (orientation.value, orientation.value)
+        if n_colors_range is not None:
+            filters["n_colors"] = tuple(n_colors_range)
+        if not filters:
+            return np.arange(len(self))
+
+        matches = {
+            name: self.get_hue_range(low, high) if name == "hue" else self.get_range(name, low, high)
+            for name, (low, high) in filters.items()
+        }
+        most_selective = min(matches, key=lambda name: len(matches[name]))
+        positions = np.sort(matches[most_selective])
+        for name, (low, high) in filters.items():
+            if name == most_selective or len(positions) == 0:
+                continue
+            values = self.get_values_at(name, positions)
+            if name == "hue" and low > high:
+                keep = (values >= low) | (values <= high)
+            else:
+                keep = (values >= low) & (values <= high)
+            positions = positions[keep]
+        return positions
+
+    def filter(
+        self, analyzed_images: Union[List[AnalysisResult], ResultStore], **filters
+    ) -> Union[List[AnalysisResult], ResultStore]:
+        """Keep the images that match every provided filter (see `find`), in order.
+
+        Args:
+            analyzed_images (Union[List[AnalysisResult], ResultStore]): The images this catalog was created from (the
+                results, or the store).
+            **filters: The filters (see `find`).
+
+        Returns:
+            Union[List[AnalysisResult], ResultStore]: The matching images (a view, for a store).
+        """
+        positions = self.find(**filters)
+        if isinstance(analyzed_images, ResultStore):
+            return analyzed_images.take(positions)
+        return [analyzed_images[i] for i in positions]
+
+
+def get_fingerprint(store: ResultStore) -> str:
+    """Get a fingerprint of the records of a store (or view), in order, which the catalog's indexes are built from.
+
+    Args:
+        store (ResultStore): The store.
+
+    Returns:
+        str: A hash of the records.
+    """
+    records = np.asarray(store.records) if store.rows is None else np.asarray(store.records)[store.get_rows()]
+    return hashlib.blake2b(np.ascontiguousarray(records).tobytes(), digest_size=16).hexdigest()
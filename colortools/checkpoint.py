@@ -0,0 +1,142 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Union
+
+import colortools.config as config
+from colortools.results import AnalysisResult
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_INDEX_FILE = "checkpoint.json"
+CHECKPOINT_SEGMENT_GLOB = "segment-*.jsonl"
+
+
+class Checkpoint:
+    """
+    Periodic checkpoint of the results of a long analysis run, so that an interrupted run can be resumed.
+
+    Results are buffered as they arrive and saved at most every `interval` seconds, each save writing only the
+    results that arrived since the last one to a new segment file. Segments are written to a temporary file that
+    then replaces its destination, so a checkpoint never holds a partially written segment, and each save costs
+    time proportional to the number of new results rather than to the size of the checkpoint.
+    """
+
+    def __init__(
+        self,
+        checkpoint_dir: Union[Path, str],
+        settings: Dict,
+        interval: float = config.DEFAULT_CHECKPOINT_INTERVAL,
+        resume: bool = False,
+    ):
+        """Start a checkpoint, or continue an existing one.
+
+        Args:
+            checkpoint_dir (Union[Path, str]): The directory of the checkpoint.
+            settings (Dict): The analysis settings of the run; a checkpoint can only be resumed with the same
+                settings.
+            interval (float, optional): The minimum number of seconds between saves. Defaults to
+                config.DEFAULT_CHECKPOINT_INTERVAL.
+            resume (bool, optional): Whether to continue the checkpoint in `checkpoint_dir` (if any) instead of
+                starting a new one. Defaults to False.
+
+        Raises:
+            ValueError: If resuming a checkpoint with different analysis settings, or written by an unsupported
+                version of ColorTools.
+        """
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.settings = settings
+        self.interval = interval
+        self.pending = []
+        self.n_segments = 0
+        self.last_save_time = time.monotonic()
+
+        index_path = self.checkpoint_dir / CHECKPOINT_INDEX_FILE
+        if resume and index_path.exists():
+            with open(index_path) as f:
+                index = json.load(f)
+            if index.get("version") != CHECKPOINT_VERSION:
+                raise ValueError(f"Unsupported checkpoint version: {index.get('version')}")
+            if index["settings"] != settings:
+                raise ValueError(f"Checkpoint in {self.checkpoint_dir} was written with different analysis settings")
+            self.n_segments = len(self.get_segment_paths())
+        else:
+            remove_checkpoint(self.checkpoint_dir)
+            self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+            write_atomic(index_path, json.dumps({"version": CHECKPOINT_VERSION, "settings": settings}))
+
+    def get_segment_paths(self) -> List[Path]:
+        """Get the paths of this checkpoint's saved segments.
+
+        Returns:
+            List[Path]: The paths of the segment files, in the order they were written.
+        """
+        return sorted(self.checkpoint_dir.glob(CHECKPOINT_SEGMENT_GLOB))
+
+    def load(self) -> Dict[str, AnalysisResult]:
+        """Load the results saved in this checkpoint.
+
+        Returns:
+            Dict[str, AnalysisResult]: The saved results, by the absolute path of their image.
+        """
+        results = {}
+        for segment_path in self.get_segment_paths():
+            with open(segment_path) as f:
+                for line in f:
+                    result = AnalysisResult.from_dict(json.loads(line))
+                    results[str(result.image_path)] = result
+        return results
+
+    def add(self, analyzed_image: AnalysisResult):
+        """Add a completed result, saving the checkpoint if `interval` seconds have passed since the last save.
+
+        Args:
+            analyzed_image (AnalysisResult): The result.
+        """
+        self.pending.append(analyzed_image)
+        if time.monotonic() - self.last_save_time >= self.interval:
+            self.save()
+
+    def save(self):
+        """Save the results added since the last save as a new segment."""
+        self.last_save_time = time.monotonic()
+        if not self.pending:
+            return
+        lines = []
+        for analyzed_image in self.pending:
+            result_dict = analyzed_image.to_dict()
+            result_dict["image_path"] = str(Path(analyzed_image.image_path).resolve())
+            lines.append(json.dumps(result_dict) + "\n")
+        write_atomic(self.checkpoint_dir / f"segment-{self.n_segments:08d}.jsonl", "".join(lines))
+        self.n_segments += 1
+        self.pending = []
+
+
+def write_atomic(dest_path: Path, contents: str):
+    """Write a text file atomically, by writing a temporary file that then replaces the destination.
+
+    Args:
+        dest_path (Path): The path of the file.
+        contents (str): The contents of the file.
+    """
+    tmp_path = dest_path.with_name(dest_path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(contents)
+    os.replace(tmp_path, dest_path)
+
+
+def remove_checkpoint(checkpoint_dir: Union[Path, str]):
+    """Remove a checkpoint's files, if any (for instance, once its run has completed), and its directory if empty.
+
+    Args:
+        checkpoint_dir (Union[Path, str]): The directory of the checkpoint.
+    """
+    checkpoint_dir = Path(checkpoint_dir)
+    if not checkpoint_dir.is_dir():
+        return
+    for path in checkpoint_dir.glob(CHECKPOINT_SEGMENT_GLOB + "*"):  # including temporary files
+        path.unlink()
+    for path in [checkpoint_dir / CHECKPOINT_INDEX_FILE, checkpoint_dir / f"{CHECKPOINT_INDEX_FILE}.tmp"]:
+        path.unlink(missing_ok=True)
+    if not any(checkpoint_dir.iterdir()):
+        checkpoint_dir.rmdir()
@@ -2,8 +2,9 @@
 import argparse
 import logging
 import sys
+import time
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
 from tqdm import tqdm
 
@@ -12,8 +13,28 @@ import colortools.sort as sort
 import colortools.util as util
 import colortools.visualization as visualization
 from colortools import __version__
-from colortools.analyzed_image import AnalyzedImage
+from colortools.analysis import KMeansInit
+from colortools.api import ExecutorType, analyze_many
+from colortools.benchmark import (
+    BenchmarkType,
+    MemoryBenchmarkResult,
+    MemoryStageResult,
+    benchmark_memory,
+    benchmark_sampling,
+    get_results_over_budget,
+    save_benchmark_table,
+)
+from colortools.catalog import Catalog
+from colortools.checkpoint import Checkpoint, remove_checkpoint
+from colortools.export import ExportStrategy, export_files
 from colortools.heuristics import NColorsHeuristic
+from colortools.layout import CollageLayout
+from colortools.results import AnalysisResult, OutputFormat, RecordWriter, load_records, load_results, save_results
+from colortools.sampling import SamplingStrategy
+from colortools.search import ColorIndex, ColorSpace
+from colortools.shard import ShardStrategy, get_shard_function, merge_shards, parse_shard, rebase_results
+from colortools.store import ResultsFormat, ResultStore
+from colortools.sweep import get_sweep_configs, save_results_table, sweep
 
 logging.basicConfig(format="%(levelname)s: %(message)s")
 
@@ -32,6 +53,17 @@ def parse_args(args: List[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Analyze and sort images by their dominant colors.")
     parser.add_argument("input", type=Path, help="input directory of .jpg files (or a single .jpg file)")
     parser.add_argument("--version", action="version", version=__version__)
+    add_analysis_args(parser)
+    add_output_args(parser)
+    return parser.parse_args(args)
+
+
+def add_analysis_args(parser: argparse.ArgumentParser):
+    """Add the arguments that configure analysis to a parser.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser to add arguments to.
+    """
     parser.add_argument(
         "--algorithm",
         type=util.DominantColorAlgorithm,
@@ -54,12 +86,144 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         default=config.DEFAULT_N_COLORS_HEURISTIC,
         help="heuristic used to set `n` for the clustering algorithm",
     )
+    parser.add_argument(
+        "--kmeans_init",
+        "--kmeans-init",
+        type=KMeansInit,
+        choices=[kmi.value for kmi in KMeansInit],
+        default=config.DEFAULT_KMEANS_INIT,
+        help="how to initialize k-means: k-means++, peaks of the hue histogram, or the previous image's colors",
+    )
     parser.add_argument(
         "--skip_analysis_crop",
         "--skip-analysis-crop",
         action="store_true",
         help="Analyze images in their entirety, without any edge cropping.",
     )
+    parser.add_argument(
+        "--grayscale_check",
+        "--grayscale-check",
+        action="store_true",
+        help="analyze clearly grayscale images by value only, instead of like color images",
+    )
+    parser.add_argument(
+        "--adaptive_resolution",
+        "--adaptive-resolution",
+        action="store_true",
+        help="cluster at coarse resolutions first, and at full resolution only if the coarse results are unstable",
+    )
+    parser.add_argument(
+        "--crop_on_decode",
+        "--crop-on-decode",
+        action="store_true",
+        help="decode only the analyzed region, at reduced scale (faster; results differ slightly from a full decode)",
+    )
+    parser.add_argument(
+        "--sampling_strategy",
+        "--sampling-strategy",
+        type=SamplingStrategy,
+        choices=[ss.value for ss in SamplingStrategy],
+        default=config.DEFAULT_SAMPLING_STRATEGY,
+        help="analyze a sample of each image's pixels: a regular grid, the rule-of-thirds lines, or random pixels",
+    )
+    parser.add_argument(
+        "--n_samples",
+        "--n-samples",
+        type=int,
+        default=config.DEFAULT_N_SAMPLES,
+        help="number of pixels to sample per image, with --sampling_strategy",
+    )
+    parser.add_argument(
+        "--executor",
+        type=ExecutorType,
+        choices=[et.value for et in ExecutorType],
+        default=config.DEFAULT_EXECUTOR,
+        help="how images are analyzed: in this process (serial), in a thread pool, or in a process pool",
+    )
+    parser.add_argument(
+        "--n_workers",
+        "--n-workers",
+        type=int,
+        default=None,
+        help="number of worker threads or processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--chunk_size",
+        "--chunk-size",
+        type=int,
+        default=config.DEFAULT_CHUNK_SIZE,
+        help="number of images handed to a worker at a time",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=config.DEFAULT_PREFETCH_LOOKAHEAD,
+        help="number of image files to read ahead of analysis with the serial executor (0 to disable)",
+    )
+    parser.add_argument(
+        "--prefetch_memory_cap",
+        "--prefetch-memory-cap",
+        type=int,
+        default=config.DEFAULT_PREFETCH_MEMORY_CAP // (1024 * 1024),
+        help="maximum memory (MB) used for image files that have been read ahead",
+    )
+    parser.add_argument(
+        "--pixel_cache",
+        "--pixel-cache",
+        type=str,
+        default=None,
+        help="directory of a cache of decoded, resized images, reused across runs",
+    )
+    parser.add_argument(
+        "--deduplicate",
+        action="store_true",
+        help="analyze files with identical contents only once, copying results to every duplicate",
+    )
+    parser.add_argument(
+        "--output_format",
+        "--output-format",
+        type=OutputFormat,
+        choices=[of.value for of in OutputFormat],
+        default=None,
+        help=(
+            "write a record per image to a JSON Lines or CSV file as soon as the image is analyzed (with the threads "
+            "and processes executors, records arrive once per chunk of --chunk_size images)"
+        ),
+    )
+    parser.add_argument(
+        "--output_file",
+        "--output-file",
+        type=Path,
+        default=None,
+        help="path of the records file (default: a timestamped file in OUTPUT_DIR/records/)",
+    )
+    parser.add_argument(
+        "--checkpoint_dir",
+        "--checkpoint-dir",
+        type=Path,
+        default=None,
+        help="periodically save completed results to this directory, so that the run can be resumed",
+    )
+    parser.add_argument(
+        "--checkpoint_interval",
+        "--checkpoint-interval",
+        type=float,
+        default=config.DEFAULT_CHECKPOINT_INTERVAL,
+        help="minimum number of seconds between checkpoints",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip images with results in CHECKPOINT_DIR (from an interrupted run with the same settings)",
+    )
+
+
+def add_output_args(parser: argparse.ArgumentParser):
+    """Add the arguments that select and configure outputs (sorting, graphics and summaries) to a parser.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser to add arguments to.
+    """
     parser.add_argument(
         "--exclude_bw",
         "--exclude-bw",
@@ -72,6 +236,49 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         action="store_true",
         help="exclude color images from generated graphics",
     )
+    parser.add_argument(
+        "--hue_range",
+        "--hue-range",
+        type=float,
+        nargs=2,
+        metavar=("LOW", "HIGH"),
+        default=None,
+        help="keep images with a dominant hue in this range (0 to 360, wrapping around 360 if LOW > HIGH)",
+    )
+    parser.add_argument(
+        "--saturation_range",
+        "--saturation-range",
+        type=float,
+        nargs=2,
+        metavar=("LOW", "HIGH"),
+        default=None,
+        help="keep images with a dominant saturation in this range (0 to 100)",
+    )
+    parser.add_argument(
+        "--value_range",
+        "--value-range",
+        type=float,
+        nargs=2,
+        metavar=("LOW", "HIGH"),
+        default=None,
+        help="keep images with a dominant value in this range (0 to 100)",
+    )
+    parser.add_argument(
+        "--orientation",
+        type=str,
+        choices=[orientation.name.lower() for orientation in util.ImageOrientation],
+        default=None,
+        help="keep images with this orientation",
+    )
+    parser.add_argument(
+        "--n_colors_range",
+        "--n-colors-range",
+        type=int,
+        nargs=2,
+        metavar=("MIN", "MAX"),
+        default=None,
+        help="keep images with a number of dominant colors in this range",
+    )
     parser.add_argument(
         "--sort", type=sort.SortMethod, choices=[sm.value for sm in sort.SortMethod], default=None, help="sort images"
     )
@@ -82,6 +289,22 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         help="anchor image with which to begin sorted sequence",
     )
     parser.add_argument("--save_sorted", "--save-sorted", action="store_true", help="save sorted sequence of images")
+    parser.add_argument(
+        "--export_strategy",
+        "--export-strategy",
+        type=ExportStrategy,
+        choices=[es.value for es in ExportStrategy],
+        default=config.DEFAULT_EXPORT_STRATEGY,
+        help="preferred strategy for saving sorted images; falls back to the next strategy if unsupported "
+        f"(order: {', '.join([es.value for es in ExportStrategy])})",
+    )
+    parser.add_argument(
+        "--export_workers",
+        "--export-workers",
+        type=int,
+        default=config.DEFAULT_EXPORT_WORKERS,
+        help="number of threads used to save sorted images",
+    )
     parser.add_argument(
         "--display",
         action="store_true",
@@ -119,8 +342,15 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         help="include all detected dominant colors in the spectrum graphic",
     )
     parser.add_argument("--collage", action="store_true", help="save a collage of the analyzed images")
+    parser.add_argument(
+        "--collage_layout",
+        "--collage-layout",
+        type=CollageLayout,
+        choices=[cl.value for cl in CollageLayout],
+        default=config.DEFAULT_COLLAGE_LAYOUT,
+        help="arrange collage images in order, row by row (rows), or so that neighbors have similar colors (grid)",
+    )
     parser.add_argument("--summary", action="store_true", help="print a summary of the analyzed images to the console")
-    return parser.parse_args(args)
 
 
 def check_args(args: argparse.Namespace) -> argparse.Namespace:
@@ -134,7 +364,7 @@ def check_args(args: argparse.Namespace) -> argparse.Namespace:
     """
     if args.save_sorted and not args.sort:
         logging.warning(f"--save_sorted enabled with no sort method; defaulting to {config.DEFAULT_SORT_METHOD}")
-        args.sort = config.DEFAULT_SORT_METHOD
+        args.sort = sort.SortMethod(config.DEFAULT_SORT_METHOD)
     if not args.sort:
         logging.warning("No sort method provided! Use --help to see valid values if you wish to sort your output.")
     if not args.algorithm == util.DominantColorAlgorithm.KMEANS and args.dominant_colors_remapped:
@@ -145,21 +375,54 @@ def check_args(args: argparse.Namespace) -> argparse.Namespace:
         return None
     if args.spectrum_all_colors:
         args.spectrum = True
-    if not (
+    if not has_output_action(args):
+        logging.error(
+            "No output action selected; please select --summary, --sort, --save_sorted, --dominant_colors, "
+            "--dominant_colors_remapped, --spectrum, or --output_format"
+        )
+        return None
+    return args
+
+
+def has_output_action(args: argparse.Namespace) -> bool:
+    """Determine whether the provided arguments select any output.
+
+    Args:
+        args (argparse.Namespace): The arguments to check.
+
+    Returns:
+        bool: Whether any output is selected.
+    """
+    return bool(
         args.summary
         or args.sort
         or args.save_sorted
         or args.dominant_colors
         or args.dominant_colors_remapped
         or args.spectrum
+        or args.spectrum_all_colors
         or args.collage
-    ):
-        logging.error(
-            "No output action selected; please select "
-            "--summary, --sort, --save_sorted, --dominant_colors, --dominant_colors_remapped, or --spectrum"
-        )
-        return None
-    return args
+        or getattr(args, "output_format", None)  # only commands that analyze images can write records
+    )
+
+
+def get_filters(args: argparse.Namespace) -> Dict:
+    """Get the catalog filters selected by the provided arguments (see `Catalog.find`).
+
+    Args:
+        args (argparse.Namespace): The arguments.
+
+    Returns:
+        Dict: The selected filters, by keyword argument of `Catalog.find`.
+    """
+    filters = {
+        "hue_range": args.hue_range,
+        "saturation_range": args.saturation_range,
+        "value_range": args.value_range,
+        "orientation": util.ImageOrientation[args.orientation.upper()] if args.orientation else None,
+        "n_colors_range": args.n_colors_range,
+    }
+    return {name: value for name, value in filters.items() if value is not None}
 
 
 def print_verbose_output(args: argparse.Namespace):
@@ -168,16 +431,48 @@ def print_verbose_output(args: argparse.Namespace):
     Args:
         args (argparse.Namespace): The arguments for which to print verbose summary.
     """
+    print_analysis_settings(args)
+    print_action_summary(args)
+
+
+def print_analysis_settings(args: argparse.Namespace):
+    """Print the analysis settings of the provided arguments.
+
+    Args:
+        args (argparse.Namespace): The arguments for which to print analysis settings.
+    """
     print()
     print("Analyze settings:")
     print(f"- input={args.input}")
     print(f"- algorithm={args.algorithm}")
     print(f"- n_colors={args.n_colors}")
     print(f"- n_colors_heuristic={args.n_colors_heuristic}")
+    print(f"- kmeans_init={args.kmeans_init.value}")
     print(f"- skip_analysis_crop={args.skip_analysis_crop}")
+    print(f"- grayscale_check={args.grayscale_check}")
+    print(f"- adaptive_resolution={args.adaptive_resolution}")
+    print(f"- crop_on_decode={args.crop_on_decode}")
+    print(f"- sampling_strategy={args.sampling_strategy.value} (n_samples={args.n_samples})")
+    print(f"- executor={args.executor.value} (n_workers={args.n_workers}, chunk_size={args.chunk_size})")
+    print(f"- prefetch={args.prefetch} (memory cap {args.prefetch_memory_cap} MB)")
+    print(f"- pixel_cache={args.pixel_cache}")
+    print(f"- deduplicate={args.deduplicate}")
+    if args.output_format is not None:
+        print(f"- output_format={args.output_format.value} (output_file={args.output_file})")
+    if args.checkpoint_dir is not None:
+        print(f"- checkpoint_dir={args.checkpoint_dir} (interval {args.checkpoint_interval} s, resume={args.resume})")
     print()
 
+
+def print_action_summary(args: argparse.Namespace):
+    """Print the outputs selected by the provided arguments.
+
+    Args:
+        args (argparse.Namespace): The arguments for which to print an action summary.
+    """
     print("Action summary:")
+    for name, value in get_filters(args).items():
+        print(f"- Images will be filtered by {name}: {value.name.lower() if name == 'orientation' else value}")
     print(f"- Black and white images will {'not ' if args.exclude_bw else ''}be included")
     print(f"- Color images images will {'not ' if args.exclude_color else ''}be included")
     if args.sort:
@@ -186,7 +481,7 @@ def print_verbose_output(args: argparse.Namespace):
         )
         if args.save_sorted:
             sorted_dir = Path(args.output_dir, config.DEFAULT_SORTED_DIR)
-            print(f"- Sorted images will be saved to {sorted_dir}")
+            print(f"- Sorted images will be saved to {sorted_dir} (export strategy: {args.export_strategy.value})")
         if args.sort_anchor:
             print(f"- Sort anchor image is {args.sort_anchor}")
     else:
@@ -210,7 +505,7 @@ def print_verbose_output(args: argparse.Namespace):
 
     if args.collage:
         collage_dir = Path(args.output_dir, config.DEFAULT_COLLAGE_DIR)
-        print(f"- Saving collage graphic to {collage_dir}")
+        print(f"- Saving collage graphic ({args.collage_layout.value} layout) to {collage_dir}")
 
     if args.summary:
         print("- Summary will be printed at the end of processing")
@@ -218,7 +513,903 @@ def print_verbose_output(args: argparse.Namespace):
     print()
 
 
+def analyze(args: argparse.Namespace, jpg_paths: List[Path], keep_images: bool = False) -> List[AnalysisResult]:
+    """Analyze images using the settings from the provided arguments, with a progress bar.
+
+    With a checkpoint directory, completed results are checkpointed periodically (and when interrupted); when
+    resuming, images with checkpointed results are not analyzed again. When resuming with a records file, images
+    whose records were written after the last checkpoint are not analyzed again either, and checkpointed results
+    missing from the file are written to it, so that it holds exactly one record per image.
+
+    Args:
+        args (argparse.Namespace): The arguments for this run of ColorTools.
+        jpg_paths (List[Path]): The images to analyze.
+        keep_images (bool, optional): Whether results should keep the resized images in memory, for graphics that
+            need pixels. Defaults to False.
+
+    Returns:
+        List[AnalysisResult]: The analysis results, in the same order as `jpg_paths`.
+    """
+    if args.crop_on_decode and args.pixel_cache is not None:
+        logging.error("--crop_on_decode cannot be combined with --pixel_cache")
+        sys.exit(1)
+    if args.resume and args.output_format is not None and args.output_file is None:
+        logging.error("--resume with --output_format requires --output_file (the records file of the resumed run)")
+        sys.exit(1)
+    checkpoint = None
+    finished = {}
+    if args.checkpoint_dir is not None:
+        try:
+            checkpoint = Checkpoint(
+                args.checkpoint_dir, get_analysis_settings(args), args.checkpoint_interval, args.resume
+            )
+        except ValueError as e:
+            logging.error(f"{e}; remove it or run without --resume")
+            sys.exit(1)
+        finished = checkpoint.load()
+    elif args.resume:
+        logging.warning("--resume requires --checkpoint_dir; analyzing all images")
+    resuming = checkpoint is not None and args.resume
+    keys = [str(Path(jpg_path).resolve()) for jpg_path in jpg_paths]
+
+    record_writer = None
+    if args.output_format is not None:
+        output_file = args.output_file
+        if output_file is None:
+            filename = f"{util.get_timestamp_string()}.{args.output_format.value}"
+            output_file = Path(args.output_dir, config.DEFAULT_RECORDS_DIR, filename)
+        recorded = set()
+        if resuming and output_file.exists():
+            # results recorded after the last checkpoint (e.g. before a hard kill) are not analyzed again
+            for result in load_records(output_file, args.output_format):
+                key = str(result.image_path)
+                recorded.add(key)
+                if key not in finished:
+                    finished[key] = result
+                    checkpoint.add(result)
+        record_writer = RecordWriter(output_file, args.output_format, append=resuming)
+        for key in keys:
+            if key in finished and key not in recorded:
+                record_writer.write(finished[key])
+
+    remaining = [jpg_path for jpg_path, key in zip(jpg_paths, keys) if key not in finished]
+    if len(remaining) < len(jpg_paths):
+        print(f"Resuming: {len(jpg_paths) - len(remaining)} images already analyzed")
+
+    def on_result(result: AnalysisResult):
+        if record_writer is not None:
+            record_writer.write(result)
+        if checkpoint is not None:
+            checkpoint.add(result)
+
+    try:
+        with tqdm(total=len(remaining), ascii=True) as progress_bar:
+            analyzed_images = analyze_many(
+                remaining,
+                resize_long_axis=config.DEFAULT_RESIZE_LONG_AXIS,
+                edge_crop=0 if args.skip_analysis_crop else config.DEFAULT_EDGE_CROP,
+                dominant_color_algorithm=args.algorithm,
+                n_colors=args.n_colors,
+                auto_n_heuristic=args.n_colors_heuristic,
+                kmeans_init=args.kmeans_init,
+                grayscale_check=args.grayscale_check,
+                adaptive_resolution=args.adaptive_resolution,
+                sampling_strategy=args.sampling_strategy,
+                n_samples=args.n_samples,
+                executor=args.executor,
+                n_workers=args.n_workers,
+                chunk_size=args.chunk_size,
+                keep_images=keep_images,
+                crop_on_decode=args.crop_on_decode,
+                prefetch=args.prefetch,
+                prefetch_memory_cap=args.prefetch_memory_cap * 1024 * 1024,
+                pixel_cache=args.pixel_cache,
+                progress_callback=lambda n_done, _: progress_bar.update(n_done - progress_bar.n),
+                result_callback=on_result,
+                deduplicate=args.deduplicate,
+            )
+    finally:
+        if record_writer is not None:
+            record_writer.close()
+            print(f"Wrote {record_writer.n_records} records to {record_writer.dest_path}")
+        if checkpoint is not None:
+            checkpoint.save()  # including when interrupted
+
+    analyzed_images = iter(analyzed_images)
+    return [finished[key] if key in finished else next(analyzed_images) for key in keys]
+
+
+def get_fit_summary(analyzed_images: List[AnalysisResult]) -> str:
+    """Summarize the k-means fits of the provided images (iterations and fit time).
+
+    Args:
+        analyzed_images (List[AnalysisResult]): The analyzed images.
+
+    Returns:
+        str: The summary, or an empty string if no image was fitted with k-means.
+    """
+    fitted = [analyzed_image for analyzed_image in analyzed_images if analyzed_image.n_iter is not None]
+    if len(fitted) == 0:
+        return ""
+    mean_n_iter = sum(analyzed_image.n_iter for analyzed_image in fitted) / len(fitted)
+    mean_fit_ms = 1000 * sum(analyzed_image.fit_seconds for analyzed_image in fitted) / len(fitted)
+    init_counts = {}
+    for analyzed_image in fitted:
+        init_counts[analyzed_image.kmeans_init.value] = init_counts.get(analyzed_image.kmeans_init.value, 0) + 1
+    inits = ", ".join(f"{init}={count}" for init, count in init_counts.items())
+    n_full_resolution = sum(
+        1
+        for analyzed_image in fitted
+        if analyzed_image.analysis_long_axis == max(analyzed_image.width, analyzed_image.height)
+    )
+    return (
+        f"k-means: {mean_n_iter:.1f} iterations and {mean_fit_ms:.1f} ms per fit on average ({inits}); "
+        f"{n_full_resolution} of {len(fitted)} fitted at full resolution"
+    )
+
+
+def save_outputs(
+    args: argparse.Namespace, analyzed_images: List[AnalysisResult], timstamp_str: str, catalog: Catalog = None
+):
+    """Filter, sort, and save or print the outputs selected by the provided arguments.
+
+    Args:
+        args (argparse.Namespace): The arguments for this run of ColorTools.
+        analyzed_images (List[AnalysisResult]): The analyzed images.
+        timstamp_str (str): The timestamp used to name output files and folders.
+        catalog (Catalog, optional): A catalog of the analyzed images, for filtering; if None, one is built if
+            filters are selected. Defaults to None.
+    """
+    filters = get_filters(args)
+    if filters:
+        if catalog is None:
+            if isinstance(analyzed_images, ResultStore):
+                catalog = Catalog(analyzed_images)
+            else:
+                catalog = Catalog.from_results(analyzed_images)
+        n_images = len(analyzed_images)
+        analyzed_images = catalog.filter(analyzed_images, **filters)
+        print(f"Filtered {n_images} images to {len(analyzed_images)}")
+    if args.exclude_bw:
+        analyzed_images, _ = sort.separate_color_and_bw(analyzed_images)
+    if args.exclude_color:
+        _, analyzed_images = sort.separate_color_and_bw(analyzed_images)
+
+    if args.sort:
+        sort_function = sort.get_sort_function(args.sort)
+        analyzed_images = sort_function(analyzed_images, args.sort_reverse, args.sort_anchor)
+        n_sorted = len(analyzed_images)
+
+        if args.save_sorted:
+            dest_dir = Path(args.output_dir, config.DEFAULT_SORTED_DIR, timstamp_str)
+            src_dest_pairs = [
+                (analyzed_image.image_path, Path(dest_dir, analyzed_image.generate_filename(i, "sorted")))
+                for i, analyzed_image in enumerate(analyzed_images)
+            ]
+            export_counts = export_files(src_dest_pairs, args.export_strategy, args.export_workers)
+            print(f"Saved {n_sorted} sorted images to {dest_dir}")
+            if args.verbose:
+                for strategy, count in export_counts.items():
+                    if count > 0:
+                        print(f"- {strategy.value}: {count}")
+        else:
+            print(f"Sorted {n_sorted} images:")
+            for i, image in enumerate(analyzed_images):
+                print(f"{i+1:4.0f}. {image.image_path}")
+
+    if args.dominant_colors or args.dominant_colors_remapped:
+        dest_dir = Path(args.output_dir, config.DEFAULT_DOMINANT_COLOR_DIR, timstamp_str)
+        for i, analyzed_image in enumerate(analyzed_images):
+            dominant_colors_dest = dest_dir / analyzed_image.generate_filename(i, "dc")
+            visualization.save_dominant_color_visualization(
+                analyzed_image,
+                config.DEFAULT_DOMINANT_COLOR_CHIP_SIZE,
+                dominant_colors_dest,
+                include_remapped_image=args.dominant_colors_remapped,
+                display=args.display,
+            )
+        print(f"Saved dominant color graphics to {dest_dir}")
+
+    if args.spectrum:
+        filename = f"{timstamp_str}_spectrum.jpg"
+        spectrum_dest = Path(args.output_dir, config.DEFAULT_SPECTRUM_DIR, filename)
+        visualization.save_spectrum_visualization(
+            analyzed_images,
+            args.spectrum_all_colors,
+            config.DEFAULT_SPECTRUM_HEIGHT,
+            spectrum_dest,
+            args.display,
+        )
+        print(f"Saved spectrum graphic to {spectrum_dest}")
+
+    if args.collage:
+        filename = f"{timstamp_str}_collage.jpg"
+        collage_dest = Path(args.output_dir, config.DEFAULT_COLLAGE_DIR, filename)
+        visualization.save_image_collage(
+            analyzed_images, config.DEFAULT_COLLAGE_WIDTH, collage_dest, args.display, args.collage_layout
+        )
+        print(f"Saved collage graphic to {collage_dest}")
+
+    if args.summary:
+        print("\nAnalyzed image summary:")
+        for i, image in enumerate(analyzed_images):
+            print(f"{i+1}. {image.get_pretty_string()}")
+
+
+def parse_sweep_args(args: List[str]) -> argparse.Namespace:
+    """Parse commandline arguments for the `sweep` command.
+
+    Arguments:
+        args (List[str]): The list of arguments following `sweep`.
+
+    Returns:
+        argparse.Namespace: The arguments parsed from the commandline interface.
+    """
+    parser = argparse.ArgumentParser(
+        prog="colortools sweep",
+        description="Analyze images under a grid of configurations, decoding each image only once.",
+    )
+    parser.add_argument("input", type=Path, help="input directory of .jpg files (or a single .jpg file)")
+    parser.add_argument(
+        "--algorithms",
+        type=util.DominantColorAlgorithm,
+        choices=[dca.value for dca in util.DominantColorAlgorithm],
+        nargs="+",
+        default=[util.DominantColorAlgorithm(config.DEFAULT_DOMINANT_COLOR_ALGORITHM)],
+        help="dominant color algorithms to sweep",
+    )
+    parser.add_argument(
+        "--n_colors",
+        "--n-colors",
+        type=int,
+        nargs="+",
+        default=[0],
+        help="numbers of dominant colors to sweep (0 to set `n` with each heuristic)",
+    )
+    parser.add_argument(
+        "--n_colors_heuristics",
+        "--n-colors-heuristics",
+        type=NColorsHeuristic,
+        choices=[nch.value for nch in NColorsHeuristic],
+        nargs="+",
+        default=[NColorsHeuristic(config.DEFAULT_N_COLORS_HEURISTIC)],
+        help="heuristics to sweep, for values of --n_colors that are 0",
+    )
+    parser.add_argument(
+        "--kmeans_inits",
+        "--kmeans-inits",
+        type=KMeansInit,
+        choices=[kmi.value for kmi in KMeansInit],
+        nargs="+",
+        default=[KMeansInit(config.DEFAULT_KMEANS_INIT)],
+        help="k-means initialization strategies to sweep",
+    )
+    parser.add_argument(
+        "--edge_crops",
+        "--edge-crops",
+        type=float,
+        nargs="+",
+        default=[config.DEFAULT_EDGE_CROP],
+        help="edge crops to sweep (fraction of each edge removed before analysis)",
+    )
+    parser.add_argument(
+        "--output_dir",
+        "--output-dir",
+        type=Path,
+        default=Path(config.DEFAULT_OUTPUT_DIR),
+        help="output directory for the results tables",
+    )
+    return parser.parse_args(args)
+
+
+def run_sweep(args: List[str]):
+    """Run the `sweep` command: write one results table per configuration and print throughput per configuration.
+
+    Args:
+        args (List[str]): The list of arguments following `sweep`.
+    """
+    args = parse_sweep_args(args)
+    jpg_paths = util.collect_jpg_paths(args.input)
+    if len(jpg_paths) == 0:
+        print(f"No images found in {args.input}")
+        return
+
+    configs = get_sweep_configs(
+        args.algorithms, args.n_colors, args.n_colors_heuristics, args.edge_crops, args.kmeans_inits
+    )
+    print(f"Analyzing {len(jpg_paths)} images with {len(configs)} configurations...")
+    with tqdm(total=len(jpg_paths), ascii=True) as progress_bar:
+        results, shared_seconds, config_seconds = sweep(
+            jpg_paths,
+            configs,
+            config.DEFAULT_RESIZE_LONG_AXIS,
+            progress_callback=lambda n_done, _: progress_bar.update(n_done - progress_bar.n),
+        )
+
+    dest_dir = Path(args.output_dir, config.DEFAULT_SWEEP_DIR, util.get_timestamp_string())
+    print(f"\nDecoding: {shared_seconds:.2f}s ({len(jpg_paths) / max(shared_seconds, 1e-9):.1f} images/s)")
+    for analysis_config in configs:
+        save_results_table(results[analysis_config], dest_dir / f"{analysis_config.get_name()}.csv")
+        seconds = config_seconds[analysis_config]
+        images_per_second = len(jpg_paths) / max(seconds, 1e-9)
+        fit_summary = get_fit_summary(results[analysis_config])
+        fit_summary = f"; {fit_summary}" if fit_summary else ""
+        print(f"{analysis_config.get_name()}: {seconds:.2f}s ({images_per_second:.1f} images/s){fit_summary}")
+    print(f"Saved {len(configs)} results tables to {dest_dir}")
+
+
+def parse_benchmark_args(args: List[str]) -> argparse.Namespace:
+    """Parse commandline arguments for the `benchmark` command.
+
+    Arguments:
+        args (List[str]): The list of arguments following `benchmark`.
+
+    Returns:
+        argparse.Namespace: The arguments parsed from the commandline interface.
+    """
+    parser = argparse.ArgumentParser(
+        prog="colortools benchmark",
+        description="Benchmark analysis options on a set of images.",
+    )
+    parser.add_argument(
+        "benchmark",
+        type=BenchmarkType,
+        choices=[bt.value for bt in BenchmarkType],
+        help=(
+            "the benchmark to run (sampling: speed and dominant color drift of each sampling strategy; memory: peak "
+            "and retained memory per image)"
+        ),
+    )
+    parser.add_argument("input", type=Path, help="input directory of .jpg files (or a single .jpg file)")
+    parser.add_argument(
+        "--algorithm",
+        type=util.DominantColorAlgorithm,
+        choices=[dca.value for dca in util.DominantColorAlgorithm],
+        default=config.DEFAULT_DOMINANT_COLOR_ALGORITHM,
+        help="dominant color algorithm",
+    )
+    parser.add_argument(
+        "--n_colors", "--n-colors", type=int, default=config.DEFAULT_N_COLORS, help="number of dominant colors"
+    )
+    parser.add_argument(
+        "--n_colors_heuristic",
+        "--n-colors-heuristic",
+        type=NColorsHeuristic,
+        choices=[nch.value for nch in NColorsHeuristic],
+        default=config.DEFAULT_N_COLORS_HEURISTIC,
+        help="heuristic for the number of dominant colors, if --n_colors is not provided",
+    )
+    parser.add_argument(
+        "--sampling_strategies",
+        "--sampling-strategies",
+        type=SamplingStrategy,
+        choices=[ss.value for ss in SamplingStrategy],
+        nargs="+",
+        default=[ss for ss in SamplingStrategy if ss != SamplingStrategy.NONE],
+        help="sampling strategies to compare with analyzing every pixel",
+    )
+    parser.add_argument(
+        "--n_samples",
+        "--n-samples",
+        type=int,
+        default=config.DEFAULT_N_SAMPLES,
+        help="number of pixels to sample per image",
+    )
+    parser.add_argument(
+        "--memory_budget",
+        "--memory-budget",
+        type=float,
+        default=config.DEFAULT_RETAINED_MEMORY_BUDGET / (1024 * 1024),
+        help="fail the memory benchmark if an analyzed image retains more than this many MB",
+    )
+    parser.add_argument(
+        "--output_dir",
+        "--output-dir",
+        type=Path,
+        default=Path(config.DEFAULT_OUTPUT_DIR),
+        help="output directory for the benchmark table",
+    )
+    return parser.parse_args(args)
+
+
+def run_benchmark(args: List[str]):
+    """Run the `benchmark` command: print a benchmark's results and save them as a table.
+
+    Args:
+        args (List[str]): The list of arguments following `benchmark`.
+    """
+    args = parse_benchmark_args(args)
+    jpg_paths = util.collect_jpg_paths(args.input)
+    if len(jpg_paths) == 0:
+        print(f"No images found in {args.input}")
+        return
+
+    print(f"Benchmarking {args.benchmark.value} with {len(jpg_paths)} images...")
+    # the table is saved as `benchmarks/<benchmark>_<timestamp>.csv`, and graphics in a directory of the same name
+    dest_dir = Path(
+        args.output_dir, config.DEFAULT_BENCHMARK_DIR, f"{args.benchmark.value}_{util.get_timestamp_string()}"
+    )
+    with tqdm(total=len(jpg_paths), ascii=True) as progress_bar:
+
+        def update_progress(n_done: int, _: int):
+            progress_bar.update(n_done - progress_bar.n)
+
+        if args.benchmark == BenchmarkType.SAMPLING:
+            results = benchmark_sampling(
+                jpg_paths,
+                args.sampling_strategies,
+                args.n_samples,
+                config.DEFAULT_RESIZE_LONG_AXIS,
+                config.DEFAULT_EDGE_CROP,
+                args.algorithm,
+                args.n_colors,
+                args.n_colors_heuristic,
+                progress_callback=update_progress,
+            )
+        else:
+            results, stage_results = benchmark_memory(
+                jpg_paths,
+                config.DEFAULT_RESIZE_LONG_AXIS,
+                config.DEFAULT_EDGE_CROP,
+                args.algorithm,
+                args.n_colors,
+                args.n_colors_heuristic,
+                graphics_dir=dest_dir,
+                progress_callback=update_progress,
+            )
+
+    print()
+    if args.benchmark == BenchmarkType.SAMPLING:
+        for result in results:
+            print(
+                f"{result.strategy.value}: {result.mean_pixels:.0f} pixels/image, "
+                f"{result.seconds:.2f}s ({len(jpg_paths) / max(result.seconds, 1e-9):.1f} images/s), "
+                f"color drift {result.mean_color_drift:.1f} (max {result.max_color_drift:.1f}), "
+                f"n matches {result.n_colors_agreement:.0%}"
+            )
+    else:
+        print(get_memory_summary(results, stage_results))
+
+    dest_path = dest_dir.with_suffix(".csv")
+    save_benchmark_table(results, dest_path)
+    print(f"Saved benchmark table to {dest_path}")
+
+    if args.benchmark == BenchmarkType.MEMORY:
+        budget_bytes = int(args.memory_budget * 1024 * 1024)
+        over_budget = get_results_over_budget(results, budget_bytes)
+        if over_budget:
+            print(f"{len(over_budget)} of {len(results)} analyzed images retained more than {args.memory_budget} MB:")
+            for result in over_budget[:10]:
+                print(f"- {result.image_path.name}: {result.retained_bytes / 1024 / 1024:.2f} MB")
+            sys.exit(1)
+
+
+def get_memory_summary(results: List[MemoryBenchmarkResult], stage_results: List[MemoryStageResult]) -> str:
+    """Summarize a memory benchmark: mean and maximum peaks per stage, retained memory per image, and graphics.
+
+    Args:
+        results (List[MemoryBenchmarkResult]): The memory used for each image.
+        stage_results (List[MemoryStageResult]): The memory used by each graphic.
+
+    Returns:
+        str: The summary, one line per measurement.
+    """
+
+    def to_mb(n_bytes: float) -> str:
+        return f"{n_bytes / 1024 / 1024:.2f} MB"
+
+    lines = []
+    for field, label in [
+        ("decode_peak_bytes", "decode peak"),
+        ("analysis_peak_bytes", "analysis peak"),
+        ("retained_bytes", "retained by AnalyzedImage"),
+        ("pil_image_bytes", "  - pil_image"),
+        ("model_bytes", "  - model"),
+        ("predicted_bytes", "  - predicted"),
+        ("result_retained_bytes", "retained by AnalysisResult"),
+    ]:
+        values = [getattr(result, field) for result in results]
+        lines.append(f"{label}: mean {to_mb(sum(values) / len(values))}, max {to_mb(max(values))}")
+    for stage_result in stage_results:
+        lines.append(f"{stage_result.stage} peak: {to_mb(stage_result.peak_bytes)} (excluding Pillow images)")
+    rss_peak = max([result.max_rss_so_far_bytes for result in results + stage_results] + [0])
+    lines.append(f"peak RSS: {to_mb(rss_peak) if rss_peak > 0 else 'unavailable on this platform'}")
+    return "\n".join(lines)
+
+
+def get_analysis_settings(args: argparse.Namespace) -> Dict:
+    """Get the analysis settings of the provided arguments, for saving alongside results.
+
+    Args:
+        args (argparse.Namespace): The arguments for this run of ColorTools.
+
+    Returns:
+        Dict: The analysis settings, as JSON-serializable values.
+    """
+    settings = {
+        "input": str(Path(args.input).resolve()),
+        "algorithm": args.algorithm.value,
+        "n_colors": args.n_colors,
+        "n_colors_heuristic": args.n_colors_heuristic.value if args.n_colors_heuristic else None,
+        "kmeans_init": args.kmeans_init.value,
+        "skip_analysis_crop": args.skip_analysis_crop,
+        "grayscale_check": args.grayscale_check,
+        "adaptive_resolution": args.adaptive_resolution,
+        "crop_on_decode": args.crop_on_decode,
+        "sampling_strategy": args.sampling_strategy.value,
+        "n_samples": args.n_samples,
+    }
+    if getattr(args, "shard", None) is not None:  # only `analyze` can shard
+        settings["shard"] = f"{args.shard[0]}/{args.shard[1]}"
+    return settings
+
+
+def parse_analyze_args(args: List[str]) -> argparse.Namespace:
+    """Parse commandline arguments for the `analyze` command.
+
+    Arguments:
+        args (List[str]): The list of arguments following `analyze`.
+
+    Returns:
+        argparse.Namespace: The arguments parsed from the commandline interface.
+    """
+    parser = argparse.ArgumentParser(
+        prog="colortools analyze",
+        description="Analyze images and save the results to a file, for rendering outputs with `colortools render`.",
+    )
+    parser.add_argument("input", type=Path, help="input directory of .jpg files (or a single .jpg file)")
+    add_analysis_args(parser)
+    parser.add_argument(
+        "--results_file",
+        "--results-file",
+        type=Path,
+        default=None,
+        help="path of the results file (default: a timestamped file in OUTPUT_DIR/results/)",
+    )
+    parser.add_argument(
+        "--results_format",
+        "--results-format",
+        type=ResultsFormat,
+        choices=[rf.value for rf in ResultsFormat],
+        default=config.DEFAULT_RESULTS_FORMAT,
+        help="format of the results: a JSON file, or a directory of memory-mappable arrays for large collections",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        help="analyze only the i-th of n shards of the input (i/n, from 1/n to n/n), to merge with `colortools merge`",
+    )
+    parser.add_argument(
+        "--shard_strategy",
+        "--shard-strategy",
+        type=ShardStrategy,
+        choices=[ss.value for ss in ShardStrategy],
+        default=config.DEFAULT_SHARD_STRATEGY,
+        help="split the input by position (index) or by a hash of each image's path (hash)",
+    )
+    parser.add_argument(
+        "--output_dir",
+        "--output-dir",
+        type=Path,
+        default=Path(config.DEFAULT_OUTPUT_DIR),
+        help="output directory for the results file",
+    )
+    parser.add_argument("--verbose", action="store_true", help="print a summary of the supplied arguments")
+    return parser.parse_args(args)
+
+
+def run_analyze(args: List[str]):
+    """Run the `analyze` command: analyze images and save the results to a results file.
+
+    Args:
+        args (List[str]): The list of arguments following `analyze`.
+    """
+    args = parse_analyze_args(args)
+    if (
+        args.results_format == ResultsFormat.STORE
+        and args.results_file is not None
+        and not ResultStore.can_replace(args.results_file)
+    ):
+        logging.error(f"Not replacing {args.results_file}, which exists and is not a result store")
+        sys.exit(1)
+    jpg_paths = util.collect_jpg_paths(args.input)
+    if args.shard is not None:
+        jpg_paths = get_shard_function(args.shard_strategy)(jpg_paths, args.input, *args.shard)
+    if args.verbose:
+        print_analysis_settings(args)
+    if len(jpg_paths) == 0:
+        print(f"No images found in {args.input}")
+        return
+
+    print(f"Analyzing {len(jpg_paths)} images...")
+    analyzed_images = analyze(args, jpg_paths)
+    if args.verbose and get_fit_summary(analyzed_images):
+        print(get_fit_summary(analyzed_images))
+
+    results_file = args.results_file
+    if results_file is None:
+        filename = util.get_timestamp_string()
+        if args.shard is not None:
+            filename += f"_shard-{args.shard[0]}-of-{args.shard[1]}"
+        if args.results_format == ResultsFormat.JSON:
+            filename += ".json"
+        results_file = Path(args.output_dir, config.DEFAULT_RESULTS_DIR, filename)
+    if args.results_format == ResultsFormat.STORE:
+        store = ResultStore.from_results(analyzed_images, get_analysis_settings(args))
+        store.save(results_file)
+        Catalog(store).save(results_file)
+    else:
+        save_results(analyzed_images, results_file, get_analysis_settings(args))
+    print(f"Saved results for {len(analyzed_images)} images to {results_file}")
+    if args.checkpoint_dir is not None:
+        remove_checkpoint(args.checkpoint_dir)
+
+
+def parse_render_args(args: List[str]) -> argparse.Namespace:
+    """Parse commandline arguments for the `render` command.
+
+    Arguments:
+        args (List[str]): The list of arguments following `render`.
+
+    Returns:
+        argparse.Namespace: The arguments parsed from the commandline interface.
+    """
+    parser = argparse.ArgumentParser(
+        prog="colortools render",
+        description="Sort images and render outputs from a results file written by `colortools analyze`.",
+    )
+    parser.add_argument(
+        "results_file", type=Path, help="results file (or result store directory) written by `colortools analyze`"
+    )
+    add_input_root_arg(parser)
+    add_output_args(parser)
+    return parser.parse_args(args)
+
+
+def add_input_root_arg(parser: argparse.ArgumentParser):
+    """Add the argument that moves the image paths of saved results to where their input is found now.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser to add the argument to.
+    """
+    parser.add_argument(
+        "--input_root",
+        "--input-root",
+        type=Path,
+        default=None,
+        help="where the analyzed input directory is found now (if it was moved, or is mounted elsewhere); image "
+        "paths are rebased from the input recorded in the results",
+    )
+
+
+def save_outputs_from_results(
+    args: argparse.Namespace, analyzed_images: List[AnalysisResult], catalog: Catalog = None
+):
+    """Save outputs for results loaded from disk, exiting with an error if an output needs an image that is missing.
+
+    Args:
+        args (argparse.Namespace): The arguments for this run of ColorTools.
+        analyzed_images (List[AnalysisResult]): The results (or a result store).
+        catalog (Catalog, optional): The catalog of a result store, if it is loaded. Defaults to None.
+    """
+    try:
+        save_outputs(args, analyzed_images, util.get_timestamp_string(), catalog)
+    except FileNotFoundError as e:
+        logging.error(
+            f"Image not found: {e.filename or e}. If the input has moved since it was analyzed, pass its new "
+            "location with --input_root"
+        )
+        sys.exit(1)
+
+
+def run_render(args: List[str]):
+    """Run the `render` command: produce outputs from a results file, without reanalyzing images.
+
+    Images are only read if an output needs their pixels (collages and remapped dominant color graphics).
+
+    Args:
+        args (List[str]): The list of arguments following `render`.
+    """
+    args = parse_render_args(args)
+    catalog = None
+    if ResultStore.is_store(args.results_file):
+        if get_filters(args):
+            catalog = Catalog.load(args.results_file)
+            analyzed_images = catalog.store
+        else:
+            analyzed_images = ResultStore.load(args.results_file)
+        settings = analyzed_images.settings
+    else:
+        analyzed_images, settings = load_results(args.results_file)
+    if args.input_root is not None:
+        if settings.get("input") is None:
+            logging.error(f"{args.results_file} does not record its input, so its image paths cannot be rebased")
+            sys.exit(1)
+        analyzed_images = rebase_results(analyzed_images, settings["input"], args.input_root)
+        if catalog is not None:
+            catalog.store = analyzed_images
+    args.input = args.results_file
+    args.algorithm = util.DominantColorAlgorithm(settings.get("algorithm", config.DEFAULT_DOMINANT_COLOR_ALGORITHM))
+    args = check_args(args)
+    if args:
+        if args.verbose:
+            print()
+            print_action_summary(args)
+        if len(analyzed_images) == 0:
+            print(f"No results found in {args.input}")
+        else:
+            save_outputs_from_results(args, analyzed_images, catalog)
+
+
+def parse_merge_args(args: List[str]) -> argparse.Namespace:
+    """Parse commandline arguments for the `merge` command.
+
+    Arguments:
+        args (List[str]): The list of arguments following `merge`.
+
+    Returns:
+        argparse.Namespace: The arguments parsed from the commandline interface.
+    """
+    parser = argparse.ArgumentParser(
+        prog="colortools merge",
+        description="Merge the results of the shards of a run (`colortools analyze --shard i/n`) and render outputs.",
+    )
+    parser.add_argument(
+        "shard_files", type=Path, nargs="+", help="results files (or result stores) written by each shard"
+    )
+    parser.add_argument(
+        "--results_file",
+        "--results-file",
+        type=Path,
+        default=None,
+        help="save the merged results to this path (a result store if the shards are stores)",
+    )
+    add_input_root_arg(parser)
+    add_output_args(parser)
+    return parser.parse_args(args)
+
+
+def run_merge(args: List[str]):
+    """Run the `merge` command: combine the partial results of a sharded run, then sort and render outputs.
+
+    Outputs are the same as if the run had not been sharded.
+
+    Args:
+        args (List[str]): The list of arguments following `merge`.
+    """
+    args = parse_merge_args(args)
+    try:
+        analyzed_images, settings = merge_shards(args.shard_files, args.input_root)
+    except ValueError as e:
+        logging.error(e)
+        sys.exit(1)
+    print(f"Merged results for {len(analyzed_images)} images from {len(args.shard_files)} shards")
+
+    if args.results_file is not None:
+        if isinstance(analyzed_images, ResultStore):
+            if not ResultStore.can_replace(args.results_file):
+                logging.error(f"Not replacing {args.results_file}, which exists and is not a result store")
+                sys.exit(1)
+            analyzed_images.save(args.results_file)
+            Catalog(analyzed_images).save(args.results_file)
+        else:
+            save_results(analyzed_images, args.results_file, settings)
+        print(f"Saved merged results to {args.results_file}")
+        if not has_output_action(args):
+            return
+
+    args.input = ", ".join(str(shard_file) for shard_file in args.shard_files)
+    args.algorithm = util.DominantColorAlgorithm(settings.get("algorithm", config.DEFAULT_DOMINANT_COLOR_ALGORITHM))
+    args = check_args(args)
+    if args:
+        if args.verbose:
+            print()
+            print_action_summary(args)
+        if len(analyzed_images) > 0:
+            save_outputs_from_results(args, analyzed_images)
+
+
+def parse_query_args(args: List[str]) -> argparse.Namespace:
+    """Parse commandline arguments for the `query` command.
+
+    Arguments:
+        args (List[str]): The list of arguments following `query`.
+
+    Returns:
+        argparse.Namespace: The arguments parsed from the commandline interface.
+    """
+    parser = argparse.ArgumentParser(
+        prog="colortools query",
+        description="Find the images whose dominant colors are closest to a color, in results written by `colortools "
+        "analyze`.",
+    )
+    parser.add_argument(
+        "results_file", type=Path, help="results file (or result store directory) written by `colortools analyze`"
+    )
+    parser.add_argument(
+        "--color",
+        type=util.parse_hex_color,
+        action="append",
+        required=True,
+        help="hex code of the color to search for (e.g. #2E6F95); repeat to run several queries",
+    )
+    parser.add_argument(
+        "--k",
+        type=int,
+        default=config.DEFAULT_N_MATCHES,
+        help="number of images to find per color, if --radius is not provided",
+    )
+    parser.add_argument(
+        "--radius",
+        type=float,
+        default=None,
+        help="find every image with a dominant color within this distance of the color, instead of the closest k",
+    )
+    parser.add_argument(
+        "--color_space",
+        "--color-space",
+        type=ColorSpace,
+        choices=[cs.value for cs in ColorSpace],
+        default=config.DEFAULT_SEARCH_COLOR_SPACE,
+        help="color space in which distances are measured (lab approximates perceived differences)",
+    )
+    parser.add_argument(
+        "--proportion_weight",
+        "--proportion-weight",
+        type=float,
+        default=config.DEFAULT_PROPORTION_WEIGHT,
+        help="distance added to a matched color in proportion to how little of its image it covers (0 to ignore)",
+    )
+    return parser.parse_args(args)
+
+
+def run_query(args: List[str]):
+    """Run the `query` command: print the images whose dominant colors are closest to each color.
+
+    Args:
+        args (List[str]): The list of arguments following `query`.
+    """
+    args = parse_query_args(args)
+    start = time.perf_counter()
+    if ResultStore.is_store(args.results_file):
+        color_index = ColorIndex.from_store(ResultStore.load(args.results_file), args.color_space)
+    else:
+        analyzed_images, _ = load_results(args.results_file)
+        color_index = ColorIndex.from_results(analyzed_images, args.color_space)
+    print(f"Indexed {len(color_index)} images in {time.perf_counter() - start:.2f}s")
+
+    for color_rgb in args.color:
+        hex_color = "#" + "".join(f"{channel:02X}" for channel in color_rgb)
+        start = time.perf_counter()
+        if args.radius is not None:
+            matches = color_index.query_radius(color_rgb, args.radius, args.proportion_weight)
+        else:
+            matches = color_index.query(color_rgb, args.k, args.proportion_weight)
+        query_ms = 1000 * (time.perf_counter() - start)
+        print(f"\n{len(matches)} images closest to {hex_color} ({query_ms:.1f} ms):")
+        for i, match in enumerate(matches):
+            match_hex = "#" + "".join(f"{round(channel):02X}" for channel in match.color_rgb)
+            print(
+                f"{i+1:4.0f}. {match.image_path} ({match_hex}, {match.proportion:.0%}, distance {match.distance:.1f})"
+            )
+
+
+COMMANDS = {
+    "analyze": run_analyze,
+    "render": run_render,
+    "merge": run_merge,
+    "query": run_query,
+    "sweep": run_sweep,
+    "benchmark": run_benchmark,
+}
+
+
 def run():
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+
     args = check_args(parse_args(sys.argv[1:]))
     if args:
         timstamp_str = util.get_timestamp_string()
@@ -232,75 +1423,10 @@ def run():
             print(f"No images found in {args.input}")
         else:
             print(f"Analyzing {n_jpg_paths} images...")
-            analyzed_images = []
-            edge_crop = 0 if args.skip_analysis_crop else config.DEFAULT_EDGE_CROP
-            for jpg_path in tqdm(jpg_paths, ascii=True):
-                analyzed_images.append(
-                    AnalyzedImage(
-                        image_path=jpg_path,
-                        resize_long_axis=config.DEFAULT_RESIZE_LONG_AXIS,
-                        edge_crop=edge_crop,
-                        dominant_color_algorithm=args.algorithm,
-                        n_colors=args.n_colors,
-                        auto_n_heuristic=args.n_colors_heuristic,
-                    )
-                )
-
-            if args.exclude_bw:
-                analyzed_images, _ = sort.separate_color_and_bw(analyzed_images)
-            if args.exclude_color:
-                _, analyzed_image = sort.separate_color_and_bw(analyzed_images)
-
-            if args.sort:
-                sort_function = sort.get_sort_function(args.sort)
-                analyzed_images = sort_function(analyzed_images, args.sort_reverse, args.sort_anchor)
-                n_sorted = len(analyzed_images)
-
-                if args.save_sorted:
-                    dest_dir = Path(args.output_dir, config.DEFAULT_SORTED_DIR, timstamp_str)
-                    for i, analyzed_image in enumerate(analyzed_images):
-                        sorted_image_dest = Path(dest_dir, analyzed_image.generate_filename(i, "sorted"))
-                        visualization.save(analyzed_image, sorted_image_dest)
-                    print(f"Saved {n_sorted} sorted images to {dest_dir}")
-                else:
-                    print(f"Sorted {n_sorted} images:")
-                    for i, image in enumerate(analyzed_images):
-                        print(f"{i+1:4.0f}. {image.image_path}")
-
-            if args.dominant_colors or args.dominant_colors_remapped:
-                dest_dir = Path(args.output_dir, config.DEFAULT_DOMINANT_COLOR_DIR, timstamp_str)
-                for i, analyzed_image in enumerate(analyzed_images):
-                    dominant_colors_dest = dest_dir / analyzed_image.generate_filename(i, "dc")
-                    visualization.save_dominant_color_visualization(
-                        analyzed_image,
-                        config.DEFAULT_DOMINANT_COLOR_CHIP_SIZE,
-                        dominant_colors_dest,
-                        include_remapped_image=args.dominant_colors_remapped,
-                        display=args.display,
-                    )
-                print(f"Saved dominant color graphics to {dest_dir}")
-
-            if args.spectrum:
-                filename = f"{timstamp_str}_spectrum.jpg"
-                spectrum_dest = Path(args.output_dir, config.DEFAULT_SPECTRUM_DIR, filename)
-                visualization.save_spectrum_visualization(
-                    analyzed_images,
-                    args.spectrum_all_colors,
-                    config.DEFAULT_SPECTRUM_HEIGHT,
-                    spectrum_dest,
-                    args.display,
-                )
-                print(f"Saved spectrum graphic to {spectrum_dest}")
-
-            if args.collage:
-                filename = f"{timstamp_str}_collage.jpg"
-                collage_dest = Path(args.output_dir, config.DEFAULT_COLLAGE_DIR, filename)
-                visualization.save_image_collage(
-                    analyzed_images, config.DEFAULT_COLLAGE_WIDTH, collage_dest, args.display
-                )
-                print(f"Saved collage graphic to {collage_dest}")
-
-            if args.summary:
-                print("\nAnalyzed image summary:")
-                for i, image in enumerate(analyzed_images):
-                    print(f"{i+1}. {image.get_pretty_string()}")
+            keep_images = args.dominant_colors or args.dominant_colors_remapped or args.collage
+            analyzed_images = analyze(args, jpg_paths, keep_images)
+            if args.verbose and get_fit_summary(analyzed_images):
+                print(get_fit_summary(analyzed_images))
+            save_outputs(args, analyzed_images, timstamp_str)
+            if args.checkpoint_dir is not None:
+                remove_checkpoint(args.checkpoint_dir)  # outputs are complete; nothing left to resume
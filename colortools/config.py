@@ -1,4 +1,11 @@
+DEFAULT_ADAPTIVE_RESOLUTIONS = (64, 128)
+DEFAULT_ADAPTIVE_TOLERANCE = 4.0
+DEFAULT_ASYNC_CONCURRENCY = 4
+DEFAULT_BENCHMARK_DIR = "benchmarks/"
+DEFAULT_CHECKPOINT_INTERVAL = 5
+DEFAULT_CHUNK_SIZE = 16
 DEFAULT_COLLAGE_DIR = "collages/"
+DEFAULT_COLLAGE_LAYOUT = "rows"
 DEFAULT_COLLAGE_SPACING = 10
 DEFAULT_COLLAGE_WIDTH = "sqrt"
 DEFAULT_DOMINANT_COLOR_ALGORITHM = "kmeans"
@@ -7,14 +14,39 @@ DEFAULT_DOMINANT_COLOR_CHIP_GAP = 10
 DEFAULT_DOMINANT_COLOR_CHIP_SIZE = 80
 DEFAULT_DOMINANT_COLOR_DIR = "dominant_colors/"
 DEFAULT_EDGE_CROP = 0.05
+DEFAULT_EXECUTOR = "serial"
+DEFAULT_EXPORT_STRATEGY = "hardlink"
+DEFAULT_EXPORT_WORKERS = 1
+DEFAULT_GRAYSCALE_MAX_SATURATION = 0.08
+DEFAULT_GRAYSCALE_THUMBNAIL_SIZE = 32
+DEFAULT_GRAYSCALE_TOLERANCE = 4
+DEFAULT_KMEANS_INIT = "kmeans++"
+DEFAULT_LAYOUT_CHUNK_SIZE = 256
 DEFAULT_N_COLORS = None
 DEFAULT_N_COLORS_HEURISTIC = "auto_n_binned_with_threshold"
 DEFAULT_N_COLORS_MAX = 8
 DEFAULT_N_COLORS_MIN = 2
+DEFAULT_N_MATCHES = 50
+DEFAULT_N_SAMPLES = 10000
 DEFAULT_OUTPUT_DIR = "output/"
+DEFAULT_PATH_N_NEIGHBORS = 8
+DEFAULT_PREFETCH_LOOKAHEAD = 8
+DEFAULT_PREFETCH_MEMORY_CAP = 256 * 1024 * 1024
+DEFAULT_PROPORTION_WEIGHT = 0.0
+DEFAULT_RECORDS_DIR = "records/"
 DEFAULT_RESIZE_LONG_AXIS = 500
+DEFAULT_RESULTS_DIR = "results/"
+DEFAULT_RESULTS_FORMAT = "json"
+DEFAULT_RETAINED_MEMORY_BUDGET = 2 * 1024 * 1024
+DEFAULT_SAMPLING_SEED = 0
+DEFAULT_SAMPLING_STRATEGY = "none"
+DEFAULT_SEARCH_COLOR_SPACE = "lab"
+DEFAULT_SHARD_STRATEGY = "index"
+DEFAULT_SOM_ITERATIONS = 20
 DEFAULT_SORT_METHOD = "hue"
 DEFAULT_SORTED_DIR = "sorted/"
 DEFAULT_SPECTRUM_HEIGHT = 800
 DEFAULT_SPECTRUM_DIR = "spectrums/"
 DEFAULT_SPECTRUM_RATIO = 16 / 9
+DEFAULT_SWEEP_DIR = "sweeps/"
+DEFAULT_WARM_START_SIMILARITY = 0.9
@@ -0,0 +1,108 @@
+import copy
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, List, Union
+
+from colortools.results import AnalysisResult
+
+HASH_BLOCK_SIZE = 1024 * 1024
+PARTIAL_HASH_SIZE = 64 * 1024
+
+
+def get_partial_hash(image_path: Union[Path, str], size: int = PARTIAL_HASH_SIZE) -> str:
+    """Get a BLAKE2 hash of the first and last bytes of a file, to cheaply rule out files that differ.
+
+    Args:
+        image_path (Union[Path, str]): The path of the file.
+        size (int, optional): The number of bytes to hash at each end of the file. Defaults to PARTIAL_HASH_SIZE.
+
+    Returns:
+        str: The hash, as a hexadecimal string.
+    """
+    file_hash = hashlib.blake2b()
+    with open(image_path, "rb") as f:
+        file_hash.update(f.read(size))
+        f.seek(max(0, os.fstat(f.fileno()).st_size - size))
+        file_hash.update(f.read(size))
+    return file_hash.hexdigest()
+
+
+def get_content_hash(image_path: Union[Path, str]) -> str:
+    """Get a BLAKE2 hash of the full contents of a file.
+
+    Args:
+        image_path (Union[Path, str]): The path of the file.
+
+    Returns:
+        str: The hash, as a hexadecimal string.
+    """
+    file_hash = hashlib.blake2b()
+    with open(image_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def group_duplicates(image_paths: List[Union[Path, str]]) -> List[List[Path]]:
+    """Group files with identical contents.
+
+    Files are first grouped by size, then (for sizes shared by several files) by a partial hash, then by a hash of
+    their full contents, so that only files that are likely duplicates are read in full.
+
+    Args:
+        image_paths (List[Union[Path, str]]): The paths of the files.
+
+    Returns:
+        List[List[Path]]: One group per distinct content, each listing the paths with that content in input order,
+            ordered by their first path.
+    """
+    image_paths = [Path(image_path) for image_path in image_paths]
+    candidates = [image_paths]
+    for get_key in [lambda path: path.stat().st_size, get_partial_hash, get_content_hash]:
+        next_candidates = []
+        for group in candidates:
+            if len(group) == 1:
+                next_candidates.append(group)
+                continue
+            by_key = {}
+            for image_path in group:
+                by_key.setdefault(get_key(image_path), []).append(image_path)
+            next_candidates.extend(by_key.values())
+        candidates = next_candidates
+
+    position = {image_path: i for i, image_path in reversed(list(enumerate(image_paths)))}
+    groups = [sorted(group, key=position.get) for group in candidates]
+    return sorted(groups, key=lambda group: position[group[0]])
+
+
+def get_duplicate_map(groups: List[List[Path]]) -> Dict[Path, List[Path]]:
+    """Map the first path of each group of duplicates to the other paths in the group.
+
+    Args:
+        groups (List[List[Path]]): Groups of duplicates, as returned by `group_duplicates`.
+
+    Returns:
+        Dict[Path, List[Path]]: The duplicates of each group's first path, for groups with duplicates.
+    """
+    return {group[0]: group[1:] for group in groups if len(group) > 1}
+
+
+def fan_out(analyzed_image: AnalysisResult, duplicate_paths: List[Path]) -> List[AnalysisResult]:
+    """Copy a result to the duplicates of its image.
+
+    Copies share the result's dominant colors, histogram and pixels (if any); only their paths differ.
+
+    Args:
+        analyzed_image (AnalysisResult): The result.
+        duplicate_paths (List[Path]): The paths of the files with the same contents as the result's image.
+
+    Returns:
+        List[AnalysisResult]: A copy of the result for each duplicate.
+    """
+    copies = []
+    for duplicate_path in duplicate_paths:
+        duplicate = copy.copy(analyzed_image)
+        duplicate.image_path = Path(duplicate_path)
+        copies.append(duplicate)
+    return copies
@@ -0,0 +1,252 @@
+import errno
+import os
+import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+COPY_CHUNK_SIZE = 1 << 30
+
+# errors that indicate a strategy is unsupported for a source/destination pair, rather than a problem with
+# a particular file; once one of these is raised, the strategy is skipped for the rest of the batch. Other errors
+# (such as permission errors) are raised, rather than hidden behind a fallback
+UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.ENOTSUP,
+    errno.EOPNOTSUPP,
+    errno.ENOSYS,
+}
+
+
+class ExportStrategy(str, Enum):
+    """Enum for strategies used to export original image files (in fallback order)."""
+
+    HARDLINK = "hardlink"
+    REFLINK = "reflink"
+    SYMLINK = "symlink"
+    COPY = "copy"
+
+
+def get_export_function(export_strategy: ExportStrategy) -> Callable:
+    """Get the function that corresponds to an export strategy name.
+
+    Args:
+        export_strategy (ExportStrategy): The name of the export strategy function to return.
+
+    Raises:
+        ValueError: Raised if the provided export strategy name is not recognized.
+
+    Returns:
+        Callable: The function corresponding to the export strategy name.
+    """
+    if export_strategy == ExportStrategy.HARDLINK:
+        return export_hardlink
+    elif export_strategy == ExportStrategy.REFLINK:
+        return export_reflink
+    elif export_strategy == ExportStrategy.SYMLINK:
+        return export_symlink
+    elif export_strategy == ExportStrategy.COPY:
+        return export_copy
+    else:
+        raise ValueError(f"Invalid export strategy selected: {export_strategy}")
+
+
+def get_fallback_chain(export_strategy: ExportStrategy) -> List[ExportStrategy]:
+    """Get the provided export strategy followed by all strategies it may fall back to.
+
+    Args:
+        export_strategy (ExportStrategy): The preferred export strategy.
+
+    Returns:
+        List[ExportStrategy]: The preferred strategy, followed by its fallbacks in order.
+    """
+    strategies = list(ExportStrategy)
+    return strategies[strategies.index(ExportStrategy(export_strategy)) :]
+
+
+def export_hardlink(src_path: Path, dest_path: Path):
+    """Export a file by creating a hard link to it.
+
+    Args:
+        src_path (Path): The file to export.
+        dest_path (Path): The path of the new link.
+    """
+    os.link(src_path, dest_path)
+
+
+def export_reflink(src_path: Path, dest_path: Path):
+    """Export a file by creating a copy-on-write clone of it (Linux filesystems such as Btrfs and XFS only).
+
+    Args:
+        src_path (Path): The file to export.
+        dest_path (Path): The path of the clone.
+
+    Raises:
+        OSError: If the platform or filesystem does not support cloning.
+    """
+    if fcntl is None:
+        raise OSError(errno.ENOTSUP, "reflinks are not supported on this platform", str(src_path))
+
+    with open(src_path, "rb") as src, open(dest_path, "xb") as dest:
+        try:
+            fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dest.close()
+            os.unlink(dest_path)
+            raise
+
+
+def export_symlink(src_path: Path, dest_path: Path):
+    """Export a file by creating a symbolic link to it.
+
+    Args:
+        src_path (Path): The file to export.
+        dest_path (Path): The path of the new link.
+    """
+    os.symlink(os.path.abspath(src_path), dest_path)
+
+
+def export_copy(src_path: Path, dest_path: Path):
+    """Export a file by copying its bytes in the kernel, without passing them through user space where possible.
+
+    Uses `os.copy_file_range` or `os.sendfile` if available, otherwise `shutil.copyfileobj`. If the copy fails, the
+    partially written copy is removed.
+
+    Args:
+        src_path (Path): The file to export.
+        dest_path (Path): The path of the copy.
+    """
+    with open(src_path, "rb") as src, open(dest_path, "xb") as dest:
+        try:
+            _copy_contents(src, dest)
+        except BaseException:
+            dest.close()
+            os.unlink(dest_path)
+            raise
+
+
+def _copy_contents(src: BinaryIO, dest: BinaryIO):
+    if not (hasattr(os, "copy_file_range") or hasattr(os, "sendfile")):
+        shutil.copyfileobj(src, dest)
+        return
+
+    remaining = os.fstat(src.fileno()).st_size
+    try:
+        while remaining > 0:
+            count = min(remaining, COPY_CHUNK_SIZE)
+            if hasattr(os, "copy_file_range"):
+                copied = os.copy_file_range(src.fileno(), dest.fileno(), count)
+            else:
+                copied = os.sendfile(dest.fileno(), src.fileno(), None, count)
+            if copied == 0:
+                break
+            remaining -= copied
+    except OSError as e:
+        if e.errno not in UNSUPPORTED_ERRNOS:
+            raise
+        src.seek(0)
+        dest.seek(0)
+        dest.truncate()
+        shutil.copyfileobj(src, dest)
+
+
+def export_file(
+    src_path: Union[Path, str], dest_path: Union[Path, str], export_strategy: ExportStrategy = ExportStrategy.HARDLINK
+) -> ExportStrategy:
+    """Export a single file using the provided strategy, falling back to the next strategy if it is unsupported.
+
+    Args:
+        src_path (Union[Path, str]): The file to export.
+        dest_path (Union[Path, str]): The destination path; its parent directory must already exist.
+        export_strategy (ExportStrategy, optional): The preferred export strategy. Defaults to HARDLINK.
+
+    Raises:
+        FileExistsError: If the destination path already exists.
+        OSError: If none of the strategies in the fallback chain succeeded.
+
+    Returns:
+        ExportStrategy: The strategy that was used to export the file.
+    """
+    return _export_with_fallback(Path(src_path), Path(dest_path), get_fallback_chain(export_strategy))
+
+
+def export_files(
+    src_dest_pairs: List[Tuple[Union[Path, str], Union[Path, str]]],
+    export_strategy: ExportStrategy = ExportStrategy.HARDLINK,
+    n_workers: int = 1,
+) -> Dict[ExportStrategy, int]:
+    """Export a batch of files, grouped by destination directory.
+
+    Each destination directory is created once, and strategies that turn out to be unsupported for a directory
+    (e.g. hard links across filesystems) are dropped for the rest of that directory's batch, so that the fallback
+    cost is paid once per directory rather than once per file. If `n_workers` is greater than 1, the batches are
+    exported with a thread pool.
+
+    Args:
+        src_dest_pairs (List[Tuple[Union[Path, str], Union[Path, str]]]): Pairs of source and destination paths.
+        export_strategy (ExportStrategy, optional): The preferred export strategy. Defaults to HARDLINK.
+        n_workers (int, optional): The number of threads used to export files. Defaults to 1.
+
+    Returns:
+        Dict[ExportStrategy, int]: The number of files exported with each strategy.
+    """
+    batches = defaultdict(list)
+    for src_path, dest_path in src_dest_pairs:
+        dest_path = Path(dest_path)
+        batches[dest_path.parent].append((Path(src_path), dest_path))
+
+    for dest_dir in batches:
+        dest_dir.mkdir(parents=True, exist_ok=True)
+
+    # split large directories so that every worker has something to do
+    jobs = []
+    for batch in batches.values():
+        job_size = max(1, -(-len(batch) // max(1, n_workers)))
+        jobs.extend(batch[i : i + job_size] for i in range(0, len(batch), job_size))
+
+    fallback_chain = get_fallback_chain(export_strategy)
+    counts = {strategy: 0 for strategy in ExportStrategy}
+    if n_workers > 1 and len(jobs) > 1:
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            job_counts = list(pool.map(lambda job: _export_batch(job, fallback_chain), jobs))
+    else:
+        job_counts = [_export_batch(job, fallback_chain) for job in jobs]
+
+    for job_count in job_counts:
+        for strategy, count in job_count.items():
+            counts[strategy] += count
+    return counts
+
+
+def _export_batch(batch: List[Tuple[Path, Path]], fallback_chain: List[ExportStrategy]) -> Dict[ExportStrategy, int]:
+    fallback_chain = list(fallback_chain)
+    counts = defaultdict(int)
+    for src_path, dest_path in batch:
+        used = _export_with_fallback(src_path, dest_path, fallback_chain)
+        counts[used] += 1
+        while fallback_chain[0] != used:
+            fallback_chain.pop(0)  # later files in this batch skip strategies known to be unsupported
+    return counts
+
+
+def _export_with_fallback(src_path: Path, dest_path: Path, fallback_chain: List[ExportStrategy]) -> ExportStrategy:
+    last_error = None
+    for strategy in fallback_chain:
+        try:
+            get_export_function(strategy)(src_path, dest_path)
+            return strategy
+        except FileExistsError:
+            raise
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            last_error = e
+    raise OSError(f"Unable to export {src_path} to {dest_path}: {last_error}")
@@ -1,12 +1,15 @@
 from enum import Enum
-from typing import Callable, Dict
+from typing import Callable, Dict, Tuple
 
 import numpy as np
+from PIL import Image
+from sklearn.cluster import KMeans
 
 from colortools.config import DEFAULT_N_COLORS_MAX, DEFAULT_N_COLORS_MIN
 from colortools.util import round_to_int
 
 PIL_NUM_HUES = 256  # images converted to HSV are in the range 0-255 (8 bits)
+COLOR_HISTOGRAM_BITS = 4  # bits kept per channel when binning colors for the incremental heuristic
 
 
 class NColorsHeuristic(str, Enum):
@@ -16,6 +19,7 @@ class NColorsHeuristic(str, Enum):
     AUTO_N_HUE_BINNED = "auto_n_hue_binned"
     AUTO_N_BINNED_WITH_THRESHOLD = "auto_n_binned_with_threshold"
     AUTO_N_SIMPLE_THRESHOLD = "auto_n_simple_threshold"
+    AUTO_N_INCREMENTAL = "auto_n_incremental"
 
 
 def get_n_heuristic(heuristic_name: NColorsHeuristic) -> Callable:
@@ -38,6 +42,8 @@ def get_n_heuristic(heuristic_name: NColorsHeuristic) -> Callable:
         return auto_n_binned_with_threshold
     elif heuristic_name == NColorsHeuristic.AUTO_N_SIMPLE_THRESHOLD:
         return auto_n_simple_threshold
+    elif heuristic_name == NColorsHeuristic.AUTO_N_INCREMENTAL:
+        return auto_n_incremental
     else:
         raise ValueError(f"Invalid heuristic selected: {heuristic_name}")
 
@@ -74,7 +80,42 @@ def compute_hue_dist(image_hsv: np.ndarray, n_bins: int = PIL_NUM_HUES, hue_coun
     return hue_dist
 
 
-def auto_n_hue(image_hsv: np.ndarray) -> int:
+def compute_hue_histogram(image_hsv: np.ndarray) -> np.ndarray:
+    """Count the pixels of each hue in the provided image.
+
+    The histogram can be computed once and passed to several heuristics, which then skip scanning the image.
+
+    Args:
+        image_hsv (np.ndarray): The image for which to count hues.
+
+    Raises:
+        ValueError: If an invalid hue is encountered.
+
+    Returns:
+        np.ndarray: The number of pixels of each hue, indexed by hue (PIL_NUM_HUES bins).
+    """
+    hues = np.asarray(image_hsv)[..., 0].ravel().astype(np.int64)
+    if hues.size > 0 and (hues.min() < 0 or hues.max() >= PIL_NUM_HUES):
+        raise ValueError(f"Invalid hue value (hues must be in the range 0-{PIL_NUM_HUES - 1})")
+    return np.bincount(hues, minlength=PIL_NUM_HUES)
+
+
+def bin_hue_histogram(hue_histogram: np.ndarray, n_bins: int) -> np.ndarray:
+    """Combine the bins of a hue histogram, using the same bin boundaries as `compute_hue_dist`.
+
+    Args:
+        hue_histogram (np.ndarray): A histogram from `compute_hue_histogram`.
+        n_bins (int): The number of bins to combine the histogram into.
+
+    Returns:
+        np.ndarray: The number of pixels in each of the `n_bins` bins.
+    """
+    n_bins = min(n_bins, PIL_NUM_HUES)
+    bin_indices = (np.arange(PIL_NUM_HUES) / (PIL_NUM_HUES / n_bins)).astype(np.int64)
+    return np.bincount(bin_indices, weights=hue_histogram, minlength=n_bins)
+
+
+def auto_n_hue(image_hsv: np.ndarray, hue_histogram: np.ndarray = None) -> int:
     """Determine the number of clusters based on the number of hues present in the provided image.
 
     This heuristic determines `n` using the following steps:
@@ -85,18 +126,19 @@ def auto_n_hue(image_hsv: np.ndarray) -> int:
 
     Args:
         image_rgb (np.ndarray): The image to generate `n` for.
+        hue_histogram (np.ndarray, optional): The image's hue histogram, if already computed. Defaults to None.
 
     Returns:
         int: The value of `n` (number of clusters) generated by this heuristic.
     """
-    flattened_hsv = image_hsv.reshape((image_hsv.shape[0] * image_hsv.shape[1], 3))
-    n_hues = set([hsv[0] for hsv in flattened_hsv])
-    hue_coverage = len(n_hues) / PIL_NUM_HUES
+    if hue_histogram is None:
+        hue_histogram = compute_hue_histogram(image_hsv)
+    hue_coverage = np.count_nonzero(hue_histogram) / PIL_NUM_HUES
     n_clusters = max(DEFAULT_N_COLORS_MIN, round_to_int(hue_coverage * DEFAULT_N_COLORS_MAX))
     return n_clusters
 
 
-def auto_n_hue_binned(image_hsv: np.ndarray) -> int:
+def auto_n_hue_binned(image_hsv: np.ndarray, hue_histogram: np.ndarray = None) -> int:
     """Determine the number of clusters based on the range of hues present in the provided image.
 
     This heuristic determines `n` using the following steps:
@@ -108,14 +150,17 @@ def auto_n_hue_binned(image_hsv: np.ndarray) -> int:
 
     Args:
         image_rgb (np.ndarray): The image to generate `n` for.
+        hue_histogram (np.ndarray, optional): The image's hue histogram, if already computed. Defaults to None.
 
     Returns:
         int: The value of `n` (number of clusters) generated by this heuristic.
     """
-    return auto_n_binned_with_threshold(image_hsv, threshold=0)
+    return auto_n_binned_with_threshold(image_hsv, threshold=0, hue_histogram=hue_histogram)
 
 
-def auto_n_binned_with_threshold(image_hsv: np.ndarray, threshold: float = 0.1) -> int:
+def auto_n_binned_with_threshold(
+    image_hsv: np.ndarray, threshold: float = 0.1, hue_histogram: np.ndarray = None
+) -> int:
     """Determine the number of clusters based on the range of hues present in the provided image.
 
     This heuristic determines `n` using the following steps:
@@ -130,19 +175,21 @@ def auto_n_binned_with_threshold(image_hsv: np.ndarray, threshold: float = 0.1)
     Args:
         image_rgb (np.ndarray): The image to generate `n` for.
         threshold (float): The threshold for determining the bin count to use for `n`.
+        hue_histogram (np.ndarray, optional): The image's hue histogram, if already computed. Defaults to None.
 
     Returns:
         int: The value of `n` (number of clusters) generated by this heuristic.
     """
-    hue_dist = compute_hue_dist(image_hsv, DEFAULT_N_COLORS_MAX, True)
-    max_hue_count = np.max(list(hue_dist.values()))
-    hue_count_threshold = threshold * max_hue_count
-    n_clusters = sum([1 for hue_count in list(hue_dist.values()) if hue_count > hue_count_threshold])
+    if hue_histogram is None:
+        hue_histogram = compute_hue_histogram(image_hsv)
+    hue_counts = bin_hue_histogram(hue_histogram, DEFAULT_N_COLORS_MAX)
+    hue_count_threshold = threshold * np.max(hue_counts)
+    n_clusters = int(np.count_nonzero(hue_counts > hue_count_threshold))
     n_clusters = max(DEFAULT_N_COLORS_MIN, n_clusters)
     return n_clusters
 
 
-def auto_n_simple_threshold(image_hsv: np.ndarray, threshold: float = 0.1) -> int:
+def auto_n_simple_threshold(image_hsv: np.ndarray, threshold: float = 0.1, hue_histogram: np.ndarray = None) -> int:
     """Determine the number of clusters based on the range of hues present in the provided image.
 
     This heuristic sets `n` using the following steps:
@@ -156,13 +203,93 @@ def auto_n_simple_threshold(image_hsv: np.ndarray, threshold: float = 0.1) -> in
     Args:
         image_rgb (np.ndarray): The image to generate `n` for.
         threshold (float): The threshold for determining the bin count to use for `n`.
+        hue_histogram (np.ndarray, optional): The image's hue histogram, if already computed. Defaults to None.
 
     Returns:
         int: The value of `n` (number of clusters) generated by this heuristic.
     """
-    hue_dist = compute_hue_dist(image_hsv, DEFAULT_N_COLORS_MAX, True)
-    pixel_count = sum(list(hue_dist.values()))
-    threhold_hue_count = threshold * pixel_count
-    n_clusters = sum([1 for hue_count in list(hue_dist.values()) if hue_count > threhold_hue_count])
+    if hue_histogram is None:
+        hue_histogram = compute_hue_histogram(image_hsv)
+    hue_counts = bin_hue_histogram(hue_histogram, DEFAULT_N_COLORS_MAX)
+    threhold_hue_count = threshold * np.sum(hue_counts)
+    n_clusters = int(np.count_nonzero(hue_counts > threhold_hue_count))
     n_clusters = max(DEFAULT_N_COLORS_MIN, n_clusters)
     return n_clusters
+
+
+def compute_color_histogram(image_hsv: np.ndarray, bits: int = COLOR_HISTOGRAM_BITS) -> Tuple[np.ndarray, np.ndarray]:
+    """Bin the colors of the provided image, keeping `bits` bits per channel.
+
+    Args:
+        image_hsv (np.ndarray): The image for which to bin colors.
+        bits (int, optional): The number of bits to keep per channel. Defaults to COLOR_HISTOGRAM_BITS.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The RGB color at the center of each non-empty bin, as an array of shape
+            (n_bins, 3), and the number of pixels in each bin.
+    """
+    shift = 8 - bits
+    binned = np.asarray(image_hsv, dtype=np.uint8).reshape((-1, 3)) >> shift  # stays uint8
+    bin_indices = (binned[:, 0].astype(np.uint16) << (2 * bits)) | (binned[:, 1].astype(np.uint16) << bits)
+    bin_indices |= binned[:, 2]
+    counts = np.bincount(bin_indices, minlength=1 << (3 * bits))
+    nonzero = np.flatnonzero(counts)
+
+    mask = (1 << bits) - 1
+    bin_centers_hsv = np.stack([nonzero >> (2 * bits), (nonzero >> bits) & mask, nonzero & mask], axis=-1)
+    bin_centers_hsv = ((bin_centers_hsv << shift) + (1 << shift) // 2).astype(np.uint8)
+    bin_centers_rgb = np.asarray(Image.fromarray(bin_centers_hsv[np.newaxis], mode="HSV").convert("RGB"))[0]
+    return bin_centers_rgb.astype(float), counts[nonzero].astype(float)
+
+
+def auto_n_incremental(image_hsv: np.ndarray, threshold: float = 0.05, hue_histogram: np.ndarray = None) -> int:
+    """Determine the number of clusters by adding clusters until the improvement of the fit levels off.
+
+    This heuristic determines `n` using the following steps:
+    - bin the colors of the provided image into a small color histogram, and work with the (weighted) bins instead
+    of the pixels
+    - start with a single cluster; to go from `k` to `k + 1` clusters, split the cluster with the largest inertia
+    along its principal axis (bisecting k-means), and refine all clusters with a single k-means run started from
+    the previous centers
+    - stop as soon as the reduction in inertia from the added cluster, as a fraction of the histogram's total
+    inertia, is below the threshold, and set `n` to the number of clusters before that
+
+    Args:
+        image_hsv (np.ndarray): The image to generate `n` for.
+        threshold (float): The minimum fraction of the total inertia an added cluster must explain.
+        hue_histogram (np.ndarray, optional): Unused; accepted for compatibility with other heuristics. Defaults to
+            None.
+
+    Returns:
+        int: The value of `n` (number of clusters) generated by this heuristic.
+    """
+    colors, weights = compute_color_histogram(image_hsv)
+    centers = np.average(colors, axis=0, weights=weights)[np.newaxis]
+    labels = np.zeros(len(colors), dtype=int)
+    total_inertia = float(np.sum(weights * np.sum((colors - centers[0]) ** 2, axis=1)))
+    inertia = total_inertia
+    n_clusters = 1
+    while total_inertia > 0 and n_clusters < min(DEFAULT_N_COLORS_MAX, len(colors)):
+        centers = _split_largest_cluster(colors, weights, centers, labels)
+        model = KMeans(n_clusters=n_clusters + 1, init=centers, n_init=1, random_state=0)
+        model.fit(colors, sample_weight=weights)
+        if (inertia - model.inertia_) / total_inertia < threshold:
+            break
+        centers, labels, inertia = model.cluster_centers_, model.labels_, model.inertia_
+        n_clusters += 1
+    return max(DEFAULT_N_COLORS_MIN, n_clusters)
+
+
+def _split_largest_cluster(
+    colors: np.ndarray, weights: np.ndarray, centers: np.ndarray, labels: np.ndarray
+) -> np.ndarray:
+    cluster_inertias = [
+        np.sum(weights[labels == i] * np.sum((colors[labels == i] - center) ** 2, axis=1))
+        for i, center in enumerate(centers)
+    ]
+    largest = int(np.argmax(cluster_inertias))
+    members, member_weights = colors[labels == largest], weights[labels == largest]
+    covariance = np.cov(members, rowvar=False, aweights=member_weights) if len(members) > 1 else np.zeros((3, 3))
+    eigenvalues, eigenvectors = np.linalg.eigh(np.atleast_2d(covariance))
+    offset = np.sqrt(max(eigenvalues[-1], 0)) * eigenvectors[:, -1]
+    return np.vstack([np.delete(centers, largest, axis=0), centers[largest] + offset, centers[largest] - offset])
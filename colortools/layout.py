@@ -0,0 +1,202 @@
+import math
+from enum import Enum
+from typing import Callable, Tuple
+
+import numpy as np
+from scipy.ndimage import gaussian_filter
+from scipy.optimize import linear_sum_assignment
+from scipy.spatial import cKDTree
+
+import colortools.config as config
+
+
+class CollageLayout(str, Enum):
+    """Enum for the ways of arranging images on the grid of a collage."""
+
+    ROWS = "rows"
+    GRID = "grid"
+
+
+def get_layout_function(layout: CollageLayout) -> Callable:
+    """Get the function that corresponds to a collage layout.
+
+    Each function takes the colors of the images (in CIELAB, in their current order) and the number of columns of
+    the grid, and returns the order in which to place the images on the grid, row by row.
+
+    Args:
+        layout (CollageLayout): The collage layout.
+
+    Raises:
+        ValueError: Raised if the provided collage layout is not recognized.
+
+    Returns:
+        Callable: The function corresponding to the collage layout.
+    """
+    if layout == CollageLayout.ROWS:
+        return get_row_layout
+    elif layout == CollageLayout.GRID:
+        return get_grid_layout
+    else:
+        raise ValueError(f"Invalid collage layout selected: {layout}")
+
+
+def get_row_layout(colors: np.ndarray, n_cols: int) -> np.ndarray:
+    """Keep images in their current order (for instance, sorted), filling the grid row by row.
+
+    Args:
+        colors (np.ndarray): The colors of the images, of shape (n_images, 3).
+        n_cols (int): The number of columns of the grid.
+
+    Returns:
+        np.ndarray: The order of the images on the grid.
+    """
+    return np.arange(len(colors))
+
+
+def get_grid_layout(
+    colors: np.ndarray,
+    n_cols: int,
+    n_iter: int = config.DEFAULT_SOM_ITERATIONS,
+    chunk_size: int = config.DEFAULT_LAYOUT_CHUNK_SIZE,
+) -> np.ndarray:
+    """Arrange images on a grid so that neighbors in both directions have similar colors.
+
+    A self-organizing map with one node per cell of the grid is fitted to the colors (see `fit_som`), which gives
+    every cell a color that varies smoothly across the grid and every image a (fractional) position on it. Images
+    are then split between the two halves of the grid by their positions along its longer side, recursively, and
+    each chunk of at most `chunk_size` cells is solved exactly as a linear assignment of its images to its cells,
+    minimizing the squared distances between the colors of the images and those of their cells.
+
+    Like the row layout, the grid is filled from the top left, so only the last row can be incomplete.
+
+    Args:
+        colors (np.ndarray): The colors of the images, of shape (n_images, 3).
+        n_cols (int): The number of columns of the grid.
+        n_iter (int, optional): The number of iterations of the self-organizing map. Defaults to
+            config.DEFAULT_SOM_ITERATIONS.
+        chunk_size (int, optional): The maximum number of cells assigned at once. Defaults to
+            config.DEFAULT_LAYOUT_CHUNK_SIZE.
+
+    Returns:
+        np.ndarray: The order of the images on the grid.
+    """
+    colors = np.asarray(colors, dtype=np.float64).reshape((-1, 3))
+    n_images = len(colors)
+    if n_images <= 1:
+        return np.arange(n_images)
+    n_rows = math.ceil(n_images / n_cols)
+    weights = fit_som(colors, n_rows, n_cols, n_iter).reshape((-1, 3))
+    positions = get_som_positions(colors, weights, n_cols)
+
+    layout = np.empty(n_images, dtype=np.int64)
+    stack = [(np.arange(n_images), np.arange(n_images))]  # cells (row by row) and the images placed in them
+    while stack:
+        cells, images = stack.pop()
+        if len(cells) <= chunk_size:
+            costs = np.sum((colors[images][:, np.newaxis] - weights[cells][np.newaxis]) ** 2, axis=-1)
+            image_indices, cell_indices = linear_sum_assignment(costs)
+            layout[cells[cell_indices]] = images[image_indices]
+            continue
+        cell_rows, cell_cols = np.divmod(cells, n_cols)
+        if np.ptp(cell_rows) > np.ptp(cell_cols):
+            cell_order = np.lexsort((cell_cols, cell_rows))
+            image_order = np.lexsort((positions[images, 1], positions[images, 0]))
+        else:
+            cell_order = np.lexsort((cell_rows, cell_cols))
+            image_order = np.lexsort((positions[images, 0], positions[images, 1]))
+        half = len(cells) // 2
+        stack.append((cells[cell_order[:half]], images[image_order[:half]]))
+        stack.append((cells[cell_order[half:]], images[image_order[half:]]))
+    return layout
+
+
+def fit_som(colors: np.ndarray, n_rows: int, n_cols: int, n_iter: int = config.DEFAULT_SOM_ITERATIONS) -> np.ndarray:
+    """Fit a self-organizing map (with batch updates) of a grid of nodes to colors.
+
+    Nodes start on the plane of the two principal components of the colors, and each iteration moves every node to
+    the mean of the colors whose closest node is near it on the grid, weighted by a Gaussian of the distance on the
+    grid. The Gaussian shrinks from a quarter of the grid to under a cell, so that the map first orders itself
+    globally, then fits the colors locally. Means are computed for all nodes at once, by smoothing per-node sums
+    and counts with a Gaussian filter.
+
+    Args:
+        colors (np.ndarray): The colors, of shape (n_colors, 3).
+        n_rows (int): The number of rows of the grid.
+        n_cols (int): The number of columns of the grid.
+        n_iter (int, optional): The number of iterations. Defaults to config.DEFAULT_SOM_ITERATIONS.
+
+    Returns:
+        np.ndarray: The color of each node, of shape (n_rows, n_cols, 3).
+    """
+    n_cells = n_rows * n_cols
+    mean = colors.mean(axis=0)
+    _, singular_values, components = np.linalg.svd(colors - mean, full_matrices=False)
+    spread = 2 * singular_values / math.sqrt(len(colors))  # two standard deviations along each component
+    # the principal component spans the longer side of the grid
+    long_axis = np.linspace(-1, 1, max(n_rows, n_cols))[:, np.newaxis] * spread[0] * components[0]
+    short_axis = np.linspace(-1, 1, min(n_rows, n_cols))[:, np.newaxis] * spread[1] * components[1]
+    if n_cols >= n_rows:
+        weights = mean + long_axis[np.newaxis] + short_axis[:, np.newaxis]
+    else:
+        weights = mean + long_axis[:, np.newaxis] + short_axis[np.newaxis]
+
+    start_sigma, end_sigma = max(max(n_rows, n_cols) / 4, 1.0), 0.5
+    for i in range(n_iter):
+        sigma = start_sigma * (end_sigma / start_sigma) ** (i / max(n_iter - 1, 1))
+        _, nodes = cKDTree(weights.reshape((-1, 3))).query(colors)
+        counts = np.bincount(nodes, minlength=n_cells).astype(np.float64).reshape((n_rows, n_cols))
+        sums = np.stack(
+            [np.bincount(nodes, weights=colors[:, channel], minlength=n_cells) for channel in range(3)], axis=-1
+        ).reshape((n_rows, n_cols, 3))
+        smoothed_counts = gaussian_filter(counts, sigma, mode="constant")
+        smoothed_sums = gaussian_filter(sums, (sigma, sigma, 0), mode="constant")
+        has_colors = smoothed_counts > 1e-9
+        weights[has_colors] = smoothed_sums[has_colors] / smoothed_counts[has_colors][:, np.newaxis]
+    return weights
+
+
+def get_som_positions(colors: np.ndarray, weights: np.ndarray, n_cols: int, k: int = 4) -> np.ndarray:
+    """Get the fractional position of each color on the grid of a self-organizing map.
+
+    A color's position is the mean of the positions of its `k` closest nodes, weighted by inverse distance, so that
+    colors with the same closest node are still ordered.
+
+    Args:
+        colors (np.ndarray): The colors, of shape (n_colors, 3).
+        weights (np.ndarray): The color of each node, row by row, of shape (n_cells, 3).
+        n_cols (int): The number of columns of the grid.
+        k (int, optional): The number of closest nodes. Defaults to 4.
+
+    Returns:
+        np.ndarray: The row and column of each color, of shape (n_colors, 2).
+    """
+    k = min(k, len(weights))
+    distances, nodes = cKDTree(weights).query(colors, k=k)
+    distances, nodes = distances.reshape((len(colors), k)), nodes.reshape((len(colors), k))
+    node_weights = 1 / (distances + 1e-9)
+    node_positions = np.stack(np.divmod(nodes, n_cols), axis=-1)
+    return np.sum(node_positions * node_weights[..., np.newaxis], axis=1) / np.sum(node_weights, axis=1)[:, None]
+
+
+def get_neighbor_distances(colors: np.ndarray, layout: np.ndarray, n_cols: int) -> Tuple[float, float]:
+    """Measure how coherent a layout is: the mean color distance between horizontal and vertical neighbors.
+
+    Args:
+        colors (np.ndarray): The colors of the images, of shape (n_images, 3).
+        layout (np.ndarray): The order of the images on the grid, row by row.
+        n_cols (int): The number of columns of the grid.
+
+    Returns:
+        Tuple[float, float]: The mean distance between horizontal neighbors, and between vertical neighbors.
+    """
+    placed = np.asarray(colors, dtype=np.float64)[np.asarray(layout)]
+    n_images = len(placed)
+    cells = np.arange(n_images)
+    right = cells[(cells % n_cols < n_cols - 1) & (cells + 1 < n_images)]
+    below = cells[cells + n_cols < n_images]
+    horizontal = np.linalg.norm(placed[right] - placed[right + 1], axis=1)
+    vertical = np.linalg.norm(placed[below] - placed[below + n_cols], axis=1)
+    return (
+        float(horizontal.mean()) if len(horizontal) else 0.0,
+        float(vertical.mean()) if len(vertical) else 0.0,
+    )
@@ -0,0 +1,113 @@
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Tuple, Union
+
+import colortools.config as config
+
+
+class PrefetchReader:
+    """
+    Iterate over image files while a thread pool reads the next files into memory, so that decoding never waits on
+    disk or network latency.
+
+    The files read ahead hold at most `memory_cap` bytes (unless a single file is larger). The highest number of
+    bytes held at once is recorded in `peak_bytes`.
+    """
+
+    def __init__(
+        self,
+        image_paths: Iterable[Union[Path, str]],
+        lookahead: int = config.DEFAULT_PREFETCH_LOOKAHEAD,
+        memory_cap: int = config.DEFAULT_PREFETCH_MEMORY_CAP,
+        n_workers: int = None,
+        use_mmap: bool = False,
+    ):
+        """Create an instance of this class.
+
+        Args:
+            image_paths (Iterable[Union[Path, str]]): The files to read, in the order they should be returned.
+            lookahead (int, optional): The maximum number of files to read ahead of the consumer. Defaults to
+                config.DEFAULT_PREFETCH_LOOKAHEAD.
+            memory_cap (int, optional): The maximum number of bytes to hold in memory for files that have been read
+                ahead; at least one file is always read, regardless of its size. Defaults to
+                config.DEFAULT_PREFETCH_MEMORY_CAP.
+            n_workers (int, optional): The number of reader threads; if None, uses `lookahead`. Defaults to None.
+            use_mmap (bool, optional): Whether to memory-map files (and advise the kernel to read them ahead)
+                instead of reading them into buffers. Each mapping is closed when the next file is requested, so
+                its contents must be used before then. Defaults to False.
+        """
+        self.image_paths = image_paths
+        self.lookahead = max(1, lookahead)
+        self.memory_cap = memory_cap
+        self.n_workers = n_workers if n_workers is not None else self.lookahead
+        self.use_mmap = use_mmap
+        self.peak_bytes = 0
+
+    def __iter__(self) -> Iterator[Tuple[Path, BinaryIO]]:
+        """Iterate over the files, in order.
+
+        Yields:
+            Iterator[Tuple[Path, BinaryIO]]: Each path, along with a file-like object holding its contents.
+        """
+        paths = iter(self.image_paths)
+        pending = deque()
+        pending_bytes = 0
+        next_file = None  # the next file to read, once it fits under the memory cap
+        buffer = None  # the file held by the consumer
+        with ThreadPoolExecutor(max_workers=self.n_workers) as pool:
+            try:
+                while True:
+                    while len(pending) < self.lookahead:
+                        if next_file is None:
+                            try:
+                                image_path = Path(next(paths))
+                            except StopIteration:
+                                break
+                            next_file = (image_path, os.stat(image_path).st_size)
+                        image_path, size = next_file
+                        if pending and pending_bytes + size > self.memory_cap:
+                            break
+                        pending.append((image_path, size, pool.submit(self.read, image_path)))
+                        pending_bytes += size
+                        self.peak_bytes = max(self.peak_bytes, pending_bytes)
+                        next_file = None
+
+                    if not pending:
+                        return
+
+                    image_path, size, future = pending.popleft()
+                    pending_bytes -= size
+                    buffer = future.result()
+                    yield image_path, buffer
+                    if self.use_mmap:
+                        buffer.close()
+                    buffer = None
+            finally:
+                if self.use_mmap:  # close the files held or read ahead if iteration stops early
+                    if buffer is not None:
+                        buffer.close()
+                    for _, _, future in pending:
+                        if not future.cancel() and future.exception() is None:
+                            future.result().close()
+
+    def read(self, image_path: Path) -> BinaryIO:
+        """Read a single file into memory.
+
+        Args:
+            image_path (Path): The file to read.
+
+        Returns:
+            BinaryIO: A file-like object holding the file's contents.
+        """
+        with open(image_path, "rb") as f:
+            if not self.use_mmap:
+                return BytesIO(f.read())
+
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_WILLNEED)
+            return mapped
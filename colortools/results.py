@@ -0,0 +1,553 @@
+import csv
+import json
+import os
+from enum import Enum
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+import colortools.util as util
+from colortools.analysis import KMeansInit, predict_from_centers
+
+RESULTS_FILE_VERSION = 1
+RECORD_FIELDS = [
+    "image_path",
+    "width",
+    "height",
+    "orientation",
+    "dominant_color_algorithm",
+    "n_colors",
+    "dominant_colors_rgb",
+    "dominant_colors_hsv",
+    "cluster_histogram",
+    "resize_long_axis",
+    "kmeans_init",
+    "n_iter",
+    "fit_seconds",
+    "analysis_long_axis",
+]
+# how CSV cells are parsed back into `to_dict` values (strings are kept as-is; empty cells are None)
+CSV_CONVERTERS = {
+    "width": int,
+    "height": int,
+    "orientation": int,
+    "n_colors": int,
+    "dominant_colors_rgb": json.loads,
+    "dominant_colors_hsv": json.loads,
+    "cluster_histogram": json.loads,
+    "resize_long_axis": int,
+    "n_iter": int,
+    "fit_seconds": float,
+    "analysis_long_axis": int,
+}
+
+
+class OutputFormat(str, Enum):
+    """Enum for the formats of per-image result records."""
+
+    JSONL = "jsonl"
+    CSV = "csv"
+
+
+class AnalysisResult:
+    """
+    Compact representation of an image's analysis results. Holds basic image metadata and the dominant colors found
+    during analysis, but neither the image's pixels nor the fitted model, so that results are cheap to keep in memory
+    and to send between processes. Pixels are re-read from disk if they are needed.
+    """
+
+    analysis_long_axis = None
+    cluster_histogram = None
+    fit_seconds = None
+    kmeans_init = None
+    label_map = None
+    n_iter = None
+    resize_long_axis = None
+    _pil_image = None
+
+    def __init__(
+        self,
+        image_path: Union[Path, str],
+        width: int,
+        height: int,
+        orientation: util.ImageOrientation,
+        dominant_color_algorithm: util.DominantColorAlgorithm,
+        n_colors: int,
+        dominant_colors_rgb: List[List],
+        dominant_colors_hsv: List[List],
+        cluster_histogram: List[Tuple[np.ndarray, float]] = None,
+        resize_long_axis: int = None,
+    ):
+        """Create an instance of this class.
+
+        Args:
+            image_path (Union[Path, str]): The path to the JPG image on disk.
+            width (int): The width of the image after resizing.
+            height (int): The height of the image after resizing.
+            orientation (util.ImageOrientation): The orientation of the image.
+            dominant_color_algorithm (util.DominantColorAlgorithm): The algorithm used to determine the dominant
+                colors.
+            n_colors (int): The number of dominant colors.
+            dominant_colors_rgb (List[List]): The dominant colors, as RGB values.
+            dominant_colors_hsv (List[List]): The dominant colors, as HSV values.
+            cluster_histogram (List[Tuple[np.ndarray, float]], optional): The dominant colors (cluster centers) and
+                their proportions, if the KMEANS algorithm was used. Defaults to None.
+            resize_long_axis (int, optional): The length of the long axis the image was resized to for analysis.
+                Defaults to None.
+        """
+        self.image_path = Path(image_path)
+        self.width = width
+        self.height = height
+        self.orientation = orientation
+        self.dominant_color_algorithm = dominant_color_algorithm
+        self.n_colors = n_colors
+        self.dominant_colors_rgb = dominant_colors_rgb
+        self.dominant_colors_hsv = dominant_colors_hsv
+        self.cluster_histogram = cluster_histogram
+        self.resize_long_axis = resize_long_axis
+
+    @classmethod
+    def from_analyzed_image(cls, analyzed_image: "AnalysisResult", keep_image: bool = False) -> "AnalysisResult":
+        """Create a compact result from an analyzed image.
+
+        Args:
+            analyzed_image (AnalysisResult): The analyzed image.
+            keep_image (bool, optional): Whether to keep a reference to the analyzed image's resized pixels, so that
+                they do not need to be re-read from disk later. Defaults to False.
+
+        The k-means fit statistics (`kmeans_init`, `n_iter`, `fit_seconds` and `analysis_long_axis`) are kept as well.
+
+        Returns:
+            AnalysisResult: The compact result.
+        """
+        result = cls(
+            analyzed_image.image_path,
+            analyzed_image.width,
+            analyzed_image.height,
+            analyzed_image.orientation,
+            analyzed_image.dominant_color_algorithm,
+            analyzed_image.n_colors,
+            analyzed_image.dominant_colors_rgb,
+            analyzed_image.dominant_colors_hsv,
+            analyzed_image.cluster_histogram,
+            analyzed_image.resize_long_axis,
+        )
+        result.kmeans_init = analyzed_image.kmeans_init
+        result.n_iter = analyzed_image.n_iter
+        result.fit_seconds = analyzed_image.fit_seconds
+        result.analysis_long_axis = analyzed_image.analysis_long_axis
+        if keep_image:
+            result.pil_image = analyzed_image.pil_image
+        return result
+
+    def to_dict(self) -> Dict:
+        """Get this result as a dictionary of JSON-serializable values (see `from_dict`).
+
+        Returns:
+            Dict: This result's metadata, dominant colors and cluster histogram.
+        """
+        cluster_histogram = None
+        if self.cluster_histogram is not None:
+            cluster_histogram = [
+                [np.asarray(rgb).tolist(), float(proportion)] for rgb, proportion in self.cluster_histogram
+            ]
+        return {
+            "image_path": str(self.image_path),
+            "width": self.width,
+            "height": self.height,
+            "orientation": self.orientation.value,
+            "dominant_color_algorithm": self.dominant_color_algorithm.value,
+            "n_colors": self.n_colors,
+            "dominant_colors_rgb": np.asarray(self.dominant_colors_rgb, dtype=float).tolist(),
+            "dominant_colors_hsv": np.asarray(self.dominant_colors_hsv, dtype=float).tolist(),
+            "cluster_histogram": cluster_histogram,
+            "resize_long_axis": self.resize_long_axis,
+            "kmeans_init": self.kmeans_init.value if self.kmeans_init is not None else None,
+            "n_iter": self.n_iter,
+            "fit_seconds": self.fit_seconds,
+            "analysis_long_axis": self.analysis_long_axis,
+        }
+
+    @classmethod
+    def from_dict(cls, result_dict: Dict) -> "AnalysisResult":
+        """Create a result from a dictionary created by `to_dict`.
+
+        Args:
+            result_dict (Dict): The dictionary.
+
+        Returns:
+            AnalysisResult: The result.
+        """
+        cluster_histogram = None
+        if result_dict["cluster_histogram"] is not None:
+            cluster_histogram = [(np.array(rgb), proportion) for rgb, proportion in result_dict["cluster_histogram"]]
+        result = cls(
+            result_dict["image_path"],
+            result_dict["width"],
+            result_dict["height"],
+            util.ImageOrientation(result_dict["orientation"]),
+            util.DominantColorAlgorithm(result_dict["dominant_color_algorithm"]),
+            result_dict["n_colors"],
+            result_dict["dominant_colors_rgb"],
+            result_dict["dominant_colors_hsv"],
+            cluster_histogram,
+            result_dict["resize_long_axis"],
+        )
+        if result_dict.get("kmeans_init") is not None:
+            result.kmeans_init = KMeansInit(result_dict["kmeans_init"])
+        result.n_iter = result_dict.get("n_iter")
+        result.fit_seconds = result_dict.get("fit_seconds")
+        result.analysis_long_axis = result_dict.get("analysis_long_axis")
+        return result
+
+    @property
+    def pil_image(self) -> Image.Image:
+        """The resized image; read from disk on first access if it is not held in memory.
+
+        Returns:
+            Image.Image: The resized image.
+        """
+        if self._pil_image is None:
+            with Image.open(self.image_path) as pil_image:
+                self._pil_image = pil_image.convert("RGB").resize((self.width, self.height))
+        return self._pil_image
+
+    @pil_image.setter
+    def pil_image(self, pil_image: Image.Image):
+        self._pil_image = pil_image
+
+    def get_dominant_colors(self, hsv=False, round=False) -> List[List]:
+        """Get the dominant colors that were computed for this image.
+
+        Args:
+            hsv (bool, optional): Whether to convert colors to HSV space before returning. Defaults to False.
+
+        Returns:
+            List[List]: A list of the dominant colors for this image.
+        """
+        dom_colors = self.dominant_colors_hsv if hsv else self.dominant_colors_rgb
+        dom_colors = util.round_array(dom_colors) if round else dom_colors
+        if hsv:
+            for dc in dom_colors:
+                dc[0] = dc[0] % 360  # hue space fix
+        return dom_colors
+
+    def get_dominant_color(self, hsv=False, round=False) -> List:
+        """Get the single most dominant color for this image.
+
+        Args:
+            hsv (bool, optional): Whether to convert the color to HSV space before returning. Defaults to False.
+
+        Returns:
+            List: _description_
+        """
+        return self.get_dominant_colors(hsv, round)[0]
+
+    def get_orientation(self) -> util.ImageOrientation:
+        """Get the orientation of this image.
+
+        Returns:
+            util.ImageOrientation: This image's orientation.
+        """
+        return self.orientation
+
+    def is_bw(self) -> bool:
+        """Determine whether this image is black and white.
+
+        Determines whether the represented image is black and white by checking to see if the saturation of
+        the most dominant color is equal to 0.
+
+        Returns:
+            bool: Whether this image is black and white or not.
+        """
+        return self.get_dominant_color(hsv=True)[1] < 1
+
+    def get_remapped_image(self, other: "AnalysisResult" = None) -> Union[Image.Image, None]:
+        """Map the pixels of this image (or another image) to this image's dominant colors.
+
+        Each pixel is replaced by the nearest cluster center, which is equivalent to predicting with the model that
+        was fitted to this image. If this result holds a label map for its own pixels, the label map is used instead.
+
+        Args:
+            other (AnalysisResult, optional): Another image whose pixels to remap. If `None`, use this image's own
+                pixels. Defaults to None.
+
+        Returns:
+            Union[Image.Image, None]: An image mapped to this image's dominant colors.
+        """
+        if self.cluster_histogram is None:
+            raise ValueError(f"Cannot remap images using the {self.dominant_color_algorithm.value} algorithm")
+
+        target = self if other is None else other
+        target_colors = np.array([rgb for rgb, _ in self.cluster_histogram])
+        if other is None and self.label_map is not None:
+            labels = self.label_map
+        else:
+            rgb_data = np.asarray(target.pil_image).reshape((target.height * target.width, 3))
+            labels = predict_from_centers(rgb_data, target_colors)
+        remapped_image = np.uint8(target_colors)[labels]  # index a uint8 palette, rather than upcasting every pixel
+        return Image.fromarray(remapped_image.reshape((target.height, target.width, 3)))
+
+    def generate_filename(self, index: int, base: str) -> str:
+        """Generate a filename using this analyzed image.
+
+        Args:
+            index (int): An index to use as a prefix for the generated filename.
+            base (str): A base string to use in the generated filename.
+
+        Returns:
+            str: The generated filename.
+        """
+        if index is not None:
+            filename = f"{str(index)}_"
+        else:
+            filename = ""
+
+        dom_color_hsv = util.round_array(self.get_dominant_color(hsv=True))
+        dom_hue, dom_sat, dom_val = dom_color_hsv[0], dom_color_hsv[1], dom_color_hsv[2]
+        filename += f"{base}_hue={dom_hue}_sat={dom_sat}_val={dom_val}_n={self.n_colors}.jpg"
+        return filename
+
+    def get_pretty_string(self) -> str:
+        """Get a pretty string representation of this image and its dominant colors.
+
+        Returns:
+            str: A pretty string representation of this analyzed image.
+        """
+        out = f"{self.image_path.name}: n={self.n_colors}, algorithm={self.dominant_color_algorithm.value} \n"
+        out += f"    rgb={util.round_array(self.dominant_colors_rgb)}\n"
+        out += f"    hsv={util.round_array(self.dominant_colors_hsv)}"
+        return out
+
+    def get_huesort_metric(self) -> int:
+        """Get a value to use for sorting.
+
+        Currently, this method returns the dominant color's hue, shifted by -90 degrees so that colors in the
+        red region of the spectrum come before colors in the blue region of the spectrum. (If not shifted, some
+        reds may appear at the beginning of the sort order, while some reds might appear at the end of the sort
+        order.)
+
+        Returns:
+            int: A value to use when sorting this image.
+        """
+        dom_hue = self.get_dominant_color(hsv=True)[0]
+        dom_hue = (dom_hue + 90) % 360
+        return dom_hue
+
+
+def save_results(analyzed_images: List[AnalysisResult], dest_path: Union[Path, str], settings: Dict = None):
+    """Save analysis results to a JSON results file (atomically), so that outputs can be rendered without reanalysis.
+
+    Image paths are saved as absolute paths, so that the file can be used from any working directory.
+
+    Args:
+        analyzed_images (List[AnalysisResult]): The results to save.
+        dest_path (Union[Path, str]): The path of the results file.
+        settings (Dict, optional): The analysis settings, saved alongside the results for reference. Defaults to
+            None.
+    """
+    dest_path = Path(dest_path)
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    result_dicts = []
+    for analyzed_image in analyzed_images:
+        result_dict = analyzed_image.to_dict()
+        result_dict["image_path"] = str(Path(analyzed_image.image_path).resolve())
+        result_dicts.append(result_dict)
+
+    tmp_path = dest_path.with_name(dest_path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"version": RESULTS_FILE_VERSION, "settings": settings or {}, "results": result_dicts}, f)
+    os.replace(tmp_path, dest_path)
+
+
+def load_results(src_path: Union[Path, str]) -> Tuple[List[AnalysisResult], Dict]:
+    """Load analysis results from a results file written by `save_results`.
+
+    Args:
+        src_path (Union[Path, str]): The path of the results file.
+
+    Raises:
+        ValueError: If the file was written by an unsupported version of ColorTools.
+
+    Returns:
+        Tuple[List[AnalysisResult], Dict]: The results, in the order they were saved, and the analysis settings.
+    """
+    with open(src_path) as f:
+        contents = json.load(f)
+    if contents.get("version") != RESULTS_FILE_VERSION:
+        raise ValueError(f"Unsupported results file version: {contents.get('version')}")
+    return [AnalysisResult.from_dict(result_dict) for result_dict in contents["results"]], contents["settings"]
+
+
+class RecordWriter:
+    """
+    Writes one record per analysis result to a JSON Lines or CSV file as results arrive, flushing after each record
+    so that other processes can read the file while it is written, and so that the records written before an
+    interrupted run survive it.
+
+    Records hold the values of `AnalysisResult.to_dict`, with absolute image paths. Files are encoded as UTF-8. In
+    CSV files, lists are written as JSON and missing values as empty cells; quoted paths may contain line breaks.
+    """
+
+    def __init__(self, dest_path: Union[Path, str], output_format: OutputFormat, append: bool = False):
+        """Create a writer.
+
+        Args:
+            dest_path (Union[Path, str]): The path of the records file.
+            output_format (OutputFormat): The format of the records file.
+            append (bool, optional): Whether to add records to an existing file (for instance, when resuming a
+                run) instead of replacing it. A partially written last record (from an interrupted run) is removed
+                first. Defaults to False.
+        """
+        self.dest_path = Path(dest_path)
+        self.output_format = OutputFormat(output_format)
+        self.n_records = 0
+        self.dest_path.parent.mkdir(parents=True, exist_ok=True)
+        if append and self.dest_path.exists():
+            truncate_partial_record(self.dest_path, self.output_format)
+        is_new = not append or not self.dest_path.exists() or self.dest_path.stat().st_size == 0
+        self.file = open(self.dest_path, "w" if is_new else "a", newline="", encoding="utf-8")
+        self.csv_writer = None
+        if self.output_format == OutputFormat.CSV:
+            self.csv_writer = csv.writer(self.file)
+            if is_new:
+                self.csv_writer.writerow(RECORD_FIELDS)
+                self.file.flush()
+
+    def write(self, analyzed_image: AnalysisResult):
+        """Write and flush the record of a result.
+
+        Args:
+            analyzed_image (AnalysisResult): The result.
+        """
+        result_dict = analyzed_image.to_dict()
+        result_dict["image_path"] = str(Path(analyzed_image.image_path).resolve())
+        if self.output_format == OutputFormat.JSONL:
+            self.file.write(json.dumps(result_dict) + "\n")
+        else:
+            self.csv_writer.writerow(
+                [
+                    "" if value is None else json.dumps(value) if isinstance(value, list) else value
+                    for value in (result_dict[field] for field in RECORD_FIELDS)
+                ]
+            )
+        self.file.flush()
+        self.n_records += 1
+
+    def close(self):
+        """Close the records file."""
+        self.file.close()
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def truncate_partial_record(
+    path: Union[Path, str], output_format: OutputFormat = OutputFormat.JSONL, block_size: int = 1 << 16
+):
+    """Truncate a records file after its last complete record, removing a partially written last record.
+
+    JSON Lines files are read backwards from their end, one block at a time, until a line break is found. CSV
+    records may contain line breaks (in quoted paths), so CSV files are parsed from the start instead (see
+    `iter_csv_records`).
+
+    Args:
+        path (Union[Path, str]): The path of the records file.
+        output_format (OutputFormat, optional): The format of the records file. Defaults to OutputFormat.JSONL.
+        block_size (int, optional): The number of bytes read at a time. Defaults to 1 << 16.
+    """
+    with open(path, "rb+") as f:
+        if OutputFormat(output_format) == OutputFormat.CSV:
+            end = 0
+            for _, end in iter_csv_records(f):
+                pass
+            f.truncate(end)
+            return
+
+        position = f.seek(0, os.SEEK_END)
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            line_break = f.read(position - start).rfind(b"\n")
+            if line_break >= 0:
+                f.truncate(start + line_break + 1)
+                return
+            position = start
+        f.truncate(0)
+
+
+def load_records(src_path: Union[Path, str], output_format: OutputFormat = None) -> List[AnalysisResult]:
+    """Load analysis results from a records file written by `RecordWriter`.
+
+    A last record that was only partially written (by an interrupted run) is ignored.
+
+    Args:
+        src_path (Union[Path, str]): The path of the records file.
+        output_format (OutputFormat, optional): The format of the records file; if None, it is determined by the
+            file's extension (`.csv` for CSV, JSON Lines otherwise). Defaults to None.
+
+    Returns:
+        List[AnalysisResult]: The results, in the order they were written.
+    """
+    src_path = Path(src_path)
+    if output_format is None:
+        is_csv = src_path.suffix.lower() == f".{OutputFormat.CSV.value}"
+    else:
+        is_csv = OutputFormat(output_format) == OutputFormat.CSV
+    with open(src_path, "rb") as f:
+        if is_csv:
+            rows = [row for row, _ in iter_csv_records(f)][1:]  # after the header
+            result_dicts = [
+                {
+                    field: None if value == "" else CSV_CONVERTERS.get(field, str)(value)
+                    for field, value in zip(RECORD_FIELDS, row)
+                }
+                for row in rows
+            ]
+        else:
+            # a last line without a line break was only partially written
+            result_dicts = [json.loads(line) for line in f if line.endswith(b"\n")]
+    return [AnalysisResult.from_dict(result_dict) for result_dict in result_dicts]
+
+
+def iter_csv_records(f: BinaryIO) -> Iterator[Tuple[List[str], int]]:
+    """Iterate over the complete records of a CSV records file, along with the offset at which each record ends.
+
+    Quoted values may contain line breaks, so the file is parsed with `csv.reader` rather than split into lines. A
+    last record that was only partially written (one that does not end with a line break, or ends within a quoted
+    value) is not returned.
+
+    Args:
+        f (BinaryIO): The records file, opened in binary mode at its start.
+
+    Raises:
+        csv.Error: If a record before the last one is malformed.
+
+    Yields:
+        Iterator[Tuple[List[str], int]]: The values of each record (the header first), and the number of bytes from
+            the start of the file to the end of the record.
+    """
+    end = 0
+    last_line = b""
+
+    def read_lines() -> Iterator[str]:
+        nonlocal end, last_line
+        for line in f:
+            end += len(line)
+            last_line = line
+            yield line.decode("utf-8")
+
+    try:
+        for row in csv.reader(read_lines(), strict=True):
+            if not last_line.endswith(b"\n"):
+                return  # the file ends within this record
+            yield row, end
+    except csv.Error:
+        if f.read(1):
+            raise
+        # the file ends within a quoted value
@@ -0,0 +1,140 @@
+from enum import Enum
+from typing import Callable
+
+import numpy as np
+
+from colortools.util import round_to_int
+
+
+class SamplingStrategy(str, Enum):
+    """Enum type for pixel sampling strategies."""
+
+    NONE = "none"
+    GRID = "grid"
+    RULE_OF_THIRDS = "rule_of_thirds"
+    RANDOM = "random"
+
+
+def get_sampling_function(strategy: SamplingStrategy) -> Callable:
+    """Get the function that corresponds to a sampling strategy.
+
+    Each function takes the height and width of an image, the number of pixels to sample and a random seed, and
+    returns the indices of the sampled pixels in the flattened image.
+
+    Args:
+        strategy (SamplingStrategy): The sampling strategy.
+
+    Raises:
+        ValueError: Raised if the provided sampling strategy is not recognized.
+
+    Returns:
+        Callable: The function corresponding to the sampling strategy.
+    """
+    if strategy == SamplingStrategy.NONE:
+        return get_all_indices
+    elif strategy == SamplingStrategy.GRID:
+        return get_grid_sample_indices
+    elif strategy == SamplingStrategy.RULE_OF_THIRDS:
+        return get_rule_of_thirds_sample_indices
+    elif strategy == SamplingStrategy.RANDOM:
+        return get_random_sample_indices
+    else:
+        raise ValueError(f"Invalid sampling strategy selected: {strategy}")
+
+
+def get_all_indices(height: int, width: int, n_samples: int = None, seed: int = None) -> np.ndarray:
+    """Get the indices of all pixels of an image (no sampling).
+
+    Args:
+        height (int): The height of the image.
+        width (int): The width of the image.
+        n_samples (int, optional): Unused. Defaults to None.
+        seed (int, optional): Unused. Defaults to None.
+
+    Returns:
+        np.ndarray: The indices of all pixels in the flattened image.
+    """
+    return np.arange(height * width)
+
+
+def get_grid_sample_indices(height: int, width: int, n_samples: int, seed: int = None) -> np.ndarray:
+    """Get a stratified sample of pixels: the center pixel of each cell of a regular grid.
+
+    The grid's cells are as close to square as possible, and there are about `n_samples` of them, so that every
+    region of the image is represented in proportion to its area.
+
+    Args:
+        height (int): The height of the image.
+        width (int): The width of the image.
+        n_samples (int): The (approximate) number of pixels to sample.
+        seed (int, optional): Unused; the grid is deterministic. Defaults to None.
+
+    Returns:
+        np.ndarray: The indices of the sampled pixels in the flattened image, in raster order.
+    """
+    if n_samples >= height * width:
+        return get_all_indices(height, width)
+
+    cell_size = np.sqrt(height * width / n_samples)
+    n_rows = min(height, max(1, round_to_int(height / cell_size)))
+    n_cols = min(width, max(1, round_to_int(width / cell_size)))
+    rows = ((np.arange(n_rows) + 0.5) * height / n_rows).astype(int)
+    cols = ((np.arange(n_cols) + 0.5) * width / n_cols).astype(int)
+    return (rows[:, np.newaxis] * width + cols[np.newaxis, :]).ravel()
+
+
+def get_rule_of_thirds_sample_indices(height: int, width: int, n_samples: int, seed: int = None) -> np.ndarray:
+    """Get a sample of pixels along the "rule of thirds" lines and the lines that bisect the image.
+
+    If the lines hold more than `n_samples` pixels, evenly spaced pixels along them are kept.
+
+    Args:
+        height (int): The height of the image.
+        width (int): The width of the image.
+        n_samples (int): The maximum number of pixels to sample.
+        seed (int, optional): Unused; the lines are deterministic. Defaults to None.
+
+    Returns:
+        np.ndarray: The indices of the sampled pixels in the flattened image, in raster order.
+    """
+    rows = np.unique([height // 3, height // 2, (2 * height) // 3])
+    cols = np.unique([width // 3, width // 2, (2 * width) // 3])
+    row_indices = (rows[:, np.newaxis] * width + np.arange(width)[np.newaxis, :]).ravel()
+    col_indices = (np.arange(height)[:, np.newaxis] * width + cols[np.newaxis, :]).ravel()
+    indices = np.union1d(row_indices, col_indices)
+    if len(indices) > n_samples:
+        indices = indices[np.linspace(0, len(indices) - 1, n_samples).astype(int)]
+    return indices
+
+
+def get_random_sample_indices(height: int, width: int, n_samples: int, seed: int = None) -> np.ndarray:
+    """Get a uniformly random sample of pixels, without replacement.
+
+    Args:
+        height (int): The height of the image.
+        width (int): The width of the image.
+        n_samples (int): The number of pixels to sample.
+        seed (int, optional): The seed of the random number generator, for reproducible samples. Defaults to None.
+
+    Returns:
+        np.ndarray: The indices of the sampled pixels in the flattened image, in raster order.
+    """
+    if n_samples >= height * width:
+        return get_all_indices(height, width)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(height * width, n_samples, replace=False))
+
+
+def sample_pixels(image_data: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """Take the sampled pixels of an image.
+
+    Args:
+        image_data (np.ndarray): The image, as an array of shape (height, width, channels).
+        indices (np.ndarray): The indices of the sampled pixels in the flattened image.
+
+    Returns:
+        np.ndarray: The sampled pixels, as an array of shape (n_samples, 1, channels), so that they can be used
+            wherever an image array is expected.
+    """
+    channels = image_data.shape[2]
+    return image_data.reshape((-1, channels))[indices].reshape((-1, 1, channels))
@@ -0,0 +1,216 @@
+from enum import Enum
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Sequence
+
+import numpy as np
+from sklearn.neighbors import KDTree
+
+import colortools.config as config
+from colortools.results import AnalysisResult
+from colortools.store import ResultStore
+from colortools.util import rgb_to_lab
+
+
+class ColorSpace(str, Enum):
+    """Enum for the color spaces in which colors can be compared."""
+
+    RGB = "rgb"
+    LAB = "lab"
+
+
+def get_color_space_function(color_space: ColorSpace) -> Callable:
+    """Get the function that converts RGB colors to a color space.
+
+    Args:
+        color_space (ColorSpace): The color space.
+
+    Raises:
+        ValueError: Raised if the provided color space is not recognized.
+
+    Returns:
+        Callable: A function taking an array of RGB colors of shape (..., 3) and returning the converted colors.
+    """
+    if color_space == ColorSpace.RGB:
+        return lambda rgb_array: np.asarray(rgb_array, dtype=np.float64)
+    elif color_space == ColorSpace.LAB:
+        return rgb_to_lab
+    else:
+        raise ValueError(f"Invalid color space selected: {color_space}")
+
+
+class ColorMatch(NamedTuple):
+    """An image matching a color query, through the dominant color closest to the query."""
+
+    image_index: int  # position of the image in the indexed collection
+    image_path: Path
+    distance: float  # distance of the matched color, plus its proportion penalty (if any)
+    color_rgb: List[float]
+    proportion: float
+
+
+class ColorIndex:
+    """
+    Spatial index (a KD-tree) over the dominant colors of a collection of analyzed images, for nearest-color queries.
+
+    Every dominant color of every image is indexed, in RGB or CIELAB space. An image matches a query through its
+    closest dominant color. Queries can favor images in which the matched color covers more of the image, by adding
+    `proportion_weight * (1 - proportion)` to each color's distance, where `proportion` is the color's share of the
+    image (from its cluster histogram, or an equal share of its dominant colors if it has none).
+    """
+
+    def __init__(
+        self,
+        image_paths: Sequence[Path],
+        colors_rgb: np.ndarray,
+        image_indices: np.ndarray,
+        proportions: np.ndarray,
+        color_space: ColorSpace = config.DEFAULT_SEARCH_COLOR_SPACE,
+    ):
+        """Create an index over colors (see `from_results` and `from_store`).
+
+        Args:
+            image_paths (Sequence[Path]): The path of each image.
+            colors_rgb (np.ndarray): The dominant colors of all images, as RGB values of shape (n_colors, 3).
+            image_indices (np.ndarray): The index (in `image_paths`) of the image of each color.
+            proportions (np.ndarray): The proportion of its image covered by each color.
+            color_space (ColorSpace, optional): The color space in which to compare colors. Defaults to
+                config.DEFAULT_SEARCH_COLOR_SPACE.
+        """
+        self.image_paths = image_paths
+        self.colors_rgb = np.asarray(colors_rgb, dtype=np.float64).reshape((-1, 3))
+        self.image_indices = np.asarray(image_indices, dtype=np.int64)
+        self.proportions = np.asarray(proportions, dtype=np.float64)
+        self.color_space = ColorSpace(color_space)
+        self.convert = get_color_space_function(self.color_space)
+        self.tree = KDTree(self.convert(self.colors_rgb)) if len(self.colors_rgb) > 0 else None
+
+    @classmethod
+    def from_results(
+        cls, analyzed_images: List[AnalysisResult], color_space: ColorSpace = config.DEFAULT_SEARCH_COLOR_SPACE
+    ) -> "ColorIndex":
+        """Index the dominant colors of analysis results.
+
+        Args:
+            analyzed_images (List[AnalysisResult]): The results.
+            color_space (ColorSpace, optional): The color space in which to compare colors. Defaults to
+                config.DEFAULT_SEARCH_COLOR_SPACE.
+
+        Returns:
+            ColorIndex: The index.
+        """
+        colors_rgb, image_indices, proportions = [], [], []
+        for i, analyzed_image in enumerate(analyzed_images):
+            n_colors = len(analyzed_image.dominant_colors_rgb)
+            colors_rgb.extend(analyzed_image.dominant_colors_rgb)
+            image_indices.extend([i] * n_colors)
+            if analyzed_image.cluster_histogram is not None:
+                proportions.extend(float(proportion) for _, proportion in analyzed_image.cluster_histogram)
+            else:
+                proportions.extend([1 / n_colors] * n_colors)
+        image_paths = [analyzed_image.image_path for analyzed_image in analyzed_images]
+        return cls(image_paths, colors_rgb, image_indices, proportions, color_space)
+
+    @classmethod
+    def from_store(
+        cls, store: ResultStore, color_space: ColorSpace = config.DEFAULT_SEARCH_COLOR_SPACE
+    ) -> "ColorIndex":
+        """Index the dominant colors of a result store, without creating a result per image.
+
+        Args:
+            store (ResultStore): The store.
+            color_space (ColorSpace, optional): The color space in which to compare colors. Defaults to
+                config.DEFAULT_SEARCH_COLOR_SPACE.
+
+        Returns:
+            ColorIndex: The index.
+        """
+        store = store.compact()
+        counts = np.diff(store.color_offsets)
+        image_indices = np.repeat(np.arange(len(store)), counts)
+        proportions = np.asarray(store.proportions, dtype=np.float64)
+        no_histogram = np.isnan(proportions)
+        proportions[no_histogram] = 1 / counts[image_indices[no_histogram]]
+        return cls(_StorePaths(store), store.colors_rgb, image_indices, proportions, color_space)
+
+    def __len__(self) -> int:
+        return len(self.image_paths)
+
+    def query(self, color_rgb: List[float], k: int, proportion_weight: float = 0.0) -> List[ColorMatch]:
+        """Find the `k` images with the dominant colors closest to a color.
+
+        Args:
+            color_rgb (List[float]): The color, as an RGB array.
+            k (int): The number of images to find.
+            proportion_weight (float, optional): The penalty for a matched color that covers none of its image (see
+                `ColorIndex`), in units of distance. Defaults to 0.0.
+
+        Returns:
+            List[ColorMatch]: The matching images, closest first.
+        """
+        if self.tree is None or k <= 0:
+            return []
+        point = self.convert(np.asarray(color_rgb, dtype=np.float64)).reshape((1, 3))
+        n_colors = len(self.colors_rgb)
+        n_candidates = min(n_colors, 2 * k)
+        while True:
+            distances, indices = self.tree.query(point, k=n_candidates)
+            matches = self._get_matches(distances[0], indices[0], proportion_weight)[:k]
+            # colors that were not fetched are at least as far as the farthest fetched color, so the matches are
+            # final once there are k of them and none is farther than that
+            complete = len(matches) == min(k, len(self)) and matches[-1].distance <= distances[0][-1]
+            if complete or n_candidates == n_colors:
+                return matches
+            n_candidates = min(n_colors, 2 * n_candidates)
+
+    def query_radius(self, color_rgb: List[float], radius: float, proportion_weight: float = 0.0) -> List[ColorMatch]:
+        """Find all images with a dominant color within a distance of a color.
+
+        Args:
+            color_rgb (List[float]): The color, as an RGB array.
+            radius (float): The maximum distance (including the proportion penalty, if any).
+            proportion_weight (float, optional): The penalty for a matched color that covers none of its image (see
+                `ColorIndex`), in units of distance. Defaults to 0.0.
+
+        Returns:
+            List[ColorMatch]: The matching images, closest first.
+        """
+        if self.tree is None:
+            return []
+        point = self.convert(np.asarray(color_rgb, dtype=np.float64)).reshape((1, 3))
+        indices, distances = self.tree.query_radius(point, r=radius, return_distance=True)
+        matches = self._get_matches(distances[0], indices[0], proportion_weight)
+        return [match for match in matches if match.distance <= radius]
+
+    def _get_matches(self, distances: np.ndarray, indices: np.ndarray, proportion_weight: float) -> List[ColorMatch]:
+        scores = distances + proportion_weight * (1 - self.proportions[indices])
+        order = np.argsort(scores, kind="stable")
+        matches = []
+        seen = set()
+        for i in order:
+            image_index = int(self.image_indices[indices[i]])
+            if image_index in seen:
+                continue  # an image matches through its closest color only
+            seen.add(image_index)
+            matches.append(
+                ColorMatch(
+                    image_index,
+                    Path(self.image_paths[image_index]),
+                    float(scores[i]),
+                    self.colors_rgb[indices[i]].tolist(),
+                    float(self.proportions[indices[i]]),
+                )
+            )
+        return matches
+
+
+class _StorePaths:
+    """Lazy sequence of the image paths of a (compact) result store."""
+
+    def __init__(self, store: ResultStore):
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __getitem__(self, i: int) -> Path:
+        return self.store.get_path(i)
@@ -0,0 +1,254 @@
+import copy
+import hashlib
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple, Union
+
+from colortools.results import AnalysisResult, load_results
+from colortools.store import ResultStore
+from colortools.util import natural_keys
+
+
+class ShardStrategy(str, Enum):
+    """Enum for the ways of splitting a collection of images into shards."""
+
+    INDEX = "index"
+    HASH = "hash"
+
+
+def get_shard_function(strategy: ShardStrategy) -> Callable:
+    """Get the function that corresponds to a shard strategy.
+
+    Each function takes the (sorted) image paths, the input directory they were collected from, the 1-based index
+    of the shard and the number of shards, and returns the paths in the shard, in order.
+
+    Args:
+        strategy (ShardStrategy): The shard strategy.
+
+    Raises:
+        ValueError: Raised if the provided shard strategy is not recognized.
+
+    Returns:
+        Callable: The function corresponding to the shard strategy.
+    """
+    if strategy == ShardStrategy.INDEX:
+        return get_index_shard
+    elif strategy == ShardStrategy.HASH:
+        return get_hash_shard
+    else:
+        raise ValueError(f"Invalid shard strategy selected: {strategy}")
+
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """Parse a shard specification of the form `i/n` (the i-th of n shards, starting from 1).
+
+    Args:
+        shard (str): The shard specification.
+
+    Raises:
+        ValueError: If the specification is malformed, or `i` is not between 1 and `n`.
+
+    Returns:
+        Tuple[int, int]: The index of the shard and the number of shards.
+    """
+    try:
+        shard_index, n_shards = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard: {shard} (expected i/n)")
+    if not 1 <= shard_index <= n_shards:
+        raise ValueError(f"Invalid shard: {shard} (i must be between 1 and n)")
+    return shard_index, n_shards
+
+
+def get_index_shard(image_paths: List[Path], input_dir: Path, shard_index: int, n_shards: int) -> List[Path]:
+    """Get a shard of images by position: every n-th image, starting from the i-th.
+
+    Shards are as even as possible, but change if images are added to or removed from the input.
+
+    Args:
+        image_paths (List[Path]): The image paths, in the order returned by `util.collect_jpg_paths`.
+        input_dir (Path): Unused; shards only depend on the order of the paths.
+        shard_index (int): The index of the shard, from 1 to `n_shards`.
+        n_shards (int): The number of shards.
+
+    Returns:
+        List[Path]: The paths in the shard, in order.
+    """
+    return image_paths[shard_index - 1 :: n_shards]
+
+
+def get_hash_shard(image_paths: List[Path], input_dir: Path, shard_index: int, n_shards: int) -> List[Path]:
+    """Get a shard of images by hash: the images whose path (relative to the input) hashes to the shard.
+
+    An image's shard only depends on its own path, so it is the same on every node (wherever the input is mounted)
+    and does not change when other images are added or removed.
+
+    Args:
+        image_paths (List[Path]): The image paths.
+        input_dir (Path): The input directory (or file) the paths were collected from.
+        shard_index (int): The index of the shard, from 1 to `n_shards`.
+        n_shards (int): The number of shards.
+
+    Returns:
+        List[Path]: The paths in the shard, in order.
+    """
+    input_dir = Path(input_dir)
+    shard = []
+    for image_path in image_paths:
+        relative_path = image_path.relative_to(input_dir) if input_dir.is_dir() else Path(image_path.name)
+        if get_path_hash(relative_path) % n_shards == shard_index - 1:
+            shard.append(image_path)
+    return shard
+
+
+def get_path_hash(path: Path) -> int:
+    """Get a stable (platform- and run-independent) hash of a path.
+
+    Args:
+        path (Path): The path.
+
+    Returns:
+        int: The hash, as a 64-bit integer.
+    """
+    return int.from_bytes(hashlib.blake2b(path.as_posix().encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def load_shard(src_path: Union[Path, str]) -> Tuple[Union[List[AnalysisResult], ResultStore], Dict]:
+    """Load the partial results written by one shard: a results file, or a result store.
+
+    Args:
+        src_path (Union[Path, str]): The path of the results file or store.
+
+    Returns:
+        Tuple[Union[List[AnalysisResult], ResultStore], Dict]: The results and their analysis settings.
+    """
+    if ResultStore.is_store(src_path):
+        store = ResultStore.load(src_path)
+        return store, store.settings
+    return load_results(src_path)
+
+
+def merge_shards(
+    src_paths: List[Union[Path, str]], input_dir: Union[Path, str] = None
+) -> Tuple[Union[List[AnalysisResult], ResultStore], Dict]:
+    """Merge the partial results written by the shards of a run, as if the run had not been sharded.
+
+    Shards must have been analyzed with the same settings, except for their input, which may be mounted at a
+    different path on each node. If they record their shard (see `parse_shard`), every shard of the run must be
+    present exactly once. Results are put back in the order of `util.collect_jpg_paths`, by their paths relative to
+    their shard's input.
+
+    Args:
+        src_paths (List[Union[Path, str]]): The paths of the shards' results files or stores.
+        input_dir (Union[Path, str], optional): Where the input is found on this machine; if provided, the image
+            paths of each shard are moved from the shard's input to it (see `rebase_results`), so that the merged
+            results can read their images. Defaults to None.
+
+    Raises:
+        ValueError: If the shards' settings differ, if shards are missing or repeated, or if `input_dir` is
+            provided but a shard does not record its input.
+
+    Returns:
+        Tuple[Union[List[AnalysisResult], ResultStore], Dict]: The merged results (a store if every shard is a
+            store), and their analysis settings (without the shard, and with `input_dir` or the input of the first
+            shard).
+    """
+    shards = [load_shard(src_path) for src_path in src_paths]
+    all_settings = [dict(settings) for _, settings in shards]
+    shard_specs = [settings.pop("shard", None) for settings in all_settings]
+    inputs = [settings.pop("input", None) for settings in all_settings]
+    if any(settings != all_settings[0] for settings in all_settings):
+        raise ValueError("Cannot merge shards analyzed with different settings")
+    if any(shard_spec is not None for shard_spec in shard_specs):
+        if any(shard_spec is None for shard_spec in shard_specs):
+            raise ValueError("Cannot merge sharded and unsharded results")
+        shard_indices = sorted(parse_shard(shard_spec) for shard_spec in shard_specs)
+        n_shards = shard_indices[0][1]
+        if shard_indices != [(i, n_shards) for i in range(1, n_shards + 1)]:
+            found = ", ".join(f"{i}/{n}" for i, n in shard_indices)
+            raise ValueError(f"Expected shards 1/{n_shards} to {n_shards}/{n_shards}, found {found}")
+    if input_dir is not None:
+        if any(shard_input is None for shard_input in inputs):
+            raise ValueError("Cannot move the images of shards that do not record their input")
+        input_dir = str(Path(input_dir).resolve())
+        shards = [
+            (rebase_results(results, shard_input, input_dir), shard_settings)
+            for (results, shard_settings), shard_input in zip(shards, inputs)
+        ]
+        inputs = [input_dir] * len(shards)
+    settings = dict(all_settings[0])
+    if inputs[0] is not None:
+        settings["input"] = inputs[0]
+
+    if all(isinstance(results, ResultStore) for results, _ in shards):
+        merged = ResultStore.merge([results for results, _ in shards], settings)
+        keys = [
+            natural_keys(get_relative_path(results.get_path(row), input_dir))
+            for (results, _), input_dir in zip(shards, inputs)
+            for row in range(len(results))
+        ]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        return merged.take(order).compact(), settings
+
+    keyed = [
+        (natural_keys(get_relative_path(result.image_path, input_dir)), i, result)
+        for i, ((results, _), input_dir) in enumerate(zip(shards, inputs))
+        for result in results
+    ]
+    keyed.sort(key=lambda item: item[:2])
+    return [result for _, _, result in keyed], settings
+
+
+def rebase_results(
+    analyzed_images: Union[List[AnalysisResult], ResultStore], src_dir: Union[Path, str], dest_dir: Union[Path, str]
+) -> Union[List[AnalysisResult], ResultStore]:
+    """Move the image paths of results from the input they were analyzed from to another directory, keeping their
+    paths relative to the input (e.g. if the input was moved, or is mounted at another path on this machine).
+
+    Paths that are not within `src_dir` are kept.
+
+    Args:
+        analyzed_images (Union[List[AnalysisResult], ResultStore]): The results (which are not modified).
+        src_dir (Union[Path, str]): The (absolute) input directory the results were analyzed from.
+        dest_dir (Union[Path, str]): The directory the input is now found at.
+
+    Returns:
+        Union[List[AnalysisResult], ResultStore]: Copies of the results, with their new paths.
+    """
+    src_dir, dest_dir = Path(src_dir).resolve(), Path(dest_dir).resolve()
+
+    def rebase_path(image_path: Union[Path, str]) -> Path:
+        try:
+            return dest_dir / Path(image_path).resolve().relative_to(src_dir)
+        except ValueError:
+            return Path(image_path)
+
+    if isinstance(analyzed_images, ResultStore):
+        return analyzed_images.with_paths(
+            [rebase_path(analyzed_images.get_path(row)) for row in range(len(analyzed_images.records))]
+        )
+
+    rebased = []
+    for analyzed_image in analyzed_images:
+        analyzed_image = copy.copy(analyzed_image)
+        analyzed_image.image_path = rebase_path(analyzed_image.image_path)
+        rebased.append(analyzed_image)
+    return rebased
+
+
+def get_relative_path(image_path: Union[Path, str], input_dir: Union[Path, str, None]) -> str:
+    """Get the path of an image relative to the input it was collected from, if it is within it.
+
+    Args:
+        image_path (Union[Path, str]): The (absolute) path of the image.
+        input_dir (Union[Path, str, None]): The (absolute) input directory, or None if unknown.
+
+    Returns:
+        str: The relative path, or the path itself if it is not within the input.
+    """
+    if input_dir is not None:
+        try:
+            return Path(image_path).relative_to(input_dir).as_posix()
+        except ValueError:
+            pass
+    return str(image_path)
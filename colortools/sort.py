@@ -3,7 +3,12 @@ from collections import deque
 from enum import Enum
 from typing import Callable, List, Tuple
 
+import numpy as np
+
 from colortools.analyzed_image import AnalyzedImage
+from colortools.store import ResultStore
+from colortools.tour import get_shortest_path
+from colortools.util import rgb_to_lab
 
 
 class SortMethod(str, Enum):
@@ -12,6 +17,7 @@ class SortMethod(str, Enum):
     HUE = "hue"
     SATURATION = "saturation"
     VALUE = "value"
+    PATH = "path"
 
 
 def get_sort_function(sort_method: SortMethod) -> Callable:
@@ -32,6 +38,8 @@ def get_sort_function(sort_method: SortMethod) -> Callable:
         return satsort
     elif sort_method == SortMethod.VALUE:
         return valsort
+    elif sort_method == SortMethod.PATH:
+        return pathsort
     else:
         raise ValueError(f"Invalid sort method selected: {sort_method}")
 
@@ -46,6 +54,9 @@ def separate_color_and_bw(analyzed_images: List[AnalyzedImage]) -> Tuple[List[An
         Tuple[List[AnalyzedImage], List[AnalyzedImage]]: A list of color images followed by a list
             of black and white images.
     """
+    if isinstance(analyzed_images, ResultStore):
+        return analyzed_images.separate_color_and_bw()
+
     color = []
     bw = []
     for img in analyzed_images:
@@ -62,7 +73,7 @@ def orient_to_sort_anchor(sorted_analyzed_images: List[AnalyzedImage], sort_anch
 
     Args:
         sorted_analyzed_images (List[AnalyzedImage]): A sorted list of analyzed images.
-        sort_anchor (str): The anchor image with whih to begin the returned sorted sequence.
+        sort_anchor (str): The anchor image with which to begin the returned sorted sequence.
 
     Returns:
         List[AnalyzedImage]: Sorted results, starting with the sort anchor.
@@ -92,13 +103,20 @@ def huesort(analyzed_images: List[AnalyzedImage], sort_reverse: bool, sort_ancho
     Args:
         analyzed_images (List[AnalyzedImage]): A list of analyzed images.
         sort_reverse (bool): Whether to reverse the sort order.
-        sort_anchor (str): The anchor image with whih to begin the returned sorted sequence.
+        sort_anchor (str): The anchor image with which to begin the returned sorted sequence.
 
     Returns:
         List[AnalyzedImage]: Sorted results, where color images are first, sorted by the hue of
             their dominant color, followed by black and white images, sorted by the value of
             their dominant color.
     """
+    if isinstance(analyzed_images, ResultStore):
+        color, bw = analyzed_images.separate_color_and_bw()
+        hue_metric, saturation, value = color.get_sort_keys()
+        color = color.sort_by((hue_metric, value, saturation), sort_reverse).orient_to_sort_anchor(sort_anchor)
+        bw = bw.sort_by((bw.get_sort_keys()[2],), sort_reverse)
+        return color.concat(bw)
+
     color, bw = separate_color_and_bw(analyzed_images)
 
     # sort color images by built-in sort metric, then value
@@ -129,12 +147,17 @@ def satsort(analyzed_images: List[AnalyzedImage], sort_reverse: bool, sort_ancho
     Args:
         analyzed_images (List[AnalyzedImage]): A list of analyzed images.
         sort_reverse (bool): Whether to reverse the sort order.
-        sort_anchor (str): The anchor image with whih to begin the returned sorted sequence.
+        sort_anchor (str): The anchor image with which to begin the returned sorted sequence.
 
     Returns:
         List[AnalyzedImage]: Sorted results, where all images are sorted by the saturation of
             their domiant color.
     """
+    if isinstance(analyzed_images, ResultStore):
+        hue_metric, saturation, value = analyzed_images.get_sort_keys()
+        sorted_images = analyzed_images.sort_by((saturation, value, hue_metric), sort_reverse)
+        return sorted_images.orient_to_sort_anchor(sort_anchor)
+
     analyzed_images.sort(
         key=lambda elem: (
             elem.get_dominant_color(hsv=True, round=True)[1],
@@ -154,12 +177,17 @@ def valsort(analyzed_images: List[AnalyzedImage], sort_reverse: bool, sort_ancho
     Args:
         analyzed_images (List[AnalyzedImage]): A list of analyzed images.
         sort_reverse (bool): Whether to reverse the sort order.
-        sort_anchor (str): The anchor image with whih to begin the returned sorted sequence.
+        sort_anchor (str): The anchor image with which to begin the returned sorted sequence.
 
     Returns:
         List[AnalyzedImage]: Sorted results, where all images are sorted by the value of
             their domiant color.
     """
+    if isinstance(analyzed_images, ResultStore):
+        hue_metric, saturation, value = analyzed_images.get_sort_keys()
+        sorted_images = analyzed_images.sort_by((value, hue_metric, saturation), sort_reverse)
+        return sorted_images.orient_to_sort_anchor(sort_anchor)
+
     analyzed_images.sort(
         key=lambda elem: (
             elem.get_dominant_color(hsv=True, round=True)[2],
@@ -169,3 +197,45 @@ def valsort(analyzed_images: List[AnalyzedImage], sort_reverse: bool, sort_ancho
         reverse=sort_reverse,
     )
     return orient_to_sort_anchor(analyzed_images, sort_anchor)
+
+
+def pathsort(analyzed_images: List[AnalyzedImage], sort_reverse: bool, sort_anchor: str) -> List[AnalyzedImage]:
+    """Static method for sorting a collection of analyzed images along a smooth gradient of their colors.
+
+    Images are ordered along an approximate shortest path through their dominant colors in CIELAB, so that
+    consecutive images have perceptually similar colors in hue, saturation and value alike (see
+    `tour.get_shortest_path`). Black and white images are part of the path, among the colors closest to them. The
+    path starts with the sort anchor if provided, and otherwise at its darker end.
+
+    Args:
+        analyzed_images (List[AnalyzedImage]): A list of analyzed images.
+        sort_reverse (bool): Whether to reverse the sort order. As with the other sorts, the sequence is reversed
+            before it is oriented to the sort anchor, so the anchor still leads, followed by the rest of the path in
+            reverse.
+        sort_anchor (str): The anchor image with which to begin the returned sorted sequence.
+
+    Returns:
+        List[AnalyzedImage]: Sorted results, along the path through their dominant colors.
+    """
+    if isinstance(analyzed_images, ResultStore):
+        colors_rgb = analyzed_images.get_dominant_colors_rgb()
+        names = [analyzed_images.get_path(row).name for row in analyzed_images.get_rows()] if sort_anchor else []
+    else:
+        colors_rgb = [analyzed_image.get_dominant_color() for analyzed_image in analyzed_images]
+        names = [analyzed_image.image_path.name for analyzed_image in analyzed_images] if sort_anchor else []
+
+    start = None
+    if sort_anchor:
+        if sort_anchor in names:
+            start = names.index(sort_anchor)
+        else:
+            logging.warning(f"Starting image {sort_anchor} not found!")
+    order = get_shortest_path(rgb_to_lab(np.reshape(colors_rgb, (-1, 3))), start)
+    if sort_reverse:
+        order = order[::-1]
+        if start is not None:
+            order = np.roll(order, 1)  # the anchor, now last, leads again (see `orient_to_sort_anchor`)
+
+    if isinstance(analyzed_images, ResultStore):
+        return analyzed_images.take(order)
+    return [analyzed_images[i] for i in order]
@@ -0,0 +1,523 @@
+import json
+import logging
+from enum import Enum
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+
+import colortools.util as util
+from colortools.results import AnalysisResult
+from colortools.transport import DOMINANT_COLOR_ALGORITHMS, KMEANS_INITS
+
+RESULT_STORE_VERSION = 1
+RESULT_STORE_INDEX_FILE = "store.json"
+RESULT_STORE_ARRAYS = (
+    "records",
+    "path_offsets",
+    "path_data",
+    "color_offsets",
+    "colors_rgb",
+    "colors_hsv",
+    "proportions",
+)
+
+# one fixed-width record per image; the dominant color's HSV values are kept as columns for sorting
+RECORD_DTYPE = np.dtype(
+    [
+        ("hue", "f8"),
+        ("saturation", "f8"),
+        ("value", "f8"),
+        ("width", "u4"),
+        ("height", "u4"),
+        ("resize_long_axis", "i4"),  # -1 if not resized
+        ("orientation", "u1"),
+        ("algorithm", "u1"),
+        ("n_colors", "u2"),
+        ("has_histogram", "?"),
+        ("kmeans_init", "i1"),  # -1 if not fitted with k-means
+        ("n_iter", "i4"),
+        ("fit_seconds", "f4"),
+        ("analysis_long_axis", "i4"),
+    ]
+)
+
+
+class ResultsFormat(str, Enum):
+    """Enum for the formats of saved analysis results."""
+
+    JSON = "json"
+    STORE = "store"
+
+
+class ResultStore:
+    """
+    Column-wise store of analysis results, for collections too large to hold as Python objects.
+
+    Each image has one fixed-width record (see RECORD_DTYPE); its dominant colors (and their proportions, if any)
+    are held in ragged arrays indexed by `color_offsets`, and its path in a string table (UTF-8 bytes indexed by
+    `path_offsets`). Stores are saved as a directory of `.npy` files, which are memory-mapped when loaded, so that
+    loading is instant and memory stays flat however many images there are.
+
+    A store can also be a view of a subset of another store's rows (in any order), as returned by `take`, `sort` and
+    `separate_color_and_bw`; views share the underlying arrays. Indexing or iterating over a store creates an
+    `AnalysisResult` per image, on demand.
+    """
+
+    def __init__(
+        self,
+        records: np.ndarray,
+        path_offsets: np.ndarray,
+        path_data: np.ndarray,
+        color_offsets: np.ndarray,
+        colors_rgb: np.ndarray,
+        colors_hsv: np.ndarray,
+        proportions: np.ndarray,
+        rows: np.ndarray = None,
+        settings: dict = None,
+    ):
+        """Create a store from its arrays (see `from_results` and `load`).
+
+        Args:
+            records (np.ndarray): One record of RECORD_DTYPE per image.
+            path_offsets (np.ndarray): The offset of each image's path in `path_data`, followed by the total length.
+            path_data (np.ndarray): The UTF-8 encoded paths, concatenated.
+            color_offsets (np.ndarray): The offset of each image's dominant colors in the color arrays, followed by
+                the total number of colors.
+            colors_rgb (np.ndarray): The dominant colors of all images, as RGB values.
+            colors_hsv (np.ndarray): The dominant colors of all images, as HSV values.
+            proportions (np.ndarray): The proportion of each dominant color (NaN if the image has no histogram).
+            rows (np.ndarray, optional): The rows of this view, in order; if None, all rows in order. Defaults to
+                None.
+            settings (dict, optional): The analysis settings used to produce the results. Defaults to None.
+        """
+        self.records = records
+        self.path_offsets = path_offsets
+        self.path_data = path_data
+        self.color_offsets = color_offsets
+        self.colors_rgb = colors_rgb
+        self.colors_hsv = colors_hsv
+        self.proportions = proportions
+        self.rows = rows
+        self.settings = settings if settings is not None else {}
+
+    @classmethod
+    def from_results(cls, analyzed_images: Iterable[AnalysisResult], settings: dict = None) -> "ResultStore":
+        """Create a store from analysis results.
+
+        Args:
+            analyzed_images (Iterable[AnalysisResult]): The results.
+            settings (dict, optional): The analysis settings used to produce the results. Defaults to None.
+
+        Returns:
+            ResultStore: The store, with one row per result, in order.
+        """
+        records, paths, n_colors = [], [], []
+        colors_rgb, colors_hsv, proportions = [], [], []
+        for analyzed_image in analyzed_images:
+            record = np.zeros((), dtype=RECORD_DTYPE)
+            record["hue"], record["saturation"], record["value"] = analyzed_image.dominant_colors_hsv[0]
+            record["width"] = analyzed_image.width
+            record["height"] = analyzed_image.height
+            resize_long_axis = analyzed_image.resize_long_axis
+            record["resize_long_axis"] = -1 if resize_long_axis is None else resize_long_axis
+            record["orientation"] = analyzed_image.orientation.value
+            record["algorithm"] = DOMINANT_COLOR_ALGORITHMS.index(analyzed_image.dominant_color_algorithm)
+            record["n_colors"] = analyzed_image.n_colors
+            record["has_histogram"] = analyzed_image.cluster_histogram is not None
+            kmeans_init = analyzed_image.kmeans_init
+            record["kmeans_init"] = -1 if kmeans_init is None else KMEANS_INITS.index(kmeans_init)
+            if kmeans_init is not None:
+                record["n_iter"] = analyzed_image.n_iter
+                record["fit_seconds"] = analyzed_image.fit_seconds
+                record["analysis_long_axis"] = analyzed_image.analysis_long_axis
+            records.append(record)
+
+            paths.append(str(Path(analyzed_image.image_path).resolve()).encode("utf-8"))
+            n_colors.append(len(analyzed_image.dominant_colors_rgb))
+            colors_rgb.extend(analyzed_image.dominant_colors_rgb)
+            colors_hsv.extend(analyzed_image.dominant_colors_hsv)
+            if analyzed_image.cluster_histogram is not None:
+                proportions.extend(float(proportion) for _, proportion in analyzed_image.cluster_histogram)
+            else:
+                proportions.extend([np.nan] * n_colors[-1])
+
+        return cls(
+            np.array(records, dtype=RECORD_DTYPE),
+            np.concatenate([[0], np.cumsum([len(path) for path in paths], dtype=np.int64)]).astype(np.int64),
+            np.frombuffer(b"".join(paths), dtype=np.uint8),
+            np.concatenate([[0], np.cumsum(n_colors, dtype=np.int64)]).astype(np.int64),
+            np.array(colors_rgb, dtype=np.float64).reshape((-1, 3)),
+            np.array(colors_hsv, dtype=np.float64).reshape((-1, 3)),
+            np.array(proportions, dtype=np.float32),
+            settings=settings,
+        )
+
+    def save(self, dest_dir: Union[Path, str]):
+        """Save this store (or view) as a directory of `.npy` files, replacing any store already there.
+
+        The store is written to a temporary directory, which then replaces any store already at the destination (see
+        `util.write_dir_atomically`).
+
+        Args:
+            dest_dir (Union[Path, str]): The directory to save the store to.
+
+        Raises:
+            FileExistsError: If the destination exists and is neither a store nor an empty directory.
+        """
+        dest_dir = Path(dest_dir)
+        if not self.can_replace(dest_dir):
+            raise FileExistsError(f"Not replacing {dest_dir}, which exists and is not a result store")
+
+        store = self.compact()
+
+        def write(tmp_dir: Path):
+            for name in RESULT_STORE_ARRAYS:
+                np.save(tmp_dir / f"{name}.npy", getattr(store, name))
+            with open(tmp_dir / RESULT_STORE_INDEX_FILE, "w") as f:
+                json.dump(
+                    {"version": RESULT_STORE_VERSION, "n_images": len(store), "settings": self.settings}, f, indent=2
+                )
+
+        util.write_dir_atomically(dest_dir, write)
+
+    @staticmethod
+    def can_replace(dest_dir: Union[Path, str]) -> bool:
+        """Determine whether `save` may write a store to a path: a saved store, an empty directory or a new path.
+
+        Args:
+            dest_dir (Union[Path, str]): The path.
+
+        Returns:
+            bool: Whether saving a store to the path would not overwrite anything but a store.
+        """
+        dest_dir = Path(dest_dir)
+        if not dest_dir.exists():
+            return True
+        return dest_dir.is_dir() and (ResultStore.is_store(dest_dir) or not any(dest_dir.iterdir()))
+
+    @classmethod
+    def load(cls, src_dir: Union[Path, str], mmap: bool = True) -> "ResultStore":
+        """Load a store saved by `save`.
+
+        Args:
+            src_dir (Union[Path, str]): The directory of the store.
+            mmap (bool, optional): Whether to memory-map the store's arrays (read-only) instead of reading them.
+                Defaults to True.
+
+        Raises:
+            ValueError: If the store was written by an unsupported version of ColorTools.
+
+        Returns:
+            ResultStore: The store.
+        """
+        src_dir = Path(src_dir)
+        with open(src_dir / RESULT_STORE_INDEX_FILE) as f:
+            index = json.load(f)
+        if index.get("version") != RESULT_STORE_VERSION:
+            raise ValueError(f"Unsupported result store version: {index.get('version')}")
+        mmap_mode = "r" if mmap else None
+        arrays = [np.load(src_dir / f"{name}.npy", mmap_mode=mmap_mode) for name in RESULT_STORE_ARRAYS]
+        return cls(*arrays, settings=index.get("settings", {}))
+
+    @staticmethod
+    def is_store(path: Union[Path, str]) -> bool:
+        """Determine whether a path is a saved store.
+
+        Args:
+            path (Union[Path, str]): The path.
+
+        Returns:
+            bool: Whether the path is a directory holding a store.
+        """
+        return (Path(path) / RESULT_STORE_INDEX_FILE).exists()
+
+    def __len__(self) -> int:
+        return len(self.records) if self.rows is None else len(self.rows)
+
+    def __getitem__(self, i: int) -> AnalysisResult:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Index {i} out of range for a store of {len(self)} images")
+        return self.get_result(self._get_row(i))
+
+    def __iter__(self) -> Iterator[AnalysisResult]:
+        for i in range(len(self)):
+            yield self.get_result(self._get_row(i))
+
+    def _get_row(self, i: int) -> int:
+        return i if self.rows is None else int(self.rows[i])
+
+    def get_rows(self) -> np.ndarray:
+        """Get the rows of this view, in order.
+
+        Returns:
+            np.ndarray: The indices of this view's records in the underlying arrays.
+        """
+        return np.arange(len(self.records)) if self.rows is None else np.asarray(self.rows)
+
+    def get_column(self, name: str) -> np.ndarray:
+        """Get one field of this view's records, in order.
+
+        Args:
+            name (str): The name of the field (see RECORD_DTYPE).
+
+        Returns:
+            np.ndarray: The field's values.
+        """
+        column = self.records[name]
+        return np.asarray(column) if self.rows is None else column[self.rows]
+
+    def get_path(self, row: int) -> Path:
+        """Get the image path of a row of the underlying arrays.
+
+        Args:
+            row (int): The row.
+
+        Returns:
+            Path: The image path.
+        """
+        start, end = self.path_offsets[row], self.path_offsets[row + 1]
+        return Path(bytes(self.path_data[start:end]).decode("utf-8"))
+
+    def with_paths(self, paths: List[Union[Path, str]]) -> "ResultStore":
+        """Get a copy of this store (or view) with a new table of paths; all other arrays are shared.
+
+        Args:
+            paths (List[Union[Path, str]]): The new image path of each row of the underlying arrays.
+
+        Returns:
+            ResultStore: The store, with the new paths.
+        """
+        encoded = [str(path).encode("utf-8") for path in paths]
+        return ResultStore(
+            self.records,
+            np.concatenate([[0], np.cumsum([len(path) for path in encoded], dtype=np.int64)]).astype(np.int64),
+            np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            self.color_offsets,
+            self.colors_rgb,
+            self.colors_hsv,
+            self.proportions,
+            rows=self.rows,
+            settings=self.settings,
+        )
+
+    def get_result(self, row: int) -> AnalysisResult:
+        """Create an analysis result from a row of the underlying arrays.
+
+        Args:
+            row (int): The row.
+
+        Returns:
+            AnalysisResult: The result.
+        """
+        record = self.records[row]
+        start, end = self.color_offsets[row], self.color_offsets[row + 1]
+        cluster_histogram = None
+        if record["has_histogram"]:
+            cluster_histogram = [
+                (np.array(rgb), float(proportion))
+                for rgb, proportion in zip(self.colors_rgb[start:end], self.proportions[start:end])
+            ]
+        result = AnalysisResult(
+            self.get_path(row),
+            int(record["width"]),
+            int(record["height"]),
+            util.ImageOrientation(int(record["orientation"])),
+            DOMINANT_COLOR_ALGORITHMS[int(record["algorithm"])],
+            int(record["n_colors"]),
+            np.asarray(self.colors_rgb[start:end]).tolist(),
+            np.asarray(self.colors_hsv[start:end]).tolist(),
+            cluster_histogram,
+            None if record["resize_long_axis"] < 0 else int(record["resize_long_axis"]),
+        )
+        if record["kmeans_init"] >= 0:
+            result.kmeans_init = KMEANS_INITS[int(record["kmeans_init"])]
+            result.n_iter = int(record["n_iter"])
+            result.fit_seconds = float(record["fit_seconds"])
+            result.analysis_long_axis = int(record["analysis_long_axis"])
+        return result
+
+    def take(self, indices: np.ndarray) -> "ResultStore":
+        """Get a view of some of this view's images.
+
+        Args:
+            indices (np.ndarray): The positions (in this view) of the images to keep, in order.
+
+        Returns:
+            ResultStore: The view, sharing this store's arrays.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        rows = indices if self.rows is None else np.asarray(self.rows)[indices]
+        return ResultStore(
+            self.records,
+            self.path_offsets,
+            self.path_data,
+            self.color_offsets,
+            self.colors_rgb,
+            self.colors_hsv,
+            self.proportions,
+            rows,
+            self.settings,
+        )
+
+    def compact(self) -> "ResultStore":
+        """Get a store holding only this view's images, in order, with its own arrays.
+
+        Returns:
+            ResultStore: This store, if it is not a view; otherwise, a new store.
+        """
+        if self.rows is None:
+            return self
+        rows = np.asarray(self.rows)
+        path_lengths = self.path_offsets[rows + 1] - self.path_offsets[rows]
+        color_counts = self.color_offsets[rows + 1] - self.color_offsets[rows]
+        path_indices = _get_ragged_indices(self.path_offsets[rows], path_lengths)
+        color_indices = _get_ragged_indices(self.color_offsets[rows], color_counts)
+        return ResultStore(
+            np.asarray(self.records[rows]),
+            np.concatenate([[0], np.cumsum(path_lengths)]).astype(np.int64),
+            np.asarray(self.path_data[path_indices]),
+            np.concatenate([[0], np.cumsum(color_counts)]).astype(np.int64),
+            np.asarray(self.colors_rgb[color_indices]),
+            np.asarray(self.colors_hsv[color_indices]),
+            np.asarray(self.proportions[color_indices]),
+            settings=self.settings,
+        )
+
+    @classmethod
+    def merge(cls, stores: List["ResultStore"], settings: dict = None) -> "ResultStore":
+        """Create a store holding the images of several stores (or views), one after the other.
+
+        Args:
+            stores (List[ResultStore]): The stores.
+            settings (dict, optional): The analysis settings of the merged store. Defaults to None.
+
+        Returns:
+            ResultStore: The merged store, with its own arrays.
+        """
+        stores = [store.compact() for store in stores]
+        path_offsets, color_offsets = [np.zeros(1, dtype=np.int64)], [np.zeros(1, dtype=np.int64)]
+        for store in stores:
+            path_offsets.append(store.path_offsets[1:] + path_offsets[-1][-1])
+            color_offsets.append(store.color_offsets[1:] + color_offsets[-1][-1])
+        return cls(
+            np.concatenate([np.asarray(store.records) for store in stores]).astype(RECORD_DTYPE),
+            np.concatenate(path_offsets).astype(np.int64),
+            np.concatenate([np.asarray(store.path_data) for store in stores]).astype(np.uint8),
+            np.concatenate(color_offsets).astype(np.int64),
+            np.concatenate([np.asarray(store.colors_rgb) for store in stores]).reshape((-1, 3)),
+            np.concatenate([np.asarray(store.colors_hsv) for store in stores]).reshape((-1, 3)),
+            np.concatenate([np.asarray(store.proportions) for store in stores]).astype(np.float32),
+            settings=settings,
+        )
+
+    def get_dominant_colors_rgb(self) -> np.ndarray:
+        """Get the most dominant color of each image in this view, in order.
+
+        Returns:
+            np.ndarray: The dominant colors, as RGB values, of shape (n_images, 3).
+        """
+        return np.asarray(self.colors_rgb[self.color_offsets[self.get_rows()]])
+
+    def is_bw(self) -> np.ndarray:
+        """Determine which images in this view are black and white (see `AnalysisResult.is_bw`).
+
+        Returns:
+            np.ndarray: Whether each image is black and white, in order.
+        """
+        return self.get_column("saturation") < 1
+
+    def separate_color_and_bw(self) -> Tuple["ResultStore", "ResultStore"]:
+        """Separate this view into a view of color images and a view of black and white images.
+
+        Returns:
+            Tuple[ResultStore, ResultStore]: The color images followed by the black and white images, each in order.
+        """
+        is_bw = self.is_bw()
+        return self.take(np.flatnonzero(~is_bw)), self.take(np.flatnonzero(is_bw))
+
+    def get_sort_keys(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the keys used to sort images (see `sort.huesort`).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The hue sort metric (see
+                `AnalysisResult.get_huesort_metric`), and the rounded saturation and value of each image's dominant
+                color.
+        """
+        hue_metric = (self.get_column("hue") % 360 + 90) % 360
+        saturation = np.uint(np.around(self.get_column("saturation"), 0)).astype(np.int64)
+        value = np.uint(np.around(self.get_column("value"), 0)).astype(np.int64)
+        return hue_metric, saturation, value
+
+    def sort_by(self, keys: Tuple[np.ndarray, ...], sort_reverse: bool) -> "ResultStore":
+        """Sort this view by several keys, like a stable sort of tuples of keys (with `reverse`) in Python.
+
+        Args:
+            keys (Tuple[np.ndarray, ...]): The keys, from most to least significant.
+            sort_reverse (bool): Whether to sort in descending order (equal images keep their order).
+
+        Returns:
+            ResultStore: The sorted view.
+        """
+        if sort_reverse:
+            keys = tuple(-np.asarray(key, dtype=np.float64) for key in keys)
+        return self.take(np.lexsort(keys[::-1]))
+
+    def orient_to_sort_anchor(self, sort_anchor: str) -> "ResultStore":
+        """Shift this (sorted) view so that it starts with the provided sort anchor (see `sort.orient_to_sort_anchor`).
+
+        Args:
+            sort_anchor (str): The filename of the image with which to begin the view.
+
+        Returns:
+            ResultStore: The shifted view.
+        """
+        if not sort_anchor:
+            return self
+        rows = self.get_rows()
+        for i, row in enumerate(rows):
+            if self.get_path(row).name == sort_anchor:
+                return self.take(np.roll(np.arange(len(rows)), -i))
+        logging.warning(f"Starting image {sort_anchor} not found!")
+        return self
+
+    def concat(self, other: "ResultStore") -> "ResultStore":
+        """Get a view of this view's images followed by another view's images (of the same store).
+
+        Args:
+            other (ResultStore): The other view.
+
+        Returns:
+            ResultStore: The combined view.
+        """
+        return ResultStore(
+            self.records,
+            self.path_offsets,
+            self.path_data,
+            self.color_offsets,
+            self.colors_rgb,
+            self.colors_hsv,
+            self.proportions,
+            np.concatenate([self.get_rows(), other.get_rows()]),
+            self.settings,
+        )
+
+
+def _get_ragged_indices(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Get the indices of the elements of several slices of a flat array, concatenated.
+
+    Args:
+        starts (np.ndarray): The start of each slice.
+        lengths (np.ndarray): The length of each slice.
+
+    Returns:
+        np.ndarray: The indices, slice after slice.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    slice_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    return np.repeat(np.asarray(starts, dtype=np.int64) - slice_starts, lengths) + np.arange(total)
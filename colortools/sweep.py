@@ -0,0 +1,179 @@
+import csv
+import itertools
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple, Union
+
+import numpy as np
+
+import colortools.util as util
+from colortools.analysis import KMeansInit
+from colortools.analyzed_image import AnalyzedImage, load_resized_image
+from colortools.heuristics import NColorsHeuristic, compute_hue_histogram, get_n_heuristic
+from colortools.results import AnalysisResult
+
+
+class SweepConfig(NamedTuple):
+    """One combination of analysis settings in a parameter sweep."""
+
+    algorithm: util.DominantColorAlgorithm
+    n_colors: Union[int, None]  # None if set by the heuristic
+    n_colors_heuristic: Union[NColorsHeuristic, None]  # None if n_colors is fixed
+    edge_crop: float
+    kmeans_init: KMeansInit = KMeansInit.KMEANS_PLUS_PLUS
+
+    def get_name(self) -> str:
+        """Get a name for this configuration, usable as a filename.
+
+        Returns:
+            str: The name of this configuration.
+        """
+        n_colors = self.n_colors if self.n_colors is not None else self.n_colors_heuristic.value
+        name = f"{self.algorithm.value}_n={n_colors}_crop={self.edge_crop}"
+        if self.algorithm == util.DominantColorAlgorithm.KMEANS:
+            name += f"_init={self.kmeans_init.value}"
+        return name
+
+
+def get_sweep_configs(
+    algorithms: Iterable[util.DominantColorAlgorithm],
+    n_colors_values: Iterable[int],
+    n_colors_heuristics: Iterable[NColorsHeuristic],
+    edge_crops: Iterable[float],
+    kmeans_inits: Iterable[KMeansInit] = (KMeansInit.KMEANS_PLUS_PLUS,),
+) -> List[SweepConfig]:
+    """Get the grid of configurations for a parameter sweep.
+
+    A value of `None` or 0 in `n_colors_values` stands for "set by the heuristic", and expands to one configuration
+    per heuristic; heuristics are not combined with fixed values of `n_colors`. Initialization strategies only apply
+    to the KMEANS algorithm.
+
+    Args:
+        algorithms (Iterable[util.DominantColorAlgorithm]): The dominant color algorithms to sweep.
+        n_colors_values (Iterable[int]): The numbers of dominant colors to sweep.
+        n_colors_heuristics (Iterable[NColorsHeuristic]): The heuristics to sweep.
+        edge_crops (Iterable[float]): The edge crops to sweep.
+        kmeans_inits (Iterable[KMeansInit], optional): The k-means initialization strategies to sweep. Defaults to
+            (KMeansInit.KMEANS_PLUS_PLUS,).
+
+    Returns:
+        List[SweepConfig]: The configurations, without duplicates.
+    """
+    configs = []
+    for algorithm, n_colors, edge_crop in itertools.product(algorithms, n_colors_values, edge_crops):
+        if n_colors is None or n_colors == 0:
+            n_colors_settings = [(None, heuristic) for heuristic in n_colors_heuristics]
+        else:
+            n_colors_settings = [(n_colors, None)]
+        inits = kmeans_inits if algorithm == util.DominantColorAlgorithm.KMEANS else [KMeansInit.KMEANS_PLUS_PLUS]
+        for (n, heuristic), kmeans_init in itertools.product(n_colors_settings, inits):
+            config = SweepConfig(algorithm, n, heuristic, edge_crop, kmeans_init)
+            if config not in configs:
+                configs.append(config)
+    return configs
+
+
+def sweep(
+    image_paths: List[Union[Path, str]],
+    configs: List[SweepConfig],
+    resize_long_axis: int,
+    progress_callback: Callable[[int, int], None] = None,
+) -> Tuple[Dict[SweepConfig, List[AnalysisResult]], float, Dict[SweepConfig, float]]:
+    """Analyze images under several configurations, decoding each image only once.
+
+    Each image is decoded and resized once, and converted to HSV once; the HSV pixels of each edge crop and their hue
+    histogram (used by the heuristics) are shared by every configuration with that edge crop. Every configuration
+    then analyzes the shared image, without converting it to HSV again.
+
+    Args:
+        image_paths (List[Union[Path, str]]): The paths of the images to analyze.
+        configs (List[SweepConfig]): The configurations to analyze each image with.
+        resize_long_axis (int): The target length of the long axis after resizing.
+        progress_callback (Callable[[int, int], None], optional): Called with the number of images analyzed so far
+            and the total number of images after each image. Defaults to None.
+
+    Returns:
+        Tuple[Dict[SweepConfig, List[AnalysisResult]], float, Dict[SweepConfig, float]]: The results of each
+            configuration (in the order of `image_paths`), the time spent decoding and preparing the shared data (in
+            seconds), and the time spent analyzing with each configuration (in seconds).
+    """
+    results = {config: [] for config in configs}
+    previous_images = {config: None for config in configs}  # for warm starts with KMeansInit.PREVIOUS
+    config_seconds = {config: 0.0 for config in configs}
+    shared_seconds = 0.0
+    edge_crops = sorted(set(config.edge_crop for config in configs))
+
+    for i, image_path in enumerate(image_paths):
+        start = time.perf_counter()
+        pil_image = load_resized_image(image_path, resize_long_axis)
+        image_hsv = np.asarray(pil_image.convert("HSV"))
+        cropped_hsv = {crop: util.crop_center(image_hsv, crop) for crop in edge_crops}
+        hue_histograms = {crop: compute_hue_histogram(cropped_hsv[crop]) for crop in edge_crops}
+        shared_seconds += time.perf_counter() - start
+
+        for config in configs:
+            start = time.perf_counter()
+            n_colors = config.n_colors
+            if n_colors is None:
+                heuristic_func = get_n_heuristic(config.n_colors_heuristic)
+                n_colors = heuristic_func(
+                    cropped_hsv[config.edge_crop], hue_histogram=hue_histograms[config.edge_crop]
+                )
+            analyzed_image = AnalyzedImage(
+                image_path,
+                resize_long_axis,
+                config.edge_crop,
+                config.algorithm,
+                n_colors,
+                None,
+                image=pil_image,
+                kmeans_init=config.kmeans_init,
+                previous_image=previous_images[config],
+                image_hsv=cropped_hsv[config.edge_crop],
+            )
+            previous_images[config] = analyzed_image
+            results[config].append(AnalysisResult.from_analyzed_image(analyzed_image))
+            config_seconds[config] += time.perf_counter() - start
+
+        if progress_callback is not None:
+            progress_callback(i + 1, len(image_paths))
+
+    return results, shared_seconds, config_seconds
+
+
+def save_results_table(analyzed_images: List[AnalysisResult], dest_path: Union[Path, str]):
+    """Save analysis results as a CSV table, with one row per image.
+
+    Args:
+        analyzed_images (List[AnalysisResult]): The results to save.
+        dest_path (Union[Path, str]): The path of the CSV file.
+    """
+    dest_path = Path(dest_path)
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(dest_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            [
+                "image_path",
+                "n_colors",
+                "is_bw",
+                "dominant_colors_rgb",
+                "dominant_colors_hsv",
+                "kmeans_init",
+                "n_iter",
+                "fit_seconds",
+            ]
+        )
+        for analyzed_image in analyzed_images:
+            writer.writerow(
+                [
+                    analyzed_image.image_path,
+                    analyzed_image.n_colors,
+                    analyzed_image.is_bw(),
+                    util.round_array(analyzed_image.get_dominant_colors()),
+                    util.round_array(analyzed_image.get_dominant_colors(hsv=True)),
+                    analyzed_image.kmeans_init.value if analyzed_image.kmeans_init is not None else "",
+                    analyzed_image.n_iter if analyzed_image.n_iter is not None else "",
+                    f"{analyzed_image.fit_seconds:.6f}" if analyzed_image.fit_seconds is not None else "",
+                ]
+            )
@@ -0,0 +1,214 @@
+import math
+from collections import deque
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+import colortools.config as config
+
+
+def get_nearest_neighbors(points: np.ndarray, n_neighbors: int) -> Tuple[np.ndarray, np.ndarray, cKDTree]:
+    """Get the nearest neighbors of each point (excluding itself), using a KD-tree.
+
+    Args:
+        points (np.ndarray): The points, of shape (n_points, n_dims).
+        n_neighbors (int): The number of neighbors per point (at most `n_points - 1`).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, cKDTree]: The indices of the neighbors of each point and their distances,
+            closest first, each of shape (n_points, n_neighbors), and the KD-tree of the points.
+    """
+    tree = cKDTree(points)
+    n_neighbors = min(n_neighbors, len(points) - 1)
+    distances, indices = tree.query(points, k=n_neighbors + 1)
+    # a point is usually its own first neighbor, but not always among duplicates; move it last and drop it
+    order = np.argsort(indices == np.arange(len(points))[:, None], axis=1, kind="stable")
+    indices = np.take_along_axis(indices, order, axis=1)[:, :n_neighbors]
+    distances = np.take_along_axis(distances, order, axis=1)[:, :n_neighbors]
+    return indices, distances, tree
+
+
+def get_greedy_path(points: np.ndarray, neighbors: np.ndarray, tree: cKDTree, start: int) -> np.ndarray:
+    """Get a path through every point by always moving to the nearest unvisited point.
+
+    The nearest unvisited point is looked up in the point's neighbors first. Only if they have all been visited is
+    the KD-tree searched, and the tree is rebuilt over the unvisited points whenever more than half of its points
+    have been visited, so that searches stay short.
+
+    Args:
+        points (np.ndarray): The points, of shape (n_points, n_dims).
+        neighbors (np.ndarray): The nearest neighbors of each point, closest first (see `get_nearest_neighbors`).
+        tree (cKDTree): The KD-tree of the points.
+        start (int): The index of the first point of the path.
+
+    Returns:
+        np.ndarray: The indices of the points, in the order of the path.
+    """
+    n_points = len(points)
+    visited = np.zeros(n_points, dtype=bool)
+    path = np.empty(n_points, dtype=np.int64)
+    neighbor_lists = neighbors.tolist()
+    tree_points = np.arange(n_points)
+    n_visited_in_tree = 0
+
+    current = start
+    for step in range(n_points):
+        visited[current] = True
+        n_visited_in_tree += 1
+        path[step] = current
+        if step == n_points - 1:
+            break
+        next_point = next((neighbor for neighbor in neighbor_lists[current] if not visited[neighbor]), None)
+        if next_point is None:
+            if n_visited_in_tree > len(tree_points) // 2:
+                tree_points = np.flatnonzero(~visited)
+                tree = cKDTree(points[tree_points])
+                n_visited_in_tree = 0
+            k = min(len(tree_points), 2 * neighbors.shape[1] + 1)
+            while next_point is None:
+                candidates = tree_points[np.atleast_1d(tree.query(points[current], k=k)[1])]
+                unvisited = candidates[~visited[candidates]]
+                if len(unvisited) > 0:
+                    next_point = int(unvisited[0])
+                k = min(len(tree_points), 2 * k)
+        current = next_point
+    return path
+
+
+def improve_path(
+    points: np.ndarray,
+    path: np.ndarray,
+    neighbors: np.ndarray,
+    neighbor_distances: np.ndarray,
+    fix_start: bool = False,
+) -> np.ndarray:
+    """Shorten an open path through points with 2-opt moves between neighbors.
+
+    A 2-opt move reverses a segment of the path, replacing the two edges at its ends (or one, at an end of the path)
+    with two others. Only moves that make a point adjacent to one of its nearest neighbors, closer than the point's
+    neighbor on the path that it replaces, are tried. Points are queued for checking, and requeued when one of their
+    edges changes, until no move shortens the path.
+
+    Args:
+        points (np.ndarray): The points, of shape (n_points, n_dims).
+        path (np.ndarray): The indices of the points, in the order of the path.
+        neighbors (np.ndarray): The nearest neighbors of each point, closest first (see `get_nearest_neighbors`).
+        neighbor_distances (np.ndarray): The distances to the nearest neighbors of each point.
+        fix_start (bool, optional): Whether the first point of the path must stay first. Defaults to False.
+
+    Returns:
+        np.ndarray: The improved path.
+    """
+    path = np.array(path, dtype=np.int64)
+    n_points = len(path)
+    position = np.empty(n_points, dtype=np.int64)
+    position[path] = np.arange(n_points)
+    coordinates = points.tolist()
+    neighbor_lists = neighbors.tolist()
+    neighbor_distance_lists = neighbor_distances.tolist()
+    # segments are reversed with numpy, but single elements are much faster to read through memoryviews
+    path_view, position_view = memoryview(path), memoryview(position)
+
+    def get_edge_length(i: int, j: int) -> float:
+        # the distance between the points at two positions; missing edges (past an end of the path) are infinite, so
+        # that they never limit the moves tried from the ends
+        if i < 0 or j >= n_points:
+            return math.inf
+        return math.dist(coordinates[path_view[i]], coordinates[path_view[j]])
+
+    def get_gain(start: int, end: int) -> float:
+        # reversing path[start:end + 1] replaces edges (before, first) and (last, after) with (before, last) and
+        # (first, after)
+        first, last = coordinates[path_view[start]], coordinates[path_view[end]]
+        gain = 0.0
+        if start > 0:
+            before = coordinates[path_view[start - 1]]
+            gain += math.dist(before, first) - math.dist(before, last)
+        if end < n_points - 1:
+            after = coordinates[path_view[end + 1]]
+            gain += math.dist(last, after) - math.dist(first, after)
+        return gain
+
+    queue = deque(path.tolist())
+    queued = bytearray(b"\x01") * n_points
+    while queue:
+        a = queue.popleft()
+        queued[a] = False
+        i = position_view[a]
+        successor_length, predecessor_length = get_edge_length(i, i + 1), get_edge_length(i - 1, i)
+        for c, distance in zip(neighbor_lists[a], neighbor_distance_lists[a]):
+            if distance >= max(successor_length, predecessor_length):
+                break  # neighbors are sorted, so no further neighbor is closer than either edge it would replace
+            j = position_view[c]
+            # the segments whose reversal makes a and c adjacent, and the length of the edge of a that each replaces
+            if i < j:
+                segments = [(i + 1, j, successor_length), (i, j - 1, predecessor_length)]
+            else:
+                segments = [(j + 1, i, successor_length), (j, i - 1, predecessor_length)]
+            best_gain, best_segment = 1e-9, None
+            for start, end, replaced_length in segments:
+                if start >= end or distance >= replaced_length or (fix_start and start == 0):
+                    continue
+                gain = get_gain(start, end)
+                if gain > best_gain:
+                    best_gain, best_segment = gain, (start, end)
+            if best_segment is None:
+                continue
+            start, end = best_segment
+            path[start : end + 1] = path[start : end + 1][::-1].copy()
+            position[path[start : end + 1]] = np.arange(start, end + 1)
+            for changed in {max(start - 1, 0), start, end, min(end + 1, n_points - 1)}:
+                point = path_view[changed]
+                if not queued[point]:
+                    queued[point] = True
+                    queue.append(point)
+            break
+    return path
+
+
+def get_path_length(points: np.ndarray, path: np.ndarray) -> float:
+    """Get the length of an open path through points.
+
+    Args:
+        points (np.ndarray): The points, of shape (n_points, n_dims).
+        path (np.ndarray): The indices of the points, in the order of the path.
+
+    Returns:
+        float: The sum of the distances between consecutive points of the path.
+    """
+    ordered = np.asarray(points)[np.asarray(path)]
+    return float(np.sum(np.linalg.norm(np.diff(ordered, axis=0), axis=1)))
+
+
+def get_shortest_path(
+    points: np.ndarray, start: Optional[int] = None, n_neighbors: int = config.DEFAULT_PATH_N_NEIGHBORS
+) -> np.ndarray:
+    """Get an approximate shortest open path through points: a greedy nearest-neighbor path, improved with 2-opt.
+
+    Both steps only consider each point's nearest neighbors (and a KD-tree, when those are exhausted), so the cost
+    grows roughly as n log n rather than with the square of the number of points.
+
+    Args:
+        points (np.ndarray): The points, of shape (n_points, n_dims).
+        start (Optional[int], optional): The index of the first point of the path; if None, the path is built from
+            the point with the lowest first coordinate, and starts at whichever of its ends has the lower one. Defaults
+            to None.
+        n_neighbors (int, optional): The number of nearest neighbors per point. Defaults to
+            config.DEFAULT_PATH_N_NEIGHBORS.
+
+    Returns:
+        np.ndarray: The indices of the points, in the order of the path.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) <= 2:
+        return np.argsort(points[:, 0], kind="stable") if start is None else np.roll(np.arange(len(points)), -start)
+    neighbors, neighbor_distances, tree = get_nearest_neighbors(points, n_neighbors)
+    fix_start = start is not None
+    if start is None:
+        start = int(np.argmin(points[:, 0]))
+    path = get_greedy_path(points, neighbors, tree, start)
+    path = improve_path(points, path, neighbors, neighbor_distances, fix_start)
+    if not fix_start and points[path[-1], 0] < points[path[0], 0]:
+        path = path[::-1]  # 2-opt may have moved the start; begin at the end with the lower first coordinate
+    return path
@@ -0,0 +1,232 @@
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+import colortools.util as util
+from colortools.analysis import KMeansInit, predict_from_centers
+from colortools.results import AnalysisResult
+
+RESULT_MAX_COLORS = 16
+DOMINANT_COLOR_ALGORITHMS = list(util.DominantColorAlgorithm)
+KMEANS_INITS = list(KMeansInit)
+
+# fixed-size record returned by worker processes in place of a pickled result
+RESULT_DTYPE = np.dtype(
+    [
+        ("width", "u4"),
+        ("height", "u4"),
+        ("resize_long_axis", "i4"),  # -1 if not resized
+        ("orientation", "u1"),
+        ("algorithm", "u1"),
+        ("n_colors", "u2"),
+        ("n_dominant_colors", "u2"),
+        ("has_histogram", "?"),
+        ("colors_rgb", "f8", (RESULT_MAX_COLORS, 3)),
+        ("colors_hsv", "f8", (RESULT_MAX_COLORS, 3)),
+        ("proportions", "f4", (RESULT_MAX_COLORS,)),
+        ("kmeans_init", "i1"),  # -1 if not fitted with k-means
+        ("n_iter", "i4"),
+        ("fit_seconds", "f4"),
+        ("analysis_long_axis", "i4"),
+        ("slot", "i4"),  # ring slot holding the image's pixels and label map, or -1
+    ]
+)
+
+
+class SharedPixelRing:
+    """
+    A ring of fixed-size slots in shared memory for passing decoded images (and their label maps) between processes
+    by slot index instead of by pickling. Each slot holds up to `max_pixels` RGB pixels followed by one label per
+    pixel; the process that creates the ring decides which slots are free.
+    """
+
+    def __init__(self, n_slots: int, max_pixels: int, name: str = None):
+        """Create a ring, or attach to an existing ring if `name` is provided.
+
+        Args:
+            n_slots (int): The number of slots in the ring.
+            max_pixels (int): The maximum number of pixels per slot.
+            name (str, optional): The name of an existing ring's shared memory block. Defaults to None.
+        """
+        self.n_slots = n_slots
+        self.max_pixels = max_pixels
+        self.slot_size = max_pixels * 4  # 3 bytes of RGB + 1 byte of label per pixel
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(1, n_slots * self.slot_size))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.free_slots = list(range(n_slots)) if self.owner else None
+
+    def acquire(self) -> int:
+        """Take a free slot (owner only).
+
+        Raises:
+            IndexError: If no slots are free.
+
+        Returns:
+            int: The index of the acquired slot.
+        """
+        return self.free_slots.pop()
+
+    def release(self, slot: int):
+        """Return a slot to the ring once its contents have been read (owner only).
+
+        Args:
+            slot (int): The index of the slot to release.
+        """
+        self.free_slots.append(slot)
+
+    def write(self, slot: int, rgb_image_data: np.ndarray, labels: np.ndarray = None):
+        """Write an image (and optionally its label map) into a slot.
+
+        Args:
+            slot (int): The index of the slot to write.
+            rgb_image_data (np.ndarray): The image, as an array of shape (height, width, 3).
+            labels (np.ndarray, optional): One label per pixel, each less than 256. Defaults to None.
+
+        Raises:
+            ValueError: If the image does not fit in a slot.
+        """
+        n_pixels = rgb_image_data.shape[0] * rgb_image_data.shape[1]
+        if n_pixels > self.max_pixels:
+            raise ValueError(f"Image with {n_pixels} pixels does not fit in a {self.max_pixels}-pixel slot")
+
+        rgb_view, labels_view = self.get_views(slot, rgb_image_data.shape[0], rgb_image_data.shape[1])
+        rgb_view[:] = rgb_image_data
+        if labels is not None:
+            labels_view[:] = labels.reshape(labels_view.shape)
+
+    def get_views(self, slot: int, height: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Get zero-copy views of the image and label map held in a slot.
+
+        Args:
+            slot (int): The index of the slot.
+            height (int): The height of the image held in the slot.
+            width (int): The width of the image held in the slot.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The image, of shape (height, width, 3), and label map, of shape
+                (height, width).
+        """
+        n_pixels = height * width
+        offset = slot * self.slot_size
+        rgb_view = np.ndarray((height, width, 3), dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+        labels_view = np.ndarray((height, width), dtype=np.uint8, buffer=self.shm.buf, offset=offset + n_pixels * 3)
+        return rgb_view, labels_view
+
+    def close(self):
+        """Detach from the ring, removing it if this instance created it."""
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def pack_result(analyzed_image: AnalysisResult, slot: int = -1) -> np.ndarray:
+    """Pack an analysis result into a fixed-size record.
+
+    Args:
+        analyzed_image (AnalysisResult): The result to pack.
+        slot (int, optional): The ring slot holding the image's pixels, if any. Defaults to -1.
+
+    Raises:
+        ValueError: If the result has more than RESULT_MAX_COLORS dominant colors.
+
+    Returns:
+        np.ndarray: The packed result, as a scalar record of RESULT_DTYPE.
+    """
+    n_colors = len(analyzed_image.dominant_colors_rgb)
+    if n_colors > RESULT_MAX_COLORS:
+        raise ValueError(f"Cannot pack more than {RESULT_MAX_COLORS} dominant colors (got {n_colors})")
+
+    record = np.zeros((), dtype=RESULT_DTYPE)
+    record["width"] = analyzed_image.width
+    record["height"] = analyzed_image.height
+    record["resize_long_axis"] = -1 if analyzed_image.resize_long_axis is None else analyzed_image.resize_long_axis
+    record["orientation"] = analyzed_image.orientation.value
+    record["algorithm"] = DOMINANT_COLOR_ALGORITHMS.index(analyzed_image.dominant_color_algorithm)
+    record["n_colors"] = analyzed_image.n_colors
+    record["n_dominant_colors"] = n_colors
+    record["colors_rgb"][:n_colors] = analyzed_image.dominant_colors_rgb
+    record["colors_hsv"][:n_colors] = analyzed_image.dominant_colors_hsv
+    record["has_histogram"] = analyzed_image.cluster_histogram is not None
+    if analyzed_image.cluster_histogram is not None:
+        record["proportions"][:n_colors] = [proportion for _, proportion in analyzed_image.cluster_histogram]
+    record["kmeans_init"] = (
+        -1 if analyzed_image.kmeans_init is None else KMEANS_INITS.index(analyzed_image.kmeans_init)
+    )
+    if analyzed_image.kmeans_init is not None:
+        record["n_iter"] = analyzed_image.n_iter
+        record["fit_seconds"] = analyzed_image.fit_seconds
+        record["analysis_long_axis"] = analyzed_image.analysis_long_axis
+    record["slot"] = slot
+    return record
+
+
+def unpack_result(record: np.ndarray, image_path: Path, ring: SharedPixelRing = None) -> AnalysisResult:
+    """Unpack a fixed-size record into an analysis result.
+
+    If the record refers to a ring slot, the image and its label map are copied out of the ring (the slot may be
+    released afterwards).
+
+    Args:
+        record (np.ndarray): The packed result, as a record of RESULT_DTYPE.
+        image_path (Path): The path of the analyzed image.
+        ring (SharedPixelRing, optional): The ring holding the image's pixels, if any. Defaults to None.
+
+    Returns:
+        AnalysisResult: The unpacked result.
+    """
+    n_colors = int(record["n_dominant_colors"])
+    dominant_colors_rgb = record["colors_rgb"][:n_colors].tolist()
+    dominant_colors_hsv = record["colors_hsv"][:n_colors].tolist()
+    cluster_histogram = None
+    if record["has_histogram"]:
+        cluster_histogram = [
+            (np.array(rgb), proportion)
+            for rgb, proportion in zip(record["colors_rgb"][:n_colors], record["proportions"])
+        ]
+
+    result = AnalysisResult(
+        image_path,
+        int(record["width"]),
+        int(record["height"]),
+        util.ImageOrientation(int(record["orientation"])),
+        DOMINANT_COLOR_ALGORITHMS[int(record["algorithm"])],
+        int(record["n_colors"]),
+        dominant_colors_rgb,
+        dominant_colors_hsv,
+        cluster_histogram,
+        None if record["resize_long_axis"] < 0 else int(record["resize_long_axis"]),
+    )
+    if record["kmeans_init"] >= 0:
+        result.kmeans_init = KMEANS_INITS[int(record["kmeans_init"])]
+        result.n_iter = int(record["n_iter"])
+        result.fit_seconds = float(record["fit_seconds"])
+        result.analysis_long_axis = int(record["analysis_long_axis"])
+    if ring is not None and record["slot"] >= 0:
+        rgb_view, labels_view = ring.get_views(int(record["slot"]), result.height, result.width)
+        result.pil_image = Image.fromarray(rgb_view.copy())
+        if cluster_histogram is not None:
+            result.label_map = labels_view.copy()
+    return result
+
+
+def write_to_ring(ring: SharedPixelRing, slot: int, analyzed_image: AnalysisResult):
+    """Write an analyzed image's resized pixels and label map (nearest dominant color per pixel) into a ring slot.
+
+    Args:
+        ring (SharedPixelRing): The ring to write to.
+        slot (int): The slot to write.
+        analyzed_image (AnalysisResult): The analyzed image.
+    """
+    rgb_image_data = np.asarray(analyzed_image.pil_image.convert("RGB"))
+    labels = None
+    if analyzed_image.cluster_histogram is not None:
+        cluster_centers = np.array([rgb for rgb, _ in analyzed_image.cluster_histogram])
+        labels = predict_from_centers(rgb_image_data.reshape((-1, 3)), cluster_centers).astype(np.uint8)
+    ring.write(slot, rgb_image_data, labels)
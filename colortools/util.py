@@ -1,13 +1,20 @@
 import colorsys
+import os
 import re
+import shutil
+import tempfile
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import List, Union
+from typing import Callable, List, Tuple, Union
 
 import numpy as np
 
 DIGIT_RE = re.compile(r"(\d+)")
+SRGB_TO_XYZ = np.array(
+    [[0.4124564, 0.3575761, 0.1804375], [0.2126729, 0.7151522, 0.0721750], [0.0193339, 0.1191920, 0.9503041]]
+)
+D65_WHITE = np.array([0.95047, 1.0, 1.08883])
 
 
 # enums
@@ -94,6 +101,31 @@ def collect_jpg_paths(input_dir: Union[Path, str]) -> List[Path]:
     return jpg_paths
 
 
+def write_dir_atomically(dest_dir: Union[Path, str], write: Callable[[Path], None]):
+    """Write a directory to a temporary directory next to it, then rename it into place.
+
+    A directory already at `dest_dir` is renamed aside first, and only removed once the new directory is in place,
+    so that `dest_dir` is never partially written.
+
+    Args:
+        dest_dir (Union[Path, str]): The directory to write.
+        write (Callable[[Path], None]): Writes the contents of the directory into the (empty) directory it is called
+            with.
+    """
+    dest_dir = Path(dest_dir)
+    dest_dir.parent.mkdir(parents=True, exist_ok=True)
+    work_dir = Path(tempfile.mkdtemp(prefix=f".{dest_dir.name}.", dir=dest_dir.parent))
+    try:
+        tmp_dir = work_dir / "new"
+        tmp_dir.mkdir()
+        write(tmp_dir)
+        if dest_dir.exists():
+            os.replace(dest_dir, work_dir / "old")
+        os.replace(tmp_dir, dest_dir)
+    finally:
+        shutil.rmtree(work_dir)
+
+
 # mathematical operations
 # --------------------------------------------------------------------------------
 def round_to_int(val: float) -> int:
@@ -151,29 +183,48 @@ def normalize_8bit_hsv(hsv_list: Union[List[int], List[List[int]]]) -> Union[Lis
     return normalized
 
 
-def crop_center(rgb_image_data: np.ndarray, border_percent_y: float, border_percent_x: float = None) -> np.ndarray:
-    """Crop the borders of an image, leaving only the center.
-
-    Source: https://stackoverflow.com/a/39382475
+def get_crop_box(
+    width: int, height: int, border_percent_y: float, border_percent_x: float = None
+) -> Tuple[int, int, int, int]:
+    """Get the box that `crop_center` keeps, for an image of the provided size.
 
     Args:
-        rgb_image_data (np.ndarray): The image to crop, as a NumPy array.
+        width (int): The width of the image.
+        height (int): The height of the image.
         border_percent_y (float): The percentage to crop from the top and bottom.
         border_percent_x (float, optional): The percentage to crop from the left and right; if None, sets to the
             same value as border_percent_y. Defaults to None.
 
     Returns:
-        np.ndarray: The cropped image array.
+        Tuple[int, int, int, int]: The box to keep, as (left, upper, right, lower) pixel coordinates.
     """
     if border_percent_x is None:
         border_percent_x = border_percent_y
-    height, width = rgb_image_data.shape[0], rgb_image_data.shape[1]
     cropped_height = height - (2 * round_to_int(border_percent_y * height))
     cropped_width = width - (2 * round_to_int(border_percent_x * width))
 
     start_y = height // 2 - (cropped_height // 2)
     start_x = width // 2 - (cropped_width // 2)
-    return rgb_image_data[start_y : start_y + cropped_height, start_x : start_x + cropped_width]
+    return start_x, start_y, start_x + cropped_width, start_y + cropped_height
+
+
+def crop_center(rgb_image_data: np.ndarray, border_percent_y: float, border_percent_x: float = None) -> np.ndarray:
+    """Crop the borders of an image, leaving only the center.
+
+    Source: https://stackoverflow.com/a/39382475
+
+    Args:
+        rgb_image_data (np.ndarray): The image to crop, as a NumPy array.
+        border_percent_y (float): The percentage to crop from the top and bottom.
+        border_percent_x (float, optional): The percentage to crop from the left and right; if None, sets to the
+            same value as border_percent_y. Defaults to None.
+
+    Returns:
+        np.ndarray: The cropped image array.
+    """
+    height, width = rgb_image_data.shape[0], rgb_image_data.shape[1]
+    left, upper, right, lower = get_crop_box(width, height, border_percent_y, border_percent_x)
+    return rgb_image_data[upper:lower, left:right]
 
 
 # color space conversions
@@ -238,57 +289,35 @@ def hsv_to_rgb(
     return converted
 
 
-# def get_sample(image: np.ndarray) -> np.ndarray:
-#     """Get a sample of pixels from an image.
-
-#     Gets data from rule of thirds lines and quadrant lines.
-
-#     Args:
-#         image (np.ndarray): The image from which to pull the sample.
-
-#     Returns:
-#         np.ndarray: A sample of pixels from the provided image.
-#     """
-#     rot_sample = get_rule_of_thirds_sample(image)
-#     quad_sample = get_quadrant_sample(image)
-#     return np.concatenate((rot_sample, quad_sample))
+def rgb_to_lab(rgb_array: np.ndarray) -> np.ndarray:
+    """Convert sRGB colors to CIELAB (D65 white point), in which distances approximate perceived differences.
 
+    Args:
+        rgb_array (np.ndarray): The colors, as an array of shape (..., 3) of values from 0 to 255.
 
-# def get_rule_of_thirds_sample(image: np.ndarray) -> np.ndarray:
-#     """Get a sample of pixels from an image using the "rule of thirds" lines.
-
-#     Args:
-#         image (np.ndarray): The image from which to pull the sample.
-
-#     Returns:
-#         np.ndarray: A sample of pixels from the provided image.
-#     """
-#     height, width, _ = np.shape(image)
-#     h0 = int(height / 3)
-#     h1 = h0 * 2
-#     v0 = int(width / 3)
-#     v1 = v0 * 2
-
-#     horizontal_slices = np.ndarray([image[h0], image[h1]]).reshape((width * 2), 3)
-#     vertical_slices = np.ndarray([image[:, v0], image[:, v1]]).reshape((height * 2), 3)
-#     return np.concatenate((horizontal_slices, vertical_slices))
-
+    Returns:
+        np.ndarray: The converted colors, as an array of the same shape, with L from 0 to 100.
+    """
+    rgb = np.asarray(rgb_array, dtype=np.float64) / 255
+    linear = np.where(rgb > 0.04045, ((rgb + 0.055) / 1.055) ** 2.4, rgb / 12.92)
+    xyz = linear @ SRGB_TO_XYZ.T / D65_WHITE
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
 
-# def get_quadrant_sample(image: np.ndarray) -> np.ndarray:
-#     """Get a sample of pixels from an image using quadrant lines
 
-#     Sample draws pixels along the lines that bisect the image horizontally and vertically.
+def parse_hex_color(hex_color: str) -> List[int]:
+    """Parse a hexadecimal color code (e.g. `#2E6F95`).
 
-#     Args:
-#         image (np.ndarray): The image from which to pull the sample.
+    Args:
+        hex_color (str): The color code, with or without a leading `#`.
 
-#     Returns:
-#         np.ndarray: A sample of pixels from the provided image.
-#     """
-#     height, width, _ = np.shape(image)
-#     h = int(height / 2)
-#     v = int(width / 2)
+    Raises:
+        ValueError: If the color code is not six hexadecimal digits.
 
-#     horizontal_slice = np.ndarray([image[h]]).reshape(width, 3)
-#     vertical_slice = np.ndarray([image[:, v]]).reshape(height, 3)
-#     return np.concatenate((horizontal_slice, vertical_slice))
+    Returns:
+        List[int]: The color, as an RGB array.
+    """
+    digits = hex_color.lstrip("#")
+    if not re.fullmatch(r"[0-9a-fA-F]{6}", digits):
+        raise ValueError(f"Invalid hex color: {hex_color}")
+    return [int(digits[i : i + 2], 16) for i in range(0, 6, 2)]
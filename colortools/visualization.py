@@ -1,6 +1,5 @@
 import logging
 import math
-import os
 from pathlib import Path
 from typing import List, Union
 
@@ -9,7 +8,11 @@ from PIL import Image, ImageOps
 
 import colortools.config as config
 from colortools.analyzed_image import AnalyzedImage
-from colortools.util import ImageOrientation, round_array, round_to_int
+from colortools.export import ExportStrategy, export_file
+from colortools.layout import CollageLayout, get_layout_function
+from colortools.results import AnalysisResult
+from colortools.store import ResultStore
+from colortools.util import ImageOrientation, rgb_to_lab, round_array, round_to_int
 
 logging.basicConfig(format="%(levelname)s: %(message)s")
 
@@ -18,15 +21,21 @@ MAX_IMAGE_DIM = 12000
 # TODO tests
 
 
-def save(image: Union[AnalyzedImage, Image.Image, np.ndarray], dest_path: Union[Path, str]):
+def save(
+    image: Union[AnalyzedImage, Image.Image, np.ndarray],
+    dest_path: Union[Path, str],
+    export_strategy: ExportStrategy = ExportStrategy.HARDLINK,
+):
     """Save the provided image to disk.
 
-    If the image is an image representation, create a hard link between the image's original file and
-    the provided path to save on disk space.
+    If the image is an image representation, export the image's original file to the provided path (by default
+    with a hard link, to save on disk space) instead of re-encoding it.
 
     Args:
         image (Union[AnalyzedImage, Image, np.ndarray]): The image to save to disk.
         dest_path (Union[Path, str]): The output path to which to save the image.
+        export_strategy (ExportStrategy, optional): The preferred strategy for exporting original files; falls
+            back to the next strategy if unsupported. Defaults to HARDLINK.
     """
     if not isinstance(dest_path, Path):
         dest_path = Path(dest_path)
@@ -34,8 +43,8 @@ def save(image: Union[AnalyzedImage, Image.Image, np.ndarray], dest_path: Union[
     dest_parent = dest_path.parents[0]
     _ = dest_parent.mkdir(parents=True, exist_ok=True)
 
-    if isinstance(image, AnalyzedImage):
-        os.link(image.image_path, dest_path)
+    if isinstance(image, AnalysisResult):
+        export_file(image.image_path, dest_path, export_strategy)
     else:
         if isinstance(image, np.ndarray):
             image = Image.fromarray(image)
@@ -395,11 +404,14 @@ def save_spectrum_visualization(
         dest_path (str): The output folder to which to write the generated spectrum graphic.
         display (bool): Whether to display the generated spectrum graphic.
     """
-    bar_width = round_to_int((output_graphic_height * config.DEFAULT_SPECTRUM_RATIO) / len(analyzed_images))
-    vertical_bars = [
-        get_histogram_as_bar(img, include_all_colors, output_graphic_height, bar_width) for img in analyzed_images
-    ]
-    spectrum = concat_horizontal(vertical_bars)
+    if isinstance(analyzed_images, ResultStore):
+        spectrum = Image.fromarray(get_store_spectrum(analyzed_images, include_all_colors, output_graphic_height))
+    else:
+        bar_width = round_to_int((output_graphic_height * config.DEFAULT_SPECTRUM_RATIO) / len(analyzed_images))
+        vertical_bars = [
+            get_histogram_as_bar(img, include_all_colors, output_graphic_height, bar_width) for img in analyzed_images
+        ]
+        spectrum = concat_horizontal(vertical_bars)
 
     if display:
         spectrum.show()
@@ -431,16 +443,60 @@ def get_histogram_as_bar(
     else:
         color_hist = [(analyzed_image.get_dominant_color(), 1)]
 
-    color_hist.reverse()  # build bottom-up
     bar_components = []
-    for color_rgb, proportion in color_hist:
+    for color_rgb, proportion in reversed(color_hist):  # build bottom-up, without reordering the image's histogram
         converted = tuple([int(color) for color in color_rgb])
         bar_components.append(Image.new("RGB", (width, round_to_int(proportion * height)), color=converted))
 
     return concat_vertical(bar_components)
 
 
-def save_image_collage(analyzed_images: List[AnalyzedImage], width: Union[int, str], dest_path: str, display: bool):
+def get_store_spectrum(store: ResultStore, include_all_colors: bool, height: int) -> np.ndarray:
+    """Get a "spectrum" of the dominant colors of the images in a result store, as an array.
+
+    Like `save_spectrum_visualization`, each image is drawn as a vertical bar (with its most dominant color at the
+    bottom), but the spectrum is computed column by column, so its cost depends on the size of the graphic rather
+    than on the number of images. If there are more images than columns, each column shows one of the images it
+    covers.
+
+    Args:
+        store (ResultStore): The images, in order.
+        include_all_colors (bool): Whether to include all detected dominant colors (for images with a histogram).
+        height (int): The height of the spectrum.
+
+    Returns:
+        np.ndarray: The spectrum, as an array of shape (height, width, 3).
+    """
+    n_images = len(store)
+    bar_width = round_to_int((height * config.DEFAULT_SPECTRUM_RATIO) / n_images)
+    if bar_width >= 1:
+        width = n_images * bar_width
+        columns = np.arange(width) // bar_width
+    else:
+        width = round_to_int(height * config.DEFAULT_SPECTRUM_RATIO)
+        columns = np.arange(width) * n_images // width
+
+    rows = store.get_rows()[columns]
+    starts = store.color_offsets[rows]
+    color_indices = np.repeat(starts[np.newaxis, :], height, axis=0)
+    if include_all_colors:
+        counts = np.where(store.records["has_histogram"][rows], store.color_offsets[rows + 1] - starts, 1)
+        heights_from_bottom = (height - np.arange(height) - 0.5) / height
+        cumulative = np.zeros(width)
+        for k in range(1, int(counts.max())):
+            # colors are stacked bottom-up, so pixels above the first k colors' share show a later color
+            cumulative += np.nan_to_num(store.proportions[starts + np.minimum(k - 1, counts - 1)])
+            color_indices += (heights_from_bottom[:, np.newaxis] >= cumulative) & (k < counts)
+    return np.asarray(store.colors_rgb[color_indices.ravel()]).astype(np.uint8).reshape((height, width, 3))
+
+
+def save_image_collage(
+    analyzed_images: List[AnalyzedImage],
+    width: Union[int, str],
+    dest_path: str,
+    display: bool,
+    layout: CollageLayout = config.DEFAULT_COLLAGE_LAYOUT,
+):
     """Generate a collage of the sorted images.
 
     Tries to keep aspect ratio of generated graphic as square as possible.
@@ -449,6 +505,9 @@ def save_image_collage(analyzed_images: List[AnalyzedImage], width: Union[int, s
         analyzed_images (List[AnalyzedImage]): Sequence of analyzed images.
         dest_path (str): The output folder to which to write the generated graphic.
         display (bool): Whether to display the generated graphic.
+        layout (CollageLayout, optional): How images are arranged: in order, row by row, or so that neighbors in
+            both directions have similar dominant colors (see `layout.get_grid_layout`). Defaults to
+            config.DEFAULT_COLLAGE_LAYOUT.
     """
     if width == "sqrt":
         width = int(math.sqrt(len(analyzed_images)))
@@ -464,6 +523,16 @@ def save_image_collage(analyzed_images: List[AnalyzedImage], width: Union[int, s
         if (width * height) < len(analyzed_images):
             height += 1
 
+    if isinstance(analyzed_images, ResultStore):
+        colors_rgb = analyzed_images.get_dominant_colors_rgb()
+    else:
+        colors_rgb = [analyzed_image.get_dominant_color() for analyzed_image in analyzed_images]
+    order = get_layout_function(layout)(rgb_to_lab(np.reshape(colors_rgb, (-1, 3))), width)
+    if isinstance(analyzed_images, ResultStore):
+        analyzed_images = analyzed_images.take(order)
+    else:
+        analyzed_images = [analyzed_images[i] for i in order]
+
     pil_images = [analyzed_image.pil_image for analyzed_image in analyzed_images]
     rows = [pil_images[i : i + width] for i in range(0, len(pil_images), width)]
     spacing = config.DEFAULT_COLLAGE_SPACING
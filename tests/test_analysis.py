@@ -1,7 +1,24 @@
+import tracemalloc
+
 import numpy as np
 import pytest
 from PIL import Image
-from colortools.analysis import fit_and_predict
+from sklearn.cluster import KMeans
+from colortools.analysis import (
+    compare_hue_histograms,
+    fit_and_predict,
+    fit_values,
+    get_hue_peak_centers,
+    is_grayscale,
+    predict_from_centers,
+)
+from colortools.heuristics import compute_hue_histogram
+
+PATCH_COLORS = [(200, 30, 30), (30, 200, 30), (30, 30, 200)]
+
+
+def get_patch_image(colors=PATCH_COLORS, patch_size=20):
+    return np.concatenate([np.full((patch_size, patch_size, 3), color, dtype=np.uint8) for color in colors], axis=1)
 
 
 @pytest.mark.parametrize("test_side_length, color", [(100, (255, 0, 0)), (100, (0, 255, 0)), (100, (0, 0, 255))])
@@ -10,3 +27,92 @@ def test_analyzed_image_resize(test_side_length, color):
     clusters, predicted = fit_and_predict(np.asarray(image), 1)
     assert (clusters.cluster_centers_ == [list(color)]).all()
     assert (predicted == [0] * image.size[0] * image.size[1]).all()
+
+
+def get_peak_allocation(func, *args):
+    func(*args)  # warm up (imports, caches)
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_fit_and_predict_float32():
+    image = np.random.default_rng(0).integers(0, 256, (300, 400, 3), dtype=np.uint8)
+    cropped = image[10:-10, 10:-10]  # a non-contiguous view, as after cropping
+    (clusters, _), peak = get_peak_allocation(fit_and_predict, cropped, 4)
+    assert clusters.cluster_centers_.dtype == np.float32
+
+    def fit_float64(image_data, n_clusters):
+        return KMeans(n_clusters=n_clusters, random_state=0, n_init="auto").fit(image_data.reshape((-1, 3)))
+
+    clusters_float64, peak_float64 = get_peak_allocation(fit_float64, cropped, 4)
+    assert clusters.n_iter_ > 0 and clusters_float64.n_iter_ > 0
+    assert peak < 0.85 * peak_float64
+
+
+def test_predict_from_centers():
+    image = np.asarray(Image.open("tests/test_images/test_analyzed_image/red-blue.jpg").resize((50, 25)))
+    clusters, predicted = fit_and_predict(image, 2)
+    rgb_data = image.reshape((-1, 3))
+    np.testing.assert_array_equal(predict_from_centers(rgb_data, clusters.cluster_centers_), predicted)
+
+
+def test_fit_and_predict_with_init_centers():
+    image = get_patch_image()
+    clusters, predicted = fit_and_predict(image, 3, init_centers=np.array(PATCH_COLORS))
+    assert clusters.n_iter_ == 1
+    np.testing.assert_allclose(clusters.cluster_centers_, PATCH_COLORS, rtol=1e-5)  # clustered in float32
+    assert len(set(predicted)) == 3
+
+
+def test_get_hue_peak_centers():
+    image = get_patch_image()
+    image_hsv = np.asarray(Image.fromarray(image).convert("HSV"))
+    hue_histogram = compute_hue_histogram(image_hsv)
+    centers = get_hue_peak_centers(image, image_hsv, hue_histogram, 3)
+    assert sorted(map(tuple, centers.round().astype(int).tolist())) == sorted(PATCH_COLORS)
+    assert get_hue_peak_centers(image, image_hsv, hue_histogram, 4) is None
+
+
+def test_compare_hue_histograms():
+    hue_histogram = compute_hue_histogram(np.asarray(Image.fromarray(get_patch_image()).convert("HSV")))
+    assert compare_hue_histograms(hue_histogram, hue_histogram) == pytest.approx(1)
+    assert compare_hue_histograms(hue_histogram, 2 * hue_histogram) == pytest.approx(1)
+    assert compare_hue_histograms(hue_histogram, np.roll(hue_histogram, 1)) == 0
+    assert compare_hue_histograms(hue_histogram, np.zeros_like(hue_histogram)) == 0
+
+
+@pytest.mark.parametrize(
+    "image, expected",
+    [
+        (Image.new("L", (300, 200), 128), True),
+        (Image.new("RGB", (300, 200), (128, 128, 128)), True),
+        (Image.new("RGB", (300, 200), (128, 128, 150)), False),
+        (Image.new("RGB", (300, 200), (20, 12, 12)), False),
+        (Image.new("RGB", (300, 200), (5, 5, 12)), False),
+        (Image.new("RGB", (300, 200), (2, 2, 5)), True),
+        (Image.fromarray(get_patch_image()), False),
+    ],
+)
+def test_is_grayscale(image, expected):
+    assert is_grayscale(image) == expected
+
+
+def test_is_grayscale_noise():
+    rng = np.random.default_rng(0)
+    gray = np.repeat(rng.integers(0, 256, (200, 300, 1)), 3, axis=2)
+    noisy = np.clip(gray + rng.integers(-20, 21, gray.shape), 0, 255).astype(np.uint8)
+    assert is_grayscale(Image.fromarray(noisy))  # channel noise averages out in the thumbnail
+    assert not is_grayscale(Image.fromarray(noisy), thumbnail_size=1000)
+
+
+def test_fit_values():
+    value_histogram = np.zeros(256)
+    value_histogram[[10, 11, 12]] = 100
+    value_histogram[[200, 201]] = 50
+    centers, proportions = fit_values(value_histogram, 2)
+    np.testing.assert_allclose(centers, [11, 200.5])
+    np.testing.assert_allclose(proportions, [0.75, 0.25])
@@ -1,9 +1,16 @@
 import logging
+from pathlib import Path
 
 import numpy as np
 import pytest
+from PIL import Image
+import colortools.analyzed_image as analyzed_image_module
+import colortools.config as config
+from colortools.analysis import KMeansInit, predict_from_centers
 from colortools.analyzed_image import AnalyzedImage
 from colortools.heuristics import NColorsHeuristic
+from colortools.results import AnalysisResult
+from colortools.sampling import SamplingStrategy
 from colortools.util import DominantColorAlgorithm, ImageOrientation, hsv_to_rgb, rgb_to_hsv
 
 from conftest import ARRAY_TOLERANCE
@@ -104,6 +111,40 @@ def test_is_bw(test_color, target_is_bw):
     assert analyzed_image.is_bw() == target_is_bw
 
 
+@pytest.mark.parametrize("image_source", ["image", "bytes", "file"])
+def test_initialization_from_image_source(image_source):
+    image_path = f"{TEST_IMAGE_DIR}/red-blue.jpg"
+    if image_source == "image":
+        image = Image.open(image_path)
+    elif image_source == "bytes":
+        image = Path(image_path).read_bytes()
+    else:
+        image = open(image_path, "rb")
+
+    expected = AnalyzedImage(image_path, 50, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 2, None)
+    analyzed_image = AnalyzedImage(image_path, 50, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 2, None, image=image)
+    assert (analyzed_image.width, analyzed_image.height) == (expected.width, expected.height)
+    assert analyzed_image.get_dominant_colors() == expected.get_dominant_colors()
+
+
+def test_initialization_sets_result_attributes(monkeypatch):
+    init_calls = []
+    result_init = AnalysisResult.__init__
+    monkeypatch.setattr(
+        AnalysisResult, "__init__", lambda self, *args, **kwargs: init_calls.append(result_init(self, *args, **kwargs))
+    )
+    analyzed_image = AnalyzedImage(
+        get_image_path((100, 200), "red"), 50, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None
+    )
+    assert len(init_calls) == 1
+    assert analyzed_image.image_path == Path(get_image_path((100, 200), "red"))
+    assert (analyzed_image.width, analyzed_image.height) == (25, 50)
+    assert analyzed_image.orientation == ImageOrientation.VERTICAL
+    assert analyzed_image.resize_long_axis == 50
+    assert analyzed_image.n_colors == 1
+    assert analyzed_image.cluster_histogram is None
+
+
 @pytest.mark.parametrize("index", [None, 1, "a"])
 @pytest.mark.parametrize("base", [1, "a"])
 @pytest.mark.parametrize("n_colors", [1, 2, 100])
@@ -115,3 +156,176 @@ def test_generate_filename(n_colors, index, base):
         assert f"{str(index)}_" in test_filename
     assert f"{str(base)}_" in test_filename
     assert f"_n={str(n_colors)}.jpg" in test_filename
+
+
+@pytest.mark.parametrize("kmeans_init", [kmi for kmi in KMeansInit])
+def test_kmeans_init(kmeans_init):
+    image_path = f"{TEST_IMAGE_DIR}/red-blue.jpg"
+    expected = AnalyzedImage(image_path, 50, EDGE_CROP, DominantColorAlgorithm.KMEANS, 2, None)
+    analyzed_image = AnalyzedImage(
+        image_path, 50, EDGE_CROP, DominantColorAlgorithm.KMEANS, 2, None, kmeans_init=kmeans_init
+    )
+    assert analyzed_image.n_iter >= 1
+    assert analyzed_image.fit_seconds > 0
+    assert analyzed_image.kmeans_init != KMeansInit.PREVIOUS  # falls back without a previous image
+    assert np.allclose(
+        sorted(analyzed_image.get_dominant_colors()), sorted(expected.get_dominant_colors()), atol=ARRAY_TOLERANCE
+    )
+
+
+def test_kmeans_init_previous():
+    image_path = f"{TEST_IMAGE_DIR}/red-blue.jpg"
+    args = (image_path, 50, EDGE_CROP, DominantColorAlgorithm.KMEANS)
+    first = AnalyzedImage(*args, 2, None, kmeans_init=KMeansInit.PREVIOUS)
+    assert first.kmeans_init != KMeansInit.PREVIOUS  # no previous image
+
+    second = AnalyzedImage(*args, 2, None, kmeans_init=KMeansInit.PREVIOUS, previous_image=first)
+    assert second.kmeans_init == KMeansInit.PREVIOUS
+    assert second.n_iter <= first.n_iter
+    assert np.allclose(sorted(second.get_dominant_colors()), sorted(first.get_dominant_colors()), atol=ARRAY_TOLERANCE)
+
+    different_n = AnalyzedImage(*args, 3, None, kmeans_init=KMeansInit.PREVIOUS, previous_image=first)
+    assert different_n.kmeans_init != KMeansInit.PREVIOUS
+
+    other_image_path = get_image_path((100, 100), "green")
+    other = AnalyzedImage(
+        other_image_path,
+        50,
+        EDGE_CROP,
+        DominantColorAlgorithm.KMEANS,
+        2,
+        None,
+        kmeans_init=KMeansInit.PREVIOUS,
+        previous_image=first,
+    )
+    assert other.kmeans_init != KMeansInit.PREVIOUS
+
+
+@pytest.mark.parametrize("dominant_color_algorithm", DOMINANT_COLOR_ALGORITHMS)
+@pytest.mark.parametrize("mode", ["L", "RGB"])
+def test_grayscale_value_only_analysis(dominant_color_algorithm, mode):
+    values = np.concatenate([np.full((50, 75), 40, dtype=np.uint8), np.full((50, 25), 220, dtype=np.uint8)], axis=1)
+    image = Image.fromarray(values).convert(mode)
+    analyzed_image = AnalyzedImage(
+        "gray.jpg", 100, EDGE_CROP, dominant_color_algorithm, 2, None, image=image, grayscale_check=True
+    )
+    assert analyzed_image.is_grayscale
+    assert analyzed_image.is_bw()
+    assert analyzed_image.n_iter is None
+    assert analyzed_image.pil_image.mode == "RGB"
+    assert np.allclose(analyzed_image.get_dominant_colors(), [[40] * 3, [220] * 3], atol=ARRAY_TOLERANCE)
+    if dominant_color_algorithm == DominantColorAlgorithm.KMEANS:
+        assert [proportion for _, proportion in analyzed_image.cluster_histogram] == pytest.approx([0.75, 0.25])
+        remapped = np.asarray(analyzed_image.get_remapped_image())
+        assert np.allclose(remapped, np.asarray(analyzed_image.pil_image), atol=ARRAY_TOLERANCE)
+
+
+def test_grayscale_check_disabled_by_default():
+    image = Image.new("RGB", (100, 100), (128, 128, 128))
+    args = ("gray.jpg", 50, EDGE_CROP, DominantColorAlgorithm.KMEANS, 2, None)
+    analyzed_image = AnalyzedImage(*args, image=image)
+    assert not analyzed_image.is_grayscale
+    assert analyzed_image.n_iter is not None
+    assert analyzed_image.is_bw()
+
+
+@pytest.mark.parametrize("dominant_color_algorithm", DOMINANT_COLOR_ALGORITHMS)
+@pytest.mark.parametrize("n_colors, auto_n_heuristic", [(3, None), (None, NColorsHeuristic.AUTO_N_HUE)])
+def test_grayscale_check_n_colors(monkeypatch, dominant_color_algorithm, n_colors, auto_n_heuristic):
+    monkeypatch.setattr(analyzed_image_module, "get_n_heuristic", lambda _: lambda *args, **kwargs: 3)
+    values = np.repeat(np.array([[30, 120, 210]], dtype=np.uint8), 100, axis=0).repeat(30, axis=1)
+    image = Image.fromarray(values).convert("RGB")
+    analyzed_image = AnalyzedImage(
+        "gray.jpg",
+        90,
+        EDGE_CROP,
+        dominant_color_algorithm,
+        n_colors,
+        auto_n_heuristic,
+        image=image,
+        grayscale_check=True,
+    )
+    assert analyzed_image.is_grayscale
+    assert analyzed_image.n_colors == 3
+    assert np.allclose(
+        sorted(analyzed_image.get_dominant_colors()), [[30] * 3, [120] * 3, [210] * 3], atol=ARRAY_TOLERANCE
+    )
+
+
+@pytest.mark.parametrize("dominant_color_algorithm", DOMINANT_COLOR_ALGORITHMS)
+@pytest.mark.parametrize("color", [(20, 12, 12), (5, 5, 12)])
+def test_dark_saturated_image_not_grayscale(dominant_color_algorithm, color):
+    image = Image.new("RGB", (100, 100), color)
+    analyzed_image = AnalyzedImage(
+        "dark.jpg", 50, EDGE_CROP, dominant_color_algorithm, 1, None, image=image, grayscale_check=True
+    )
+    assert not analyzed_image.is_grayscale
+    assert not analyzed_image.is_bw()
+    assert analyzed_image.get_dominant_color(hsv=True)[1] > 30
+
+
+def get_gradient_image(width=400, height=300):
+    y, x = np.mgrid[0:height, 0:width]
+    rgb = np.stack([x / width * 255, y / height * 255, np.full(x.shape, 128)], axis=-1)
+    return Image.fromarray(rgb.astype(np.uint8))
+
+
+def test_adaptive_resolution_coarse():
+    image = get_gradient_image()
+    args = ("gradient.jpg", 400, EDGE_CROP, DominantColorAlgorithm.KMEANS, 4, None)
+    expected = AnalyzedImage(*args, image=image)
+    analyzed_image = AnalyzedImage(*args, image=image, adaptive_resolution=True)
+    assert expected.analysis_long_axis == 400
+    assert analyzed_image.analysis_long_axis == max(config.DEFAULT_ADAPTIVE_RESOLUTIONS)
+    assert analyzed_image.center_shift <= config.DEFAULT_ADAPTIVE_TOLERANCE
+    assert analyzed_image.predicted.shape == expected.predicted.shape
+    np.testing.assert_array_equal(
+        analyzed_image.predicted,
+        predict_from_centers(
+            analyzed_image.get_analysis_array().reshape((-1, 3)), analyzed_image.model.cluster_centers_
+        ),
+    )
+    assert np.allclose(sorted(analyzed_image.get_dominant_colors()), sorted(expected.get_dominant_colors()), atol=10)
+
+
+def test_adaptive_resolution_full(monkeypatch):
+    monkeypatch.setattr(config, "DEFAULT_ADAPTIVE_TOLERANCE", -1)
+    args = ("gradient.jpg", 400, EDGE_CROP, DominantColorAlgorithm.KMEANS, 4, None)
+    analyzed_image = AnalyzedImage(*args, image=get_gradient_image(), adaptive_resolution=True)
+    assert analyzed_image.analysis_long_axis == 400
+    assert analyzed_image.center_shift is not None
+
+
+@pytest.mark.parametrize("dominant_color_algorithm", DOMINANT_COLOR_ALGORITHMS)
+@pytest.mark.parametrize("edge_crop", [0, 0.1])
+def test_crop_on_decode(dominant_color_algorithm, edge_crop):
+    image_path = f"{TEST_IMAGE_DIR}/red-blue.jpg"
+    args = (image_path, 50, edge_crop, dominant_color_algorithm, 2, None)
+    expected = AnalyzedImage(*args)
+    analyzed_image = AnalyzedImage(*args, crop_on_decode=True)
+    assert (analyzed_image.width, analyzed_image.height) == (expected.width, expected.height)
+    assert analyzed_image.get_as_array(crop_center=True).shape == expected.get_as_array(crop_center=True).shape
+    assert np.allclose(sorted(analyzed_image.get_dominant_colors()), sorted(expected.get_dominant_colors()), atol=10)
+
+    # the full frame is re-read on demand
+    assert analyzed_image._pil_image is None
+    assert analyzed_image.pil_image.size == (expected.width, expected.height)
+
+
+@pytest.mark.parametrize("sampling_strategy", list(SamplingStrategy))
+@pytest.mark.parametrize("dominant_color_algorithm", DOMINANT_COLOR_ALGORITHMS)
+def test_sampling_strategy(sampling_strategy, dominant_color_algorithm):
+    image = get_gradient_image()
+    args = ("gradient.jpg", 200, EDGE_CROP, dominant_color_algorithm, None, NColorsHeuristic.AUTO_N_HUE_BINNED)
+    expected = AnalyzedImage(*args, image=image)
+    analyzed_image = AnalyzedImage(*args, image=image, sampling_strategy=sampling_strategy, n_samples=1000)
+    rgb_sample, hsv_sample = analyzed_image.get_analysis_array(), analyzed_image.get_analysis_array(hsv=True)
+    assert rgb_sample.shape == hsv_sample.shape
+    if sampling_strategy == SamplingStrategy.NONE:
+        assert rgb_sample.shape[:2] == (analyzed_image.height, analyzed_image.width)
+    else:
+        assert rgb_sample.shape[0] * rgb_sample.shape[1] <= 1000
+    assert analyzed_image.n_colors == expected.n_colors
+    if dominant_color_algorithm == DominantColorAlgorithm.KMEANS:
+        assert len(analyzed_image.predicted) == rgb_sample.shape[0] * rgb_sample.shape[1]
+        assert analyzed_image.get_remapped_image().size == (analyzed_image.width, analyzed_image.height)
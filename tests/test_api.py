@@ -0,0 +1,206 @@
+import asyncio
+from concurrent.futures import Executor, Future
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+import colortools.api as api
+from colortools.analyzed_image import AnalyzedImage
+from colortools.api import analyze_many, analyze_stream
+from colortools.cache import PixelCache
+from colortools.heuristics import NColorsHeuristic
+from colortools.transport import SharedPixelRing
+from colortools.util import DominantColorAlgorithm
+
+TEST_IMAGE_DIR = "tests/test_images/test_sort"
+EDGE_CROP = 0
+
+
+def get_test_images():
+    return sorted(Path(TEST_IMAGE_DIR).glob("*.jpg"))
+
+
+async def collect_stream(image_paths, **kwargs):
+    return [
+        analyzed_image
+        async for analyzed_image in analyze_stream(
+            image_paths, None, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None, **kwargs
+        )
+    ]
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 3, 100])
+def test_analyze_stream_ordered(max_concurrency):
+    image_paths = get_test_images()
+    results = asyncio.run(collect_stream(image_paths, max_concurrency=max_concurrency, ordered=True))
+    assert [analyzed_image.image_path for analyzed_image in results] == image_paths
+
+
+def test_analyze_stream_unordered():
+    image_paths = get_test_images()
+    results = asyncio.run(collect_stream(image_paths, max_concurrency=4))
+    assert sorted(analyzed_image.image_path for analyzed_image in results) == image_paths
+
+
+class ImmediateExecutor(Executor):
+    # runs each call when it is submitted, so that all results complete at once
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+
+def test_analyze_stream_unordered_error():
+    image_paths = get_test_images()
+    bad_path = Path(TEST_IMAGE_DIR) / "missing.jpg"
+    results = []
+
+    async def collect(paths):
+        stream = analyze_stream(
+            paths,
+            None,
+            EDGE_CROP,
+            DominantColorAlgorithm.HUE_DIST,
+            1,
+            None,
+            max_concurrency=len(paths),
+            executor=ImmediateExecutor(),
+        )
+        async for analyzed_image in stream:
+            results.append(analyzed_image)
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(collect([bad_path, *image_paths]))
+    assert sorted(analyzed_image.image_path for analyzed_image in results) == image_paths
+
+
+def test_analyze_stream_early_exit():
+    async def take_first(image_paths):
+        stream = analyze_stream(image_paths, None, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None)
+        async for analyzed_image in stream:
+            await stream.aclose()
+            return analyzed_image
+
+    analyzed_image = asyncio.run(take_first(get_test_images()))
+    assert analyzed_image.image_path in get_test_images()
+
+
+@pytest.mark.parametrize("executor", ["serial", "threads", "processes"])
+@pytest.mark.parametrize("chunk_size", [1, 5])
+def test_analyze_many(executor, chunk_size):
+    image_paths = get_test_images()
+    progress = []
+    metrics = []
+    streamed = []
+    results = analyze_many(
+        image_paths,
+        None,
+        EDGE_CROP,
+        DominantColorAlgorithm.HUE_DIST,
+        1,
+        None,
+        executor=executor,
+        n_workers=2,
+        chunk_size=chunk_size,
+        progress_callback=lambda n_done, n_total: progress.append((n_done, n_total)),
+        metrics_callback=metrics.append,
+        result_callback=streamed.append,
+    )
+    assert [result.image_path for result in results] == image_paths
+    assert sorted(result.image_path for result in streamed) == image_paths
+    assert progress[-1] == (len(image_paths), len(image_paths))
+    assert metrics[-1]["n_done"] == len(image_paths)
+    for result, image_path in zip(results, image_paths):
+        expected = AnalyzedImage(image_path, None, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None)
+        assert result.get_dominant_colors() == expected.get_dominant_colors()
+        assert result.is_bw() == expected.is_bw()
+
+
+def test_analyze_many_bad_executor():
+    with pytest.raises(ValueError):
+        _ = analyze_many(get_test_images(), executor="fake")
+
+
+def test_init_worker_process_closes_ring(monkeypatch):
+    finalizers = []
+    monkeypatch.setattr(api, "Finalize", lambda obj, callback, exitpriority=None: finalizers.append(callback))
+    monkeypatch.setattr(api, "_worker_ring", None)
+    ring = SharedPixelRing(2, 16)
+    try:
+        api._init_worker_process((ring.name, ring.n_slots, ring.max_pixels), None)
+        assert api._worker_ring is not None
+        assert len(finalizers) == 1
+        finalizers[0]()  # as run when the worker exits
+        assert api._worker_ring.shm.buf is None
+    finally:
+        ring.close()
+
+
+def test_analyze_many_processes_keep_images():
+    image_paths = get_test_images()
+    results = analyze_many(
+        image_paths,
+        20,
+        EDGE_CROP,
+        DominantColorAlgorithm.KMEANS,
+        2,
+        None,
+        executor="processes",
+        n_workers=2,
+        chunk_size=2,
+        keep_images=True,
+    )
+    for result, image_path in zip(results, image_paths):
+        expected = AnalyzedImage(image_path, 20, EDGE_CROP, DominantColorAlgorithm.KMEANS, 2, None)
+        assert result._pil_image is not None
+        assert result.label_map is not None
+        np.testing.assert_array_equal(np.asarray(result.pil_image), np.asarray(expected.pil_image))
+
+
+@pytest.mark.parametrize("executor", ["serial", "threads", "processes"])
+def test_analyze_many_pixel_cache(executor, tmp_path):
+    image_paths = get_test_images()
+    kwargs = dict(executor=executor, n_workers=2, chunk_size=2, keep_images=True)
+    expected = analyze_many(image_paths, 20, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None, **kwargs)
+    for _ in range(2):  # populate (except with processes, which only read), then read from the cache
+        analyze_many(
+            image_paths, 20, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None, pixel_cache=tmp_path, **kwargs
+        )
+    analyze_many(image_paths, 20, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None, pixel_cache=tmp_path)
+    results = analyze_many(
+        image_paths, 20, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None, pixel_cache=tmp_path, **kwargs
+    )
+    assert len(PixelCache(tmp_path)) == len(image_paths)
+    for result, expected_result in zip(results, expected):
+        assert result.get_dominant_colors() == expected_result.get_dominant_colors()
+        assert (result.width, result.height) == (expected_result.width, expected_result.height)
+        np.testing.assert_array_equal(np.asarray(result.pil_image), np.asarray(expected_result.pil_image))
+
+
+def get_large_jpeg(dest_path):
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:1200, 0:1800]
+    rgb = np.stack([x * 255 // 1800, y * 255 // 1200, np.full(x.shape, 96)], axis=-1)
+    rgb = np.clip(rgb + rng.integers(-30, 31, rgb.shape), 0, 255).astype(np.uint8)
+    Image.fromarray(rgb).save(dest_path, quality=90)
+    return dest_path
+
+
+@pytest.mark.parametrize("crop_on_decode", [False, True])
+def test_analyze_many_independent_of_keep_images(crop_on_decode, tmp_path):
+    image_paths = [get_large_jpeg(tmp_path / "large.jpg"), *get_test_images()[:2]]
+    args = (image_paths, 500, 0.05, DominantColorAlgorithm.KMEANS, None, NColorsHeuristic.AUTO_N_HUE)
+    results = analyze_many(*args, crop_on_decode=crop_on_decode)
+    kept = analyze_many(*args, crop_on_decode=crop_on_decode, keep_images=True)
+    for result, kept_result in zip(results, kept):
+        assert result.n_colors == kept_result.n_colors
+        np.testing.assert_array_equal(result.get_dominant_colors(), kept_result.get_dominant_colors())
+
+
+def test_analyze_many_crop_on_decode_pixel_cache(tmp_path):
+    with pytest.raises(ValueError):
+        _ = analyze_many(get_test_images(), crop_on_decode=True, pixel_cache=tmp_path)
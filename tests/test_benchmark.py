@@ -0,0 +1,111 @@
+import csv
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pytest
+import colortools.benchmark as benchmark
+from colortools.analyzed_image import AnalyzedImage
+from colortools.benchmark import (
+    benchmark_memory,
+    benchmark_sampling,
+    get_color_drift,
+    get_peak_rss,
+    get_results_over_budget,
+    get_retained_breakdown,
+    save_benchmark_table,
+)
+from colortools.heuristics import NColorsHeuristic
+from colortools.results import AnalysisResult
+from colortools.sampling import SamplingStrategy
+from colortools.util import DominantColorAlgorithm, ImageOrientation
+
+TEST_IMAGE_DIR = "tests/test_images/test_sort"
+
+
+def get_result(colors, proportions=None):
+    cluster_histogram = None
+    if proportions is not None:
+        cluster_histogram = [(np.array(rgb), proportion) for rgb, proportion in zip(colors, proportions)]
+    return AnalysisResult(
+        "image.jpg",
+        10,
+        10,
+        ImageOrientation.HORIZONTAL,
+        DominantColorAlgorithm.KMEANS,
+        len(colors),
+        colors,
+        colors,
+        cluster_histogram,
+    )
+
+
+def test_get_color_drift():
+    baseline = get_result([[0, 0, 0], [100, 0, 0]], [0.75, 0.25])
+    assert get_color_drift(baseline, baseline) == 0
+    assert get_color_drift(get_result([[0, 0, 0]]), baseline) == pytest.approx(25)
+    assert get_color_drift(get_result([[0, 0, 0], [100, 0, 0], [0, 0, 100]]), baseline) == 0
+    assert get_color_drift(get_result([[0, 0, 10], [100, 0, 0]]), get_result([[0, 0, 0], [100, 0, 0]])) == 5
+
+
+def test_benchmark_sampling(tmp_path):
+    image_paths = sorted(Path(TEST_IMAGE_DIR).glob("*.jpg"))[:3]
+    strategies = [SamplingStrategy.GRID, SamplingStrategy.RANDOM]
+    results = benchmark_sampling(
+        image_paths, strategies, 100, 50, 0, DominantColorAlgorithm.KMEANS, None, NColorsHeuristic.AUTO_N_HUE
+    )
+    assert [result.strategy for result in results] == [SamplingStrategy.NONE] + strategies
+    assert results[0].mean_color_drift == 0 and results[0].n_colors_agreement == 1
+    assert all(result.mean_pixels <= 100 for result in results[1:])
+
+    dest_path = tmp_path / "sampling.csv"
+    save_benchmark_table(results, dest_path)
+    with open(dest_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["strategy"] for row in rows] == ["none", "grid", "random"]
+
+
+def test_benchmark_memory(tmp_path):
+    image_paths = sorted(Path(TEST_IMAGE_DIR).glob("*-100-100.jpg"))[:3]  # color images, clustered with k-means
+    results, stage_results = benchmark_memory(
+        image_paths, 100, 0, DominantColorAlgorithm.KMEANS, 2, None, graphics_dir=tmp_path
+    )
+    assert [result.image_path for result in results] == image_paths
+    for result in results:
+        assert result.analysis_peak_bytes > 0
+        assert result.pil_image_bytes == 100 * 100 * 3
+        assert result.predicted_bytes > 0
+        assert result.retained_bytes >= result.pil_image_bytes + result.predicted_bytes
+        assert result.result_retained_bytes >= result.pil_image_bytes
+        assert result.max_rss_so_far_bytes > 0
+    assert [stage_result.stage for stage_result in stage_results] == ["collage", "spectrum"]
+    assert (tmp_path / "collage.jpg").exists() and (tmp_path / "spectrum.jpg").exists()
+    assert not tracemalloc.is_tracing()
+
+    budget = sorted(result.retained_bytes for result in results)[1]
+    over_budget = get_results_over_budget(results, budget)
+    assert [result.retained_bytes for result in over_budget] == sorted(
+        [result.retained_bytes for result in results if result.retained_bytes > budget], reverse=True
+    )
+    assert get_results_over_budget(results, max(result.retained_bytes for result in results)) == []
+
+
+def test_get_retained_breakdown():
+    analyzed_image = AnalyzedImage(
+        f"{TEST_IMAGE_DIR}/0-0-0.jpg", 100, 0, DominantColorAlgorithm.KMEANS, 2, None, grayscale_check=False
+    )
+    breakdown = get_retained_breakdown(analyzed_image)
+    assert breakdown["pil_image"] == 100 * 100 * 3
+    assert breakdown["predicted"] == analyzed_image.predicted.nbytes
+    assert breakdown["model"] >= analyzed_image.model.cluster_centers_.nbytes
+    assert get_retained_breakdown(AnalysisResult.from_analyzed_image(analyzed_image)) == {
+        "pil_image": 0,
+        "model": 0,
+        "predicted": 0,
+    }
+
+
+def test_get_peak_rss_unavailable(monkeypatch):
+    assert get_peak_rss() > 0
+    monkeypatch.setattr(benchmark, "resource", None)
+    assert get_peak_rss() == 0
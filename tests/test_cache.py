@@ -0,0 +1,58 @@
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+from colortools.cache import PixelCache
+
+TEST_IMAGE_DIR = "tests/test_images/test_sort"
+
+
+def get_test_images():
+    return sorted(Path(TEST_IMAGE_DIR).glob("*.jpg"))
+
+
+def get_pixels(seed, shape=(4, 6, 3)):
+    return np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+
+
+def test_pixel_cache_roundtrip(tmp_path):
+    image_paths = get_test_images()[:3]
+    cache = PixelCache(tmp_path / "cache")
+    for i, image_path in enumerate(image_paths):
+        assert cache.get(image_path, 10) is None
+        cache.put(image_path, 10, get_pixels(i))
+    assert len(cache) == 3
+    for i, image_path in enumerate(image_paths):
+        assert cache.contains(image_path, 10)
+        assert not cache.contains(image_path, 20)
+        np.testing.assert_array_equal(cache.get(image_path, 10), get_pixels(i))
+
+
+def test_pixel_cache_flush_and_reopen(tmp_path):
+    image_path = get_test_images()[0]
+    cache = PixelCache(tmp_path)
+    cache.put(image_path, 10, get_pixels(0))
+    assert len(PixelCache(tmp_path)) == 0  # index is not written until flushed
+    cache.flush()
+
+    reopened = PixelCache(tmp_path, read_only=True)
+    cached = reopened.get(image_path, 10)
+    np.testing.assert_array_equal(cached, get_pixels(0))
+    assert not cached.flags.writeable
+    with pytest.raises(ValueError):
+        reopened.put(image_path, 10, get_pixels(0))
+
+
+def test_pixel_cache_invalidated_by_modification(tmp_path):
+    image_path = tmp_path / "image.jpg"
+    shutil.copy(get_test_images()[0], image_path)
+    cache = PixelCache(tmp_path / "cache")
+    cache.put(image_path, 10, get_pixels(0))
+    assert cache.contains(image_path, 10)
+
+    stat = os.stat(image_path)
+    os.utime(image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not cache.contains(image_path, 10)
+    assert cache.get(image_path, 10) is None
@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+from colortools.catalog import Catalog
+from colortools.store import RECORD_DTYPE, ResultStore
+from colortools.util import ImageOrientation
+
+from test_store import get_random_results
+
+
+def brute_force(
+    results, hue_range=None, saturation_range=None, value_range=None, orientation=None, n_colors_range=None
+):
+    """Find the matching images with a linear scan."""
+    positions = []
+    for i, result in enumerate(results):
+        hue, saturation, value = result.dominant_colors_hsv[0]
+        hue %= 360
+        if hue_range is not None:
+            low, high = hue_range
+            if not (low <= hue <= high if low <= high else hue >= low or hue <= high):
+                continue
+        if saturation_range is not None and not saturation_range[0] <= saturation <= saturation_range[1]:
+            continue
+        if value_range is not None and not value_range[0] <= value <= value_range[1]:
+            continue
+        if orientation is not None and result.orientation != orientation:
+            continue
+        if n_colors_range is not None and not n_colors_range[0] <= result.n_colors <= n_colors_range[1]:
+            continue
+        positions.append(i)
+    return positions
+
+
+def get_catalog_results(n_images):
+    results = get_random_results(n_images)
+    for result in results[::3]:
+        result.orientation = ImageOrientation.VERTICAL
+    return results
+
+
+FILTERS = [
+    {},
+    {"hue_range": (90, 210)},
+    {"hue_range": (300, 60)},  # wraps around 360
+    {"hue_range": (330, 330)},
+    {"hue_range": (0, 360)},
+    {"saturation_range": (1, 100)},
+    {"value_range": (25, 50)},
+    {"orientation": ImageOrientation.VERTICAL},
+    {"n_colors_range": (2, 3)},
+    {"hue_range": (270, 90), "saturation_range": (40, 100), "orientation": ImageOrientation.HORIZONTAL},
+    {"hue_range": (0, 120), "value_range": (0, 50), "n_colors_range": (1, 1)},
+    {"saturation_range": (101, 200)},
+]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_find(filters):
+    results = get_catalog_results(300)
+    expected = brute_force(results, **filters)
+    catalog = Catalog.from_results(results)
+    assert catalog.find(**filters).tolist() == expected
+    assert catalog.filter(results, **filters) == [results[i] for i in expected]
+
+    store = ResultStore.from_results(results)
+    filtered = Catalog(store).filter(store, **filters)
+    assert isinstance(filtered, ResultStore)
+    assert filtered.get_rows().tolist() == expected
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_find_view(filters):
+    results = get_catalog_results(300)
+    order = np.random.default_rng(0).permutation(len(results))
+    view = ResultStore.from_results(results).take(order)
+    expected = brute_force([results[i] for i in order], **filters)
+    assert Catalog(view).find(**filters).tolist() == expected
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load(tmp_path, mmap):
+    results = get_catalog_results(100)
+    store = ResultStore.from_results(results)
+    store.save(tmp_path / "store")
+    Catalog(store).save(tmp_path / "store")
+    catalog = Catalog.load(tmp_path / "store", mmap=mmap)
+    assert isinstance(catalog.indexes["hue"][0], np.memmap) == mmap
+    filters = {"hue_range": (300, 60), "n_colors_range": (1, 2)}
+    assert catalog.find(**filters).tolist() == brute_force(results, **filters)
+
+
+def test_load_without_indexes(tmp_path):
+    results = get_catalog_results(50)
+    ResultStore.from_results(results).save(tmp_path / "store")
+    catalog = Catalog.load(tmp_path / "store")
+    assert catalog.find(value_range=(0, 25)).tolist() == brute_force(results, value_range=(0, 25))
+
+    # indexes saved for a different store are rebuilt, even if it has as many images
+    for other_results in [results[:10], results[::-1]]:
+        Catalog.from_results(other_results).save(tmp_path / "store")
+        catalog = Catalog.load(tmp_path / "store")
+        assert catalog.find(value_range=(0, 25)).tolist() == brute_force(results, value_range=(0, 25))
+
+
+def test_save_replaces_indexes(tmp_path):
+    results = get_catalog_results(50)
+    store = ResultStore.from_results(results)
+    store.save(tmp_path / "store")
+    Catalog.from_results(results[::-1]).save(tmp_path / "store")
+    Catalog(store).save(tmp_path / "store")
+    assert sorted(path.name for path in (tmp_path / "store").iterdir() if not path.name.endswith(".npy")) == [
+        "catalog",
+        "store.json",
+    ]  # no temporary directories are left behind
+    catalog = Catalog.load(tmp_path / "store")
+    assert isinstance(catalog.indexes["hue"][0], np.memmap)  # loaded, not rebuilt
+    assert catalog.find(value_range=(0, 25)).tolist() == brute_force(results, value_range=(0, 25))
+
+
+def test_large_catalog(tmp_path):
+    n_images = 1_000_000
+    rng = np.random.default_rng(0)
+    records = np.zeros(n_images, dtype=RECORD_DTYPE)
+    records["hue"] = rng.uniform(0, 360, n_images)
+    records["saturation"] = rng.uniform(0, 100, n_images)
+    records["value"] = rng.uniform(0, 100, n_images)
+    records["n_colors"] = rng.integers(1, 9, n_images)
+    offsets = np.arange(n_images + 1, dtype=np.int64)
+    colors = np.zeros((n_images, 3))
+    store = ResultStore(
+        records, offsets, np.zeros(n_images, dtype=np.uint8), offsets, colors, colors, np.zeros(n_images)
+    )
+    catalog = Catalog(store)
+    positions = catalog.find(hue_range=(359, 1), saturation_range=(50, 100), n_colors_range=(3, 3))
+    hue = records["hue"]
+    expected = np.flatnonzero(((hue >= 359) | (hue <= 1)) & (records["saturation"] >= 50) & (records["n_colors"] == 3))
+    np.testing.assert_array_equal(positions, expected)
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pytest
+from colortools.checkpoint import Checkpoint, remove_checkpoint
+from colortools.results import AnalysisResult
+from colortools.util import DominantColorAlgorithm, ImageOrientation
+
+SETTINGS = {"algorithm": "kmeans", "n_colors": 2}
+
+
+def get_results(n_results):
+    return [
+        AnalysisResult(
+            Path(f"/images/{i}.jpg"),
+            100,
+            50,
+            ImageOrientation.HORIZONTAL,
+            DominantColorAlgorithm.HUE_DIST,
+            1,
+            [[i, i, i]],
+            [[0, 0, i]],
+        )
+        for i in range(n_results)
+    ]
+
+
+def test_save_and_resume(tmp_path):
+    checkpoint_dir = tmp_path / "checkpoint"
+    results = get_results(5)
+    checkpoint = Checkpoint(checkpoint_dir, SETTINGS, interval=0)
+    for result in results[:3]:
+        checkpoint.add(result)
+    assert len(checkpoint.get_segment_paths()) == 3  # saved on every add
+    assert not list(checkpoint_dir.glob("*.tmp"))
+
+    resumed = Checkpoint(checkpoint_dir, SETTINGS, resume=True)
+    loaded = resumed.load()
+    assert sorted(loaded) == [str(result.image_path) for result in results[:3]]
+    assert loaded["/images/2.jpg"].get_dominant_color() == [2, 2, 2]
+
+    for result in results[3:]:
+        resumed.add(result)
+    assert len(resumed.load()) == 3  # not saved until the interval has passed
+    resumed.save()
+    assert len(resumed.load()) == len(results)
+    assert len(resumed.get_segment_paths()) == 4
+
+
+def test_start_clears_checkpoint(tmp_path):
+    checkpoint = Checkpoint(tmp_path, SETTINGS, interval=0)
+    checkpoint.add(get_results(1)[0])
+    assert len(Checkpoint(tmp_path, SETTINGS).load()) == 0
+
+
+def test_resume_with_different_settings(tmp_path):
+    Checkpoint(tmp_path, SETTINGS)
+    with pytest.raises(ValueError):
+        Checkpoint(tmp_path, {**SETTINGS, "n_colors": 3}, resume=True)
+
+
+def test_remove_checkpoint(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "checkpoint", SETTINGS, interval=0)
+    checkpoint.add(get_results(1)[0])
+    remove_checkpoint(tmp_path / "checkpoint")
+    assert not (tmp_path / "checkpoint").exists()
+
+    checkpoint = Checkpoint(tmp_path, SETTINGS, interval=0)
+    checkpoint.add(get_results(1)[0])
+    (tmp_path / "other.txt").write_text("")
+    remove_checkpoint(tmp_path)
+    assert [path.name for path in tmp_path.iterdir()] == ["other.txt"]
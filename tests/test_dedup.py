@@ -0,0 +1,90 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+from colortools.api import analyze_many
+from colortools.dedup import PARTIAL_HASH_SIZE, fan_out, get_duplicate_map, group_duplicates
+from colortools.results import AnalysisResult
+from colortools.util import DominantColorAlgorithm, ImageOrientation
+
+TEST_IMAGE_DIR = "tests/test_images/test_sort"
+EDGE_CROP = 0
+
+
+def test_group_duplicates(tmp_path):
+    contents = np.random.default_rng(0).integers(0, 256, 4 * PARTIAL_HASH_SIZE, dtype=np.uint8).tobytes()
+    middle_changed = bytearray(contents)
+    middle_changed[2 * PARTIAL_HASH_SIZE] ^= 1  # same size and partial hash, different contents
+    files = {
+        "a": contents,
+        "b": bytes(middle_changed),
+        "c/a-copy": contents,
+        "d": contents[:-1],
+        "e": bytes(middle_changed),
+        "f": contents,
+    }
+    for name, file_contents in files.items():
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_bytes(file_contents)
+
+    groups = group_duplicates([tmp_path / name for name in files])
+    assert [[path.relative_to(tmp_path).as_posix() for path in group] for group in groups] == [
+        ["a", "c/a-copy", "f"],
+        ["b", "e"],
+        ["d"],
+    ]
+    assert get_duplicate_map(groups) == {
+        tmp_path / "a": [tmp_path / "c/a-copy", tmp_path / "f"],
+        tmp_path / "b": [tmp_path / "e"],
+    }
+
+
+def test_fan_out():
+    result = AnalysisResult(
+        "a.jpg", 100, 50, ImageOrientation.HORIZONTAL, DominantColorAlgorithm.HUE_DIST, 1, [[1, 2, 3]], [[0, 0, 1]]
+    )
+    copies = fan_out(result, [Path("b.jpg"), Path("c/a.jpg")])
+    assert [copy.image_path for copy in copies] == [Path("b.jpg"), Path("c/a.jpg")]
+    assert all(copy.get_dominant_colors() == result.get_dominant_colors() for copy in copies)
+    assert result.image_path == Path("a.jpg")
+
+
+@pytest.mark.parametrize("executor", ["serial", "threads", "processes"])
+def test_analyze_many_deduplicate(tmp_path, executor):
+    image_paths = []
+    for i, src_path in enumerate(sorted(Path(TEST_IMAGE_DIR).glob("*.jpg"))):
+        for copy_dir in ["originals", "backup"] if i % 2 == 0 else ["originals"]:
+            dest_path = tmp_path / copy_dir / src_path.name
+            dest_path.parent.mkdir(exist_ok=True)
+            shutil.copy(src_path, dest_path)
+            image_paths.append(dest_path)
+
+    kwargs = dict(executor=executor, n_workers=2, chunk_size=2)
+    streamed = []
+    progress = []
+    results = analyze_many(
+        image_paths,
+        None,
+        EDGE_CROP,
+        DominantColorAlgorithm.HUE_DIST,
+        1,
+        None,
+        deduplicate=True,
+        result_callback=streamed.append,
+        progress_callback=lambda n_done, n_total: progress.append((n_done, n_total)),
+        **kwargs,
+    )
+    expected = analyze_many(image_paths, None, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None, **kwargs)
+    assert [result.image_path for result in results] == image_paths
+    assert sorted(result.image_path for result in streamed) == sorted(image_paths)
+    assert progress[-1] == (len(image_paths), len(image_paths))
+    for result, expected_result in zip(results, expected):
+        assert result.get_dominant_colors() == expected_result.get_dominant_colors()
+
+    # duplicates share the result of the analyzed copy
+    results_by_path = {result.image_path: result for result in results}
+    for image_path in image_paths:
+        if image_path.parent.name == "backup":
+            original = results_by_path[image_path.parent.parent / "originals" / image_path.name]
+            assert results_by_path[image_path].dominant_colors_rgb is original.dominant_colors_rgb
@@ -0,0 +1,112 @@
+import errno
+import os
+from pathlib import Path
+
+import pytest
+import colortools.export as export
+from colortools.export import (
+    ExportStrategy,
+    export_copy,
+    export_file,
+    export_files,
+    get_export_function,
+    get_fallback_chain,
+)
+
+TEST_IMAGE_DIR = "tests/test_images/test_sort"
+
+
+def get_test_images():
+    return sorted(Path(TEST_IMAGE_DIR).glob("*.jpg"))
+
+
+@pytest.mark.parametrize(
+    "export_strategy,expected",
+    [
+        ("hardlink", "export_hardlink"),
+        ("reflink", "export_reflink"),
+        ("symlink", "export_symlink"),
+        ("copy", "export_copy"),
+    ],
+)
+def test_get_export_function(export_strategy, expected):
+    assert get_export_function(export_strategy).__name__ == expected
+
+
+def test_bad_get_export_function():
+    with pytest.raises(ValueError):
+        _ = get_export_function("fake")
+
+
+@pytest.mark.parametrize(
+    "export_strategy,expected",
+    [
+        ("hardlink", ["hardlink", "reflink", "symlink", "copy"]),
+        ("symlink", ["symlink", "copy"]),
+        ("copy", ["copy"]),
+    ],
+)
+def test_get_fallback_chain(export_strategy, expected):
+    assert [strategy.value for strategy in get_fallback_chain(export_strategy)] == expected
+
+
+@pytest.mark.parametrize("export_strategy", [ExportStrategy.HARDLINK, ExportStrategy.SYMLINK, ExportStrategy.COPY])
+def test_export_file(tmp_path, export_strategy):
+    src_path = get_test_images()[0]
+    dest_path = tmp_path / "exported.jpg"
+    used = export_file(src_path, dest_path, export_strategy)
+    assert used == export_strategy
+    assert dest_path.read_bytes() == src_path.read_bytes()
+
+
+def test_export_file_exists(tmp_path):
+    src_path = get_test_images()[0]
+    dest_path = tmp_path / "exported.jpg"
+    dest_path.write_bytes(b"")
+    with pytest.raises(FileExistsError):
+        _ = export_file(src_path, dest_path, ExportStrategy.HARDLINK)
+
+
+def test_export_file_fallback(tmp_path, monkeypatch):
+    def fail_cross_device(src_path, dest_path):
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+    monkeypatch.setattr(os, "link", fail_cross_device)
+    src_path = get_test_images()[0]
+    dest_path = tmp_path / "exported.jpg"
+    used = export_file(src_path, dest_path, ExportStrategy.HARDLINK)
+    assert used != ExportStrategy.HARDLINK
+    assert dest_path.read_bytes() == src_path.read_bytes()
+
+
+@pytest.mark.parametrize("n_workers", [1, 4])
+def test_export_files(tmp_path, n_workers):
+    src_paths = get_test_images()
+    src_dest_pairs = [(p, tmp_path / f"dir{i % 2}" / p.name) for i, p in enumerate(src_paths)]
+    counts = export_files(src_dest_pairs, ExportStrategy.COPY, n_workers)
+    assert counts[ExportStrategy.COPY] == len(src_paths)
+    for src_path, dest_path in src_dest_pairs:
+        assert dest_path.read_bytes() == src_path.read_bytes()
+
+
+def test_export_file_permission_error(tmp_path, monkeypatch):
+    def fail_permission(src_path, dest_path):
+        raise OSError(errno.EACCES, os.strerror(errno.EACCES))
+
+    monkeypatch.setattr(os, "link", fail_permission)
+    dest_path = tmp_path / "exported.jpg"
+    with pytest.raises(PermissionError):  # not hidden behind a fallback
+        _ = export_file(get_test_images()[0], dest_path, ExportStrategy.HARDLINK)
+    assert not dest_path.exists()
+
+
+def test_export_copy_removes_partial_copy(tmp_path, monkeypatch):
+    def fail_midway(src, dest, *args):
+        dest.write(b"partial")
+        raise OSError(errno.EIO, os.strerror(errno.EIO))
+
+    monkeypatch.setattr(export, "_copy_contents", fail_midway)
+    dest_path = tmp_path / "exported.jpg"
+    with pytest.raises(OSError):
+        export_copy(get_test_images()[0], dest_path)
+    assert not dest_path.exists()
@@ -1,10 +1,17 @@
+import numpy as np
 import pytest
 from colortools.heuristics import (
+    PIL_NUM_HUES,
+    NColorsHeuristic,
     auto_n_binned_with_threshold,
     auto_n_hue,
     auto_n_hue_binned,
+    auto_n_incremental,
     auto_n_simple_threshold,
+    bin_hue_histogram,
+    compute_color_histogram,
     compute_hue_dist,
+    compute_hue_histogram,
     get_n_heuristic,
 )
 
@@ -147,3 +154,42 @@ def test_auto_n_simple_threshold(test_hue_number, distribute_hues, extra_hues, t
 def test_get_n_heuristic_bad():
     with pytest.raises(ValueError):
         _ = get_n_heuristic("FAKE")
+
+
+@pytest.mark.parametrize(
+    "heuristic_name", [nch for nch in NColorsHeuristic if nch != NColorsHeuristic.AUTO_N_INCREMENTAL]
+)
+@pytest.mark.parametrize("test_hue_number, distribute_hues", [(1, False), (65, False), (256, False), (5, True)])
+def test_heuristics_with_hue_histogram(heuristic_name, test_hue_number, distribute_hues):
+    test_input = get_hsv_array(test_hue_number, distribute_hues)
+    heuristic_func = get_n_heuristic(heuristic_name)
+    expected = heuristic_func(test_input)
+    assert heuristic_func(None, hue_histogram=compute_hue_histogram(test_input)) == expected
+
+
+@pytest.mark.parametrize("n_hues, n_bins", [(10, 2), (129, 2), (256, 256), (256, 128), (256, 8)])
+def test_bin_hue_histogram(n_hues, n_bins):
+    test_input = get_hsv_array(n_hues)
+    expected = compute_hue_dist(test_input, n_bins, hue_counts_only=True)
+    binned = bin_hue_histogram(compute_hue_histogram(test_input), n_bins)
+    assert binned.tolist() == [expected[i] for i in range(n_bins)]
+
+
+def test_compute_hue_histogram_exception():
+    with pytest.raises(ValueError):
+        _ = compute_hue_histogram(get_hsv_array(257))
+
+
+@pytest.mark.parametrize("n_patches", [1, 2, 3, 5])
+def test_auto_n_incremental(n_patches):
+    hues = [int(i * PIL_NUM_HUES / n_patches) for i in range(n_patches)]
+    patches = [np.full((10, 10, 3), (hue, 255, 255), dtype=np.uint8) for hue in hues]
+    test_input = np.concatenate(patches, axis=1)
+    assert auto_n_incremental(test_input) == max(DEFAULT_N_COLORS_MIN, n_patches)
+
+
+def test_compute_color_histogram():
+    test_input = np.array([[[0, 255, 255], [0, 255, 255], [0, 0, 255]]], dtype=np.uint8)
+    colors, counts = compute_color_histogram(test_input)
+    assert sorted(counts.tolist()) == [1, 2]
+    assert colors.shape == (2, 3)
@@ -0,0 +1,87 @@
+import math
+
+import numpy as np
+import pytest
+from colortools.layout import (
+    CollageLayout,
+    fit_som,
+    get_grid_layout,
+    get_layout_function,
+    get_neighbor_distances,
+    get_row_layout,
+)
+from colortools.util import rgb_to_lab
+
+
+def get_random_colors(n_colors, seed=0):
+    return rgb_to_lab(np.random.default_rng(seed).uniform(0, 255, (n_colors, 3)))
+
+
+@pytest.mark.parametrize("layout,expected", [("rows", "get_row_layout"), ("grid", "get_grid_layout")])
+def test_get_layout_function(layout, expected):
+    assert get_layout_function(CollageLayout(layout)).__name__ == expected
+
+
+def test_bad_get_layout_function():
+    with pytest.raises(ValueError):
+        _ = get_layout_function("fake")
+
+
+def test_get_row_layout():
+    np.testing.assert_array_equal(get_row_layout(get_random_colors(10), 4), np.arange(10))
+
+
+@pytest.mark.parametrize("n_colors,n_cols", [(0, 1), (1, 1), (2, 2), (7, 3), (100, 10), (101, 11), (600, 25)])
+def test_get_grid_layout(n_colors, n_cols):
+    colors = get_random_colors(n_colors)
+    layout = get_grid_layout(colors, n_cols, chunk_size=64)
+    assert sorted(layout.tolist()) == list(range(n_colors))
+
+
+@pytest.mark.parametrize("n_cols", [20, 30])
+def test_get_grid_layout_coherent(n_cols):
+    colors = get_random_colors(600)
+    hue_order = np.argsort(np.arctan2(colors[:, 2], colors[:, 1]))
+    grid = get_neighbor_distances(colors, get_grid_layout(colors, n_cols, chunk_size=64), n_cols)
+    rows = get_neighbor_distances(colors, hue_order, n_cols)
+    # neighbors are closer than in a hue-sorted row layout, in both directions
+    assert grid[0] < rows[0] / 2
+    assert grid[1] < rows[1] / 2
+
+
+def test_get_grid_layout_gradient():
+    # colors sampled from a 2D gradient are laid out as a smooth grid
+    n_rows, n_cols = 12, 16
+    rows, cols = np.meshgrid(np.linspace(0, 255, n_rows), np.linspace(0, 255, n_cols), indexing="ij")
+    colors = rgb_to_lab(np.stack([rows, cols, np.full_like(rows, 128)], axis=-1).reshape((-1, 3)))
+    shuffled = np.random.default_rng(0).permutation(len(colors))
+    layout = get_grid_layout(colors[shuffled], n_cols)
+    horizontal, vertical = get_neighbor_distances(colors[shuffled], layout, n_cols)
+    expected_horizontal, expected_vertical = get_neighbor_distances(colors, np.arange(len(colors)), n_cols)
+    assert max(horizontal, vertical) < 2 * max(expected_horizontal, expected_vertical)
+
+
+def test_fit_som():
+    colors = get_random_colors(400)
+    weights = fit_som(colors, 5, 8, n_iter=10)
+    assert weights.shape == (5, 8, 3)
+    # the map spans the colors and varies smoothly
+    assert np.all(weights.min(axis=(0, 1)) >= colors.min(axis=0) - 1e-6)
+    assert np.all(weights.max(axis=(0, 1)) <= colors.max(axis=0) + 1e-6)
+    assert np.mean(np.linalg.norm(np.diff(weights, axis=1), axis=-1)) < np.mean(
+        np.linalg.norm(colors[1:] - colors[:-1], axis=-1)
+    )
+
+
+def test_get_neighbor_distances():
+    colors = np.array([[0, 0, 0], [3, 4, 0], [0, 0, 0], [0, 0, 10], [0, 0, 0]], dtype=np.float64)
+    # grid (2 columns): [0, 1], [2, 3], [4]
+    assert get_neighbor_distances(colors, np.arange(5), 2) == pytest.approx((7.5, math.sqrt(125) / 3))
+
+
+def test_large_grid_layout():
+    n_colors = 20_000
+    colors = get_random_colors(n_colors)
+    n_cols = math.isqrt(n_colors) + 1
+    layout = get_grid_layout(colors, n_cols)
+    assert sorted(layout.tolist()) == list(range(n_colors))
@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import pytest
+from colortools.prefetch import PrefetchReader
+
+TEST_IMAGE_DIR = "tests/test_images/test_sort"
+
+
+def get_test_images():
+    return sorted(Path(TEST_IMAGE_DIR).glob("*.jpg"))
+
+
+@pytest.mark.parametrize("lookahead", [0, 1, 3, 100])
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_prefetch_reader_order_and_contents(lookahead, use_mmap):
+    image_paths = get_test_images()
+    results = []
+    for image_path, buffer in PrefetchReader(image_paths, lookahead=lookahead, use_mmap=use_mmap):
+        results.append((image_path, buffer.read()))  # mappings are closed once the next file is requested
+    assert results == [(image_path, image_path.read_bytes()) for image_path in image_paths]
+
+
+def test_prefetch_reader_closes_mappings():
+    image_paths = get_test_images()
+    buffers = [buffer for _, buffer in PrefetchReader(image_paths, lookahead=3, use_mmap=True)]
+    assert all(buffer.closed for buffer in buffers)
+
+    reader = iter(PrefetchReader(image_paths, lookahead=3, use_mmap=True))
+    _, buffer = next(reader)
+    reader.close()  # stopping early
+    assert buffer.closed
+
+
+@pytest.mark.parametrize("n_files_cap", [0, 1, 2.5, 5])
+def test_prefetch_reader_memory_cap(n_files_cap):
+    image_paths = get_test_images()
+    largest = max(image_path.stat().st_size for image_path in image_paths)
+    memory_cap = int(n_files_cap * largest)
+    reader = PrefetchReader(image_paths, lookahead=100, memory_cap=memory_cap)
+    results = list(reader)
+    assert [image_path for image_path, _ in results] == image_paths
+    assert 0 < reader.peak_bytes <= max(memory_cap, largest)  # a single file may exceed the cap
+
+
+def test_prefetch_reader_empty():
+    assert list(PrefetchReader([])) == []
@@ -0,0 +1,234 @@
+import json
+import tracemalloc
+
+import numpy as np
+import pytest
+from colortools.analyzed_image import AnalyzedImage
+from colortools.results import (
+    AnalysisResult,
+    OutputFormat,
+    RecordWriter,
+    load_records,
+    load_results,
+    save_results,
+    truncate_partial_record,
+)
+from colortools.util import DominantColorAlgorithm
+
+TEST_IMAGE_DIR = "tests/test_images/test_analyzed_image"
+EDGE_CROP = 0
+
+
+@pytest.mark.parametrize("keep_image", [False, True])
+def test_from_analyzed_image(keep_image):
+    analyzed_image = AnalyzedImage(
+        f"{TEST_IMAGE_DIR}/red-blue.jpg", 50, EDGE_CROP, DominantColorAlgorithm.KMEANS, 2, None
+    )
+    result = AnalysisResult.from_analyzed_image(analyzed_image, keep_image)
+    assert type(result) is AnalysisResult
+    assert result.get_dominant_colors() == analyzed_image.get_dominant_colors()
+    assert result.get_orientation() == analyzed_image.get_orientation()
+    assert result.generate_filename(1, "sorted") == analyzed_image.generate_filename(1, "sorted")
+    assert result.get_pretty_string() == analyzed_image.get_pretty_string()
+    assert result.pil_image.size == analyzed_image.pil_image.size
+    assert (result.pil_image is analyzed_image.pil_image) == keep_image
+
+
+def test_get_remapped_image():
+    analyzed_image = AnalyzedImage(
+        f"{TEST_IMAGE_DIR}/red-blue.jpg", 50, EDGE_CROP, DominantColorAlgorithm.KMEANS, 2, None
+    )
+    result = AnalysisResult.from_analyzed_image(analyzed_image, keep_image=True)
+    np.testing.assert_array_equal(
+        np.asarray(result.get_remapped_image()), np.asarray(analyzed_image.get_remapped_image())
+    )
+
+
+def test_get_remapped_image_memory():
+    analyzed_image = AnalyzedImage(
+        f"{TEST_IMAGE_DIR}/red-blue.jpg", 200, EDGE_CROP, DominantColorAlgorithm.KMEANS, 2, None
+    )
+    result = AnalysisResult.from_analyzed_image(analyzed_image, keep_image=True)
+    result.get_remapped_image()
+    tracemalloc.start()
+    remapped_image = result.get_remapped_image()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    n_pixels = result.width * result.height
+    assert remapped_image.mode == "RGB"
+    # the float32 pixels (12 bytes), distances (4 bytes per color) and labels (8 bytes), but no float64 copies
+    assert peak < n_pixels * (12 + 4 * 2 + 8 + 4)
+
+
+def test_get_remapped_image_hue_dist():
+    analyzed_image = AnalyzedImage(
+        f"{TEST_IMAGE_DIR}/red-blue.jpg", 50, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None
+    )
+    result = AnalysisResult.from_analyzed_image(analyzed_image)
+    with pytest.raises(ValueError):
+        _ = result.get_remapped_image()
+
+
+def assert_results_equal(result, expected):
+    assert result.image_path.name == expected.image_path.name
+    assert (result.width, result.height) == (expected.width, expected.height)
+    assert result.orientation == expected.orientation
+    assert result.dominant_color_algorithm == expected.dominant_color_algorithm
+    assert result.n_colors == expected.n_colors
+    np.testing.assert_allclose(result.dominant_colors_rgb, expected.dominant_colors_rgb)
+    np.testing.assert_allclose(result.dominant_colors_hsv, expected.dominant_colors_hsv)
+    assert (result.cluster_histogram is None) == (expected.cluster_histogram is None)
+    if expected.cluster_histogram is not None:
+        for (rgb, proportion), (expected_rgb, expected_proportion) in zip(
+            result.cluster_histogram, expected.cluster_histogram
+        ):
+            np.testing.assert_allclose(rgb, expected_rgb, rtol=1e-6)
+            assert proportion == pytest.approx(expected_proportion)
+    assert result.resize_long_axis == expected.resize_long_axis
+    assert result.kmeans_init == expected.kmeans_init
+    assert result.n_iter == expected.n_iter
+    assert result.analysis_long_axis == expected.analysis_long_axis
+
+
+@pytest.mark.parametrize("dominant_color_algorithm", list(DominantColorAlgorithm))
+def test_to_dict_from_dict(dominant_color_algorithm):
+    analyzed_image = AnalyzedImage(f"{TEST_IMAGE_DIR}/red-blue.jpg", 50, EDGE_CROP, dominant_color_algorithm, 2, None)
+    expected = AnalysisResult.from_analyzed_image(analyzed_image)
+    result_dict = expected.to_dict()
+    assert json.loads(json.dumps(result_dict)) == result_dict
+    result = AnalysisResult.from_dict(result_dict)
+    assert_results_equal(result, expected)
+    assert result.get_pretty_string() == expected.get_pretty_string()
+    assert result.generate_filename(1, "sorted") == expected.generate_filename(1, "sorted")
+
+
+def test_save_load_results(tmp_path):
+    expected = [
+        AnalysisResult.from_analyzed_image(
+            AnalyzedImage(f"{TEST_IMAGE_DIR}/{name}", 50, EDGE_CROP, DominantColorAlgorithm.KMEANS, 2, None)
+        )
+        for name in ["red-blue.jpg", "100-by-200-red.jpg"]
+    ]
+    dest_path = tmp_path / "results" / "results.json"
+    save_results(expected, dest_path, {"algorithm": "kmeans"})
+    assert [path.name for path in dest_path.parent.iterdir()] == ["results.json"]  # no temporary file left
+
+    results, settings = load_results(dest_path)
+    assert settings == {"algorithm": "kmeans"}
+    assert len(results) == len(expected)
+    for result, expected_result in zip(results, expected):
+        assert_results_equal(result, expected_result)
+        assert result.image_path.is_absolute()
+        assert result.pil_image.size == (expected_result.width, expected_result.height)  # pixels re-read on demand
+
+
+def test_load_results_version_error(tmp_path):
+    src_path = tmp_path / "results.json"
+    src_path.write_text(json.dumps({"version": 0, "settings": {}, "results": []}))
+    with pytest.raises(ValueError):
+        load_results(src_path)
+
+
+@pytest.mark.parametrize("output_format", list(OutputFormat))
+def test_record_writer(tmp_path, output_format):
+    expected = [
+        AnalysisResult.from_analyzed_image(
+            AnalyzedImage(f"{TEST_IMAGE_DIR}/{name}", 50, EDGE_CROP, algorithm, 2, None)
+        )
+        for name in ["red-blue.jpg", "100-by-200-red.jpg"]
+        for algorithm in DominantColorAlgorithm
+    ]
+    dest_path = tmp_path / "records" / f"records.{output_format.value}"
+    with RecordWriter(dest_path, output_format) as writer:
+        for i, result in enumerate(expected):
+            writer.write(result)
+            assert len(load_records(dest_path)) == i + 1  # readable while being written
+    assert writer.n_records == len(expected)
+
+    results = load_records(dest_path)
+    assert len(results) == len(expected)
+    for result, expected_result in zip(results, expected):
+        assert_results_equal(result, expected_result)
+        assert result.image_path.is_absolute()
+
+    # a partially written last record is ignored
+    with open(dest_path, "a") as f:
+        f.write(dest_path.read_text().splitlines()[-1][:20])
+    assert len(load_records(dest_path)) == len(expected)
+
+
+@pytest.mark.parametrize("output_format", list(OutputFormat))
+def test_record_writer_append(tmp_path, output_format):
+    expected = [
+        AnalysisResult.from_analyzed_image(
+            AnalyzedImage(f"{TEST_IMAGE_DIR}/{name}", 50, EDGE_CROP, DominantColorAlgorithm.KMEANS, 2, None)
+        )
+        for name in ["red-blue.jpg", "100-by-200-red.jpg"]
+    ]
+    dest_path = tmp_path / f"records.{output_format.value}"
+    for result in expected:
+        with RecordWriter(dest_path, output_format, append=True) as writer:
+            writer.write(result)
+    results = load_records(dest_path)
+    assert len(results) == len(expected)
+    for result, expected_result in zip(results, expected):
+        assert_results_equal(result, expected_result)
+
+
+@pytest.mark.parametrize("output_format", list(OutputFormat))
+def test_record_writer_append_partial_record(tmp_path, output_format):
+    expected = [
+        AnalysisResult.from_analyzed_image(
+            AnalyzedImage(f"{TEST_IMAGE_DIR}/{name}", 50, EDGE_CROP, DominantColorAlgorithm.KMEANS, 2, None)
+        )
+        for name in ["red-blue.jpg", "100-by-200-red.jpg"]
+    ]
+    dest_path = tmp_path / "records.txt"  # the format is not implied by the extension
+    with RecordWriter(dest_path, output_format) as writer:
+        writer.write(expected[0])
+    with open(dest_path, "a") as f:
+        f.write(dest_path.read_text().splitlines()[-1][:20])  # interrupted while writing a record
+    with RecordWriter(dest_path, output_format, append=True) as writer:
+        writer.write(expected[1])
+    results = load_records(dest_path, output_format)
+    assert len(results) == len(expected)
+    for result, expected_result in zip(results, expected):
+        assert_results_equal(result, expected_result)
+
+
+def test_csv_records_with_line_breaks(tmp_path):
+    expected = [
+        AnalysisResult.from_analyzed_image(
+            AnalyzedImage(f"{TEST_IMAGE_DIR}/red-blue.jpg", 50, EDGE_CROP, DominantColorAlgorithm.KMEANS, 2, None)
+        )
+        for _ in range(2)
+    ]
+    for i, result in enumerate(expected):
+        result.image_path = tmp_path / f'line\nbreak, "{i}".jpg'
+    expected_paths = [result.image_path.resolve() for result in expected]
+    dest_path = tmp_path / "records.csv"
+    with RecordWriter(dest_path, OutputFormat.CSV) as writer:
+        writer.write(expected[0])
+    complete = dest_path.read_bytes()
+    with RecordWriter(dest_path, OutputFormat.CSV, append=True) as writer:
+        writer.write(expected[1])
+    contents = dest_path.read_bytes()
+    assert [result.image_path for result in load_records(dest_path)] == expected_paths
+
+    for end in range(len(complete), len(contents)):  # interrupted anywhere within the second record
+        dest_path.write_bytes(contents[:end])
+        assert [result.image_path for result in load_records(dest_path)] == expected_paths[:1]
+        truncate_partial_record(dest_path, OutputFormat.CSV)
+        assert dest_path.read_bytes() == complete
+
+
+def test_truncate_partial_record(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_bytes(b"a" * 100 + b"\n" + b"b" * 100 + b"\n" + b"c" * 50)
+    truncate_partial_record(path, block_size=16)
+    assert path.read_bytes() == b"a" * 100 + b"\n" + b"b" * 100 + b"\n"
+    truncate_partial_record(path, block_size=16)
+    assert path.read_bytes() == b"a" * 100 + b"\n" + b"b" * 100 + b"\n"
+    path.write_bytes(b"c" * 50)
+    truncate_partial_record(path, block_size=16)
+    assert path.read_bytes() == b""
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from colortools.sampling import (
+    SamplingStrategy,
+    get_grid_sample_indices,
+    get_rule_of_thirds_sample_indices,
+    get_sampling_function,
+    sample_pixels,
+)
+
+SAMPLED_STRATEGIES = [ss for ss in SamplingStrategy if ss != SamplingStrategy.NONE]
+
+
+@pytest.mark.parametrize("strategy", list(SamplingStrategy))
+@pytest.mark.parametrize("height, width", [(100, 150), (333, 500), (7, 5)])
+@pytest.mark.parametrize("n_samples", [1, 100, 1000])
+def test_sample_indices(strategy, height, width, n_samples):
+    indices = get_sampling_function(strategy)(height, width, n_samples, 0)
+    assert indices.ndim == 1
+    assert len(np.unique(indices)) == len(indices)
+    assert indices.min() >= 0 and indices.max() < height * width
+    if strategy == SamplingStrategy.NONE:
+        assert len(indices) == height * width
+    elif strategy == SamplingStrategy.GRID:
+        assert len(indices) <= min(height * width, 2 * n_samples)
+    else:
+        assert len(indices) <= n_samples
+
+
+def test_sampling_function_error():
+    with pytest.raises(ValueError):
+        get_sampling_function("invalid")
+
+
+@pytest.mark.parametrize("strategy", SAMPLED_STRATEGIES)
+def test_sample_indices_deterministic(strategy):
+    sampling_func = get_sampling_function(strategy)
+    np.testing.assert_array_equal(sampling_func(100, 150, 500, 0), sampling_func(100, 150, 500, 0))
+
+
+def test_grid_sample_is_stratified():
+    height, width = 90, 120
+    indices = get_grid_sample_indices(height, width, 12)
+    rows, cols = indices // width, indices % width
+    assert len(indices) == 12
+    np.testing.assert_array_equal(np.unique(rows), [15, 45, 75])
+    np.testing.assert_array_equal(np.unique(cols), [15, 45, 75, 105])
+
+
+def test_rule_of_thirds_sample_lines():
+    height, width = 90, 120
+    indices = get_rule_of_thirds_sample_indices(height, width, height * width)
+    rows, cols = indices // width, indices % width
+    on_row = np.isin(rows, [30, 45, 60])
+    on_col = np.isin(cols, [40, 60, 80])
+    assert np.all(on_row | on_col)
+    assert len(indices) == 3 * width + 3 * height - 9
+
+
+def test_sample_pixels():
+    image_data = np.arange(4 * 5 * 3).reshape((4, 5, 3))
+    sample = sample_pixels(image_data, np.array([0, 6, 19]))
+    assert sample.shape == (3, 1, 3)
+    np.testing.assert_array_equal(sample[:, 0], [image_data[0, 0], image_data[1, 1], image_data[3, 4]])
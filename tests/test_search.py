@@ -0,0 +1,96 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from colortools.search import ColorIndex, ColorSpace, get_color_space_function
+from colortools.store import ResultStore
+
+from test_store import get_random_results
+
+
+def brute_force(results, color_rgb, color_space, proportion_weight):
+    """Score every image by its closest dominant color, with a linear scan."""
+    convert = get_color_space_function(color_space)
+    point = convert(np.asarray(color_rgb, dtype=np.float64))
+    scores = []
+    for i, result in enumerate(results):
+        colors = convert(np.asarray(result.dominant_colors_rgb, dtype=np.float64))
+        proportions = np.array([proportion for _, proportion in result.cluster_histogram])
+        distances = np.linalg.norm(colors - point, axis=1) + proportion_weight * (1 - proportions)
+        scores.append((float(np.min(distances)), i))
+    return sorted(scores)
+
+
+@pytest.mark.parametrize("proportion_weight", [0.0, 50.0])
+@pytest.mark.parametrize("color_space", list(ColorSpace))
+def test_query(color_space, proportion_weight):
+    results = get_random_results(300)
+    color_index = ColorIndex.from_results(results, color_space)
+    for color_rgb in [[46, 111, 149], [255, 0, 0], [128, 128, 128]]:
+        expected = brute_force(results, color_rgb, color_space, proportion_weight)
+        for k in [1, 10, 300, 500]:
+            matches = color_index.query(color_rgb, k, proportion_weight)
+            assert len(matches) == min(k, len(results))
+            assert [match.distance for match in matches] == pytest.approx([score for score, _ in expected[:k]])
+            for match in matches:
+                assert match.image_path == results[match.image_index].image_path
+            # ties may be ordered differently
+            distinct = [i for score, i in expected[:k] if score < expected[min(k, len(results)) - 1][0] - 1e-9]
+            assert set(distinct) <= {match.image_index for match in matches}
+
+
+@pytest.mark.parametrize("proportion_weight", [0.0, 50.0])
+@pytest.mark.parametrize("color_space", list(ColorSpace))
+def test_query_radius(color_space, proportion_weight):
+    results = get_random_results(300)
+    color_index = ColorIndex.from_results(results, color_space)
+    color_rgb = [46, 111, 149]
+    expected = brute_force(results, color_rgb, color_space, proportion_weight)
+    scores = sorted({round(score, 6) for score, _ in expected})
+    radius = (scores[len(scores) // 3] + scores[len(scores) // 3 + 1]) / 2  # test colors are coarse, so scores tie
+    matches = color_index.query_radius(color_rgb, radius, proportion_weight)
+    assert {match.image_index for match in matches} == {i for score, i in expected if score <= radius}
+    assert [match.distance for match in matches] == sorted(match.distance for match in matches)
+    assert color_index.query_radius(color_rgb, -1, proportion_weight) == []
+
+
+def test_from_store():
+    results = get_random_results(100)
+    results[0].cluster_histogram = None  # proportions default to an equal share
+    store = ResultStore.from_results(results).take(list(range(99, -1, -1)))
+    store_index = ColorIndex.from_store(store)
+    results_index = ColorIndex.from_results(results[::-1])
+    assert len(store_index) == len(results)
+    for k in [5, 100]:
+        store_matches = store_index.query([200, 50, 50], k, 20.0)
+        results_matches = results_index.query([200, 50, 50], k, 20.0)
+        assert [match.image_index for match in store_matches] == [match.image_index for match in results_matches]
+        assert [match.image_path.resolve() for match in store_matches] == [
+            match.image_path.resolve() for match in results_matches
+        ]
+        assert [match.proportion for match in store_matches] == pytest.approx(
+            [match.proportion for match in results_matches]
+        )
+    no_histogram = [match for match in results_index.query([0, 0, 0], 100) if match.image_index == 99]
+    assert no_histogram[0].proportion == pytest.approx(1 / results[0].n_colors)
+
+
+def test_empty_index():
+    color_index = ColorIndex.from_results([])
+    assert len(color_index) == 0
+    assert color_index.query([0, 0, 0], 10) == []
+    assert color_index.query_radius([0, 0, 0], 10) == []
+
+
+def test_large_index():
+    n_images = 300_000
+    rng = np.random.default_rng(0)
+    n_colors = rng.integers(1, 6, n_images)
+    image_indices = np.repeat(np.arange(n_images), n_colors)
+    paths = [Path(f"{i}.jpg") for i in range(n_images)]
+    colors_rgb = rng.uniform(0, 255, (len(image_indices), 3))
+    color_index = ColorIndex(paths, colors_rgb, image_indices, 1 / n_colors[image_indices])
+    matches = color_index.query([46, 111, 149], 50, 10.0)
+    assert len(matches) == 50
+    assert len({match.image_index for match in matches}) == 50
+    assert [match.distance for match in matches] == sorted(match.distance for match in matches)
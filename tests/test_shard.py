@@ -0,0 +1,181 @@
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+from colortools.api import analyze_many
+from colortools.results import save_results
+from colortools.shard import (
+    ShardStrategy,
+    get_hash_shard,
+    get_index_shard,
+    get_shard_function,
+    merge_shards,
+    parse_shard,
+    rebase_results,
+)
+from colortools.store import ResultStore
+from colortools.util import DominantColorAlgorithm, collect_jpg_paths
+
+TEST_IMAGE_DIR = "tests/test_images/test_sort"
+EDGE_CROP = 0
+N_SHARDS = 3
+
+
+def analyze_shard(shard_index, n_shards, strategy, dest_path, use_store):
+    # run in a separate process, like one node of a sharded run
+    image_paths = collect_jpg_paths(TEST_IMAGE_DIR)
+    shard = get_shard_function(strategy)(image_paths, Path(TEST_IMAGE_DIR), shard_index, n_shards)
+    results = analyze_many(shard, None, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None)
+    settings = {"algorithm": "hue_dist", "shard": f"{shard_index}/{n_shards}"}
+    if use_store:
+        ResultStore.from_results(results, settings).save(dest_path)
+    else:
+        save_results(results, dest_path, settings)
+    return len(results)
+
+
+@pytest.mark.parametrize("shard,expected", [("1/1", (1, 1)), ("2/4", (2, 4)), ("4/4", (4, 4))])
+def test_parse_shard(shard, expected):
+    assert parse_shard(shard) == expected
+
+
+@pytest.mark.parametrize("shard", ["0/4", "5/4", "1", "a/b", "1/2/3"])
+def test_parse_shard_error(shard):
+    with pytest.raises(ValueError):
+        _ = parse_shard(shard)
+
+
+@pytest.mark.parametrize("strategy,expected", [("index", get_index_shard), ("hash", get_hash_shard)])
+def test_get_shard_function(strategy, expected):
+    assert get_shard_function(strategy) is expected
+
+
+def test_bad_get_shard_function():
+    with pytest.raises(ValueError):
+        _ = get_shard_function("fake")
+
+
+@pytest.mark.parametrize("strategy", list(ShardStrategy))
+def test_shards_partition_input(strategy):
+    image_paths = collect_jpg_paths(TEST_IMAGE_DIR)
+    shards = [
+        get_shard_function(strategy)(image_paths, Path(TEST_IMAGE_DIR), i, N_SHARDS) for i in range(1, N_SHARDS + 1)
+    ]
+    assert sorted(path for shard in shards for path in shard) == sorted(image_paths)
+    for shard in shards:
+        assert shard == [path for path in image_paths if path in shard]  # in input order
+
+
+def test_hash_shard_independent_of_mount_point():
+    image_paths = collect_jpg_paths(TEST_IMAGE_DIR)
+    mounted_dir = Path("/mnt/node") / TEST_IMAGE_DIR
+    mounted_paths = [mounted_dir / path.relative_to(TEST_IMAGE_DIR) for path in image_paths]
+    for i in range(1, N_SHARDS + 1):
+        shard = get_hash_shard(image_paths, Path(TEST_IMAGE_DIR), i, N_SHARDS)
+        mounted_shard = get_hash_shard(mounted_paths, mounted_dir, i, N_SHARDS)
+        assert [path.name for path in shard] == [path.name for path in mounted_shard]
+
+
+@pytest.mark.parametrize("use_store", [False, True])
+@pytest.mark.parametrize("strategy", list(ShardStrategy))
+def test_merge_shards(tmp_path, strategy, use_store):
+    dest_paths = [tmp_path / f"shard-{i}" for i in range(1, N_SHARDS + 1)]
+    with ProcessPoolExecutor(max_workers=N_SHARDS) as pool:
+        futures = [
+            pool.submit(analyze_shard, i, N_SHARDS, strategy, dest_path, use_store)
+            for i, dest_path in enumerate(dest_paths, start=1)
+        ]
+        n_results = sum(future.result() for future in futures)
+
+    image_paths = collect_jpg_paths(TEST_IMAGE_DIR)
+    assert n_results == len(image_paths)
+    merged, settings = merge_shards(dest_paths[::-1])
+    assert settings == {"algorithm": "hue_dist"}
+    assert isinstance(merged, ResultStore) == use_store
+
+    expected = analyze_many(image_paths, None, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None)
+    assert [result.image_path for result in merged] == [path.resolve() for path in image_paths]
+    for result, expected_result in zip(merged, expected):
+        assert result.get_dominant_colors() == expected_result.get_dominant_colors()
+
+
+def test_merge_shards_errors(tmp_path):
+    for i in range(1, N_SHARDS + 1):
+        save_results([], tmp_path / f"shard-{i}.json", {"algorithm": "kmeans", "shard": f"{i}/{N_SHARDS}"})
+    save_results([], tmp_path / "other.json", {"algorithm": "hue_dist", "shard": f"1/{N_SHARDS}"})
+    save_results([], tmp_path / "unsharded.json", {"algorithm": "kmeans"})
+
+    _ = merge_shards([tmp_path / f"shard-{i}.json" for i in range(1, N_SHARDS + 1)])
+    with pytest.raises(ValueError):  # missing shard
+        _ = merge_shards([tmp_path / "shard-1.json", tmp_path / "shard-2.json"])
+    with pytest.raises(ValueError):  # repeated shard
+        _ = merge_shards([tmp_path / f"shard-{i}.json" for i in [1, 2, 2, 3]])
+    with pytest.raises(ValueError):  # different settings
+        _ = merge_shards([tmp_path / "other.json", tmp_path / "shard-2.json", tmp_path / "shard-3.json"])
+    with pytest.raises(ValueError):  # sharded and unsharded
+        _ = merge_shards([tmp_path / "unsharded.json", tmp_path / "shard-1.json"])
+
+
+@pytest.mark.parametrize("use_store", [False, True])
+def test_merge_shards_different_inputs(tmp_path, use_store):
+    # each node mounts the input at a different path
+    input_dirs = [tmp_path / f"node-{i}" / "input" for i in range(1, N_SHARDS + 1)]
+    for input_dir in input_dirs:
+        shutil.copytree(TEST_IMAGE_DIR, input_dir)
+    dest_paths = []
+    for i, input_dir in enumerate(input_dirs, start=1):
+        shard = get_hash_shard(collect_jpg_paths(input_dir), input_dir, i, N_SHARDS)
+        results = analyze_many(shard, None, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None)
+        settings = {"input": str(input_dir.resolve()), "algorithm": "hue_dist", "shard": f"{i}/{N_SHARDS}"}
+        dest_paths.append(tmp_path / f"shard-{i}")
+        if use_store:
+            ResultStore.from_results(results, settings).save(dest_paths[-1])
+        else:
+            save_results(results, dest_paths[-1], settings)
+
+    merged, settings = merge_shards(dest_paths[::-1])
+    assert settings == {"input": str(input_dirs[-1].resolve()), "algorithm": "hue_dist"}
+    expected_names = [path.name for path in collect_jpg_paths(TEST_IMAGE_DIR)]
+    assert [Path(result.image_path).name for result in merged] == expected_names
+
+    # the merging machine mounts the input elsewhere, and the nodes' mounts are gone
+    merge_input_dir = tmp_path / "merge-node" / "input"
+    shutil.copytree(TEST_IMAGE_DIR, merge_input_dir)
+    for input_dir in input_dirs:
+        shutil.rmtree(input_dir)
+    with pytest.raises(FileNotFoundError):
+        _ = merged[0].pil_image
+    merged, settings = merge_shards(dest_paths[::-1], merge_input_dir)
+    assert settings["input"] == str(merge_input_dir.resolve())
+    expected_paths = [path.resolve() for path in collect_jpg_paths(merge_input_dir)]
+    assert [Path(result.image_path) for result in merged] == expected_paths
+    for result in merged:
+        assert result.pil_image.size == (result.width, result.height)  # read from the merging machine's input
+
+
+def test_merge_shards_input_dir_without_recorded_input(tmp_path):
+    results = analyze_many(
+        collect_jpg_paths(TEST_IMAGE_DIR)[:2], None, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None
+    )
+    save_results(results, tmp_path / "results.json", {"algorithm": "hue_dist"})
+    with pytest.raises(ValueError):
+        merge_shards([tmp_path / "results.json"], tmp_path)
+
+
+def test_rebase_results(tmp_path):
+    image_paths = collect_jpg_paths(TEST_IMAGE_DIR)[:3]
+    results = analyze_many(image_paths, None, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, 1, None)
+    results[-1].image_path = tmp_path / "elsewhere.jpg"  # not within the input
+    src_dir = Path(TEST_IMAGE_DIR).resolve()
+    expected = {path.resolve(): tmp_path / "moved" / path.name for path in image_paths[:2]}
+    expected[tmp_path / "elsewhere.jpg"] = tmp_path / "elsewhere.jpg"
+    store = ResultStore.from_results(results)
+    for analyzed_images in [results, store, store.take([2, 0, 1])]:
+        original = [Path(result.image_path).resolve() for result in analyzed_images]
+        rebased = rebase_results(analyzed_images, src_dir, tmp_path / "moved")
+        assert [Path(result.image_path).resolve() for result in analyzed_images] == original  # not modified
+        assert [Path(result.image_path) for result in rebased] == [expected[path] for path in original]
+        assert [result.get_dominant_colors() for result in rebased] == [
+            result.get_dominant_colors() for result in analyzed_images
+        ]
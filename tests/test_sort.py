@@ -1,9 +1,12 @@
 from pathlib import Path
 
+import numpy as np
 import pytest
 from colortools.analyzed_image import AnalyzedImage
-from colortools.sort import get_sort_function, huesort, satsort, valsort
-from colortools.util import DominantColorAlgorithm
+from colortools.sort import get_sort_function, huesort, pathsort, satsort, valsort
+from colortools.store import ResultStore
+from colortools.tour import get_path_length
+from colortools.util import DominantColorAlgorithm, rgb_to_lab
 
 TEST_IMAGE_DIR = "tests/test_images/test_sort"
 EDGE_CROP = 0
@@ -20,7 +23,7 @@ def load_analyzed_images():
 
 @pytest.mark.parametrize(
     "sort_method,expected",
-    [("hue", "huesort"), ("saturation", "satsort"), ("value", "valsort")],
+    [("hue", "huesort"), ("saturation", "satsort"), ("value", "valsort"), ("path", "pathsort")],
 )
 def test_get_sort_function(sort_method, expected):
     func = get_sort_function(sort_method)
@@ -388,3 +391,55 @@ def test_valuesort_with_anchor(anchor_image, expected):
         print(s.get_dominant_color(True))
     results = [image.image_path.name for image in sorted_all]
     assert results == expected
+
+
+def get_path_length_of(analyzed_images):
+    return get_path_length(
+        rgb_to_lab([image.get_dominant_color() for image in analyzed_images]), range(len(analyzed_images))
+    )
+
+
+@pytest.mark.parametrize("sort_reverse", [False, True])
+def test_pathsort(sort_reverse):
+    analyzed_images = load_analyzed_images()
+    sorted_images = pathsort(list(analyzed_images), sort_reverse, None)
+    names = [image.image_path.name for image in sorted_images]
+    assert sorted(names) == sorted(image.image_path.name for image in analyzed_images)
+    # the path starts (or, reversed, ends) at its darker end
+    lightness = [rgb_to_lab(image.get_dominant_color())[0] for image in sorted_images]
+    assert (lightness[0] >= lightness[-1]) if sort_reverse else (lightness[0] <= lightness[-1])
+    assert get_path_length_of(sorted_images) < get_path_length_of(huesort(list(analyzed_images), False, None))
+
+
+@pytest.mark.parametrize("sort_reverse", [False, True])
+@pytest.mark.parametrize("anchor_image", ["240-100-100.jpg", "0-0-100.jpg", "missing.jpg"])
+def test_pathsort_with_anchor(anchor_image, sort_reverse):
+    analyzed_images = load_analyzed_images()
+    names = [image.image_path.name for image in pathsort(list(analyzed_images), sort_reverse, anchor_image)]
+    if anchor_image == "missing.jpg":
+        assert names == [image.image_path.name for image in pathsort(list(analyzed_images), sort_reverse, None)]
+    else:
+        assert names[0] == anchor_image
+        if sort_reverse:
+            # the anchor leads, followed by the rest of the path in reverse
+            forward_names = [image.image_path.name for image in pathsort(list(analyzed_images), False, anchor_image)]
+            assert names == forward_names[:1] + forward_names[:0:-1]
+
+    store = ResultStore.from_results(analyzed_images)
+    sorted_store = pathsort(store, sort_reverse, anchor_image)
+    assert isinstance(sorted_store, ResultStore)
+    assert [Path(image.image_path).name for image in sorted_store] == names
+
+
+def test_pathsort_gradient():
+    # a shuffled gradient from black to white through red is sorted back into order
+    colors = np.concatenate([np.linspace([0, 0, 0], [255, 0, 0], 20), np.linspace([255, 0, 0], [255, 255, 255], 20)])
+    order = np.random.default_rng(0).permutation(len(colors))
+    store = ResultStore.from_results(load_analyzed_images()[:1] * len(colors))
+    store.colors_rgb = colors[order]  # one dominant color per image
+    sorted_positions = pathsort(store, False, None).get_rows()
+    np.testing.assert_array_equal(order[sorted_positions], np.arange(len(colors)))
+
+
+def test_pathsort_empty():
+    assert pathsort([], False, None) == []
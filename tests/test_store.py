@@ -0,0 +1,213 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from colortools.analyzed_image import AnalyzedImage
+from colortools.results import AnalysisResult
+from colortools.sort import get_sort_function, separate_color_and_bw
+from colortools.store import RECORD_DTYPE, ResultStore
+from colortools.util import DominantColorAlgorithm, ImageOrientation, hsv_to_rgb
+from colortools.visualization import get_histogram_as_bar, get_store_spectrum
+
+TEST_IMAGE_DIR = "tests/test_images/test_analyzed_image"
+EDGE_CROP = 0
+
+
+def get_random_results(n_images, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+    for i in range(n_images):
+        n_colors = int(rng.integers(1, 4))
+        # coarse values, so that sort keys tie often
+        hsv = np.stack(
+            [
+                rng.integers(0, 12, n_colors) * 30.0,
+                rng.choice([0.0, 0.4, 50.0, 100.0], n_colors),
+                rng.integers(0, 4, n_colors) * 25.0,
+            ],
+            axis=1,
+        )
+        rgb = np.array([hsv_to_rgb(color) for color in hsv])
+        proportions = rng.dirichlet(np.ones(n_colors))
+        results.append(
+            AnalysisResult(
+                Path(f"/images/{i}.jpg"),
+                100,
+                50,
+                ImageOrientation.HORIZONTAL,
+                DominantColorAlgorithm.KMEANS,
+                n_colors,
+                rgb.tolist(),
+                hsv.tolist(),
+                [(color, proportion) for color, proportion in zip(rgb, proportions)],
+                None,
+            )
+        )
+    return results
+
+
+def assert_results_equal(result, expected):
+    assert result.image_path.resolve() == expected.image_path.resolve()
+    assert (result.width, result.height) == (expected.width, expected.height)
+    assert result.orientation == expected.orientation
+    assert result.dominant_color_algorithm == expected.dominant_color_algorithm
+    assert result.n_colors == expected.n_colors
+    np.testing.assert_allclose(result.dominant_colors_rgb, expected.dominant_colors_rgb)
+    np.testing.assert_allclose(result.dominant_colors_hsv, expected.dominant_colors_hsv)
+    assert (result.cluster_histogram is None) == (expected.cluster_histogram is None)
+    if expected.cluster_histogram is not None:
+        assert [proportion for _, proportion in result.cluster_histogram] == pytest.approx(
+            [proportion for _, proportion in expected.cluster_histogram]
+        )
+    assert result.resize_long_axis == expected.resize_long_axis
+    assert result.kmeans_init == expected.kmeans_init
+    assert result.n_iter == expected.n_iter
+    assert result.analysis_long_axis == expected.analysis_long_axis
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+@pytest.mark.parametrize("dominant_color_algorithm", list(DominantColorAlgorithm))
+def test_save_load(tmp_path, dominant_color_algorithm, mmap):
+    expected = [
+        AnalysisResult.from_analyzed_image(
+            AnalyzedImage(f"{TEST_IMAGE_DIR}/{name}", 50, EDGE_CROP, dominant_color_algorithm, 2, None)
+        )
+        for name in ["red-blue.jpg", "100-by-200-red.jpg"]
+    ]
+    store = ResultStore.from_results(expected, {"algorithm": dominant_color_algorithm.value})
+    dest_dir = tmp_path / "store"
+    store.save(dest_dir)
+    assert ResultStore.is_store(dest_dir)
+    assert list(tmp_path.iterdir()) == [dest_dir]  # no temporary directories are left behind
+
+    loaded = ResultStore.load(dest_dir, mmap=mmap)
+    assert isinstance(loaded.records, np.memmap) == mmap
+    assert loaded.settings == {"algorithm": dominant_color_algorithm.value}
+    assert len(loaded) == len(expected)
+    for result, expected_result in zip(loaded, expected):
+        assert_results_equal(result, expected_result)
+        assert result.image_path.is_absolute()
+    assert_results_equal(loaded[-1], expected[-1])
+    with pytest.raises(IndexError):
+        _ = loaded[len(expected)]
+
+
+def test_save_replace(tmp_path):
+    dest_dir = tmp_path / "store"
+    ResultStore.from_results(get_random_results(5)).save(dest_dir)
+    loaded = ResultStore.load(dest_dir)
+    loaded.take([4, 0]).save(dest_dir)  # replacing the store that the view is mapped from
+    replaced = ResultStore.load(dest_dir)
+    assert [result.image_path.name for result in replaced] == ["4.jpg", "0.jpg"]
+    assert list(tmp_path.iterdir()) == [dest_dir]
+
+    empty_dir = tmp_path / "empty"
+    empty_dir.mkdir()
+    ResultStore.from_results(get_random_results(2)).save(empty_dir)
+    assert len(ResultStore.load(empty_dir)) == 2
+
+
+def test_save_not_store(tmp_path):
+    dest_dir = tmp_path / "photos"
+    dest_dir.mkdir()
+    (dest_dir / "photo.jpg").write_bytes(b"not a store")
+    dest_file = tmp_path / "results.json"
+    dest_file.write_text("{}")
+    store = ResultStore.from_results(get_random_results(2))
+    for dest_path in [dest_dir, dest_file]:
+        assert not ResultStore.can_replace(dest_path)
+        with pytest.raises(FileExistsError):
+            store.save(dest_path)
+    assert (dest_dir / "photo.jpg").read_bytes() == b"not a store"
+    assert dest_file.read_text() == "{}"
+    assert sorted(tmp_path.iterdir()) == [dest_dir, dest_file]
+
+
+def test_load_version_error(tmp_path):
+    ResultStore.from_results(get_random_results(2)).save(tmp_path / "store")
+    (tmp_path / "store" / "store.json").write_text(json.dumps({"version": 0}))
+    with pytest.raises(ValueError):
+        ResultStore.load(tmp_path / "store")
+
+
+def test_take_and_compact(tmp_path):
+    results = get_random_results(20)
+    store = ResultStore.from_results(results)
+    indices = [5, 3, 17, 3]
+    view = store.take(indices).take([3, 0, 1])
+    expected = [results[3], results[5], results[3]]
+    compacted = view.compact()
+    assert compacted.rows is None
+    compacted.save(tmp_path / "store")
+    loaded = ResultStore.load(tmp_path / "store")
+    for results_view in [view, compacted, loaded]:
+        assert len(results_view) == len(expected)
+        for result, expected_result in zip(results_view, expected):
+            assert_results_equal(result, expected_result)
+
+
+def test_separate_color_and_bw():
+    results = get_random_results(50)
+    color, bw = separate_color_and_bw(ResultStore.from_results(results))
+    expected_color, expected_bw = separate_color_and_bw(results)
+    assert [result.image_path for result in color] == [result.image_path for result in expected_color]
+    assert [result.image_path for result in bw] == [result.image_path for result in expected_bw]
+
+
+@pytest.mark.parametrize("sort_anchor", [None, "7.jpg", "missing.jpg"])
+@pytest.mark.parametrize("sort_reverse", [False, True])
+@pytest.mark.parametrize("sort_method", ["hue", "saturation", "value"])
+def test_sort(sort_method, sort_reverse, sort_anchor):
+    results = get_random_results(200)
+    store = ResultStore.from_results(results)
+    sort_function = get_sort_function(sort_method)
+    sorted_store = sort_function(store, sort_reverse, sort_anchor)
+    expected = sort_function(results, sort_reverse, sort_anchor)
+    assert isinstance(sorted_store, ResultStore)
+    assert [result.image_path for result in sorted_store] == [result.image_path for result in expected]
+
+
+@pytest.mark.parametrize("include_all_colors", [False, True])
+def test_get_store_spectrum(include_all_colors):
+    results = get_random_results(40)
+    height = 90
+    spectrum = get_store_spectrum(ResultStore.from_results(results), include_all_colors, height)
+    bar_width = 4  # round(90 * 16 / 9 / 40)
+    assert spectrum.shape == (height, len(results) * bar_width, 3)
+    for i, result in enumerate(results):
+        expected = np.asarray(get_histogram_as_bar(result, include_all_colors, height, bar_width))
+        bar = spectrum[:, i * bar_width : (i + 1) * bar_width]
+        if include_all_colors:
+            # bars may differ by a row where proportions are rounded
+            np.testing.assert_array_equal(bar[[0, -1]], expected[[0, -1]])
+            assert np.mean(np.all(bar[: len(expected)] == expected[:height], axis=2)) > 0.9
+        else:
+            np.testing.assert_array_equal(bar, expected)
+
+
+def test_large_store():
+    n_images = 1_000_000
+    rng = np.random.default_rng(0)
+    records = np.zeros(n_images, dtype=RECORD_DTYPE)
+    records["hue"] = rng.uniform(0, 360, n_images)
+    records["saturation"] = rng.uniform(0, 100, n_images)
+    records["value"] = rng.uniform(0, 100, n_images)
+    paths = np.frombuffer(b"".join(f"{i:07d}.jpg".encode("utf-8") for i in range(n_images)), dtype=np.uint8)
+    colors_hsv = np.stack([records["hue"], records["saturation"], records["value"]], axis=1)
+    store = ResultStore(
+        records,
+        np.arange(n_images + 1, dtype=np.int64) * 11,
+        paths,
+        np.arange(n_images + 1, dtype=np.int64),
+        rng.uniform(0, 255, (n_images, 3)),
+        colors_hsv,
+        np.full(n_images, np.nan, dtype=np.float32),
+    )
+    color, bw = separate_color_and_bw(store)
+    assert len(color) + len(bw) == n_images
+    sorted_store = get_sort_function("hue")(store, False, None)
+    hue_metric = sorted_store.get_sort_keys()[0][: len(color)]
+    assert np.all(np.diff(hue_metric) >= 0)
+    spectrum = get_store_spectrum(sorted_store, True, 90)
+    assert spectrum.shape == (90, 160, 3)
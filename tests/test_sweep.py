@@ -0,0 +1,95 @@
+import csv
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+from colortools.analysis import KMeansInit
+from colortools.analyzed_image import AnalyzedImage
+from colortools.heuristics import NColorsHeuristic
+from colortools.sweep import SweepConfig, get_sweep_configs, save_results_table, sweep
+from colortools.util import DominantColorAlgorithm
+
+TEST_IMAGE_DIR = "tests/test_images/test_sort"
+RESIZE_LONG_AXIS = 20
+
+
+def get_test_images():
+    return sorted(Path(TEST_IMAGE_DIR).glob("*.jpg"))
+
+
+def test_get_sweep_configs():
+    configs = get_sweep_configs(
+        list(DominantColorAlgorithm),
+        [0, 3, 3],
+        [NColorsHeuristic.AUTO_N_HUE, NColorsHeuristic.AUTO_N_SIMPLE_THRESHOLD],
+        [0, 0.05],
+    )
+    assert len(configs) == len(DominantColorAlgorithm) * 3 * 2
+    assert len(set(configs)) == len(configs)
+    assert SweepConfig(DominantColorAlgorithm.KMEANS, 3, None, 0.05) in configs
+    assert SweepConfig(DominantColorAlgorithm.KMEANS, None, NColorsHeuristic.AUTO_N_HUE, 0) in configs
+    assert len(set(config.get_name() for config in configs)) == len(configs)
+
+
+def test_sweep_matches_individual_analysis():
+    image_paths = get_test_images()[:4]
+    configs = get_sweep_configs(
+        list(DominantColorAlgorithm),
+        [0, 2],
+        [NColorsHeuristic.AUTO_N_HUE, NColorsHeuristic.AUTO_N_HUE_BINNED],
+        [0, 0.1],
+    )
+    progress = []
+    results, shared_seconds, config_seconds = sweep(
+        image_paths, configs, RESIZE_LONG_AXIS, progress_callback=lambda n_done, n_total: progress.append(n_done)
+    )
+    assert progress == list(range(1, len(image_paths) + 1))
+    assert shared_seconds > 0
+    assert set(config_seconds) == set(configs)
+    for config in configs:
+        assert [result.image_path for result in results[config]] == image_paths
+        for result, image_path in zip(results[config], image_paths):
+            expected = AnalyzedImage(
+                image_path,
+                RESIZE_LONG_AXIS,
+                config.edge_crop,
+                config.algorithm,
+                config.n_colors,
+                config.n_colors_heuristic,
+            )
+            assert result.n_colors == expected.n_colors
+            np.testing.assert_allclose(result.get_dominant_colors(), expected.get_dominant_colors())
+
+
+def test_sweep_converts_to_hsv_once(monkeypatch):
+    image_paths = get_test_images()[:3]
+    configs = get_sweep_configs(
+        list(DominantColorAlgorithm),
+        [0, 2],
+        [NColorsHeuristic.AUTO_N_HUE],
+        [0, 0.1],
+        [KMeansInit.KMEANS_PLUS_PLUS, KMeansInit.HUE_PEAKS],
+    )
+    n_conversions = 0
+    convert = Image.Image.convert
+
+    def counting_convert(self, mode=None, *args, **kwargs):
+        nonlocal n_conversions
+        n_conversions += mode == "HSV"
+        return convert(self, mode, *args, **kwargs)
+
+    monkeypatch.setattr(Image.Image, "convert", counting_convert)
+    sweep(image_paths, configs, RESIZE_LONG_AXIS)
+    assert n_conversions == len(image_paths)
+
+
+def test_save_results_table(tmp_path):
+    image_paths = get_test_images()[:3]
+    config = SweepConfig(DominantColorAlgorithm.KMEANS, 2, None, 0)
+    results, _, _ = sweep(image_paths, [config], RESIZE_LONG_AXIS)
+    dest_path = tmp_path / "tables" / f"{config.get_name()}.csv"
+    save_results_table(results[config], dest_path)
+    with open(dest_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [Path(row["image_path"]) for row in rows] == image_paths
+    assert all(row["n_colors"] == "2" for row in rows)
@@ -0,0 +1,104 @@
+import itertools
+
+import numpy as np
+import pytest
+from colortools.tour import (
+    get_greedy_path,
+    get_nearest_neighbors,
+    get_path_length,
+    get_shortest_path,
+    improve_path,
+)
+
+
+def get_optimal_length(points, start=None):
+    """Get the length of the shortest open path through a few points, by brute force."""
+    lengths = []
+    for path in itertools.permutations(range(len(points))):
+        if start is None or path[0] == start:
+            lengths.append(get_path_length(points, path))
+    return min(lengths)
+
+
+def test_get_nearest_neighbors():
+    points = np.random.default_rng(0).uniform(0, 100, (200, 3))
+    points[1] = points[0]  # duplicates
+    points[2] = points[0]
+    neighbors, distances, _ = get_nearest_neighbors(points, 5)
+    assert neighbors.shape == distances.shape == (200, 5)
+    all_distances = np.linalg.norm(points[:, None] - points[None], axis=2)
+    np.fill_diagonal(all_distances, np.inf)
+    for i in range(len(points)):
+        assert i not in neighbors[i]
+        np.testing.assert_allclose(distances[i], np.sort(all_distances[i])[:5])
+        np.testing.assert_allclose(all_distances[i, neighbors[i]], distances[i])
+
+
+def test_get_greedy_path():
+    points = np.random.default_rng(0).uniform(0, 100, (300, 3))
+    neighbors, _, tree = get_nearest_neighbors(points, 4)
+    path = get_greedy_path(points, neighbors, tree, 7)
+    assert path[0] == 7
+    assert sorted(path.tolist()) == list(range(len(points)))
+    # each step goes to the nearest unvisited point
+    visited = {int(path[0])}
+    for current, next_point in zip(path[:-1], path[1:]):
+        unvisited = [i for i in range(len(points)) if i not in visited]
+        distances = np.linalg.norm(points[unvisited] - points[current], axis=1)
+        assert np.linalg.norm(points[next_point] - points[current]) == pytest.approx(np.min(distances))
+        visited.add(int(next_point))
+
+
+@pytest.mark.parametrize("fix_start", [False, True])
+def test_improve_path(fix_start):
+    points = np.random.default_rng(1).uniform(0, 100, (500, 3))
+    neighbors, distances, tree = get_nearest_neighbors(points, 8)
+    greedy = get_greedy_path(points, neighbors, tree, 0)
+    improved = improve_path(points, greedy, neighbors, distances, fix_start)
+    assert sorted(improved.tolist()) == list(range(len(points)))
+    assert get_path_length(points, improved) < get_path_length(points, greedy)
+    if fix_start:
+        assert improved[0] == 0
+
+
+def test_improve_path_uncrosses():
+    # a path that zigzags across a square is shortened to go around it
+    points = np.array([[0, 0, 0], [1, 1, 0], [1, 0, 0], [0, 1, 0]], dtype=np.float64)
+    neighbors, distances, _ = get_nearest_neighbors(points, 3)
+    improved = improve_path(points, [0, 1, 2, 3], neighbors, distances, fix_start=True)
+    assert get_path_length(points, improved) == pytest.approx(3)
+
+
+@pytest.mark.parametrize("start", [None, 0, 5])
+@pytest.mark.parametrize("seed", range(5))
+def test_get_shortest_path_small(seed, start):
+    points = np.random.default_rng(seed).uniform(0, 100, (8, 3))
+    path = get_shortest_path(points, start)
+    assert sorted(path.tolist()) == list(range(len(points)))
+    if start is not None:
+        assert path[0] == start
+    else:
+        assert points[path[0], 0] <= points[path[-1], 0]
+    assert get_path_length(points, path) <= 1.25 * get_optimal_length(points, start)
+
+
+@pytest.mark.parametrize("n_points", [0, 1, 2, 3])
+def test_get_shortest_path_tiny(n_points):
+    points = np.arange(n_points * 3, dtype=np.float64).reshape((n_points, 3))[::-1]
+    assert sorted(get_shortest_path(points).tolist()) == list(range(n_points))
+    if n_points > 0:
+        assert get_shortest_path(points, n_points - 1)[0] == n_points - 1
+
+
+def test_get_shortest_path_duplicates():
+    points = np.repeat(np.random.default_rng(0).uniform(0, 100, (20, 3)), 10, axis=0)
+    path = get_shortest_path(points)
+    assert sorted(path.tolist()) == list(range(len(points)))
+    # duplicates are visited together, so the path only moves between distinct points 19 times
+    assert np.count_nonzero(np.any(np.diff(points[path], axis=0) != 0, axis=1)) == 19
+
+
+def test_get_shortest_path_large():
+    points = np.random.default_rng(0).uniform(0, 100, (20_000, 3))
+    path = get_shortest_path(points)
+    assert sorted(path.tolist()) == list(range(len(points)))
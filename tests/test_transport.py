@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from colortools.analyzed_image import AnalyzedImage
+from colortools.transport import RESULT_MAX_COLORS, SharedPixelRing, pack_result, unpack_result, write_to_ring
+from colortools.util import DominantColorAlgorithm
+
+TEST_IMAGE_DIR = "tests/test_images/test_analyzed_image"
+EDGE_CROP = 0
+
+
+@pytest.mark.parametrize("dominant_color_algorithm", [dca for dca in DominantColorAlgorithm])
+def test_pack_unpack_result(dominant_color_algorithm):
+    image_path = f"{TEST_IMAGE_DIR}/red-blue.jpg"
+    analyzed_image = AnalyzedImage(image_path, 50, EDGE_CROP, dominant_color_algorithm, 2, None)
+    result = unpack_result(pack_result(analyzed_image), analyzed_image.image_path)
+    assert result.image_path == analyzed_image.image_path
+    assert (result.width, result.height) == (analyzed_image.width, analyzed_image.height)
+    assert result.get_orientation() == analyzed_image.get_orientation()
+    assert result.dominant_color_algorithm == analyzed_image.dominant_color_algorithm
+    assert result.n_colors == analyzed_image.n_colors
+    assert result.resize_long_axis == analyzed_image.resize_long_axis
+    assert result.get_dominant_colors() == analyzed_image.get_dominant_colors()
+    assert result.get_dominant_colors(hsv=True) == analyzed_image.get_dominant_colors(hsv=True)
+    assert (result.cluster_histogram is None) == (analyzed_image.cluster_histogram is None)
+    assert result.kmeans_init == analyzed_image.kmeans_init
+    assert result.n_iter == analyzed_image.n_iter
+    assert result.analysis_long_axis == analyzed_image.analysis_long_axis
+
+
+def test_pack_result_too_many_colors():
+    image_path = f"{TEST_IMAGE_DIR}/red-blue.jpg"
+    analyzed_image = AnalyzedImage(
+        image_path, 50, EDGE_CROP, DominantColorAlgorithm.HUE_DIST, RESULT_MAX_COLORS + 1, None
+    )
+    with pytest.raises(ValueError):
+        _ = pack_result(analyzed_image)
+
+
+def test_shared_pixel_ring():
+    ring = SharedPixelRing(2, 100)
+    try:
+        attached = SharedPixelRing(2, 100, name=ring.name)
+        slot = ring.acquire()
+        rgb_image_data = np.random.default_rng(0).integers(0, 256, (5, 20, 3), dtype=np.uint8)
+        labels = np.arange(100, dtype=np.uint8)
+        attached.write(slot, rgb_image_data, labels)
+        rgb_view, labels_view = ring.get_views(slot, 5, 20)
+        np.testing.assert_array_equal(rgb_view, rgb_image_data)
+        np.testing.assert_array_equal(labels_view.reshape(-1), labels)
+        with pytest.raises(ValueError):
+            attached.write(slot, np.zeros((11, 10, 3), dtype=np.uint8))
+        attached.close()
+        ring.release(slot)
+    finally:
+        ring.close()
+
+
+def test_unpack_result_from_ring():
+    image_path = f"{TEST_IMAGE_DIR}/red-blue.jpg"
+    analyzed_image = AnalyzedImage(image_path, 50, EDGE_CROP, DominantColorAlgorithm.KMEANS, 2, None)
+    ring = SharedPixelRing(1, 50 * 50)
+    try:
+        slot = ring.acquire()
+        write_to_ring(ring, slot, analyzed_image)
+        result = unpack_result(pack_result(analyzed_image, slot), analyzed_image.image_path, ring)
+    finally:
+        ring.close()
+
+    np.testing.assert_array_equal(np.asarray(result.pil_image), np.asarray(analyzed_image.pil_image))
+    np.testing.assert_array_equal(
+        np.asarray(result.get_remapped_image()), np.asarray(analyzed_image.get_remapped_image())
+    )
@@ -268,3 +268,50 @@ def test_hsv_to_rgb(test_rgb, test_hsv):
 )
 def test_round_to_int(test_input, target_output):
     assert util.round_to_int(test_input) == target_output
+
+
+@pytest.mark.parametrize(
+    "width, height, crop, expected",
+    [
+        (10, 8, 0, (0, 0, 10, 8)),
+        (10, 8, 0.1, (1, 1, 9, 7)),
+        (10, 8, 0.25, (3, 2, 7, 6)),
+        (9, 7, 0.25, (2, 2, 7, 5)),
+        (500, 333, 0.05, (25, 17, 475, 316)),
+    ],
+)
+def test_get_crop_box(width, height, crop, expected):
+    box = util.get_crop_box(width, height, crop)
+    assert box == expected
+    left, upper, right, lower = box
+    image = np.arange(width * height).reshape((height, width))
+    np.testing.assert_array_equal(image[upper:lower, left:right], util.crop_center(image, crop))
+
+
+@pytest.mark.parametrize(
+    "test_rgb, test_lab",
+    [
+        ([0, 0, 0], [0, 0, 0]),
+        ([255, 255, 255], [100, 0, 0]),
+        ([255, 0, 0], [53.24, 80.09, 67.20]),
+        ([0, 255, 0], [87.73, -86.18, 83.18]),
+        ([0, 0, 255], [32.30, 79.19, -107.86]),
+    ],
+)
+def test_rgb_to_lab(test_rgb, test_lab):
+    np.testing.assert_allclose(util.rgb_to_lab(test_rgb), test_lab, atol=0.05)
+    np.testing.assert_allclose(util.rgb_to_lab([[test_rgb, test_rgb]]), [[test_lab, test_lab]], atol=0.05)
+
+
+@pytest.mark.parametrize(
+    "hex_color, expected",
+    [("#2E6F95", [46, 111, 149]), ("2e6f95", [46, 111, 149]), ("#000000", [0, 0, 0]), ("#ffffff", [255, 255, 255])],
+)
+def test_parse_hex_color(hex_color, expected):
+    assert util.parse_hex_color(hex_color) == expected
+
+
+@pytest.mark.parametrize("hex_color", ["#2E6F9", "#2E6F95AA", "#GGGGGG", ""])
+def test_parse_hex_color_error(hex_color):
+    with pytest.raises(ValueError):
+        util.parse_hex_color(hex_color)